@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Mikael Hartzell 2026
+#
+# This program compares the NumPy loudness measurement of LoudnessCorrection.py to the libebur128 measurement of loudness-freelcs.
+#
+# Every file in the given directory (for example the test files of regression_tester.py) is measured with sample peak and TruePeak:
+# - loudness-freelcs measures integrated loudness, loudness range and the peak.
+# - The NumPy measurement of LoudnessCorrection.py measures the same values. The real subroutines of LoudnessCorrection.py are used, files NumPy can not read are decoded with sox to a pipe the same way LoudnessCorrection.py does it.
+# Integrated loudness and loudness range are rounded to one decimal, the same way LoudnessCorrection.py rounds them. A measurement fails if any value differs more than the allowed difference.
+#
+# Usage: compare_numpy_loudness_measurement_to_libebur128.py DIR_OF_TEST_FILES
+# loudness-freelcs must be in the os path or in the same directory with LoudnessCorrection.py.
+
+import sys
+import os
+import math
+import shutil
+import tempfile
+import subprocess
+import load_loudnesscorrection_subroutines
+
+maximum_allowed_difference = 0.1 # LU or dB
+list_of_peak_measurement_methods = ['--peak=sample', '--peak=true']
+
+def print_instructions_on_program_usage():
+
+	print()
+	print('This program compares the NumPy loudness measurement of LoudnessCorrection.py to libebur128 (loudness-freelcs).')
+	print()
+	print('Usage: ', sys.argv[0], 'DIR_OF_TEST_FILES')
+	print()
+	sys.exit()
+
+def find_program_in_os_path(program_name_to_find):
+
+	# Find a program in the operating system path. Returns the full path to the program (search for python3 returns: '/usr/bin/python3').
+	program_path = ''
+	os_environment_list = os.environ["PATH"].split(os.pathsep)
+
+	for os_path in os_environment_list:
+		true_or_false = os.path.exists(os_path + os.sep + program_name_to_find) and os.access(os_path + os.sep + program_name_to_find, os.X_OK) # True if program can be found in the path and it has executable permissions on.
+		if true_or_false == True: # Program was found and is executable
+			program_path = os_path + os.sep + program_name_to_find
+
+	return(program_path)
+
+def convert_peak_to_db(peak):
+
+	if peak <= 0:
+		return(float('-inf'))
+
+	return(20 * math.log(peak, 10))
+
+def measure_file_with_libebur128(path_to_loudness_freelcs, file_to_process, peak_measurement_method):
+
+	# loudness-freelcs prints one line for the file: 'integrated loudness LUFS, loudness range LU, peak, filename'.
+	integrated_loudness = float('-inf')
+	loudness_range = 0.0
+	peak_db = float('-inf')
+	error_message = ''
+
+	process = subprocess.Popen([path_to_loudness_freelcs, 'scan', '-l', peak_measurement_method, file_to_process], stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.DEVNULL)
+	stdout, stderr = process.communicate()
+	list_of_results = stdout.decode('UTF-8', errors='replace').split('\n')[0].split(',')
+
+	if (process.returncode != 0) or (len(list_of_results) < 3):
+		error_message = 'loudness-freelcs error: ' + stderr.decode('UTF-8', errors='replace').strip()
+		return(integrated_loudness, loudness_range, peak_db, error_message)
+
+	try:
+		integrated_loudness = float(list_of_results[0].split()[0])
+		loudness_range = float(list_of_results[1].split()[0])
+		peak_db = convert_peak_to_db(float(list_of_results[2]))
+	except ValueError:
+		error_message = 'Could not parse loudness-freelcs results: ' + str(list_of_results)
+
+	return(integrated_loudness, loudness_range, peak_db, error_message)
+
+def measure_file_with_numpy(loudnesscorrection, file_to_process, peak_measurement_method, directory_for_temporary_files):
+
+	integrated_loudness = float('-inf')
+	loudness_range = 0.0
+	peak_db = float('-inf')
+	measurement_method = 'NumPy'
+
+	loudnesscorrection.peak_measurement_method = peak_measurement_method
+	list_of_100ms_block_energies, highest_peak_float, channel_count, sample_rate, error_message = loudnesscorrection.calculate_100ms_block_energies_and_peak_with_numpy(file_to_process, peak_measurement_method, 1, 0)
+
+	if len(list_of_100ms_block_energies) == 0:
+		measurement_method = 'sox + NumPy'
+		list_of_100ms_block_energies, highest_peak_float, channel_count, sample_rate, error_message, sox_commandline, sox_stderr_string = loudnesscorrection.decode_file_with_sox_and_measure_it_with_numpy(file_to_process, directory_for_temporary_files, 1, 0)
+
+		if (error_message == '') and (sox_stderr_string.strip() != ''):
+			error_message = sox_stderr_string.strip()
+
+	if len(list_of_100ms_block_energies) == 0:
+		return(integrated_loudness, loudness_range, peak_db, measurement_method, 'NumPy error: ' + error_message)
+
+	integrated_loudness, loudness_range, list_of_timeslice_loudness_values = loudnesscorrection.calculate_loudness_from_100ms_block_energies(list_of_100ms_block_energies, '3')
+	integrated_loudness = round(integrated_loudness, 1)
+	loudness_range = round(loudness_range, 1)
+	peak_db = convert_peak_to_db(highest_peak_float)
+
+	return(integrated_loudness, loudness_range, peak_db, measurement_method, '')
+
+def calculate_difference(value_1, value_2):
+
+	# Both values are -inf for silent files, they are equal.
+	if value_1 == value_2:
+		return(0.0)
+
+	return(value_1 - value_2)
+
+# Check if command line parameters are sane.
+if len(sys.argv) != 2:
+	print_instructions_on_program_usage()
+
+directory_of_test_files = os.path.abspath(sys.argv[1])
+
+if os.path.isdir(directory_of_test_files) == False:
+	print_instructions_on_program_usage()
+
+path_to_loudness_freelcs = find_program_in_os_path('loudness-freelcs')
+
+if path_to_loudness_freelcs == '':
+	path_to_loudness_freelcs = os.path.dirname(load_loudnesscorrection_subroutines.path_to_loudnesscorrection) + os.sep + 'loudness-freelcs'
+
+if os.access(path_to_loudness_freelcs, os.X_OK) == False:
+	print()
+	print('Error: loudness-freelcs can not be found')
+	print()
+	sys.exit(1)
+
+directory_for_temporary_files = tempfile.mkdtemp(prefix='compare_numpy_loudness_measurement-')
+loudnesscorrection = load_loudnesscorrection_subroutines.load_loudnesscorrection_subroutines(directory_for_temporary_files)
+
+if loudnesscorrection.numpy_is_available == False:
+	print()
+	print('Error: NumPy is not installed')
+	print()
+	sys.exit(1)
+
+# Get directory listing for the test file directory. The 'break' statement stops the for - statement from recursing into subdirectories.
+for path, list_of_directories, list_of_files in os.walk(directory_of_test_files):
+	break
+
+number_of_measurements = 0
+number_of_failed_measurements = 0
+largest_difference = 0.0
+
+print()
+print('Allowed difference', maximum_allowed_difference, 'LU. Differences are NumPy - libebur128.')
+print()
+print('File'.ljust(40), 'Peak'.ljust(8), 'Method'.ljust(12), 'Loudness'.rjust(9), 'Diff'.rjust(6), 'LRA'.rjust(6), 'Diff'.rjust(6), 'Peak dB'.rjust(8), 'Diff'.rjust(6), '  Result')
+
+try:
+	for filename in sorted(list_of_files):
+		file_to_process = directory_of_test_files + os.sep + filename
+
+		for peak_measurement_method in list_of_peak_measurement_methods:
+			number_of_measurements = number_of_measurements + 1
+			reference_loudness, reference_loudness_range, reference_peak_db, reference_error_message = measure_file_with_libebur128(path_to_loudness_freelcs, file_to_process, peak_measurement_method)
+			integrated_loudness, loudness_range, peak_db, measurement_method, error_message = measure_file_with_numpy(loudnesscorrection, file_to_process, peak_measurement_method, directory_for_temporary_files)
+
+			# Files libebur128 can not read are skipped, NumPy must not measure them either, otherwise the result differs.
+			if reference_error_message != '':
+				if error_message == '':
+					number_of_failed_measurements = number_of_failed_measurements + 1
+				print(filename[:40].ljust(40), peak_measurement_method[7:].ljust(8), measurement_method.ljust(12), reference_error_message, '/', error_message)
+				continue
+
+			if error_message != '':
+				number_of_failed_measurements = number_of_failed_measurements + 1
+				print(filename[:40].ljust(40), peak_measurement_method[7:].ljust(8), measurement_method.ljust(12), error_message, '  FAILED')
+				continue
+
+			loudness_difference = calculate_difference(integrated_loudness, reference_loudness)
+			loudness_range_difference = calculate_difference(loudness_range, reference_loudness_range)
+			peak_difference = calculate_difference(peak_db, reference_peak_db)
+			result = 'OK'
+
+			# Allow for the floating point error of the rounded values.
+			if max(abs(loudness_difference), abs(loudness_range_difference), abs(peak_difference)) > maximum_allowed_difference + 0.000001:
+				result = 'FAILED'
+				number_of_failed_measurements = number_of_failed_measurements + 1
+
+			largest_difference = max(largest_difference, abs(loudness_difference), abs(loudness_range_difference), abs(peak_difference))
+			print(filename[:40].ljust(40), peak_measurement_method[7:].ljust(8), measurement_method.ljust(12), str(integrated_loudness).rjust(9), str(round(loudness_difference, 2)).rjust(6), str(loudness_range).rjust(6), str(round(loudness_range_difference, 2)).rjust(6), str(round(peak_db, 2)).rjust(8), str(round(peak_difference, 3)).rjust(6), ' ', result)
+
+except KeyboardInterrupt:
+	print('\n\nUser cancelled operation.\n')
+	sys.exit(0)
+finally:
+	shutil.rmtree(directory_for_temporary_files)
+
+print()
+print('Measurements:', number_of_measurements, 'Failed:', number_of_failed_measurements, 'Largest difference:', round(largest_difference, 3))
+print()
+
+if number_of_failed_measurements > 0:
+	sys.exit(1)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Mikael Hartzell 2026
+#
+# This program measures the time one HotFolder poll of LoudnessCorrection.py takes.
+#
+# The subroutines of LoudnessCorrection.py are loaded with load_loudnesscorrection_subroutines.py and the poll is done by calling 'read_hotfolder_and_update_file_bookkeeping', the same function the main loop calls.
+# The function reads the directory, removes vanished files from the bookkeeping, tests each file for expiry and saves information of the files that still need attention.
+#
+# A temporary directory with the given number of empty files is created and used as the HotFolder.
+# Part of the files are growing, queued, waiting for deletion or ignored. The proportions can be changed from the variables below.
+#
+# The first poll sees all files for the first time and reads the information of every file. The following polls only read the information of growing and queued files.
+# The check of files that have stopped growing is not measured, because it probes files with FFmpeg. The only part of it that is repeated here is saving the file information for the next poll.
+#
+# Usage: hotfolder_poll_benchmark.py [number of files] [number of files] ...
+# The default is to measure polls of 1000, 10000 and 100000 files.
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import collections
+import load_loudnesscorrection_subroutines
+
+share_of_growing_files = 0.01
+share_of_files_queued_to_loudness_calculation = 0.05
+share_of_files_queued_for_deletion = 0.01
+share_of_unsupported_ignored_files = 0.01
+number_of_files_in_loudness_calculation = 8
+number_of_polls = 3
+
+def print_instructions_on_program_usage():
+
+	print()
+	print('This program measures the time one HotFolder poll of LoudnessCorrection.py takes.')
+	print()
+	print('Usage: ', sys.argv[0], '[number of files] [number of files] ...')
+	print()
+	sys.exit()
+
+def create_files_to_the_hotfolder(hotfolder_path, number_of_files):
+
+	list_of_filenames = []
+
+	for counter in range(0, number_of_files):
+		filename = 'Test_file_' + str(counter).zfill(7) + '.wav'
+		open(hotfolder_path + os.sep + filename, 'wb').close()
+		list_of_filenames.append(filename)
+
+	return(list_of_filenames)
+
+def create_bookkeeping(loudnesscorrection, list_of_filenames):
+
+	# The bookkeeping variables are created in the main program of LoudnessCorrection.py, which is not loaded. Create them here.
+	# Pick files for each bookkeeping structure from different parts of the file list, so that each file is only in one structure.
+	number_of_files = len(list_of_filenames)
+	position = 0
+	bookkeeping = {}
+
+	for name, share in [['growing', share_of_growing_files], ['queued', share_of_files_queued_to_loudness_calculation], ['deletion', share_of_files_queued_for_deletion], ['ignored', share_of_unsupported_ignored_files]]:
+		number_of_names = int(number_of_files * share)
+		bookkeeping[name] = list_of_filenames[position:position + number_of_names]
+		position = position + number_of_names
+
+	loudnesscorrection.list_of_growing_files = collections.OrderedDict.fromkeys(bookkeeping['growing'], True)
+	loudnesscorrection.files_queued_to_loudness_calculation = collections.OrderedDict.fromkeys(bookkeeping['queued'], True)
+	loudnesscorrection.files_queued_for_deletion = set(bookkeeping['deletion'])
+	loudnesscorrection.unsupported_ignored_files_dict = dict.fromkeys(bookkeeping['ignored'], int(time.time()))
+	loudnesscorrection.loudness_calculation_queue = collections.OrderedDict.fromkeys(list_of_filenames[position:position + number_of_files_in_loudness_calculation], [])
+	loudnesscorrection.debug_temporary_dict_for_all_file_processing_information = dict.fromkeys(loudnesscorrection.loudness_calculation_queue, [])
+	loudnesscorrection.old_hotfolder_filelist_dict = {}
+	loudnesscorrection.new_hotfolder_filelist_dict = {}
+
+def save_file_information_for_the_next_poll(loudnesscorrection):
+
+	# The main loop of LoudnessCorrection.py completes the information of known files and adds new files to growing files while it checks if files have stopped growing.
+	# Do the same here and move the information to 'old_hotfolder_filelist_dict' like the main loop does at the end of the poll.
+	old_hotfolder_filelist_dict = loudnesscorrection.old_hotfolder_filelist_dict
+	new_hotfolder_filelist_dict = loudnesscorrection.new_hotfolder_filelist_dict
+
+	for filename in new_hotfolder_filelist_dict:
+		if filename in old_hotfolder_filelist_dict:
+			new_hotfolder_filelist_dict[filename] = [new_hotfolder_filelist_dict[filename][0], old_hotfolder_filelist_dict[filename][1], new_hotfolder_filelist_dict[filename][2], old_hotfolder_filelist_dict[filename][3], old_hotfolder_filelist_dict[filename][4]]
+		elif (filename not in loudnesscorrection.files_queued_to_loudness_calculation) and (filename not in loudnesscorrection.loudness_calculation_queue):
+			loudnesscorrection.list_of_growing_files[filename] = True
+
+	loudnesscorrection.old_hotfolder_filelist_dict = new_hotfolder_filelist_dict
+	loudnesscorrection.new_hotfolder_filelist_dict = {}
+
+def measure_poll_times(loudnesscorrection, hotfolder_path, list_of_filenames):
+
+	# Returns the time of the first poll and the shortest time of 'number_of_polls' polls after it, the shortest time has the least noise from other programs.
+	loudnesscorrection.hotfolder_path = hotfolder_path
+	create_bookkeeping(loudnesscorrection, list_of_filenames)
+
+	# Files that are not growing when the benchmark starts have been in the HotFolder before, only growing files are new.
+	list_of_growing_files = loudnesscorrection.list_of_growing_files
+	loudnesscorrection.list_of_growing_files = collections.OrderedDict()
+
+	time_poll_started = time.perf_counter()
+	loudnesscorrection.read_hotfolder_and_update_file_bookkeeping()
+	first_poll_time = time.perf_counter() - time_poll_started
+
+	for filename in list_of_growing_files:
+		del loudnesscorrection.new_hotfolder_filelist_dict[filename]
+
+	save_file_information_for_the_next_poll(loudnesscorrection)
+	loudnesscorrection.list_of_growing_files = list_of_growing_files
+	shortest_poll_time = 0
+
+	for counter in range(0, number_of_polls):
+		time_poll_started = time.perf_counter()
+		loudnesscorrection.read_hotfolder_and_update_file_bookkeeping()
+		poll_time = time.perf_counter() - time_poll_started
+		save_file_information_for_the_next_poll(loudnesscorrection)
+
+		if (counter == 0) or (poll_time < shortest_poll_time):
+			shortest_poll_time = poll_time
+
+	return(first_poll_time, shortest_poll_time)
+
+# Check if command line parameters are sane.
+list_of_numbers_of_files = [1000, 10000, 100000]
+
+if len(sys.argv) > 1:
+	list_of_numbers_of_files = []
+
+	for item in sys.argv[1:]:
+		if item.isnumeric() == False:
+			print_instructions_on_program_usage()
+		list_of_numbers_of_files.append(int(item))
+
+target_path = tempfile.mkdtemp(prefix='hotfolder_poll_benchmark-')
+
+try:
+	loudnesscorrection = load_loudnesscorrection_subroutines.load_loudnesscorrection_subroutines(target_path)
+	loudnesscorrection.silent = True
+
+	print()
+	print('Shortest time of', number_of_polls, 'polls. Growing files', str(share_of_growing_files * 100) + '%, queued files', str(share_of_files_queued_to_loudness_calculation * 100) + '%, files queued for deletion', str(share_of_files_queued_for_deletion * 100) + '%.')
+	print()
+	print('Files'.rjust(10), 'First poll (s)'.rjust(15), 'Next polls (s)'.rjust(15), 'Per 1000 files (s)'.rjust(20))
+
+	for number_of_files in list_of_numbers_of_files:
+		hotfolder_path = tempfile.mkdtemp(prefix='HotFolder-', dir=target_path)
+
+		try:
+			list_of_filenames = create_files_to_the_hotfolder(hotfolder_path, number_of_files)
+			first_poll_time, poll_time = measure_poll_times(loudnesscorrection, hotfolder_path, list_of_filenames)
+			print(str(number_of_files).rjust(10), str(round(first_poll_time, 4)).rjust(15), str(round(poll_time, 4)).rjust(15), str(round(poll_time * 1000 / number_of_files, 5)).rjust(20))
+		finally:
+			shutil.rmtree(hotfolder_path)
+
+except KeyboardInterrupt:
+	print('\n\nUser cancelled operation.\n')
+	sys.exit(0)
+finally:
+	shutil.rmtree(target_path)
+
+print()
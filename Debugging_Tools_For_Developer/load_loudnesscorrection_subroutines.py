@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Mikael Hartzell 2026
+#
+# This module loads the subroutines and settings of LoudnessCorrection.py without starting the main program, so that developer tools can call the real code of LoudnessCorrection.py.
+#
+# LoudnessCorrection.py is a program, not a module: importing it would start polling the HotFolder. This module reads the source code and runs everything except the last top-level try - statement, which is the main loop of the program.
+# The commandline of LoudnessCorrection.py is replaced with the given target path while the code runs, so default settings are used and no configfile is read.
+# Error messages are only printed to the screen, no error logfile is written.
+#
+# Usage:
+#
+#	import load_loudnesscorrection_subroutines
+#	loudnesscorrection = load_loudnesscorrection_subroutines.load_loudnesscorrection_subroutines(target_path)
+#	loudnesscorrection.peak_measurement_method = '--peak=true'
+#	results = loudnesscorrection.calculate_100ms_block_energies_and_peak_with_numpy(file_to_process, '--peak=true', 1, 0)
+
+import sys
+import os
+import ast
+import types
+
+path_to_loudnesscorrection = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep + 'LoudnessCorrection.py'
+
+def load_loudnesscorrection_subroutines(target_path, path_to_loudnesscorrection=path_to_loudnesscorrection):
+
+	with open(path_to_loudnesscorrection, 'rt', encoding='utf-8') as file_handler:
+		source_code = file_handler.read()
+
+	syntax_tree = ast.parse(source_code, path_to_loudnesscorrection)
+
+	# The main program is the last top-level try - statement, leave it out.
+	for statement_number in range(len(syntax_tree.body) - 1, -1, -1):
+		if isinstance(syntax_tree.body[statement_number], ast.Try):
+			del syntax_tree.body[statement_number]
+			break
+
+	loudnesscorrection = types.ModuleType('LoudnessCorrection')
+	loudnesscorrection.__file__ = path_to_loudnesscorrection
+	original_commandline = sys.argv
+
+	try:
+		sys.argv = [path_to_loudnesscorrection, target_path]
+		exec(compile(syntax_tree, path_to_loudnesscorrection, 'exec'), loudnesscorrection.__dict__)
+	finally:
+		sys.argv = original_commandline
+
+	loudnesscorrection.where_to_send_error_messages = ['screen']
+
+	return(loudnesscorrection)
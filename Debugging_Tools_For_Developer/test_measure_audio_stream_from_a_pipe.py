@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Mikael Hartzell 2026
+#
+# This program tests how measure_audio_stream_from_a_pipe of LoudnessCorrection.py drains the measurement pipe and how its threads are stopped when FFmpeg has finished.
+#
+# A mock FFmpeg writes to the pipe the same way FFmpeg does when it extracts an audio stream: a 32 bit float wav - header with 0xFFFFFFFF as sizes and the audio data.
+# The real subroutines of LoudnessCorrection.py are used to measure the pipe and to stop the measurement thread. Each test checks that:
+# - The mock FFmpeg can write everything to the pipe, also after the measurement has stopped reading it (the pipe is drained).
+# - The measurement thread has finished and the pipe has been removed within 'maximum_time_to_stop_the_measurement' seconds after FFmpeg has finished.
+# - Results are stored only for streams that can be measured.
+# - No Python errors happened in the measurement.
+#
+# Usage: test_measure_audio_stream_from_a_pipe.py
+
+import sys
+import os
+import math
+import time
+import struct
+import shutil
+import tempfile
+import threading
+import load_loudnesscorrection_subroutines
+
+sample_rate = 48000
+channel_count = 2
+duration_of_test_stream = 10 # Seconds.
+maximum_time_to_stop_the_measurement = 5 # Seconds.
+
+def create_test_stream(format_tag):
+
+	# Create a wav - header the way FFmpeg writes it to a pipe and 997 Hz sine audio at -20 dBFS.
+	header = b'RIFF' + struct.pack('<I', 4294967295) + b'WAVE'
+	header = header + b'fmt ' + struct.pack('<IHHIIHH', 16, format_tag, channel_count, sample_rate, sample_rate * channel_count * 4, channel_count * 4, 32)
+	header = header + b'data' + struct.pack('<I', 4294967295)
+	amplitude = math.pow(10, -20 / 20)
+	one_second_of_audio = b''.join(struct.pack('<f', amplitude * math.sin(2 * math.pi * 997 * counter / sample_rate)) * channel_count for counter in range(0, sample_rate))
+
+	return(header, one_second_of_audio * duration_of_test_stream)
+
+def write_to_pipe_like_ffmpeg(measurement_pipe_path, data_to_write, delay_before_opening_the_pipe, open_the_pipe, mock_ffmpeg_results):
+
+	# Data is written in small pieces, so that the measurement reads the stream while it is being written.
+	try:
+		time.sleep(delay_before_opening_the_pipe)
+
+		if open_the_pipe == True:
+			with open(measurement_pipe_path, 'wb') as pipe_handler:
+				for position in range(0, len(data_to_write), 65536):
+					pipe_handler.write(data_to_write[position:position + 65536])
+
+		mock_ffmpeg_results.append('')
+
+	except OSError as reason_for_error:
+		mock_ffmpeg_results.append(str(reason_for_error))
+
+def run_test(loudnesscorrection, directory_for_temporary_files, test_name, data_to_write, delay_before_opening_the_pipe, open_the_pipe, results_are_expected):
+
+	filename = test_name.replace(' ', '_') + '.wav'
+	measurement_pipe_path = directory_for_temporary_files + os.sep + filename + '-measurement_pipe'
+	ffmpeg_has_finished_event = threading.Event()
+	mock_ffmpeg_results = []
+	list_of_errors = []
+	os.mkfifo(measurement_pipe_path)
+
+	# Start the measurement and the mock FFmpeg in the same order as decompress_audio_streams_with_ffmpeg does.
+	measurement_thread = threading.Thread(target=loudnesscorrection.measure_audio_stream_from_a_pipe, args=(measurement_pipe_path, filename, ffmpeg_has_finished_event, 1, 0))
+	measurement_thread.start()
+	mock_ffmpeg_thread = threading.Thread(target=write_to_pipe_like_ffmpeg, args=(measurement_pipe_path, data_to_write, delay_before_opening_the_pipe, open_the_pipe, mock_ffmpeg_results))
+	mock_ffmpeg_thread.start()
+	mock_ffmpeg_thread.join(60)
+
+	if mock_ffmpeg_thread.is_alive() == True:
+		list_of_errors.append('Mock FFmpeg is blocked writing to the pipe')
+	elif mock_ffmpeg_results != ['']:
+		list_of_errors.append('Mock FFmpeg could not write to the pipe: ' + str(mock_ffmpeg_results))
+
+	# FFmpeg has finished, stop the measurement the same way as decompress_audio_streams_with_ffmpeg does.
+	time_ffmpeg_finished = time.time()
+	ffmpeg_has_finished_event.set()
+	stop_thread = threading.Thread(target=loudnesscorrection.stop_audio_stream_measurement_threads, args=([[measurement_pipe_path, measurement_thread]],))
+	stop_thread.start()
+	stop_thread.join(maximum_time_to_stop_the_measurement)
+	time_to_stop = time.time() - time_ffmpeg_finished
+
+	if stop_thread.is_alive() == True:
+		list_of_errors.append('Measurement thread did not stop in ' + str(maximum_time_to_stop_the_measurement) + ' seconds')
+
+		# Let the thread see the end of the stream, so that the program can exit.
+		with open(measurement_pipe_path, 'wb'):
+			pass
+		stop_thread.join()
+
+	if os.path.exists(measurement_pipe_path) == True:
+		list_of_errors.append('Pipe was not removed')
+
+	if loudnesscorrection.critical_python_error_has_happened == True:
+		list_of_errors.append('Python error in the measurement')
+		loudnesscorrection.critical_python_error_has_happened = False
+
+	results = loudnesscorrection.loudness_measured_during_audio_stream_extraction_dict.pop(filename, None)
+
+	if (results_are_expected == True) and (results == None):
+		list_of_errors.append('Stream was not measured')
+	if (results_are_expected == True) and (results != None):
+		list_of_100ms_block_energies, highest_peak_float, measured_channel_count, measured_sample_rate, error_message = results
+		if (measured_channel_count != channel_count) or (measured_sample_rate != sample_rate) or (len(list_of_100ms_block_energies) != duration_of_test_stream * 10):
+			list_of_errors.append('Wrong results: ' + str([measured_channel_count, measured_sample_rate, len(list_of_100ms_block_energies)]))
+	if (results_are_expected == False) and (results != None):
+		list_of_errors.append('Stream that can not be measured has results')
+
+	return(time_to_stop, list_of_errors)
+
+directory_for_temporary_files = tempfile.mkdtemp(prefix='test_measure_audio_stream_from_a_pipe-')
+loudnesscorrection = load_loudnesscorrection_subroutines.load_loudnesscorrection_subroutines(directory_for_temporary_files)
+
+if loudnesscorrection.numpy_is_available == False:
+	print()
+	print('Error: NumPy is not installed')
+	print()
+	sys.exit(1)
+
+header, audio_data = create_test_stream(3)
+unsupported_header, audio_data = create_test_stream(2) # Format tag 2 is ADPCM, NumPy measurement stops after reading the header.
+
+# Test name, data mock FFmpeg writes, seconds before mock FFmpeg opens the pipe, mock FFmpeg opens the pipe, results are expected.
+list_of_tests = [
+	['Valid stream', header + audio_data, 0, True, True],
+	['Writer opens the pipe late', header + audio_data, 3, True, True],
+	['Unsupported format is drained', unsupported_header + audio_data, 0, True, False],
+	['Writer stops in the header', header[0:20], 0, True, False],
+	['Writer never opens the pipe', b'', 2, False, False],
+]
+
+number_of_failed_tests = 0
+
+print()
+print('Test'.ljust(35), 'Time to stop (s)'.rjust(17), '  Result')
+
+try:
+	for test_name, data_to_write, delay_before_opening_the_pipe, open_the_pipe, results_are_expected in list_of_tests:
+		time_to_stop, list_of_errors = run_test(loudnesscorrection, directory_for_temporary_files, test_name, data_to_write, delay_before_opening_the_pipe, open_the_pipe, results_are_expected)
+		result = 'OK'
+
+		if len(list_of_errors) > 0:
+			result = 'FAILED: ' + ', '.join(list_of_errors)
+			number_of_failed_tests = number_of_failed_tests + 1
+
+		print(test_name.ljust(35), str(round(time_to_stop, 2)).rjust(17), ' ', result)
+
+except KeyboardInterrupt:
+	print('\n\nUser cancelled operation.\n')
+	sys.exit(0)
+finally:
+	shutil.rmtree(directory_for_temporary_files)
+
+print()
+print('Tests:', len(list_of_tests), 'Failed:', number_of_failed_tests)
+print()
+
+if number_of_failed_tests > 0:
+	sys.exit(1)
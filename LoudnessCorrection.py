@@ -23,9 +23,15 @@ import sys
 import os
 import time
 import threading
+import queue
+import concurrent.futures
+import multiprocessing
 import subprocess
 import shutil
+import mmap
 import copy
+import collections
+import hashlib
 import smtplib
 import email
 import email.mime
@@ -33,11 +39,32 @@ import email.mime.text
 import email.mime.multipart
 import pickle
 import json
+import re
 import math
+import struct
 import signal
+import select
+import ctypes
+import ctypes.util
 import traceback
 import requests
 
+# NumPy is optional, it is only needed when loudness is measured in-process with NumPy.
+try:
+	import numpy
+	numpy_is_available = True
+except ImportError:
+	numpy_is_available = False
+
+# Pillow is optional, it is only needed when loudness graphics is drawn in-process.
+try:
+	import PIL.Image
+	import PIL.ImageDraw
+	import PIL.ImageFont
+	pillow_is_available = True
+except ImportError:
+	pillow_is_available = False
+
 loudnesscorrection_version = '400'
 freelcs_version = 'unknown version'
 
@@ -256,6 +283,22 @@ os_version = '' # Create variable to store os version information.
 
 delay_between_directory_reads = 5 # HotFolder poll interval (seconds) (how ofter the directory is checked for new files).
 
+# On Linux the HotFolder can be watched with inotify. Inotify tells immediately when a file has been written or moved to the HotFolder, so the file can be processed without waiting for the next HotFolder poll.
+# Inotify does not see changes made to network filesystems (SMB / NFS mounts) by other computers, HotFolders on network mounts are always polled every 'delay_between_directory_reads' seconds.
+# When inotify is used and no files are being transferred or processed, the HotFolder is polled every 'delay_between_directory_reads_when_idle' seconds to find expired files.
+# Inotify is off by default, then the HotFolder is always polled every 'delay_between_directory_reads' seconds. If inotify stops working, the HotFolder is polled again every 'delay_between_directory_reads' seconds.
+watch_hotfolder_with_inotify = False
+delay_between_directory_reads_when_idle = 60
+network_filesystem_types = ['cifs', 'smb3', 'smbfs', 'nfs', 'nfs4', 'fuse.sshfs'] # Inotify is not used if HotFolder is on one of these filesystems.
+
+# A file is queued for processing when its size and modification time have stayed the same for the 'stability window' of the file. The stability window depends on how the file is written to the HotFolder:
+# - Files inotify has reported closed after writing or moved to the HotFolder are ready immediately.
+# - Files written by a local program must stay unchanged for 'file_stability_window_for_local_files' seconds.
+# - Files written through Samba or to a HotFolder on a network filesystem must stay unchanged for 'file_stability_window_for_network_files' seconds, network clients may pause writing for several seconds in the middle of a transfer.
+# While files are being transferred the HotFolder is polled as soon as the shortest stability window has passed, even if it is sooner than 'delay_between_directory_reads'.
+file_stability_window_for_local_files = 1
+file_stability_window_for_network_files = 10
+
 file_expiry_time = 60*60*8 # This number (in seconds) defines how long the files are allowed to exist in HotFolder and results - directory. File creation time is not taken into account only the time this program first saw the file in the directory. Files are automatically deleted when they are 'expired'.
 
 natively_supported_file_formats = ['.wav', '.flac', '.ogg'] # Natively supported formats may be processed without first decoding to flac with ffmpeg, since libebur128 and sox both support these formats.
@@ -274,6 +317,11 @@ send_error_messages_to_logfile = True
 # Heartbeat send timestamp periodically so that a outside program can monitor if this program has stopped.
 heartbeat = True # This variable controls if this program periodically sends the current time.
 heartbeat_write_interval = 30 # This variable defines how many seconds there approximately will be between sending the current time to the Heartbeat_Checker.
+
+# Messages to Progress_Report and Heartbeat_Checker are sent through one keep-alive http session, failed sends are retried with increasing delays.
+# A message is sent only when the information in it has changed since the last successful send, but at least every 'status_message_forced_send_interval' seconds.
+status_message_forced_send_interval = 60
+http_session_for_status_messages = None
 # Collect error messages and send them periodically by email to the administrator.
 email_sending_details = {} # All information needed to send email is gathered to this dictionary.
 email_sending_details['last_send_timestamp'] = 0 # This value is always set to the last time when email was sent. This is used to calculate the next time we are allowed to send email again.
@@ -309,6 +357,7 @@ wav_format_maximum_file_size = 4294967296 # Define wav max file size. Theoretica
 # This variable is used when some of our python code caused a crash. The variable (when True) causes all error messages waiting to be sent by email to be sent immediately.
 critical_python_error_has_happened = False
 list_of_critical_python_errors = []
+graphics_plotting_threads_dict = {} # Threads that are plotting the loudness graphics file of a file while the loudness corrected file is being created. Key is the filename.
 
 # Define lists of supported pcm bit depths
 pcm_8_bit_formats = ['pcm_s8', 'pcm_s8_planar', 'pcm_u8']
@@ -383,6 +432,112 @@ unsupported_formats_list = ['libmodplug']
 # This value will be overwritten by value that comes from the installer program through the file LoudnessCorrection_Settings.json
 target_loudness = '-23'
 
+#########################################
+# Set defaults for loudness measurement #
+#########################################
+# When this is True integrated loudness, loudness range, peak and the short-term loudness time slices are all calculated from a single decode of the file.
+# Sox decodes the file once to a pipe and NumPy K-weights the audio and measures the peak or TruePeak from the same original samples, so each file needs only one processor core.
+# This mode needs NumPy. If NumPy is not installed, an error is reported at startup and loudness is measured with libebur128 even if this is True.
+# When False, two libebur128 processes are started for each file, one for integrated loudness and one for the time slices.
+measure_loudness_in_a_single_pass = False
+
+# When this is True wav - files are read and measured in-process with NumPy, no external program is started to measure the file.
+# Files that NumPy can not read (compressed formats and unusual wav - formats) are measured with the sox single pass measurement.
+# Loudness is then always measured in a single pass and each file needs only one processor core.
+# Wav - files are memory mapped, so the file is read straight from the page cache and memory used by the program does not grow with the size of the file.
+# Gain of loudness corrected integer pcm wav - files that don't need peak limiting is also applied in-process with NumPy, reading the file through the same memory mapping.
+use_numpy_for_loudness_measurement = False
+k_weighting_impulse_responses = {} # K-weighting impulse responses used in NumPy measurement are calculated once for each sample rate and stored here.
+
+# When this is True and loudness is measured with NumPy, audio streams are measured while FFmpeg extracts them from a file. FFmpeg writes a copy of each stream to a pipe that a measurement thread reads.
+# Loudness results of the streams are then ready when the extraction is ready and the extracted files are not read again for measurement.
+# Streams of mxf - files that are remixed are measured after remixing. This is not used when files are processed in worker processes.
+measure_audio_streams_while_extracting = False
+loudness_measured_during_audio_stream_extraction_dict = {} # Measurement results of extracted audio streams along with the size and modification time of the extracted file. Key is the name of the extracted file.
+# When loudness corrected files are not created and loudness is measured with NumPy, audio streams of files that need to be decoded with FFmpeg are only written to measurement pipes, not to files.
+# Channel count, sample rate, bit depth and duration of these streams are stored here while their results are created. Key is the name the extracted file would have.
+audio_streams_measured_without_a_file_dict = {}
+
+# When this is True loudness measurement, loudness graphics and loudness correction of each file is run in a worker process instead of threads in the main process.
+# Python runs code of only one thread at a time in one process, worker processes let the Python code processing different files run on all processor cores.
+# Files that need audio streams extracted with FFmpeg are still extracted in a thread of the main process, since that work is done by FFmpeg.
+run_file_processing_in_worker_processes = False
+# If a worker process dies, a new pool of worker processes is started and the files that were being processed are queued again.
+# A file gets an error graphics file instead when worker processes have died this many times while processing it.
+maximum_number_of_worker_process_failures_for_a_file = 2
+
+##############################################
+# Set defaults for running external commands #
+##############################################
+# Output of external commands is captured through pipes in memory. Only this many bytes of stdout and stderr are kept, the rest of the output is read and discarded.
+maximum_external_command_output_size = 10485760
+# Commands that only read information from a file (sox --i, ffmpeg -i, mediainfo, smbstatus) are killed if they have not finished in this many seconds.
+# Commands that process audio (loudness measurement, gnuplot, sox, ffmpeg) may run as long as they need.
+timeout_for_file_information_commands = 120
+# Output of commands that only read information from a file is stored in memory for this many file and program combinations, so that the same file is not probed again with the same program.
+file_information_cache_size = 1000
+file_information_cache = collections.OrderedDict() # The least recently used item is the first item in the dictionary.
+file_information_cache_lock = threading.Lock()
+file_format_support_information_of_extracted_audio_streams_dict = {} # Information FFmpeg reported about audio streams extracted from a file. Keys are names of the extracted files and values are the identity of the file and the information.
+# Results of a file are reused when a file with exactly the same content has already been processed with the same target loudness and peak measurement method. Loudness is not measured and the loudness corrected file is not created again.
+# The value is the maximum size of the cache in bytes, the least recently used results are removed when the cache grows bigger. A value of 0 turns the cache off.
+# Loudness corrected files are copied to the cache directory under 'directory_for_temporary_files' and copied back from it when they are reused, so changing a file in the results directory does not change the file in the cache.
+result_cache_size = 0 # Bytes.
+result_cache = collections.OrderedDict() # The least recently used item is the first item in the dictionary.
+result_cache_lock = threading.Lock()
+result_cache_keys_of_files_dict = {} # Cache keys of files that are being processed.
+result_cache_key_threads_dict = {} # Threads that are calculating cache keys of files while the files are measured.
+directory_for_result_cache = '' # This is set when the program starts.
+
+#############################################
+# Set defaults for starting file processing #
+#############################################
+# Processing of a new file is started only if it's estimated processor, memory and temporary disk space need fits in what files already being processed leave free.
+# The estimate is calculated from the duration, channel count and sample rate of the file. A value of 0 means no limit.
+# The first file in the queue is always started when no other files are being processed, so that a file bigger than the limit is still processed.
+memory_budget_for_file_processing = 0 # Bytes.
+temporary_disk_space_budget_for_file_processing = 0 # Bytes.
+
+# The order in which files waiting in the queue are processed. Possible values are:
+# 'fifo' = Files are processed in the order they were queued.
+# 'shortest_first' = Files with the shortest audio duration are processed first.
+# 'priority' = Files are processed in the order of the priority class their name starts with, files in the same class are processed in the order they were queued.
+queue_policy = 'fifo'
+# Priority classes used with the 'priority' policy. Keys are filename prefixes and values are priorities, a smaller number is processed first. The longest matching prefix is used.
+# Files that don't start with any of the prefixes get the priority in 'queue_default_priority'. Example: {'promo_' : 1, 'news_' : 2}
+queue_priority_classes = {}
+queue_default_priority = 10
+# Files waiting in the queue age, so that files queued later can't pass them forever. With 'priority' the priority of a file gets better by one every 'queue_aging_time' seconds it has waited.
+# With 'shortest_first' the duration the file is sorted by is divided by: 1 + seconds waited / 'queue_aging_time'.
+queue_aging_time = 600
+# If the first file in the queue does not fit in the free resources, smaller files behind it are started instead. When this has happened 'queue_maximum_times_passed' times
+# or the first file has waited longer than 'queue_aging_time' seconds, no other files are started before it, so the resources it needs are freed for it.
+queue_maximum_times_passed = 10
+
+# When this is True audio streams extracted from a file with FFmpeg are queued for loudness calculation as soon as the extraction is ready, using the information FFmpeg already reported about the original file.
+# The extracted files don't wait for the HotFolder polls that check that a file has stopped growing and they are not inspected with FFmpeg again.
+# When False, extracted files are found by reading the HotFolder and they are processed like files the user has copied there.
+queue_extracted_audio_streams_directly = False
+
+##############################################
+# Set defaults for drawing loudness graphics #
+##############################################
+# When this is True the loudness graphics file is drawn in this process with Pillow and written directly to the results directory.
+# When False, the graphics file is plotted with gnuplot, which needs a time slice file and a command file written to disk and gnuplot started for each file.
+draw_loudness_graphics_in_process = False
+# When this is more than 0 and graphics is plotted with gnuplot, this many gnuplot processes are started once and kept running. Commands and time slice data are sent to them through stdin.
+# This is also the maximum number of graphics files plotted at the same time. When 0, gnuplot is started for each graphics file and reads commands and time slice data from files.
+# When files are processed in worker processes, each worker process processes one file at a time, so it starts only one gnuplot process of its own, when it first plots graphics.
+number_of_gnuplot_worker_processes = 0
+# A gnuplot process that is kept running is stopped and a new one started in its place, if it has not finished plotting a graphics file in this many seconds.
+timeout_for_gnuplot_worker_processes = 300
+gnuplot_worker_processes_queue = queue.Queue() # Gnuplot processes that are not plotting. None is a process that has not been started yet or was stopped after an error.
+# Size of the loudness graphics file and the size of the font in points. Both gnuplot and the in-process drawing use these, the in-process drawing derives its font size in pixels and the margins around the plot area from them.
+loudness_graphics_width = 1280
+loudness_graphics_height = 960
+loudness_graphics_font_size = 12
+font_paths_for_loudness_graphics = ['/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf', '/usr/share/fonts/truetype/liberation2/LiberationSans-Regular.ttf', '/usr/share/fonts/liberation/LiberationSans-Regular.ttf', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'] # The first font found is used in graphics drawn in-process.
+
 ####################################################
 # Heartbeat_Checker and web service IP - addresses #
 ####################################################
@@ -438,6 +593,573 @@ def get_number_of_physical_processors():
 	return cpu_cores_int
 
 
+def read_output_of_external_command(stream_handler, output_buffer, maximum_output_size):
+
+	"""Reads output of an external command from a pipe until the pipe closes. Only the first 'maximum_output_size' bytes are stored to the output buffer."""
+
+	# The pipe is always read to the end, otherwise the command would block when the pipe buffer fills up.
+	while True:
+		output = stream_handler.read(65536)
+
+		if len(output) == 0:
+			break
+
+		if len(output_buffer) < maximum_output_size:
+			output_buffer.extend(output[0:maximum_output_size - len(output_buffer)])
+
+	stream_handler.close()
+
+def run_external_command(commandline, english, finnish, stderr_to_stdout=False, timeout=0):
+
+	"""Runs an external command and returns what the command printed to stdout and stderr and an error message. Output is captured through pipes in memory."""
+
+	# This subroutine works like this:
+	# ---------------------------------
+	# Stdout and stderr of the command are read in their own threads, so the command never blocks on a full pipe even when it prints a lot to both.
+	# If stderr_to_stdout is True, stderr of the command is written to the same pipe with stdout and returned as stdout.
+	# If the command has not finished in 'timeout' seconds it is killed. Timeout zero means that the command may run as long as it needs.
+	# Errors are sent to screen, logfile and email and the error message is also returned to the caller. If there were no errors, the error message is an empty string.
+
+	stdout_buffer = bytearray()
+	stderr_buffer = bytearray()
+	list_of_reader_threads = []
+	error_message = ''
+
+	try:
+		stderr_destination = subprocess.PIPE
+
+		if stderr_to_stdout == True:
+			stderr_destination = subprocess.STDOUT
+
+		process = subprocess.Popen(commandline, stdout=subprocess.PIPE, stderr=stderr_destination, stdin=None, close_fds=True)
+
+		list_of_reader_threads.append(threading.Thread(target=read_output_of_external_command, args=(process.stdout, stdout_buffer, maximum_external_command_output_size)))
+
+		if stderr_to_stdout == False:
+			list_of_reader_threads.append(threading.Thread(target=read_output_of_external_command, args=(process.stderr, stderr_buffer, maximum_external_command_output_size)))
+
+		for reader_thread in list_of_reader_threads:
+			reader_thread.start()
+
+		try:
+			if timeout > 0:
+				process.wait(timeout)
+			else:
+				process.wait()
+		except subprocess.TimeoutExpired:
+			process.kill()
+			process.wait()
+			error_message = 'Command did not finish in ' * english + 'Komento ei päättynyt ' * finnish + str(timeout) + ' seconds and was stopped: ' * english + ' sekunnissa ja se pysäytettiin: ' * finnish + ' '.join(commandline)
+			send_error_messages_to_screen_logfile_email(error_message, [])
+
+		for reader_thread in list_of_reader_threads:
+			reader_thread.join()
+
+	except IOError as reason_for_error:
+		error_message = 'Error running command: ' * english + 'Komennon ajaminen epäonnistui: ' * finnish + ' '.join(commandline) + '. ' + str(reason_for_error)
+		send_error_messages_to_screen_logfile_email(error_message, [])
+	except OSError as reason_for_error:
+		error_message = 'Error running command: ' * english + 'Komennon ajaminen epäonnistui: ' * finnish + ' '.join(commandline) + '. ' + str(reason_for_error)
+		send_error_messages_to_screen_logfile_email(error_message, [])
+
+	return(bytes(stdout_buffer), bytes(stderr_buffer), error_message)
+
+def get_identity_of_a_file(file_to_process):
+
+	"""Returns the device, inode, size and modification time of a file, or None if the file can not be read."""
+
+	# A file that is changed or replaced with a new file gets a new identity, a file that is only moved or renamed keeps its identity.
+	try:
+		file_metadata = os.stat(file_to_process)
+	except IOError:
+		return(None)
+	except OSError:
+		return(None)
+
+	return((file_metadata.st_dev, file_metadata.st_ino, file_metadata.st_size, file_metadata.st_mtime_ns))
+
+def run_file_information_command(commandline, file_to_process, english, finnish):
+
+	"""Runs a program that reads information from a file, or returns the output of an earlier run of the same program on the same unchanged file."""
+
+	# This subroutine works like this:
+	# ---------------------------------
+	# Output of programs that only read information from a file (sox --i, ffmpeg -i, mediainfo) is stored in the dictionary 'file_information_cache'.
+	# The key is the identity of the file (device, inode, size and modification time) and the name of the program. Each program is always run with the same options that make it print all information needed from the file,
+	# so every program is run only once for each file.
+	# A file that is changed or replaced with a new file gets a new key and is probed again, a file that is only moved or renamed keeps its key.
+	# Programs print the path of the file in their output. If the file has been renamed since the output was stored, the old path in the output is replaced with the new one.
+	# When there are more than 'file_information_cache_size' items in the cache, the least recently used items are removed.
+	# Output is stored only when the command ran without errors. Stderr of the command is returned as part of stdout.
+
+	global file_information_cache
+	global file_information_cache_lock
+	global file_information_cache_size
+
+	cache_key = None
+	file_identity = get_identity_of_a_file(file_to_process)
+
+	if file_identity != None:
+		cache_key = file_identity + (os.path.basename(commandline[0]),)
+
+		with file_information_cache_lock:
+			if cache_key in file_information_cache:
+				file_information_cache.move_to_end(cache_key)
+				command_output, path_of_the_file_in_output = file_information_cache[cache_key]
+
+				if path_of_the_file_in_output != os.fsencode(file_to_process):
+					command_output = command_output.replace(path_of_the_file_in_output, os.fsencode(file_to_process))
+
+				return(command_output, b'', '')
+
+	command_output, command_stderr, error_message = run_external_command(commandline, english, finnish, stderr_to_stdout=True, timeout=timeout_for_file_information_commands)
+
+	if (cache_key != None) and (error_message == ''):
+		with file_information_cache_lock:
+			file_information_cache[cache_key] = [command_output, os.fsencode(file_to_process)]
+
+			while len(file_information_cache) > file_information_cache_size:
+				file_information_cache.popitem(last=False)
+
+	return(command_output, command_stderr, error_message)
+
+def create_result_cache_key(file_size, content_hash_string):
+
+	"""Creates the key the results of a file are stored with in the result cache from the size of the file and the SHA-256 hash of the file content."""
+
+	# The key is the size of the file and the SHA-256 hash of the file content along with the target loudness and peak measurement method, so results are reused only for identical files processed with the same settings.
+	# The size is the first part of the key, so it can be seen without reading the file if there can be results for the file in the cache.
+
+	global target_loudness
+	global peak_measurement_method
+
+	return(str(file_size) + '_' + content_hash_string + '_' + str(target_loudness) + '_' + str(peak_measurement_method))
+
+def calculate_result_cache_key(file_to_process):
+
+	"""Calculates the key the results of a file are stored with in the result cache. An empty string is returned if the file can not be read."""
+
+	# The file is read in 1 MB blocks so that memory use does not depend on file size. Reading the file also brings it to the os file cache for loudness calculation.
+
+	content_hash = hashlib.sha256()
+	file_size = 0
+
+	try:
+		with open(file_to_process, 'rb') as file_handler:
+			file_size = os.fstat(file_handler.fileno()).st_size
+
+			while True:
+				file_data = file_handler.read(1048576)
+
+				if len(file_data) == 0:
+					break
+
+				content_hash.update(file_data)
+
+	except IOError:
+		return('')
+	except OSError:
+		return('')
+
+	return(create_result_cache_key(file_size, content_hash.hexdigest()))
+
+def calculate_result_cache_key_of_a_file_being_measured(filename, file_to_process):
+
+	"""Calculates the result cache key of a file in its own thread while the file is measured and stores it to 'result_cache_keys_of_files_dict'."""
+
+	# This is used when the file is measured by external programs, the hash can not be calculated from the data they read. The file is read at the same time by the measurement, so most of the file is read from the os file cache and the file is read from disk only once.
+
+	global result_cache_keys_of_files_dict
+
+	try:
+		cache_key = calculate_result_cache_key(file_to_process)
+
+		if cache_key != '':
+			result_cache_keys_of_files_dict[filename] = cache_key
+
+	except Exception:
+		exc_type, exc_value, exc_traceback = sys.exc_info()
+		error_message_as_a_list = traceback.format_exception(exc_type, exc_value, exc_traceback)
+		subroutine_name = 'calculate_result_cache_key_of_a_file_being_measured'
+		catch_python_interpreter_errors(error_message_as_a_list, subroutine_name)
+
+def get_result_cache_key_of_a_file(filename):
+
+	"""Returns the result cache key of a file being processed, or an empty string if the file has no key. If the key is still being calculated, waits for it."""
+
+	global result_cache_keys_of_files_dict
+	global result_cache_key_threads_dict
+
+	cache_key_thread = result_cache_key_threads_dict.get(filename)
+
+	if (cache_key_thread != None) and (cache_key_thread != threading.current_thread()):
+		cache_key_thread.join()
+
+	return(result_cache_keys_of_files_dict.get(filename, ''))
+
+def remove_least_recently_used_results_from_result_cache():
+
+	"""Removes the least recently used results from the result cache until the cache fits in 'result_cache_size'. The caller must hold 'result_cache_lock'."""
+
+	global result_cache
+	global result_cache_size
+
+	size_of_cached_results = 0
+
+	for cache_key in result_cache:
+		size_of_cached_results = size_of_cached_results + result_cache[cache_key]['size']
+
+	while (size_of_cached_results > result_cache_size) and (len(result_cache) > 0):
+		cache_key, cached_results = result_cache.popitem(last=False)
+		size_of_cached_results = size_of_cached_results - cached_results['size']
+
+		for cached_file_path, filename_ending in cached_results['corrected_files']:
+			try:
+				os.remove(cached_file_path)
+			except IOError as reason_for_error:
+				error_message = 'Error deleting file from result cache ' * english + 'Tiedoston poistaminen tulosvälimuistista epäonnistui ' * finnish + str(reason_for_error)
+				send_error_messages_to_screen_logfile_email(error_message, [])
+			except OSError as reason_for_error:
+				error_message = 'Error deleting file from result cache ' * english + 'Tiedoston poistaminen tulosvälimuistista epäonnistui ' * finnish + str(reason_for_error)
+				send_error_messages_to_screen_logfile_email(error_message, [])
+
+def store_loudness_results_in_result_cache(filename, integrated_loudness_calculation_results_list, number_of_timeslices, timeslice_loudness_calculation_stdout):
+
+	"""Stores loudness calculation results of a file to the result cache, so that they can be used for files with identical content."""
+
+	global result_cache
+	global result_cache_lock
+	global result_cache_keys_of_files_dict
+
+	cache_key = get_result_cache_key_of_a_file(filename)
+
+	if cache_key == '':
+		return
+
+	with result_cache_lock:
+		if cache_key not in result_cache:
+			result_cache[cache_key] = {'loudness_results' : [list(integrated_loudness_calculation_results_list), number_of_timeslices, timeslice_loudness_calculation_stdout], 'corrected_files' : [], 'size' : len(timeslice_loudness_calculation_stdout)}
+		result_cache.move_to_end(cache_key)
+		remove_least_recently_used_results_from_result_cache()
+
+def store_corrected_files_in_result_cache(filename, directory_for_results, list_of_filenames, english, finnish):
+
+	"""Copies the loudness corrected files of a file from the results directory to the result cache directory."""
+
+	# This subroutine works like this:
+	# ---------------------------------
+	# Corrected files are copied to the result cache directory. Files are not hard linked, because then changing a file in the results directory would also change the file in the cache.
+	# File names are stored without the name of the original file, so that the files can be given the right names when they are reused for a file with a different name.
+	# Files are stored only if loudness results of the file are already in the cache.
+
+	global result_cache
+	global result_cache_lock
+	global result_cache_keys_of_files_dict
+	global directory_for_result_cache
+
+	cache_key = get_result_cache_key_of_a_file(filename)
+	filename_and_extension = os.path.splitext(filename)
+	list_of_cached_files = []
+	size_of_cached_files = 0
+
+	if (cache_key == '') or (len(list_of_filenames) == 0):
+		return
+
+	with result_cache_lock:
+		if (cache_key not in result_cache) or (len(result_cache[cache_key]['corrected_files']) > 0):
+			return
+
+		for counter in range(0, len(list_of_filenames)):
+			corrected_file_path = directory_for_results + os.sep + list_of_filenames[counter]
+			cached_file_path = directory_for_result_cache + os.sep + cache_key + '-' + str(counter)
+
+			try:
+				shutil.copyfile(corrected_file_path, cached_file_path)
+				list_of_cached_files.append([cached_file_path, list_of_filenames[counter][len(filename_and_extension[0]):]])
+				size_of_cached_files = size_of_cached_files + os.stat(cached_file_path).st_size
+
+			except IOError as reason_for_error:
+				error_message = 'Error storing file to result cache ' * english + 'Tiedoston tallentaminen tulosvälimuistiin epäonnistui ' * finnish + str(reason_for_error)
+				send_error_messages_to_screen_logfile_email(error_message, [])
+				break
+			except OSError as reason_for_error:
+				error_message = 'Error storing file to result cache ' * english + 'Tiedoston tallentaminen tulosvälimuistiin epäonnistui ' * finnish + str(reason_for_error)
+				send_error_messages_to_screen_logfile_email(error_message, [])
+				break
+
+		# Store the files to the cache only if all of them could be stored, otherwise remove the files that were stored.
+		if len(list_of_cached_files) != len(list_of_filenames):
+			for cached_file_path, filename_ending in list_of_cached_files:
+				try:
+					os.remove(cached_file_path)
+				except OSError:
+					pass
+			return
+
+		result_cache[cache_key]['corrected_files'] = list_of_cached_files
+		result_cache[cache_key]['size'] = result_cache[cache_key]['size'] + size_of_cached_files
+		result_cache.move_to_end(cache_key)
+		remove_least_recently_used_results_from_result_cache()
+
+def copy_corrected_files_from_result_cache(filename, directory_for_temporary_files, english, finnish):
+
+	"""Copies loudness corrected files of an identical file from the result cache to the temporary files directory. Returns the names of the copied files or an empty list if the cache has no corrected files for the file."""
+
+	# Files are copied and not hard linked, so that changing a file in the results directory does not change the file in the cache.
+
+	global result_cache
+	global result_cache_lock
+	global result_cache_keys_of_files_dict
+
+	cache_key = get_result_cache_key_of_a_file(filename)
+	filename_and_extension = os.path.splitext(filename)
+	list_of_filenames = []
+
+	if cache_key == '':
+		return([])
+
+	with result_cache_lock:
+		if (cache_key not in result_cache) or (len(result_cache[cache_key]['corrected_files']) == 0):
+			return([])
+
+		result_cache.move_to_end(cache_key)
+
+		# Corrected files get their names from the name of the file being processed, the same way as when the files are created with sox or FFmpeg.
+		for cached_file_path, filename_ending in result_cache[cache_key]['corrected_files']:
+			target_filename = filename_and_extension[0] + filename_ending
+
+			try:
+				shutil.copyfile(cached_file_path, directory_for_temporary_files + os.sep + target_filename)
+				list_of_filenames.append(target_filename)
+
+			except IOError as reason_for_error:
+				error_message = 'Error reading file from result cache ' * english + 'Tiedoston lukeminen tulosvälimuistista epäonnistui ' * finnish + str(reason_for_error)
+				send_error_messages_to_screen_logfile_email(error_message, [])
+				break
+			except OSError as reason_for_error:
+				error_message = 'Error reading file from result cache ' * english + 'Tiedoston lukeminen tulosvälimuistista epäonnistui ' * finnish + str(reason_for_error)
+				send_error_messages_to_screen_logfile_email(error_message, [])
+				break
+
+		# If some of the files could not be copied, remove the ones that were and create the corrected files again.
+		if len(list_of_filenames) != len(result_cache[cache_key]['corrected_files']):
+			for target_filename in list_of_filenames:
+				try:
+					os.remove(directory_for_temporary_files + os.sep + target_filename)
+				except OSError:
+					pass
+			return([])
+
+	return(list_of_filenames)
+
+def use_result_cache_or_calculate_loudness(filename, hotfolder_path, directory_for_temporary_files, directory_for_results, english, finnish, time_slice_duration_string, event_for_timeslice_loudness_calculation, event_for_integrated_loudness_calculation, list_of_loudness_calculation_jobs):
+
+	"""Reuses loudness results of a file with identical content from the result cache, or calculates loudness of the file if the results are not in the cache."""
+
+	# This subroutine works like this:
+	# ---------------------------------
+	# The subroutine is started from the main program in it's own thread instead of the loudness calculation threads when 'result_cache_size' is more than 0.
+	# The cache key is the size of the file and the hash of the file content along with the target loudness and peak measurement method.
+	# If there are results of a file with the same size in the cache, the file is read once to calculate the cache key before loudness is calculated.
+	# If results for the key are in the cache, loudness results are taken from the cache and graphics and the machine readable results are created from them the same way as after loudness calculation.
+	# The loudness corrected files are copied from the cache by create_commands_for_loudness_adjusting_a_file.
+	# If results are not in the cache, the loudness calculation subroutines in 'list_of_loudness_calculation_jobs' are run in their own threads, they store their results to the cache.
+	# A file that has a different size than all files in the cache can not have results there. Its cache key is calculated while the file is measured, so the file is not read twice before measurement.
+	# When the file is read in-process with NumPy, calculate_loudness_in_a_single_pass calculates the key from the data it reads for the measurement. Otherwise the key is calculated in a thread of its own.
+
+	try:
+		global integrated_loudness_calculation_results
+		global result_cache
+		global result_cache_lock
+		global result_cache_keys_of_files_dict
+		global result_cache_key_threads_dict
+		file_to_process = hotfolder_path + os.sep + filename
+		cached_loudness_results = []
+		list_of_threads = []
+		cache_key = ''
+		file_size = -1
+
+		try:
+			file_size = os.stat(file_to_process).st_size
+		except IOError:
+			pass
+		except OSError:
+			pass
+
+		with result_cache_lock:
+			results_of_a_file_with_the_same_size_are_in_the_cache = False
+
+			for cached_key in result_cache:
+				if cached_key.startswith(str(file_size) + '_') == True:
+					results_of_a_file_with_the_same_size_are_in_the_cache = True
+					break
+
+		if results_of_a_file_with_the_same_size_are_in_the_cache == True:
+			cache_key = calculate_result_cache_key(file_to_process)
+		elif (list_of_loudness_calculation_jobs[0][0] == calculate_loudness_in_a_single_pass) and (use_numpy_for_loudness_measurement == True):
+			pass # The key is calculated from the data NumPy reads while it measures the file.
+		else:
+			cache_key_thread = threading.Thread(target=calculate_result_cache_key_of_a_file_being_measured, args=(filename, file_to_process)) # Create a process instance.
+			result_cache_key_threads_dict[filename] = cache_key_thread
+			cache_key_thread.start() # Start the process in it'own thread.
+
+		if cache_key != '':
+			result_cache_keys_of_files_dict[filename] = cache_key
+
+			with result_cache_lock:
+				if cache_key in result_cache:
+					result_cache.move_to_end(cache_key)
+					cached_loudness_results = result_cache[cache_key]['loudness_results']
+
+		if len(cached_loudness_results) > 0:
+			integrated_loudness_calculation_results_list, number_of_timeslices, timeslice_loudness_calculation_stdout = cached_loudness_results
+
+			# Save some debug information. Debug information is saved to the same dictionaries the loudness calculation threads use, so that the main program can handle it the same way.
+			if debug_file_processing == True:
+				global debug_temporary_dict_for_integrated_loudness_calculation_information
+				global debug_temporary_dict_for_timeslice_calculation_information
+				debug_information_list = []
+
+				if filename in debug_temporary_dict_for_timeslice_calculation_information:
+					debug_information_list = debug_temporary_dict_for_timeslice_calculation_information[filename]
+				unix_time_in_ticks, realtime = get_realtime(english, finnish)
+				debug_information_list.append('Start Time')
+				debug_information_list.append(unix_time_in_ticks)
+				debug_information_list.append('Subprocess Name')
+				debug_information_list.append('use_result_cache_or_calculate_loudness')
+				debug_information_list.append('cache_key')
+				debug_information_list.append(cache_key)
+				debug_information_list.append('integrated_loudness_calculation_results_list')
+				debug_information_list.append(integrated_loudness_calculation_results_list)
+				debug_information_list.append('number_of_timeslices')
+				debug_information_list.append(number_of_timeslices)
+				unix_time_in_ticks, realtime = get_realtime(english, finnish)
+				debug_information_list.append('Stop Time')
+				debug_information_list.append(unix_time_in_ticks)
+				debug_temporary_dict_for_timeslice_calculation_information[filename] = debug_information_list
+				debug_temporary_dict_for_integrated_loudness_calculation_information[filename] = []
+
+			integrated_loudness_calculation_results[filename] = list(integrated_loudness_calculation_results_list)
+			event_for_integrated_loudness_calculation.set()
+
+			create_gnuplot_commands(filename, number_of_timeslices, time_slice_duration_string, False, '', timeslice_loudness_calculation_stdout, hotfolder_path, directory_for_temporary_files, directory_for_results, english, finnish)
+		else:
+			# Results are not in the cache, calculate loudness of the file.
+			for job_subroutine, job_arguments in list_of_loudness_calculation_jobs:
+				calculation_thread = threading.Thread(target=job_subroutine, args=job_arguments) # Create a process instance.
+				calculation_thread.start() # Start the calculation process in it's own thread.
+				list_of_threads.append(calculation_thread)
+
+			for calculation_thread in list_of_threads:
+				calculation_thread.join()
+
+		# Wait for the cache key thread, so that the key is removed only after the thread has stored it.
+		get_result_cache_key_of_a_file(filename)
+
+		if filename in result_cache_key_threads_dict:
+			del result_cache_key_threads_dict[filename]
+
+		if filename in result_cache_keys_of_files_dict:
+			del result_cache_keys_of_files_dict[filename]
+
+		event_for_timeslice_loudness_calculation.set()
+
+	except Exception:
+		exc_type, exc_value, exc_traceback = sys.exc_info()
+		error_message_as_a_list = traceback.format_exception(exc_type, exc_value, exc_traceback)
+		subroutine_name = 'use_result_cache_or_calculate_loudness'
+
+		# Set both events for this calculation thread.
+		event_for_integrated_loudness_calculation.set()
+		event_for_timeslice_loudness_calculation.set()
+
+		catch_python_interpreter_errors(error_message_as_a_list, subroutine_name)
+
+def run_gnuplot_commands_in_worker_process(gnuplot_commands, english, finnish):
+
+	"""Sends gnuplot commands to a gnuplot process that is kept running and returns what gnuplot printed and an error message."""
+
+	# This subroutine works like this:
+	# ---------------------------------
+	# Gnuplot processes that are not plotting wait in 'gnuplot_worker_processes_queue'. Getting a process from the queue waits until one is free, so no more than 'number_of_gnuplot_worker_processes' graphics files are plotted at the same time.
+	# If the process got from the queue is None, a new gnuplot process is started in its place.
+	# Settings left from the previous graphics are cleared with 'reset' and after the commands gnuplot is told to print a line marking the end of the output. Everything gnuplot prints before the marker is returned, gnuplot only prints something when there is a warning or an error.
+	# Gnuplot output is read with select, so that a gnuplot process that has not printed the marker in 'timeout_for_gnuplot_worker_processes' seconds can be stopped.
+	# If gnuplot exits before printing the marker, does not print it in time or writing to it fails, the process is stopped and None is put back to the queue, so a new gnuplot process is started the next time it is needed.
+	# A gnuplot process that printed warnings or errors but also printed the marker is kept running. Gnuplot reads the marker command only when it is reading commands again,
+	# for example after the end of the inline data of a failed plot command, so the next graphics can be plotted with the same process. The output is returned and run_gnuplot reports it.
+
+	global gnuplot_worker_processes_queue
+	global timeout_for_gnuplot_worker_processes
+
+	gnuplot_output = bytearray()
+	unprocessed_output = bytearray()
+	end_of_output_marker = '00-End_Of_Gnuplot_Output'
+	end_of_output_marker_was_found = False
+	error_message = ''
+	gnuplot_process = gnuplot_worker_processes_queue.get()
+
+	try:
+		if gnuplot_process == None:
+			gnuplot_process = subprocess.Popen(['gnuplot'], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, close_fds=True)
+
+		gnuplot_process.stdin.write(('reset\n' + '\n'.join(gnuplot_commands) + '\nunset output\nset print \'-\'\nprint \'' + end_of_output_marker + '\'\n').encode('UTF-8'))
+		gnuplot_process.stdin.flush()
+
+		time_plotting_started = time.time()
+
+		while end_of_output_marker_was_found == False:
+			time_left = timeout_for_gnuplot_worker_processes - (time.time() - time_plotting_started)
+
+			if time_left <= 0:
+				error_message = 'Gnuplot did not finish plotting graphics in ' * english + 'Gnuplot ei saanut grafiikkaa piirrettyä ' * finnish + str(timeout_for_gnuplot_worker_processes) + ' seconds, the process is restarted' * english + ' sekunnissa, prosessi käynnistetään uudelleen' * finnish
+				send_error_messages_to_screen_logfile_email(error_message, [])
+				break
+
+			readable_pipes, writable_pipes, pipes_with_errors = select.select([gnuplot_process.stdout], [], [], time_left)
+
+			if readable_pipes == []:
+				continue
+
+			output_from_gnuplot = os.read(gnuplot_process.stdout.fileno(), 65536)
+
+			if output_from_gnuplot == b'':
+				gnuplot_process.wait()
+				error_message = 'Gnuplot exited while plotting graphics, exit code: ' * english + 'Gnuplot pysähtyi grafiikan piirtämisen aikana, paluukoodi: ' * finnish + str(gnuplot_process.returncode)
+				send_error_messages_to_screen_logfile_email(error_message, [])
+				break
+
+			unprocessed_output.extend(output_from_gnuplot)
+
+			while b'\n' in unprocessed_output:
+				end_of_line = unprocessed_output.index(b'\n') + 1
+				line = bytes(unprocessed_output[:end_of_line])
+				del unprocessed_output[:end_of_line]
+
+				if line.strip() == end_of_output_marker.encode('UTF-8'):
+					end_of_output_marker_was_found = True
+					break
+
+				if len(gnuplot_output) < maximum_external_command_output_size:
+					gnuplot_output.extend(line)
+
+	except IOError as reason_for_error:
+		error_message = 'Error running command: ' * english + 'Komennon ajaminen epäonnistui: ' * finnish + 'gnuplot. ' + str(reason_for_error)
+		send_error_messages_to_screen_logfile_email(error_message, [])
+	except OSError as reason_for_error:
+		error_message = 'Error running command: ' * english + 'Komennon ajaminen epäonnistui: ' * finnish + 'gnuplot. ' + str(reason_for_error)
+		send_error_messages_to_screen_logfile_email(error_message, [])
+	finally:
+		# Stop a gnuplot process that did not print the marker, a new one is started in its place the next time a process is needed.
+		if (error_message != '') and (gnuplot_process != None):
+			gnuplot_process.kill()
+			gnuplot_process.wait()
+			gnuplot_process = None
+
+		gnuplot_worker_processes_queue.put(gnuplot_process)
+
+	return(bytes(gnuplot_output), error_message)
+
 def calculate_integrated_loudness(event_for_integrated_loudness_calculation, filename, hotfolder_path, libebur128_commands_for_integrated_loudness_calculation, english, finnish):
 
 	"""This subroutine uses libebur128 program loudness to calculate integrated loudness, loudness range and difference from target loudness."""
@@ -488,56 +1210,13 @@ def calculate_integrated_loudness(event_for_integrated_loudness_calculation, fil
 			# Append the name of the file we are going to process at the end of libebur128 commands.
 			libebur128_commands_for_integrated_loudness_calculation.append(file_to_process)
 			
-			try:
-				# Define filenames for temporary files that we are going to use as stdout and stderr for the external command.
-				stdout_for_external_command = directory_for_temporary_files + os.sep + filename + '_integrated_loudness_calculation_stdout.txt'
-				stderr_for_external_command = directory_for_temporary_files + os.sep + filename + '_integrated_loudness_calculation_stderr.txt'
-				# Open the stdout and stderr temporary files in binary write mode.
-				with open(stdout_for_external_command, 'wb') as stdout_commandfile_handler, open(stderr_for_external_command, 'wb') as stderr_commandfile_handler:
-				
-					# Run libebur128 to calculate the integrated loudness of a audio file.
-					subprocess.Popen(libebur128_commands_for_integrated_loudness_calculation, stdout=stdout_commandfile_handler, stderr=stderr_commandfile_handler, stdin=None, close_fds=True).communicate()
-					
-					# Make sure all data written to temporary stdout and stderr - files is flushed from the os cache and written to disk.
-					stdout_commandfile_handler.flush() # Flushes written data to os cache
-					os.fsync(stdout_commandfile_handler.fileno()) # Flushes os cache to disk
-					stderr_commandfile_handler.flush() # Flushes written data to os cache
-					os.fsync(stderr_commandfile_handler.fileno()) # Flushes os cache to disk
-				
-			except IOError as reason_for_error:
-				error_message = 'Error writing to stdout- or stderr - file when running command: ' * english + 'Stdout- tai stderr - tiedostoon kirjoittaminen epäonnistui ajettaessa komentoa: ' * finnish + ' '.join(libebur128_commands_for_integrated_loudness_calculation) + '. ' + str(reason_for_error)
-				send_error_messages_to_screen_logfile_email(error_message, [])
-			except OSError as reason_for_error:
-				error_message = 'Error writing to stdout- or stderr - file when running command: ' * english + 'Stdout- tai stderr - tiedostoon kirjoittaminen epäonnistui ajettaessa komentoa: ' * finnish + ' '.join(libebur128_commands_for_integrated_loudness_calculation) + '. ' + str(reason_for_error)
-				send_error_messages_to_screen_logfile_email(error_message, [])
-			
-			# Open files we used as stdout and stderr for the external program and read in what the program did output to those files.
-			try:
-				with open(stdout_for_external_command, 'rb') as stdout_commandfile_handler, open(stderr_for_external_command, 'rb') as stderr_commandfile_handler:
-					integrated_loudness_calculation_stdout = stdout_commandfile_handler.read(None)
-					integrated_loudness_calculation_stderr = stderr_commandfile_handler.read(None)
-			except IOError as reason_for_error:
-				error_message = 'Error reading from stdout- or stderr - file when running command: ' * english + 'Stdout- tai stderr - tiedoston lukeminen epäonnistui ajettaessa komentoa: ' * finnish + ' '.join(libebur128_commands_for_integrated_loudness_calculation) + '. ' + str(reason_for_error)
-				send_error_messages_to_screen_logfile_email(error_message, [])
-			except OSError as reason_for_error:
-				error_message = 'Error reading from stdout- or stderr - file when running command: ' * english + 'Stdout- tai stderr - tiedostoon lukeminen epäonnistui ajettaessa komentoa: ' * finnish + ' '.join(libebur128_commands_for_integrated_loudness_calculation) + '. ' + str(reason_for_error)
-				send_error_messages_to_screen_logfile_email(error_message, [])
+			# Run libebur128 to calculate the integrated loudness of a audio file. Output of the program is captured through pipes.
+			integrated_loudness_calculation_stdout, integrated_loudness_calculation_stderr, error_message = run_external_command(libebur128_commands_for_integrated_loudness_calculation, english, finnish)
 			
 			# Convert libebur128 output from binary to UTF-8 text.
 			integrated_loudness_calculation_stdout_string = str(integrated_loudness_calculation_stdout.decode('UTF-8')) 
 			integrated_loudness_calculation_stderr_string = str(integrated_loudness_calculation_stderr.decode('UTF-8'))
 
-			# Delete the temporary stdout and stderr - files
-			try:
-				os.remove(stdout_for_external_command)
-				os.remove(stderr_for_external_command)
-			except IOError as reason_for_error:
-				error_message = 'Error deleting stdout- or stderr - file when running command: ' * english + 'Stdout- tai stderr - tiedoston deletoiminen epäonnistui ajettaessa komentoa: ' * finnish + ' '.join(libebur128_commands_for_integrated_loudness_calculation) + '. ' + str(reason_for_error)
-				send_error_messages_to_screen_logfile_email(error_message, [])
-			except OSError as reason_for_error:
-				error_message = 'Error deleting stdout- or stderr - file when running command: ' * english + 'Stdout- tai stderr - tiedoston deletoiminen epäonnistui ajettaessa komentoa: ' * finnish + ' '.join(libebur128_commands_for_integrated_loudness_calculation) + '. ' + str(reason_for_error)
-				send_error_messages_to_screen_logfile_email(error_message, [])
-
 			# Save debug information.
 			if debug_file_processing == True:
 				debug_information_list.append('integrated_loudness_calculation_stdout_string')
@@ -712,56 +1391,13 @@ def calculate_loudness_timeslices(filename, hotfolder_path, libebur128_commands_
 			time_slice_duration_string = libebur128_commands_for_time_slice_calculation[3] # Timeslice for files <10 seconds is 0.5 sec, and 3 sec for files >= 10 sec. Get the timeslice duration.
 			libebur128_commands_for_time_slice_calculation.append(file_to_process) # Append the name of the file we are going to process at the end of libebur128 commands.
 			
-			try:
-				# Define filenames for temporary files that we are going to use as stdout and stderr for the external command.
-				stdout_for_external_command = directory_for_temporary_files + os.sep + filename + '_timeslice_loudness_calculation_stdout.txt'
-				stderr_for_external_command = directory_for_temporary_files + os.sep + filename + '_timeslice_loudness_calculation_stderr.txt'
-				# Open the stdout and stderr temporary files in binary write mode.
-				with open(stdout_for_external_command, 'wb') as stdout_commandfile_handler, open(stderr_for_external_command, 'wb') as stderr_commandfile_handler:
-			
-					# Run libebur128 to calculate the loudness of individual time slices of a audio file.
-					subprocess.Popen(libebur128_commands_for_time_slice_calculation, stdout=stdout_commandfile_handler, stderr=stderr_commandfile_handler, stdin=None, close_fds=True).communicate()
-			
-					# Make sure all data written to temporary stdout and stderr - files is flushed from the os cache and written to disk.
-					stdout_commandfile_handler.flush() # Flushes written data to os cache
-					os.fsync(stdout_commandfile_handler.fileno()) # Flushes os cache to disk
-					stderr_commandfile_handler.flush() # Flushes written data to os cache
-					os.fsync(stderr_commandfile_handler.fileno()) # Flushes os cache to disk
-			
-			except IOError as reason_for_error:
-				error_message = 'Error writing to stdout- or stderr - file when running command: ' * english + 'Stdout- tai stderr - tiedostoon kirjoittaminen epäonnistui ajettaessa komentoa: ' * finnish + ' '.join(libebur128_commands_for_time_slice_calculation) + '. ' + str(reason_for_error)
-				send_error_messages_to_screen_logfile_email(error_message, [])
-			except OSError as reason_for_error:
-				error_message = 'Error writing to stdout- or stderr - file when running command: ' * english + 'Stdout- tai stderr - tiedostoon kirjoittaminen epäonnistui ajettaessa komentoa: ' * finnish + ' '.join(libebur128_commands_for_time_slice_calculation) + '. ' + str(reason_for_error)
-				send_error_messages_to_screen_logfile_email(error_message, [])
-			
-			# Open files we used as stdout and stderr for the external program and read in what the program did output to those files.
-			try:
-				with open(stdout_for_external_command, 'rb') as stdout_commandfile_handler, open(stderr_for_external_command, 'rb') as stderr_commandfile_handler:
-					timeslice_loudness_calculation_stdout = stdout_commandfile_handler.read(None)
-					timeslice_loudness_calculation_stderr = stderr_commandfile_handler.read(None)
-			except IOError as reason_for_error:
-				error_message = 'Error reading from stdout- or stderr - file when running command: ' * english + 'Stdout- tai stderr - tiedoston lukeminen epäonnistui ajettaessa komentoa: ' * finnish + ' '.join(libebur128_commands_for_time_slice_calculation) + '. ' + str(reason_for_error)
-				send_error_messages_to_screen_logfile_email(error_message, [])
-			except OSError as reason_for_error:
-				error_message = 'Error reading from stdout- or stderr - file when running command: ' * english + 'Stdout- tai stderr - tiedostoon lukeminen epäonnistui ajettaessa komentoa: ' * finnish + ' '.join(libebur128_commands_for_time_slice_calculation) + '. ' + str(reason_for_error)
-				send_error_messages_to_screen_logfile_email(error_message, [])
+			# Run libebur128 to calculate the loudness of individual time slices of a audio file. Output of the program is captured through pipes.
+			timeslice_loudness_calculation_stdout, timeslice_loudness_calculation_stderr, error_message = run_external_command(libebur128_commands_for_time_slice_calculation, english, finnish)
 			
 			# Convert libebur128 output from binary to UTF-8 text.
 			timeslice_loudness_calculation_result_list = str(timeslice_loudness_calculation_stdout.decode('UTF-8')).split('\n') # Convert libebur128 output from binary to UTF-8 text, split values in the text by line feeds and insert these individual values in to a list.
 			timeslice_loudness_calculation_stderr_string = str(timeslice_loudness_calculation_stderr.decode('UTF-8')) # Convert libebur128 possible error output from binary to UTF-8 text.
 			
-			# Delete the temporary stdout and stderr - files
-			try:
-				os.remove(stdout_for_external_command)
-				os.remove(stderr_for_external_command)
-			except IOError as reason_for_error:
-				error_message = 'Error deleting stdout- or stderr - file when running command: ' * english + 'Stdout- tai stderr - tiedoston deletoiminen epäonnistui ajettaessa komentoa: ' * finnish + ' '.join(libebur128_commands_for_time_slice_calculation) + '. ' + str(reason_for_error)
-				send_error_messages_to_screen_logfile_email(error_message, [])
-			except OSError as reason_for_error:
-				error_message = 'Error deleting stdout- or stderr - file when running command: ' * english + 'Stdout- tai stderr - tiedoston deletoiminen epäonnistui ajettaessa komentoa: ' * finnish + ' '.join(libebur128_commands_for_time_slice_calculation) + '. ' + str(reason_for_error)
-				send_error_messages_to_screen_logfile_email(error_message, [])
-			
 			if '' in timeslice_loudness_calculation_result_list: # There usually is an empty item [''] at the end of the list, remove it.
 				timeslice_loudness_calculation_result_list.remove('')
 			
@@ -795,14 +1431,8 @@ def calculate_loudness_timeslices(filename, hotfolder_path, libebur128_commands_
 				debug_information_list.append(expected_number_of_time_slices)
 				debug_temporary_dict_for_timeslice_calculation_information[filename] = debug_information_list
 
-			# Wait for the other loudness calculation thread to end since it's results are needed in the next step of the process.
-			integrated_loudness_calculation_is_ready = False
-			
-			while integrated_loudness_calculation_is_ready == False: # Wait until the other thread has finished. event = set, means thread has finished.
-				if event_for_integrated_loudness_calculation.is_set():
-					integrated_loudness_calculation_is_ready = True
-				else:
-					time.sleep(1)
+			# Wait for the other loudness calculation thread to end since it's results are needed in the next step of the process. event = set, means thread has finished.
+			event_for_integrated_loudness_calculation.wait()
 		else:
 			# If we get here the file we were supposed to process vanished from disk after the main program started this thread. Print a message to the user.
 			error_message = 'VIRHE !!!!!!! Tiedosto' * finnish + 'ERROR !!!!!!! FILE' * english + ' ' + filename + ' ' + 'hävisi kovalevyltä ennen käsittelyn alkua.' * finnish + 'dissapeared from disk before processing started.' * english
@@ -857,281 +1487,1155 @@ def calculate_loudness_timeslices(filename, hotfolder_path, libebur128_commands_
 
 		catch_python_interpreter_errors(error_message_as_a_list, subroutine_name)
 
-def create_gnuplot_commands(filename, number_of_timeslices, time_slice_duration_string, timeslice_calculation_error, timeslice_calculation_error_message, timeslice_loudness_calculation_stdout, hotfolder_path, directory_for_temporary_files, directory_for_results, english, finnish):
+def get_k_weighting_filter_coefficients(sample_rate):
 
-	'''This subprocess plots an jpeg graphics file using combined results from two loudness calculation processes'''
+	"""Returns the coefficients of the two ITU-R BS.1770 K-weighting filters (high shelf pre-filter and RLB high pass filter) for the given sample rate."""
 
-	# This subroutine works like this:
-	# ---------------------------------
-	# The program checks how much time slices we have in the loudness calculation results and calculates file duration from that.
-	# Then the program generates the x - axis (time axis) information for the graphics generation. The program sets time markers (minutes or seconds) along the x - axis in even intervals taking the file duration into account.
-	# If there has been an error in loudness calculations the routine generates preset graphics with the error message on it.
-	# Then the routine generates commands needed for gnuplot and puts them in a list.
-	# The timeslice list of loudness values is written to a file, since gnuplot uses values from the file for plotting the loudness curve.
-	# Then the gnuplot commands are written to a file and a subroutine called to run gnuplot.
+	# The coefficients are calculated the same way libebur128 calculates them, so that the filters match for all sample rates, not just 48 kHz.
+	# Coefficients are returned as lists in the order: b0, b1, b2, a0, a1, a2 which is also the order the sox 'biquad' effect expects.
 
-	try:
-		global integrated_loudness_calculation_results
-		global silent
+	# High shelf pre-filter that models the acoustic effect of the head.
+	filter_frequency = 1681.974450955533
+	filter_gain = 3.999843853973347
+	filter_q = 0.7071752369554196
+	k = math.tan(math.pi * filter_frequency / sample_rate)
+	vh = math.pow(10.0, filter_gain / 20.0)
+	vb = math.pow(vh, 0.4996667741545416)
+	a0 = 1.0 + k / filter_q + k * k
+	pre_filter_coefficients = [(vh + vb * k / filter_q + k * k) / a0, 2.0 * (k * k - vh) / a0, (vh - vb * k / filter_q + k * k) / a0, 1.0, 2.0 * (k * k - 1.0) / a0, (1.0 - k / filter_q + k * k) / a0]
 
-		# Set default values for integrated loudness calculation results. Defaults will be overwritten by real results if integrated loudness calculation is successful. Defaults are used if calculation fails.
-		integrated_loudness_calculation_results_list = [0, 0, 0, True, 'Integrated loudness calculation failed to finish', -120, False] 
-		integrated_loudness = integrated_loudness_calculation_results_list[0]
-		difference_from_target_loudness = integrated_loudness_calculation_results_list[1]
-		loudness_range = integrated_loudness_calculation_results_list[2]
-		integrated_loudness_calculation_error = integrated_loudness_calculation_results_list[3]
-		integrated_loudness_calculation_error_message = integrated_loudness_calculation_results_list[4]
-		highest_peak_db = integrated_loudness_calculation_results_list[5]
-		integrated_loudness_is_below_measurement_threshold = integrated_loudness_calculation_results_list[6]
+	# RLB high pass filter.
+	filter_frequency = 38.13547087602444
+	filter_q = 0.5003270373238773
+	k = math.tan(math.pi * filter_frequency / sample_rate)
+	a0 = 1.0 + k / filter_q + k * k
+	rlb_filter_coefficients = [1.0, -2.0, 1.0, 1.0, 2.0 * (k * k - 1.0) / a0, (1.0 - k / filter_q + k * k) / a0]
 
-		commandfile_for_gnuplot = directory_for_temporary_files + os.sep + filename + '-gnuplot_commands'
-		loudness_calculation_table = directory_for_temporary_files + os.sep + filename + '-loudness_calculation_table'
-		gnuplot_temporary_output_graphicsfile = directory_for_temporary_files + os.sep + filename + '-Loudness_Results_Graphics.jpg' * english + '-Aanekkyyslaskennan_Tulokset.jpg' * finnish
-		warning_message = ''
-		sox_encountered_an_error = False
-		sox_error_message = ''
-		
-		global create_loudness_history_graphics_files
-		global create_loudness_corrected_files
-		global write_loudness_calculation_results_to_a_machine_readable_file
-		global temp_loudness_results_for_automation
-		global os_name
-		global os_version 
-		global target_loudness
+	return(pre_filter_coefficients, rlb_filter_coefficients)
 
-		error_message = ''
-		gnuplot_commands = []
+def get_channel_weights_for_loudness_calculation(channel_count):
 
-		# Save some debug information. Items are always saved in pairs (Title, value) so that the list is easy to parse later.
-		if debug_file_processing == True:
-			debug_information_list = []
-			global debug_temporary_dict_for_all_file_processing_information
+	"""Returns the EBU R128 weight for each audio channel using the same default channel order as libebur128."""
 
-			if filename in debug_temporary_dict_for_all_file_processing_information:
-				debug_information_list = debug_temporary_dict_for_all_file_processing_information[filename]
-			unix_time_in_ticks, realtime = get_realtime(english, finnish)
-			debug_information_list.append('Start Time')
-			debug_information_list.append(unix_time_in_ticks)
-			debug_information_list.append('Subprocess Name')
-			debug_information_list.append('create_gnuplot_commands')
-			debug_temporary_dict_for_all_file_processing_information[filename] = debug_information_list
-		
-		# Get loudness calculation results from the integrated loudness calculation process. Results are in list format in dictionary 'integrated_loudness_calculation_results', assing results to variables.
-		if filename in integrated_loudness_calculation_results:
-			integrated_loudness_calculation_results_list = integrated_loudness_calculation_results.pop(filename)# Get loudness results for the file and remove this information from dictionary.
-			integrated_loudness = integrated_loudness_calculation_results_list[0]
-			difference_from_target_loudness = integrated_loudness_calculation_results_list[1]
-			loudness_range = integrated_loudness_calculation_results_list[2]
-			integrated_loudness_calculation_error = integrated_loudness_calculation_results_list[3]
-			integrated_loudness_calculation_error_message = integrated_loudness_calculation_results_list[4]
-			highest_peak_db = integrated_loudness_calculation_results_list[5]
-			integrated_loudness_is_below_measurement_threshold = integrated_loudness_calculation_results_list[6]
+	# Channel order for 4 channels is: L, R, Ls, Rs and for 5 channels: L, R, C, Ls, Rs.
+	# For other channel counts the order is: L, R, C, LFE, Ls, Rs. The LFE - channel is not used in loudness calculation.
+	if channel_count == 4:
+		channel_weights = [1.0, 1.0, 1.41, 1.41]
+	elif channel_count == 5:
+		channel_weights = [1.0, 1.0, 1.0, 1.41, 1.41]
+	else:
+		channel_weights = [1.0, 1.0, 1.0, 0.0, 1.41, 1.41][0:channel_count]
 
-		# If TruePeak method was used to determine the highest peak, then it can be above 0 dBFS, add a plus sign if this is the case.
-		if highest_peak_db > 0:
-			highest_peak_db_string = '+' + str(highest_peak_db)
-		else:
-			highest_peak_db_string = str(highest_peak_db)
+		# Channels beyond 5.1 are not used in loudness calculation.
+		while len(channel_weights) < channel_count:
+			channel_weights.append(0.0)
 
+	return(channel_weights)
 
-		if create_loudness_history_graphics_files == True:
+def convert_energy_to_loudness(energy):
 
-			# If calculated loudness difference from target loudness is a positive number, create a string with a plus sign and the difference number in it.
-			if difference_from_target_loudness > 0:
-				difference_from_target_loudness_string = '+' + str(difference_from_target_loudness)
-			else:
-				difference_from_target_loudness_string = str(difference_from_target_loudness) # The loudness difference from target loudness is negative, just create a string with the negative result number in it.
+	if energy <= 0:
+		return(float('-inf'))
 
-			# Scale loudness graphics x-axis time information according to file duration.
-			# Loudness calculation is done in 3 second slices when audio duration is 12 seconds or longer.
-			# If file duration is shorter than 12 seconds then slices are 0.5 seconds each.
-			audio_duration_rounded_to_seconds = int(number_of_timeslices * float(time_slice_duration_string))
-				
-			# If file duration is shorter than 12 seconds. Time slices are 0.5 seconds each.
-			if audio_duration_rounded_to_seconds < 12:
-				plotfile_x_axis_divider = 2 # Define how many time slices there are between each printed x-axis time number.
-				plotfile_x_axis_time = 1 # Define the steps of increasing x-axis time numbers.
-				plotfile_x_axis_name = 'Seconds' * english + 'Sekunnit' * finnish
-			# File duration is 10 seconds or longer. Time slices are 3 seconds each.
-			if (audio_duration_rounded_to_seconds >= 12) and (audio_duration_rounded_to_seconds <= 60): # File duration is between 10 seconds and 1 minute.
-				plotfile_x_axis_divider = 1 # Define how many time slices there are between each printed x-axis time number.
-				plotfile_x_axis_time = 3 # Define the steps of increasing x-axis time numbers.
-				plotfile_x_axis_name = 'Seconds' * english + 'Sekunnit' * finnish # X-axis time name (seconds / minutes hours).
+	return(-0.691 + 10 * math.log(energy, 10))
 
-			if (audio_duration_rounded_to_seconds > 60) and (audio_duration_rounded_to_seconds <= 180): # File duration is between 1 and 3 minutes.
-				plotfile_x_axis_divider = 5
-				plotfile_x_axis_time = 15
-				plotfile_x_axis_name = 'Seconds' * english + 'Sekunnit' * finnish
+def calculate_loudness_from_100ms_block_energies(list_of_100ms_block_energies, time_slice_duration_string):
 
-			if (audio_duration_rounded_to_seconds > 180) and (audio_duration_rounded_to_seconds < 1800): # File duration is between 3 minutes and 30 minutes.
-				plotfile_x_axis_divider = 20
-				plotfile_x_axis_time = 1
-				plotfile_x_axis_name = 'Minutes' * english + 'Minuutit' * finnish
+	"""This subroutine calculates integrated loudness, loudness range and short-term loudness time slices from channel weighted 100 ms block energies."""
 
-			if (audio_duration_rounded_to_seconds >= 1800) and (audio_duration_rounded_to_seconds < 3600): # File duration is between 30 minutes and 1 hour.
-				plotfile_x_axis_divider = 60
-				plotfile_x_axis_time = 3
-				plotfile_x_axis_name = 'Minutes' * english + 'Minuutit' * finnish
+	# Each item in 'list_of_100ms_block_energies' is the sum of the channel weighted mean square values of K-weighted audio during 100 ms.
+	# Integrated loudness is calculated from 400 ms gating blocks that overlap by 75 %, so one gating block is the mean of four consecutive 100 ms blocks.
+	# Loudness range is calculated from 3 second short-term blocks taken once every second. The time slices are 3 second short-term loudness values taken at the end of each time slice.
+	# All calculations follow EBU R128 / ITU-R BS.1770 and are done the same way libebur128 does them.
 
-			if (audio_duration_rounded_to_seconds >= 3600) and (audio_duration_rounded_to_seconds < 7200): # File duration is between 1 and 2 hours.
-				plotfile_x_axis_divider = 100
-				plotfile_x_axis_time = 5
-				plotfile_x_axis_name = 'Minutes' * english + 'Minuutit' * finnish
+	absolute_gate_energy = math.pow(10.0, (-70 + 0.691) / 10.0) # Absolute gate is -70 LUFS.
+	number_of_100ms_blocks = len(list_of_100ms_block_energies)
+	integrated_loudness = float('-inf')
+	loudness_range = 0.0
+	list_of_timeslice_loudness_values = []
 
-			if (audio_duration_rounded_to_seconds >= 7200) and (audio_duration_rounded_to_seconds < 21600): # File duration is between 2 and 6 hours.
-				plotfile_x_axis_divider = 300
-				plotfile_x_axis_time = 15
-				plotfile_x_axis_name = 'Minutes' * english + 'Minuutit' * finnish
+	#################################
+	# Calculate integrated loudness #
+	#################################
+	absolute_gated_block_energies = []
 
-			if (audio_duration_rounded_to_seconds >= 21600) and (audio_duration_rounded_to_seconds < 43200): # File duration is between 6 and 12 hours.
-				plotfile_x_axis_divider = 600
-				plotfile_x_axis_time = 30
-				plotfile_x_axis_name = 'Minutes' * english + 'Minuutit' * finnish
+	for block_number in range(3, number_of_100ms_blocks):
+		gating_block_energy = sum(list_of_100ms_block_energies[block_number - 3:block_number + 1]) / 4
+		if gating_block_energy >= absolute_gate_energy:
+			absolute_gated_block_energies.append(gating_block_energy)
 
-			if (audio_duration_rounded_to_seconds >= 43200) and (audio_duration_rounded_to_seconds < 86400): # File duration is between 12 and 24 hours.
-				plotfile_x_axis_divider = 1200
-				plotfile_x_axis_time = 1
-				plotfile_x_axis_name = 'Hours' * english + 'Tunnit' * finnish
+	if len(absolute_gated_block_energies) > 0:
 
-			if (audio_duration_rounded_to_seconds >= 86400) and (audio_duration_rounded_to_seconds < 172800): # File duration is between 24 and 48 hours.
-				plotfile_x_axis_divider = 2400
-				plotfile_x_axis_time = 2
-				plotfile_x_axis_name = 'Hours' * english + 'Tunnit' * finnish
+		# Relative gate is 10 LU below the loudness of blocks that passed the absolute gate.
+		relative_gate_energy = (sum(absolute_gated_block_energies) / len(absolute_gated_block_energies)) * 0.1
+		relative_gated_block_energies = []
 
-			if (audio_duration_rounded_to_seconds >= 172800) and (audio_duration_rounded_to_seconds < 345600): # File duration is between 48 and 96 hours.
-				plotfile_x_axis_divider = 4800
-				plotfile_x_axis_time = 4
-				plotfile_x_axis_name = 'Hours' * english + 'Tunnit' * finnish
+		for gating_block_energy in absolute_gated_block_energies:
+			if gating_block_energy >= relative_gate_energy:
+				relative_gated_block_energies.append(gating_block_energy)
 
-			if (audio_duration_rounded_to_seconds >= 345600) and (audio_duration_rounded_to_seconds < 691200): # File duration is between 96 and 192 hours.
-				plotfile_x_axis_divider = 9600
-				plotfile_x_axis_time = 8
-				plotfile_x_axis_name = 'Hours' * english + 'Tunnit' * finnish
+		if len(relative_gated_block_energies) > 0:
+			integrated_loudness = convert_energy_to_loudness(sum(relative_gated_block_energies) / len(relative_gated_block_energies))
 
-			if audio_duration_rounded_to_seconds >= 691200: # File duration is over 192 hours.
-				plotfile_x_axis_divider = 28800
-				plotfile_x_axis_time = 1
-				plotfile_x_axis_name = 'Days' * english + 'Päiviä' * finnish
+	############################
+	# Calculate loudness range #
+	############################
+	absolute_gated_block_energies = []
 
-			# Generate x-axis texts needed for gnuplot and store them in a list.
-			plotfile_x_axis_time_information=[]
-			if timeslice_calculation_error == False:
-				plotfile_x_axis_time_information.append('set xtics (')
-				counter=1
-				for counter in range(0, int(number_of_timeslices / (plotfile_x_axis_divider) + 1), 1):
-					plotfile_x_axis_time_information.append('\"' + str(counter * plotfile_x_axis_time) + '\" ' + str(counter * plotfile_x_axis_divider) + ' ')
-					if counter <  int(number_of_timeslices / (plotfile_x_axis_divider)):
-						plotfile_x_axis_time_information.append(', ')
-				plotfile_x_axis_time_information.append(')')
-				plotfile_x_axis_time_information = ''.join(plotfile_x_axis_time_information)
-		
-		# Save some debug information.
-		if debug_file_processing == True:
-			debug_information_list.append('Message')
-			debug_information_list.append('Calling subroutine: get_audiofile_info_with_sox_and_determine_output_format')
-		
-		# Get technical info from audio file and determine what the output format will be
-		channel_count, sample_rate, bit_depth, sample_count, flac_compression_level, output_format_for_intermediate_files, output_format_for_final_file, audio_channels_will_be_split_to_separate_mono_files, audio_duration, output_file_too_big_to_split_to_separate_wav_channels, sox_encountered_an_error, sox_error_message = get_audiofile_info_with_sox_and_determine_output_format(directory_for_temporary_files, hotfolder_path, filename)
+	for block_number in range(29, number_of_100ms_blocks, 10):
+		short_term_block_energy = sum(list_of_100ms_block_energies[block_number - 29:block_number + 1]) / 30
+		if short_term_block_energy >= absolute_gate_energy:
+			absolute_gated_block_energies.append(short_term_block_energy)
 
-		# Save some debug information.
-		if debug_file_processing == True:
-			debug_information_list.append('Message')
-			debug_information_list.append('Returned from subroutine: get_audiofile_info_with_sox_and_determine_output_format')
+	if len(absolute_gated_block_energies) > 0:
 
-		# Write details of loudness measurement of the file to a debug logfile.
-		# This is a debugging option.
-		if (integrated_loudness_calculation_error == False) and (timeslice_calculation_error == False):
+		# Relative gate for loudness range is 20 LU below the loudness of blocks that passed the absolute gate.
+		relative_gate_energy = (sum(absolute_gated_block_energies) / len(absolute_gated_block_energies)) * 0.01
+		relative_gated_block_energies = []
 
-			if save_all_measurement_results_to_a_single_debug_file == True:
+		for short_term_block_energy in absolute_gated_block_energies:
+			if short_term_block_energy >= relative_gate_energy:
+				relative_gated_block_energies.append(short_term_block_energy)
 
-				global loudness_calculation_logfile_path
+		if len(relative_gated_block_energies) > 0:
 
-				if loudness_calculation_logfile_path == '':
-					loudness_calculation_logfile_path = directory_for_error_logs + os.sep + 'loudness_calculation_log-' + str(get_realtime(english, finnish)[1]) + '.txt'
+			# Loudness range is the difference between the 10th and 95th percentiles of the short-term loudness distribution.
+			relative_gated_block_energies.sort()
+			number_of_gated_blocks = len(relative_gated_block_energies)
+			low_percentile_energy = relative_gated_block_energies[int((number_of_gated_blocks - 1) * 0.1 + 0.5)]
+			high_percentile_energy = relative_gated_block_energies[int((number_of_gated_blocks - 1) * 0.95 + 0.5)]
+			loudness_range = convert_energy_to_loudness(high_percentile_energy) - convert_energy_to_loudness(low_percentile_energy)
 
-				loudness_calculation_data = filename + ',EndOFFileName,' + str(integrated_loudness) + ',' + str(loudness_range) + ',' + str(highest_peak_db) + ',' + str(channel_count) + ',' + str(sample_rate) + ',' + str(bit_depth) + ',' + str(int(audio_duration)) + '\n'
+	########################################
+	# Calculate short-term loudness slices #
+	########################################
+	number_of_100ms_blocks_in_a_time_slice = int(round(float(time_slice_duration_string) * 10))
 
-				# Save some debug information.
-				if debug_file_processing == True:
-					debug_information_list.append('Message')
-					debug_information_list.append('Calling subroutine: debug_write_loudness_calculation_info_to_a_logfile')
+	for block_number in range(number_of_100ms_blocks_in_a_time_slice - 1, number_of_100ms_blocks, number_of_100ms_blocks_in_a_time_slice):
+		# At the start of the file there is less than 3 seconds of audio, the missing blocks are treated as silence the same way libebur128 does it.
+		short_term_block_energy = sum(list_of_100ms_block_energies[max(0, block_number - 29):block_number + 1]) / 30
+		list_of_timeslice_loudness_values.append(convert_energy_to_loudness(short_term_block_energy))
 
-				debug_write_loudness_calculation_info_to_a_logfile(loudness_calculation_data, loudness_calculation_logfile_path)
+	return(integrated_loudness, loudness_range, list_of_timeslice_loudness_values)
 
-				# Save some debug information.
-				if debug_file_processing == True:
-					debug_information_list.append('Message')
-					debug_information_list.append('Returned from subroutine: debug_write_loudness_calculation_info_to_a_logfile')
+def read_wav_format_information_from_a_stream(stream_handler):
 
+	"""Reads a wav - header from a stream and returns channel count, sample rate, bit depth, wav format tag and size of audio data. The stream is left at the start of audio data."""
 
-		# Write loudness calculation results of each file to separate text files in results directory.
-		# This is a user definable option.
-		if write_loudness_calculation_results_to_a_machine_readable_file == True:
+	# This subroutine can read headers from pipes, it never seeks backwards in the stream.
+	# If the header can not be parsed, zeros are returned.
+	# The size of audio data is zero if it is not known, for example when a wav is written to a pipe and the size in the header is 0xFFFFFFFF.
+	channel_count = 0
+	sample_rate = 0
+	bit_depth = 0
+	format_tag = 0
+	data_size = 0
+	rf64_data_size = 0
 
-			# Add info for all mixes found in the file to dictionary that is used to write the machine readable results file.
+	riff_header = stream_handler.read(12)
 
-			error_code = 0
-			error_message = ' '
+	if (len(riff_header) != 12) or (riff_header[0:4] not in [b'RIFF', b'RF64']) or (riff_header[8:12] != b'WAVE'):
+		return(0, 0, 0, 0, 0)
 
-			if integrated_loudness_calculation_error == True:
-				error_code = 2
-				error_message = 'ERROR !!! in libebur128 integrated loudness calculation: ' * english + 'VIRHE !!! libebur128:n keskimääräisen äänekkyyden laskennassa: ' * finnish + integrated_loudness_calculation_error_message
-		
-			if integrated_loudness_is_below_measurement_threshold == True:
-				error_code = 1
-				# variable 'error_message' is set by the previous if statement for this situation also. In this case it says 'Loudness is below measurement threshold'. The contents for 'error_message' is taken by the previous if statement from the variable 'integrated_loudness_calculation_error_message'.
+	while True:
+		chunk_header = stream_handler.read(8)
 
-			list_of_filenames = []
+		if len(chunk_header) != 8:
+			return(0, 0, 0, 0, 0)
 
-			if error_code == 0:
+		chunk_name = chunk_header[0:4]
+		chunk_size = struct.unpack('<I', chunk_header[4:8])[0]
 
-				number_of_files_in_this_mix = 1
+		# Audio data starts right after the data - chunk header.
+		if chunk_name == b'data':
+			data_size = chunk_size
 
-				if audio_channels_will_be_split_to_separate_mono_files == True:
-					number_of_files_in_this_mix = int(channel_count)
+			# In RF64 the real size of audio data is stored in the ds64 - chunk. FFmpeg and sox write 0xFFFFFFFF as the size when the wav is written to a pipe.
+			if data_size == 4294967295:
+				data_size = rf64_data_size
+			break
 
-				filename_and_extension = os.path.splitext(filename)
+		chunk_data = stream_handler.read(chunk_size + (chunk_size % 2)) # Chunks are padded to even byte boundaries.
 
-				# The combined channels in final output file exceeds the max file size and the file needs to be split to separate mono files.
-				# Create output filenames for the machine readable readable results file.
-				if number_of_files_in_this_mix > 1:
-				
-					for counter in range(1, channel_count + 1):
-						split_channel_targetfile_name = filename_and_extension[0] + '-Channel-' * english + '-Kanava-' * finnish + str(counter) + '_' + target_loudness + '_LUFS.' + output_format_for_final_file
-						list_of_filenames.append(split_channel_targetfile_name)
+		# The stream ended in the middle of a chunk.
+		if len(chunk_data) < chunk_size:
+			return(0, 0, 0, 0, 0)
 
-				else:
-					# In this case the output file will be a single file.
-					# Create output filename for the machine readable readable results file.
-					list_of_filenames.append(str(filename_and_extension[0] + '_' + target_loudness + '_LUFS.' + output_format_for_final_file))
+		if (chunk_name == b'fmt ') and (len(chunk_data) < 16):
+			return(0, 0, 0, 0, 0)
 
-				# Get values stored for machine readable results file, and complete loudness result information for the file.
-				if filename in temp_loudness_results_for_automation:
+		if chunk_name == b'fmt ':
+			format_tag, channel_count, sample_rate = struct.unpack('<HHI', chunk_data[0:8])
+			bit_depth = struct.unpack('<H', chunk_data[14:16])[0]
 
-					original_file_name, list_of_values =  temp_loudness_results_for_automation[filename]
+			# In WAVE_FORMAT_EXTENSIBLE the real format tag is stored in the start of the sub format GUID.
+			if (format_tag == 65534) and (len(chunk_data) >= 26):
+				format_tag = struct.unpack('<H', chunk_data[24:26])[0]
 
-					# list_of_values[0] = number_of_this_mix # This value is already correct and we don't need to change it.
-					# list_of_values[1] = total_number_of_supported_mixes_in_original_file # This value is already correct and we don't need to change it.
-					# list_of_values[2] = total_number_of_mixes_in_original_file # This value is already correct and we don't need to change it.
-					list_of_values[3] = create_loudness_corrected_files
-					list_of_values[4] = number_of_files_in_this_mix
-					list_of_values[5] = integrated_loudness
-					list_of_values[6] = loudness_range
-					list_of_values[7] = highest_peak_db
-					list_of_values[8] = channel_count
-					list_of_values[9] = sample_rate
-					list_of_values[10] = bit_depth
-					list_of_values[11] = audio_duration
+		if (chunk_name == b'ds64') and (len(chunk_data) >= 16):
+			rf64_data_size = struct.unpack('<Q', chunk_data[8:16])[0]
 
-					# If some subprocess has already stored an error_code or error_message, then don't change them.
-					if list_of_values[12] == 0:
-						list_of_values[12] = error_code
-					if list_of_values[13] == '':
-						list_of_values[13] = error_message
+	return(channel_count, sample_rate, bit_depth, format_tag, data_size)
 
-					list_of_values[14] = list_of_filenames
+def map_wav_audio_data_to_memory(file_handler, data_size):
 
-					temp_loudness_results_for_automation[filename] = [original_file_name, list_of_values]
+	"""Memory maps a wav - file that has been read up to the start of audio data. Returns the memory mapping and the positions where audio data starts and ends, or None if the file can not be memory mapped."""
+
+	# Pipes can not be memory mapped, they are read with normal reads.
+	# NumPy reads samples through memoryviews of the mapping, so audio data is read straight from the page cache without copying it.
+	if os.path.isfile(file_handler.name) == False:
+		return(None, 0, 0)
+
+	try:
+		audio_data_start = file_handler.tell()
+		file_mapping = mmap.mmap(file_handler.fileno(), 0, access=mmap.ACCESS_READ)
+	except ValueError:
+		return(None, 0, 0)
+	except OSError:
+		return(None, 0, 0)
+
+	# The file is read once from start to end, let the kernel read ahead.
+	if hasattr(file_mapping, 'madvise') == True:
+		file_mapping.madvise(mmap.MADV_SEQUENTIAL)
+
+	audio_data_end = len(file_mapping)
+
+	if (data_size > 0) and (audio_data_start + data_size < audio_data_end):
+		audio_data_end = audio_data_start + data_size
+
+	return(file_mapping, audio_data_start, audio_data_end)
+
+def release_memory_mapped_audio_data(file_mapping, release_start, release_end):
+
+	"""Releases pages of a memory mapped file that have already been processed. Returns the position up to where the mapping has been released."""
+
+	# The pages stay in the page cache, they are only removed from the memory of this process. If the pages are needed again, they are mapped again from the page cache.
+	# This keeps the memory used by the program small no matter how big the file is. Only whole pages can be released.
+	release_end = int(release_end / mmap.PAGESIZE) * mmap.PAGESIZE
+
+	if (hasattr(file_mapping, 'madvise') == False) or (release_end <= release_start):
+		return(release_start)
+
+	file_mapping.madvise(mmap.MADV_DONTNEED, release_start, release_end - release_start)
+
+	return(release_end)
+
+def get_k_weighting_impulse_response(sample_rate):
+
+	"""Returns the impulse response of the K-weighting filter as a NumPy array. Impulse responses are calculated only once for each sample rate."""
+
+	if sample_rate in k_weighting_impulse_responses:
+		return(k_weighting_impulse_responses[sample_rate])
+
+	# Both K-weighting filters decay in a couple of milliseconds, 100 ms of the impulse response is more than enough to represent the filters accurately.
+	impulse_response_length = int(sample_rate / 10)
+	impulse_response = [0.0] * impulse_response_length
+	impulse_response[0] = 1.0
+
+	# Run the impulse through both biquads.
+	for b0, b1, b2, a0, a1, a2 in get_k_weighting_filter_coefficients(sample_rate):
+		x1 = x2 = y1 = y2 = 0.0
+
+		for counter in range(0, impulse_response_length):
+			x0 = impulse_response[counter]
+			y0 = (b0 * x0 + b1 * x1 + b2 * x2 - a1 * y1 - a2 * y2) / a0
+			x2 = x1
+			x1 = x0
+			y2 = y1
+			y1 = y0
+			impulse_response[counter] = y0
+
+	k_weighting_impulse_responses[sample_rate] = numpy.array(impulse_response)
+
+	return(k_weighting_impulse_responses[sample_rate])
+
+def get_true_peak_interpolation_filters(sample_rate):
+
+	"""Returns the polyphase filters that libebur128 uses to oversample audio for TruePeak measurement."""
+
+	# libebur128 oversamples audio 4 times when sample rate is below 96 kHz and 2 times when it is below 192 kHz. Higher sample rates are not oversampled.
+	if sample_rate < 96000:
+		oversampling_factor = 4
+	elif sample_rate < 192000:
+		oversampling_factor = 2
+	else:
+		return([numpy.array([1.0])])
+
+	# The interpolation filter is a 49 tap Hann windowed sinc. Every oversampled output phase uses every n:th tap of the filter.
+	number_of_taps = 49
+	interpolation_filter = []
+
+	for counter in range(0, number_of_taps):
+		m = counter - (number_of_taps - 1) / 2.0
+		coefficient = 1.0
+
+		if abs(m) > 0.000000001:
+			coefficient = math.sin(m * math.pi / oversampling_factor) / (m * math.pi / oversampling_factor)
+
+		coefficient = coefficient * 0.5 * (1 - math.cos(2 * math.pi * counter / (number_of_taps - 1)))
+		interpolation_filter.append(coefficient)
+
+	list_of_phase_filters = []
+
+	for phase in range(0, oversampling_factor):
+		list_of_phase_filters.append(numpy.array(interpolation_filter[phase::oversampling_factor]))
+
+	return(list_of_phase_filters)
+
+def convert_wav_data_to_numpy_array(audio_data, channel_count, bit_depth, format_tag):
+
+	"""Converts interleaved wav - audio data to a two dimensional NumPy array of floats, one column for each channel."""
+
+	# Format tag 1 means integer audio and 3 means floating point audio.
+	if (format_tag == 1) and (bit_depth == 16):
+		audio_samples = numpy.frombuffer(audio_data, dtype='<i2') / 32768.0
+
+	elif (format_tag == 1) and (bit_depth == 24):
+		# NumPy has no 24 bit integer type, so the three bytes of each sample are combined to a 32 bit integer and the sign is restored.
+		sample_bytes = numpy.frombuffer(audio_data, dtype=numpy.uint8).reshape(-1, 3).astype(numpy.int32)
+		audio_samples = sample_bytes[:, 0] | (sample_bytes[:, 1] << 8) | (sample_bytes[:, 2] << 16)
+		audio_samples = numpy.where(audio_samples >= 8388608, audio_samples - 16777216, audio_samples) / 8388608.0
+
+	elif (format_tag == 1) and (bit_depth == 32):
+		audio_samples = numpy.frombuffer(audio_data, dtype='<i4') / 2147483648.0
+
+	elif (format_tag == 3) and (bit_depth == 32):
+		audio_samples = numpy.frombuffer(audio_data, dtype='<f4').astype(numpy.float64)
+
+	elif (format_tag == 3) and (bit_depth == 64):
+		audio_samples = numpy.frombuffer(audio_data, dtype='<f8')
+
+	return(audio_samples.reshape(-1, channel_count))
+
+def calculate_100ms_block_energies_and_peak_with_numpy(file_to_process, peak_measurement_method, english, finnish, content_hash_results=None):
+
+	"""Reads a wav - file in-process and calculates the energies of K-weighted 100 ms audio blocks and the highest sample or TruePeak of the file with NumPy."""
+
+	# This subroutine works like this:
+	# ---------------------------------
+	# The wav - file is memory mapped and processed in 10 second chunks, pipes are read in chunks of the same size. Every chunk is K-weighted by convolving it with the impulse response of the K-weighting filter in frequency domain (FFT overlap - add).
+	# The part of the convolution that extends past the end of the chunk is added to the start of the next chunk, so the result is the same as filtering the whole file at once.
+	# The channel weighted energy of each 100 ms block is calculated from the filtered chunk, the results are used with calculate_loudness_from_100ms_block_energies.
+	# TruePeak is measured from audio oversampled with the polyphase interpolation filter of libebur128. All phases of the filter are applied to all channels at once with one matrix product, one second of audio at a time to keep the result small.
+	# Pages of the memory mapping are released when a chunk has been processed, so memory used does not grow with the size of the file. The mapping is closed when the file has been read.
+	# An empty list of block energies is returned if the file can not be measured with NumPy, then the file is measured with sox instead.
+	# If the list 'content_hash_results' is given, the SHA-256 hash of the whole file is calculated from the data read for the measurement and the size of the file and the hash are appended to the list. This is done only when the whole memory mapped file was measured.
+
+	list_of_100ms_block_energies = []
+	highest_peak_float = 0.0
+	channel_count = 0
+	sample_rate = 0
+	bit_depth = 0
+	format_tag = 0
+	data_size = 0
+	error_message = ''
+	supported_wav_formats = [[1, 16], [1, 24], [1, 32], [3, 32], [3, 64]] # Pairs of [format tag, bit depth].
+	file_mapping = None
+	audio_data_memoryview = None
+	audio_data = None
+	audio_samples = None
+	content_hash = None
+
+	try:
+		with open(file_to_process, 'rb') as audio_file_handler:
+
+			channel_count, sample_rate, bit_depth, format_tag, data_size = read_wav_format_information_from_a_stream(audio_file_handler)
+
+			if (channel_count == 0) or (sample_rate == 0) or ([format_tag, bit_depth] not in supported_wav_formats):
+				error_message = 'File format is not supported in NumPy loudness measurement: ' * english + 'Tiedostoformaattia ei tueta NumPy äänekkyysmittauksessa: ' * finnish + 'channels = ' + str(channel_count) + ', sample rate = ' + str(sample_rate) + ', bit depth = ' + str(bit_depth) + ', format tag = ' + str(format_tag)
+				return(list_of_100ms_block_energies, highest_peak_float, channel_count, sample_rate, error_message)
+
+			channel_weights = numpy.array(get_channel_weights_for_loudness_calculation(channel_count))
+			samples_in_100ms = int((sample_rate + 5) / 10) # Calculate the block size the same way libebur128 does it.
+			bytes_in_one_sample_frame = int(bit_depth / 8) * channel_count
+			samples_in_a_chunk = samples_in_100ms * 100
+
+			impulse_response = get_k_weighting_impulse_response(sample_rate)
+			overlap_length = len(impulse_response) - 1
+
+			# FFT size needs to be long enough for the linear convolution of the chunk and the impulse response, a power of two is the fastest.
+			fft_size = 2 ** int(math.ceil(math.log(samples_in_a_chunk + overlap_length, 2)))
+			impulse_response_spectrum = numpy.fft.rfft(impulse_response, fft_size).reshape(-1, 1)
+			filter_overlap = numpy.zeros((overlap_length, channel_count))
+
+			# Each column of the polyphase matrix is one phase of the TruePeak interpolation filter in reverse order, so that multiplying a window of samples with the matrix gives the oversampled samples of all phases.
+			# Phases with fewer taps than the first one are padded with zeros in the start of the column, they produce the same samples as without padding.
+			if peak_measurement_method == '--peak=true':
+				list_of_phase_filters = get_true_peak_interpolation_filters(sample_rate)
+				number_of_taps_in_a_phase = len(list_of_phase_filters[0])
+				polyphase_matrix = numpy.zeros((number_of_taps_in_a_phase, len(list_of_phase_filters)))
+
+				for phase_number in range(0, len(list_of_phase_filters)):
+					phase_filter = list_of_phase_filters[phase_number]
+					polyphase_matrix[number_of_taps_in_a_phase - len(phase_filter):, phase_number] = phase_filter[::-1]
+
+				interpolation_history = numpy.zeros((number_of_taps_in_a_phase - 1, channel_count))
+
+			# If the size of audio data is not known, read until the end of the file. This way audio can also be read from a pipe.
+			bytes_remaining = data_size
+
+			if bytes_remaining == 0:
+				bytes_remaining = sys.maxsize
+
+			file_mapping, read_position, audio_data_end = map_wav_audio_data_to_memory(audio_file_handler, data_size)
+			released_position = 0
+
+			if file_mapping != None:
+				bytes_remaining = audio_data_end - read_position
+				audio_data_memoryview = memoryview(file_mapping)
+
+				# The hash of the file content is calculated from the headers before audio data, every chunk of audio data and the chunks after it.
+				if content_hash_results != None:
+					content_hash = hashlib.sha256()
+					content_hash.update(audio_data_memoryview[:read_position])
+
+			while bytes_remaining > 0:
+
+				if file_mapping != None:
+					released_position = release_memory_mapped_audio_data(file_mapping, released_position, read_position)
+					audio_data = audio_data_memoryview[read_position:read_position + min(samples_in_a_chunk * bytes_in_one_sample_frame, bytes_remaining)]
+					read_position = read_position + len(audio_data)
+				else:
+					audio_data = audio_file_handler.read(min(samples_in_a_chunk * bytes_in_one_sample_frame, bytes_remaining))
+
+				bytes_remaining = bytes_remaining - len(audio_data)
+
+				if content_hash != None:
+					content_hash.update(audio_data)
+
+				number_of_sample_frames = int(len(audio_data) / bytes_in_one_sample_frame)
+
+				if number_of_sample_frames == 0:
+					break
+
+				audio_samples = convert_wav_data_to_numpy_array(audio_data[:number_of_sample_frames * bytes_in_one_sample_frame], channel_count, bit_depth, format_tag)
+
+				# Measure the highest peak.
+				highest_peak_float = max(highest_peak_float, float(numpy.abs(audio_samples).max()))
+
+				if peak_measurement_method == '--peak=true':
+					# Every phase of the interpolation filter produces one of the oversampled samples between the original samples.
+					# The end of the previous chunk is kept as history, so that filtering continues seamlessly over chunk boundaries.
+					# The windows are views to the audio, the samples are not copied. Numpy needs to be version 1.20 or newer for sliding_window_view.
+					audio_samples_with_history = numpy.concatenate((interpolation_history, audio_samples))
+
+					for slice_start in range(0, number_of_sample_frames, samples_in_100ms * 10):
+						audio_slice = audio_samples_with_history[slice_start:slice_start + samples_in_100ms * 10 + number_of_taps_in_a_phase - 1]
+						windows_of_samples = numpy.lib.stride_tricks.sliding_window_view(audio_slice, number_of_taps_in_a_phase, axis=0)
+						oversampled_audio = numpy.matmul(windows_of_samples, polyphase_matrix)
+						highest_peak_float = max(highest_peak_float, float(numpy.abs(oversampled_audio).max()))
+
+					interpolation_history = audio_samples_with_history[len(audio_samples_with_history) - len(interpolation_history):]
+
+				# K-weight the chunk.
+				filtered_audio = numpy.fft.irfft(numpy.fft.rfft(audio_samples, fft_size, axis=0) * impulse_response_spectrum, fft_size, axis=0)[:number_of_sample_frames + overlap_length]
+				filtered_audio[:overlap_length] = filtered_audio[:overlap_length] + filter_overlap
+				filter_overlap = filtered_audio[number_of_sample_frames:]
+				filtered_audio = filtered_audio[:number_of_sample_frames]
+
+				# Calculate the channel weighted energy of every complete 100 ms block in the chunk.
+				# Chunks are a multiple of 100 ms long, so only the last chunk of the file may have an incomplete block. libebur128 does not use the incomplete block either.
+				number_of_blocks = int(number_of_sample_frames / samples_in_100ms)
+
+				if number_of_blocks > 0:
+					channel_weighted_energies = numpy.dot(filtered_audio[:number_of_blocks * samples_in_100ms] ** 2, channel_weights)
+					block_energies = channel_weighted_energies.reshape(number_of_blocks, samples_in_100ms).sum(axis=1) / samples_in_100ms
+					list_of_100ms_block_energies.extend(block_energies.tolist())
+
+			if (content_hash != None) and (read_position == audio_data_end):
+				content_hash.update(audio_data_memoryview[audio_data_end:])
+				content_hash_results.extend([len(file_mapping), content_hash.hexdigest()])
+
+	except IOError as reason_for_error:
+		error_message = 'Error reading file: ' * english + 'Tiedoston lukeminen epäonnistui: ' * finnish + file_to_process + '. ' + str(reason_for_error)
+		send_error_messages_to_screen_logfile_email(error_message, [])
+		list_of_100ms_block_energies = []
+	except OSError as reason_for_error:
+		error_message = 'Error reading file: ' * english + 'Tiedoston lukeminen epäonnistui: ' * finnish + file_to_process + '. ' + str(reason_for_error)
+		send_error_messages_to_screen_logfile_email(error_message, [])
+		list_of_100ms_block_energies = []
+	finally:
+		# The memory mapping can be closed only after all views to it have been released. Float samples are read straight from the mapping, so they are views too.
+		audio_data = None
+		audio_samples = None
+
+		if audio_data_memoryview != None:
+			audio_data_memoryview.release()
+		if file_mapping != None:
+			file_mapping.close()
+
+	return(list_of_100ms_block_energies, highest_peak_float, channel_count, sample_rate, error_message)
+
+def measure_block_energies_and_peak_from_a_pipe(measurement_pipe_path, measurement_results, english, finnish):
+
+	"""Measures the energies of 100 ms blocks and the highest peak of a wav - stream written to a pipe with NumPy and appends the results to the list 'measurement_results'."""
+
+	try:
+		global peak_measurement_method
+
+		list_of_100ms_block_energies, highest_peak_float, channel_count, sample_rate, error_message = calculate_100ms_block_energies_and_peak_with_numpy(measurement_pipe_path, peak_measurement_method, english, finnish)
+		measurement_results.extend([list_of_100ms_block_energies, highest_peak_float, channel_count, sample_rate, error_message])
+
+	except Exception:
+		exc_type, exc_value, exc_traceback = sys.exc_info()
+		error_message_as_a_list = traceback.format_exception(exc_type, exc_value, exc_traceback)
+		subroutine_name = 'measure_block_energies_and_peak_from_a_pipe'
+		catch_python_interpreter_errors(error_message_as_a_list, subroutine_name)
+
+def decode_file_with_sox_and_measure_it_with_numpy(file_to_process, directory_for_temporary_files, english, finnish):
+
+	'''This subroutine decodes a file NumPy can not read with sox to a pipe and measures the pipe with NumPy'''
+
+	# This subroutine works like this:
+	# ---------------------------------
+	# Sox only decodes the file to 32 bit float wav, the audio is not changed in any other way. The pipe is read in a thread with calculate_100ms_block_energies_and_peak_with_numpy,
+	# so K-weighting and the peak or TruePeak measurement both use the original samples, the same way libebur128 measures them in its two separate passes.
+	# When sox has finished, the pipe is opened and closed for writing until the thread has finished, so that the thread does not wait forever for a pipe sox did not open.
+	# If the measurement stops before the end of the stream, sox is stopped, otherwise it would wait forever for the pipe to be read.
+	# Returns the same values as calculate_100ms_block_energies_and_peak_with_numpy and the sox commandline and the text sox printed to stderr.
+
+	list_of_100ms_block_energies = []
+	highest_peak_float = float('0')
+	channel_count = 0
+	sample_rate = 0
+	error_message = ''
+	measurement_results = []
+	sox_stderr = bytearray()
+	measurement_pipe_path = directory_for_temporary_files + os.sep + os.path.basename(file_to_process) + '-single_pass_measurement_pipe'
+	sox_commandline = ['sox', file_to_process, '-t', 'wav', '-e', 'floating-point', '-b', '32', measurement_pipe_path]
+
+	try:
+		try:
+			if os.path.exists(measurement_pipe_path):
+				os.remove(measurement_pipe_path)
+			os.mkfifo(measurement_pipe_path)
+		except IOError as reason_for_error:
+			error_message = 'Error creating a pipe for loudness measurement ' * english + 'Äänekkyysmittauksen putken luominen epäonnistui ' * finnish + str(reason_for_error)
+			send_error_messages_to_screen_logfile_email(error_message, [])
+			return(list_of_100ms_block_energies, highest_peak_float, channel_count, sample_rate, error_message, sox_commandline, '')
+		except OSError as reason_for_error:
+			error_message = 'Error creating a pipe for loudness measurement ' * english + 'Äänekkyysmittauksen putken luominen epäonnistui ' * finnish + str(reason_for_error)
+			send_error_messages_to_screen_logfile_email(error_message, [])
+			return(list_of_100ms_block_energies, highest_peak_float, channel_count, sample_rate, error_message, sox_commandline, '')
+
+		measurement_thread = threading.Thread(target=measure_block_energies_and_peak_from_a_pipe, args=(measurement_pipe_path, measurement_results, english, finnish)) # Create a process instance.
+		measurement_thread.start() # Start the process in it'own thread.
+		sox_process = None
+
+		try:
+			sox_process = subprocess.Popen(sox_commandline, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, stdin=None, close_fds=True)
+			stderr_reader_thread = threading.Thread(target=read_output_of_external_command, args=(sox_process.stderr, sox_stderr, maximum_external_command_output_size))
+			stderr_reader_thread.start()
+		except IOError as reason_for_error:
+			error_message = 'Error running command: ' * english + 'Komennon ajaminen epäonnistui: ' * finnish + ' '.join(sox_commandline) + '. ' + str(reason_for_error)
+			send_error_messages_to_screen_logfile_email(error_message, [])
+		except OSError as reason_for_error:
+			error_message = 'Error running command: ' * english + 'Komennon ajaminen epäonnistui: ' * finnish + ' '.join(sox_commandline) + '. ' + str(reason_for_error)
+			send_error_messages_to_screen_logfile_email(error_message, [])
+
+		# If sox stopped before opening the pipe, the measurement thread is still waiting for the pipe to be opened.
+		while measurement_thread.is_alive() == True:
+			if (sox_process == None) or (sox_process.poll() != None):
+				try:
+					pipe_file_descriptor = os.open(measurement_pipe_path, os.O_WRONLY | os.O_NONBLOCK)
+					os.close(pipe_file_descriptor)
+				except OSError:
+					pass # Nobody has the pipe open for reading.
+
+			measurement_thread.join(1)
+
+		if sox_process != None:
+
+			# The measurement stopped before it read the pipe to the end, sox may be waiting for the pipe to be read.
+			if sox_process.poll() == None:
+				sox_process.kill()
+
+			sox_process.wait()
+			stderr_reader_thread.join()
+
+		try:
+			os.remove(measurement_pipe_path)
+		except OSError:
+			pass
+
+		if len(measurement_results) == 5:
+			list_of_100ms_block_energies, highest_peak_float, channel_count, sample_rate, numpy_error_message = measurement_results
+
+			if error_message == '':
+				error_message = numpy_error_message
+
+	except Exception:
+		exc_type, exc_value, exc_traceback = sys.exc_info()
+		error_message_as_a_list = traceback.format_exception(exc_type, exc_value, exc_traceback)
+		subroutine_name = 'decode_file_with_sox_and_measure_it_with_numpy'
+		catch_python_interpreter_errors(error_message_as_a_list, subroutine_name)
+
+	return(list_of_100ms_block_energies, highest_peak_float, channel_count, sample_rate, error_message, sox_commandline, bytes(sox_stderr).decode('UTF-8', 'replace'))
+
+def calculate_loudness_in_a_single_pass(filename, hotfolder_path, directory_for_temporary_files, directory_for_results, english, finnish, time_slice_duration_string, expected_number_of_time_slices, expected_file_size, event_for_timeslice_loudness_calculation, event_for_integrated_loudness_calculation):
+
+	"""This subroutine calculates integrated loudness, loudness range, peak and loudness time slices of a file by decoding the file only once."""
+
+	# This subroutine works like this:
+	# ---------------------------------
+	# The subroutine is started from the main program in it's own thread and it replaces the two libebur128 calculation threads (calculate_integrated_loudness and calculate_loudness_timeslices).
+	# If use_numpy_for_loudness_measurement is True, wav - files are read in-process with NumPy. Other files are decoded once by sox to a pipe that NumPy reads.
+	# NumPy K-weights the audio, calculates the energy of each 100 ms block and measures the peak or TruePeak from the original samples.
+	# Integrated loudness, loudness range and short-term loudness time slices are then all calculated from the block energies.
+	# Results are stored to dictionary 'integrated_loudness_calculation_results' in the same format calculate_integrated_loudness stores them and time slices are formatted the same way libebur128 prints them,
+	# so graphics generation and loudness correction work exactly the same way as when libebur128 is used.
+
+	try:
+		global integrated_loudness_calculation_results
+		global peak_measurement_method
+		global result_cache_keys_of_files_dict
+		global result_cache_key_threads_dict
+		file_to_process = hotfolder_path + os.sep + filename
+		integrated_loudness = 0
+		loudness_range = 0
+		difference_from_target_loudness = 0
+		highest_peak_float = float('0')
+		highest_peak_db = float('-120') # Set default value for sample peak.
+		integrated_loudness_is_below_measurement_threshold = False
+		integrated_loudness_calculation_error = False
+		integrated_loudness_calculation_error_message = ''
+		integrated_loudness_calculation_results_list = []
+		timeslice_loudness_calculation_stdout = b''
+		timeslice_calculation_error = False
+		timeslice_calculation_error_message = ''
+		list_of_timeslice_loudness_values = []
+		number_of_timeslices = 0
+		list_of_100ms_block_energies = []
+		sox_stderr_string = ''
+		sox_commandline = []
+		peak_level_string = ''
+		sample_rate = 0
+		channel_count = 0
+		measured_with_numpy = False
+		numpy_error_message = ''
+		error_message = ''
+		file_size = 0
+		audio_stream_was_measured_without_a_file = False
+		content_hash_results = None
+
+		# Audio streams that were measured while FFmpeg decoded them were never written to a file, the results of the measurement are used instead of the file.
+		if filename in audio_streams_measured_without_a_file_dict:
+			audio_stream_was_measured_without_a_file = True
+
+		# Save some debug information. Items are always saved in pairs (Title, value) so that the list is easy to parse later.
+		# Debug information is saved to the same dictionaries the two libebur128 calculation threads use, so that the main program can handle it the same way.
+		if debug_file_processing == True:
+			global debug_temporary_dict_for_integrated_loudness_calculation_information
+			global debug_temporary_dict_for_timeslice_calculation_information
+			debug_information_list = []
+
+			if filename in debug_temporary_dict_for_timeslice_calculation_information:
+				debug_information_list = debug_temporary_dict_for_timeslice_calculation_information[filename]
+			unix_time_in_ticks, realtime = get_realtime(english, finnish)
+			debug_information_list.append('Start Time')
+			debug_information_list.append(unix_time_in_ticks)
+			debug_information_list.append('Subprocess Name')
+			debug_information_list.append('calculate_loudness_in_a_single_pass')
+			debug_temporary_dict_for_timeslice_calculation_information[filename] = debug_information_list
+			debug_temporary_dict_for_integrated_loudness_calculation_information[filename] = []
+
+		if (os.path.exists(file_to_process)) or (audio_stream_was_measured_without_a_file == True): # Check if the audio file still exists, user may have deleted it. If True start loudness calculation.
+
+			# Try to measure wav - files in-process with NumPy first. If NumPy can not read the file, measure it with sox.
+			if use_numpy_for_loudness_measurement == True:
+
+				# Audio streams extracted with FFmpeg may have been measured while they were extracted. The results are used only if the file is still the same file that was extracted.
+				measurement_results_from_extraction = loudness_measured_during_audio_stream_extraction_dict.pop(filename, [])
+
+				if (len(measurement_results_from_extraction) == 7) and (audio_stream_was_measured_without_a_file == False):
+					try:
+						file_metadata = os.stat(file_to_process)
+
+						if (file_metadata.st_size != measurement_results_from_extraction[5]) or (file_metadata.st_mtime_ns != measurement_results_from_extraction[6]):
+							measurement_results_from_extraction = []
+					except IOError:
+						measurement_results_from_extraction = []
+					except OSError:
+						measurement_results_from_extraction = []
+
+				if (len(measurement_results_from_extraction) == 7) or ((len(measurement_results_from_extraction) == 5) and (audio_stream_was_measured_without_a_file == True)):
+					list_of_100ms_block_energies, highest_peak_float, channel_count, sample_rate, numpy_error_message = measurement_results_from_extraction[0:5]
+				elif audio_stream_was_measured_without_a_file == False:
+
+					# If the result cache needs the key of the file and it is not being calculated in an other thread, calculate it from the data read for the measurement.
+					if (result_cache_size > 0) and (filename not in result_cache_keys_of_files_dict) and (filename not in result_cache_key_threads_dict):
+						content_hash_results = []
+
+					list_of_100ms_block_energies, highest_peak_float, channel_count, sample_rate, numpy_error_message = calculate_100ms_block_energies_and_peak_with_numpy(file_to_process, peak_measurement_method, english, finnish, content_hash_results)
+
+				if len(list_of_100ms_block_energies) > 0:
+					measured_with_numpy = True
+					peak_level_string = str(highest_peak_float)
+				else:
+					highest_peak_float = float('0')
+					sample_rate = 0
+
+			# NumPy can not read the file, sox decodes it to a pipe that NumPy reads.
+			if (measured_with_numpy == False) and (audio_stream_was_measured_without_a_file == False):
+				list_of_100ms_block_energies, highest_peak_float, channel_count, sample_rate, numpy_error_message, sox_commandline, sox_stderr_string = decode_file_with_sox_and_measure_it_with_numpy(file_to_process, directory_for_temporary_files, english, finnish)
+
+				if len(list_of_100ms_block_energies) > 0:
+					measured_with_numpy = True
+					peak_level_string = str(highest_peak_float)
+
+			# If NumPy did not read the whole file, the key of the file is calculated by reading the file. The file was just read by the measurement, so it is read from the os file cache.
+			if content_hash_results != None:
+				if len(content_hash_results) == 2:
+					result_cache_keys_of_files_dict[filename] = create_result_cache_key(content_hash_results[0], content_hash_results[1])
+				else:
+					cache_key = calculate_result_cache_key(file_to_process)
+
+					if cache_key != '':
+						result_cache_keys_of_files_dict[filename] = cache_key
+
+			# Save debug information.
+			if debug_file_processing == True:
+				debug_information_list.append('measured_with_numpy')
+				debug_information_list.append(measured_with_numpy)
+				debug_information_list.append('numpy_error_message')
+				debug_information_list.append(numpy_error_message)
+				debug_information_list.append('sox_commandline')
+				debug_information_list.append(sox_commandline)
+				debug_information_list.append('sox_stderr_string')
+				debug_information_list.append(sox_stderr_string.replace('\n','\\n'))
+				debug_information_list.append('channel_count')
+				debug_information_list.append(channel_count)
+				debug_information_list.append('sample_rate')
+				debug_information_list.append(sample_rate)
+				debug_information_list.append('number_of_100ms_blocks')
+				debug_information_list.append(len(list_of_100ms_block_energies))
+				debug_information_list.append('peak_level_string')
+				debug_information_list.append(peak_level_string)
+				debug_temporary_dict_for_timeslice_calculation_information[filename] = debug_information_list
+
+			# If sox could not decode the file there are no results. Use the error message sox printed if there is one.
+			if len(list_of_100ms_block_energies) == 0:
+				integrated_loudness_calculation_error = True
+				timeslice_calculation_error = True
+
+				if audio_stream_was_measured_without_a_file == True:
+					integrated_loudness_calculation_error_message = 'Audio stream could not be measured while it was decoded with FFmpeg. ' * english + 'Ääniraitaa ei voitu mitata, kun FFmpeg purki sitä. ' * finnish + numpy_error_message
+				elif sox_stderr_string.strip() != '':
+					integrated_loudness_calculation_error_message = sox_stderr_string.strip()
+				elif numpy_error_message != '':
+					integrated_loudness_calculation_error_message = numpy_error_message
+				else:
+					integrated_loudness_calculation_error_message = 'Sox did not tell the cause of the error.' * english + 'Sox ei kertonut virheen syytä.' * finnish
+
+				timeslice_calculation_error_message = integrated_loudness_calculation_error_message
+			else:
+				# Calculate loudness results from the block energies. Integrated loudness and loudness range are rounded to one decimal, the same way libebur128 prints them.
+				integrated_loudness, loudness_range, list_of_timeslice_loudness_values = calculate_loudness_from_100ms_block_energies(list_of_100ms_block_energies, time_slice_duration_string)
+				integrated_loudness = round(integrated_loudness, 1)
+				loudness_range = round(loudness_range, 1)
+
+				# NumPy measurement returns the peak as a linear value.
+				if (integrated_loudness_calculation_error == False) and (highest_peak_float == 0):
+					integrated_loudness_calculation_error = True
+					integrated_loudness_calculation_error_message = 'Error: calculation result (highest_peak) is zero: ' * english + 'Virhe: laskentatulos (Huippuarvo) on nolla: ' * finnish + '\'' + peak_level_string + '\''
+
+				if integrated_loudness_calculation_error == False:
+					highest_peak_db = round(20 * math.log(highest_peak_float, 10),1)
+
+				difference_from_target_loudness = round(integrated_loudness - float(target_loudness), 1)
+
+				# If integrated loudness measurement is below -70 LUFS, then loudness is '-inf', which means roughly 'not possible to measure'. Generate error since '-inf' can not be used in calculations.
+				if integrated_loudness == float('-inf'):
+					integrated_loudness_calculation_error = True
+					integrated_loudness_calculation_error_message = 'Loudness is below measurement threshold (-70 LUFS)' * english + 'Äänekkyys on alle mittauksen alarajan (-70 LUFS)' * finnish
+					integrated_loudness_is_below_measurement_threshold = True
+
+				# Format time slice values the same way libebur128 prints them, one value on each row.
+				timeslice_loudness_calculation_result_list = []
+				for timeslice_loudness in list_of_timeslice_loudness_values:
+					timeslice_loudness_calculation_result_list.append('%f' % timeslice_loudness)
+				timeslice_loudness_calculation_stdout = ('\n'.join(timeslice_loudness_calculation_result_list) + '\n').encode('UTF-8')
+				number_of_timeslices = len(timeslice_loudness_calculation_result_list)
+
+				if number_of_timeslices == 0:
+					timeslice_calculation_error = True
+					timeslice_calculation_error_message = 'Loudness calculation table is empty' * english + 'Äänekkyysmittaustulosten taulukko on tyhjä' * finnish
+
+				if abs(number_of_timeslices - expected_number_of_time_slices) > 1:
+					timeslice_calculation_error = True
+					timeslice_calculation_error_message = 'Number of audio blocks from loudness calculation: ' * english + 'Äänekkyyslaskennasta saatujen audioblokkien määrä: ' * finnish + str(number_of_timeslices) + ' differs from the number that was expected: ' * english + ' eroaa ennakoidusta lukumäärästä: ' * finnish + str(expected_number_of_time_slices)
+
+			integrated_loudness_calculation_results_list = [integrated_loudness, difference_from_target_loudness, loudness_range, integrated_loudness_calculation_error, integrated_loudness_calculation_error_message, highest_peak_db, integrated_loudness_is_below_measurement_threshold]
+			integrated_loudness_calculation_results[filename] = integrated_loudness_calculation_results_list # Put loudness calculation results in a dictionary along with the filename.
+		else:
+			# If we get here the file we were supposed to process vanished from disk after the main program started this thread. Print a message to the user.
+			error_message ='ERROR !!!!!!! FILE' * english + 'VIRHE !!!!!!! Tiedosto' * finnish + ' ' + filename + ' ' + 'dissapeared from disk before processing started.' * english + 'hävisi kovalevyltä ennen käsittelyn alkua.' * finnish
+			send_error_messages_to_screen_logfile_email(error_message, [])
+
+		# Integrated loudness results are ready.
+		event_for_integrated_loudness_calculation.set()
+
+		# Check once again that the file size has not changed, if it has then we have started loudness calculation before the file was fully transmitted. Audio streams measured without a file have no file to check.
+		if audio_stream_was_measured_without_a_file == False:
+			try:
+				file_metadata=os.lstat(file_to_process) # Get file information (size, date, etc)
+				file_size = file_metadata.st_size
+	
+				if file_size != expected_file_size:
+					timeslice_calculation_error = True
+					timeslice_calculation_error_message = 'File size has changed during processing from: ' * english + 'Tiedoston koko on muuttunut laskennan aikana: ' * finnish + str(expected_file_size) + ' to: ' * english + ' -> ' * finnish + str(file_size)
+			except IOError as reason_for_error:
+				timeslice_calculation_error = True
+				timeslice_calculation_error_message = 'Error accessing file: ' * english + 'Tiedoston lukemisessa tapahtui virhe: ' * finnish + str(reason_for_error)
+			except OSError as reason_for_error:
+				timeslice_calculation_error = True
+				timeslice_calculation_error_message = 'Error accessing file: ' * english + 'Tiedoston lukemisessa tapahtui virhe: ' * finnish + str(reason_for_error)
+
+		# Save debug information.
+		if debug_file_processing == True:
+			debug_information_list.append('integrated_loudness')
+			debug_information_list.append(integrated_loudness)
+			debug_information_list.append('loudness_range')
+			debug_information_list.append(loudness_range)
+			debug_information_list.append('peak_measurement_method ')
+			debug_information_list.append(peak_measurement_method )
+			debug_information_list.append('highest_peak_db')
+			debug_information_list.append(highest_peak_db)
+			debug_information_list.append('difference_from_target_loudness')
+			debug_information_list.append(difference_from_target_loudness)
+			debug_information_list.append('integrated_loudness_calculation_error')
+			debug_information_list.append(integrated_loudness_calculation_error)
+			debug_information_list.append('integrated_loudness_calculation_error_message')
+			debug_information_list.append(integrated_loudness_calculation_error_message)
+			debug_information_list.append('number_of_timeslices')
+			debug_information_list.append(number_of_timeslices)
+			debug_information_list.append('expected_number_of_time_slices')
+			debug_information_list.append(expected_number_of_time_slices)
+			debug_information_list.append('expected_file_size')
+			debug_information_list.append(expected_file_size)
+			debug_information_list.append('file_size')
+			debug_information_list.append(file_size)
+			debug_information_list.append('timeslice_calculation_error')
+			debug_information_list.append(timeslice_calculation_error)
+			debug_information_list.append('timeslice_calculation_error_message')
+			debug_information_list.append(timeslice_calculation_error_message)
+			debug_information_list.append('error_message')
+			debug_information_list.append(error_message)
+			unix_time_in_ticks, realtime = get_realtime(english, finnish)
+			debug_information_list.append('Stop Time')
+			debug_information_list.append(unix_time_in_ticks)
+			debug_temporary_dict_for_timeslice_calculation_information[filename] = debug_information_list
+
+		# We now have all loudness calculation results needed for graphics generation, start the subprocess that plots graphics and calls another subprocess that creates loudness corrected audio with sox.
+		create_gnuplot_commands(filename, number_of_timeslices, time_slice_duration_string, timeslice_calculation_error, timeslice_calculation_error_message, timeslice_loudness_calculation_stdout, hotfolder_path, directory_for_temporary_files, directory_for_results, english, finnish)
+
+		# After generating graphics and loudness corrected audio, set the event for this calculation thread. The main program checks the events and sees that this calculation thread is ready.
+		event_for_timeslice_loudness_calculation.set()
+
+	except Exception:
+		exc_type, exc_value, exc_traceback = sys.exc_info()
+		error_message_as_a_list = traceback.format_exception(exc_type, exc_value, exc_traceback)
+		subroutine_name = 'calculate_loudness_in_a_single_pass'
+
+		# Set both events for this calculation thread.
+		event_for_integrated_loudness_calculation.set()
+		event_for_timeslice_loudness_calculation.set()
+
+		catch_python_interpreter_errors(error_message_as_a_list, subroutine_name)
+
+def create_gnuplot_commands(filename, number_of_timeslices, time_slice_duration_string, timeslice_calculation_error, timeslice_calculation_error_message, timeslice_loudness_calculation_stdout, hotfolder_path, directory_for_temporary_files, directory_for_results, english, finnish):
+
+	'''This subprocess plots an jpeg graphics file using combined results from two loudness calculation processes'''
+
+	# This subroutine works like this:
+	# ---------------------------------
+	# The program checks how much time slices we have in the loudness calculation results and calculates file duration from that.
+	# Then the program generates the x - axis (time axis) information for the graphics generation. The program sets time markers (minutes or seconds) along the x - axis in even intervals taking the file duration into account.
+	# If there has been an error in loudness calculations the routine generates preset graphics with the error message on it.
+	# Then the routine generates commands needed for gnuplot and puts them in a list.
+	# The timeslice list of loudness values is written to a file, since gnuplot uses values from the file for plotting the loudness curve.
+	# Then the gnuplot commands are written to a file and a subroutine called to run gnuplot.
+
+	try:
+		global integrated_loudness_calculation_results
+		global silent
+
+		# Set default values for integrated loudness calculation results. Defaults will be overwritten by real results if integrated loudness calculation is successful. Defaults are used if calculation fails.
+		integrated_loudness_calculation_results_list = [0, 0, 0, True, 'Integrated loudness calculation failed to finish', -120, False] 
+		integrated_loudness = integrated_loudness_calculation_results_list[0]
+		difference_from_target_loudness = integrated_loudness_calculation_results_list[1]
+		loudness_range = integrated_loudness_calculation_results_list[2]
+		integrated_loudness_calculation_error = integrated_loudness_calculation_results_list[3]
+		integrated_loudness_calculation_error_message = integrated_loudness_calculation_results_list[4]
+		highest_peak_db = integrated_loudness_calculation_results_list[5]
+		integrated_loudness_is_below_measurement_threshold = integrated_loudness_calculation_results_list[6]
+
+		commandfile_for_gnuplot = directory_for_temporary_files + os.sep + filename + '-gnuplot_commands'
+		loudness_calculation_table = directory_for_temporary_files + os.sep + filename + '-loudness_calculation_table'
+		gnuplot_temporary_output_graphicsfile = directory_for_temporary_files + os.sep + filename + '-Loudness_Results_Graphics.jpg' * english + '-Aanekkyyslaskennan_Tulokset.jpg' * finnish
+		warning_message = ''
+		sox_encountered_an_error = False
+		sox_error_message = ''
+		
+		global create_loudness_history_graphics_files
+		global create_loudness_corrected_files
+		global write_loudness_calculation_results_to_a_machine_readable_file
+		global temp_loudness_results_for_automation
+		global os_name
+		global os_version 
+		global target_loudness
+		global draw_loudness_graphics_in_process
+		global number_of_gnuplot_worker_processes
+
+		error_message = ''
+		gnuplot_commands = []
+
+		# Save some debug information. Items are always saved in pairs (Title, value) so that the list is easy to parse later.
+		if debug_file_processing == True:
+			debug_information_list = []
+			global debug_temporary_dict_for_all_file_processing_information
+
+			if filename in debug_temporary_dict_for_all_file_processing_information:
+				debug_information_list = debug_temporary_dict_for_all_file_processing_information[filename]
+			unix_time_in_ticks, realtime = get_realtime(english, finnish)
+			debug_information_list.append('Start Time')
+			debug_information_list.append(unix_time_in_ticks)
+			debug_information_list.append('Subprocess Name')
+			debug_information_list.append('create_gnuplot_commands')
+			debug_temporary_dict_for_all_file_processing_information[filename] = debug_information_list
+		
+		# Get loudness calculation results from the integrated loudness calculation process. Results are in list format in dictionary 'integrated_loudness_calculation_results', assing results to variables.
+		if filename in integrated_loudness_calculation_results:
+			integrated_loudness_calculation_results_list = integrated_loudness_calculation_results.pop(filename)# Get loudness results for the file and remove this information from dictionary.
+			integrated_loudness = integrated_loudness_calculation_results_list[0]
+			difference_from_target_loudness = integrated_loudness_calculation_results_list[1]
+			loudness_range = integrated_loudness_calculation_results_list[2]
+			integrated_loudness_calculation_error = integrated_loudness_calculation_results_list[3]
+			integrated_loudness_calculation_error_message = integrated_loudness_calculation_results_list[4]
+			highest_peak_db = integrated_loudness_calculation_results_list[5]
+			integrated_loudness_is_below_measurement_threshold = integrated_loudness_calculation_results_list[6]
+
+		# Store loudness results to the result cache, so that they can be reused for files with identical content.
+		if (result_cache_size > 0) and (integrated_loudness_calculation_error == False) and (timeslice_calculation_error == False):
+			store_loudness_results_in_result_cache(filename, integrated_loudness_calculation_results_list, number_of_timeslices, timeslice_loudness_calculation_stdout)
+
+		# If TruePeak method was used to determine the highest peak, then it can be above 0 dBFS, add a plus sign if this is the case.
+		if highest_peak_db > 0:
+			highest_peak_db_string = '+' + str(highest_peak_db)
+		else:
+			highest_peak_db_string = str(highest_peak_db)
+
+
+		if create_loudness_history_graphics_files == True:
+
+			# If calculated loudness difference from target loudness is a positive number, create a string with a plus sign and the difference number in it.
+			if difference_from_target_loudness > 0:
+				difference_from_target_loudness_string = '+' + str(difference_from_target_loudness)
+			else:
+				difference_from_target_loudness_string = str(difference_from_target_loudness) # The loudness difference from target loudness is negative, just create a string with the negative result number in it.
+
+			# Scale loudness graphics x-axis time information according to file duration.
+			# Loudness calculation is done in 3 second slices when audio duration is 12 seconds or longer.
+			# If file duration is shorter than 12 seconds then slices are 0.5 seconds each.
+			audio_duration_rounded_to_seconds = int(number_of_timeslices * float(time_slice_duration_string))
+				
+			# If file duration is shorter than 12 seconds. Time slices are 0.5 seconds each.
+			if audio_duration_rounded_to_seconds < 12:
+				plotfile_x_axis_divider = 2 # Define how many time slices there are between each printed x-axis time number.
+				plotfile_x_axis_time = 1 # Define the steps of increasing x-axis time numbers.
+				plotfile_x_axis_name = 'Seconds' * english + 'Sekunnit' * finnish
+			# File duration is 10 seconds or longer. Time slices are 3 seconds each.
+			if (audio_duration_rounded_to_seconds >= 12) and (audio_duration_rounded_to_seconds <= 60): # File duration is between 10 seconds and 1 minute.
+				plotfile_x_axis_divider = 1 # Define how many time slices there are between each printed x-axis time number.
+				plotfile_x_axis_time = 3 # Define the steps of increasing x-axis time numbers.
+				plotfile_x_axis_name = 'Seconds' * english + 'Sekunnit' * finnish # X-axis time name (seconds / minutes hours).
+
+			if (audio_duration_rounded_to_seconds > 60) and (audio_duration_rounded_to_seconds <= 180): # File duration is between 1 and 3 minutes.
+				plotfile_x_axis_divider = 5
+				plotfile_x_axis_time = 15
+				plotfile_x_axis_name = 'Seconds' * english + 'Sekunnit' * finnish
+
+			if (audio_duration_rounded_to_seconds > 180) and (audio_duration_rounded_to_seconds < 1800): # File duration is between 3 minutes and 30 minutes.
+				plotfile_x_axis_divider = 20
+				plotfile_x_axis_time = 1
+				plotfile_x_axis_name = 'Minutes' * english + 'Minuutit' * finnish
+
+			if (audio_duration_rounded_to_seconds >= 1800) and (audio_duration_rounded_to_seconds < 3600): # File duration is between 30 minutes and 1 hour.
+				plotfile_x_axis_divider = 60
+				plotfile_x_axis_time = 3
+				plotfile_x_axis_name = 'Minutes' * english + 'Minuutit' * finnish
+
+			if (audio_duration_rounded_to_seconds >= 3600) and (audio_duration_rounded_to_seconds < 7200): # File duration is between 1 and 2 hours.
+				plotfile_x_axis_divider = 100
+				plotfile_x_axis_time = 5
+				plotfile_x_axis_name = 'Minutes' * english + 'Minuutit' * finnish
+
+			if (audio_duration_rounded_to_seconds >= 7200) and (audio_duration_rounded_to_seconds < 21600): # File duration is between 2 and 6 hours.
+				plotfile_x_axis_divider = 300
+				plotfile_x_axis_time = 15
+				plotfile_x_axis_name = 'Minutes' * english + 'Minuutit' * finnish
+
+			if (audio_duration_rounded_to_seconds >= 21600) and (audio_duration_rounded_to_seconds < 43200): # File duration is between 6 and 12 hours.
+				plotfile_x_axis_divider = 600
+				plotfile_x_axis_time = 30
+				plotfile_x_axis_name = 'Minutes' * english + 'Minuutit' * finnish
+
+			if (audio_duration_rounded_to_seconds >= 43200) and (audio_duration_rounded_to_seconds < 86400): # File duration is between 12 and 24 hours.
+				plotfile_x_axis_divider = 1200
+				plotfile_x_axis_time = 1
+				plotfile_x_axis_name = 'Hours' * english + 'Tunnit' * finnish
+
+			if (audio_duration_rounded_to_seconds >= 86400) and (audio_duration_rounded_to_seconds < 172800): # File duration is between 24 and 48 hours.
+				plotfile_x_axis_divider = 2400
+				plotfile_x_axis_time = 2
+				plotfile_x_axis_name = 'Hours' * english + 'Tunnit' * finnish
+
+			if (audio_duration_rounded_to_seconds >= 172800) and (audio_duration_rounded_to_seconds < 345600): # File duration is between 48 and 96 hours.
+				plotfile_x_axis_divider = 4800
+				plotfile_x_axis_time = 4
+				plotfile_x_axis_name = 'Hours' * english + 'Tunnit' * finnish
+
+			if (audio_duration_rounded_to_seconds >= 345600) and (audio_duration_rounded_to_seconds < 691200): # File duration is between 96 and 192 hours.
+				plotfile_x_axis_divider = 9600
+				plotfile_x_axis_time = 8
+				plotfile_x_axis_name = 'Hours' * english + 'Tunnit' * finnish
+
+			if audio_duration_rounded_to_seconds >= 691200: # File duration is over 192 hours.
+				plotfile_x_axis_divider = 28800
+				plotfile_x_axis_time = 1
+				plotfile_x_axis_name = 'Days' * english + 'Päiviä' * finnish
+
+			# Generate x-axis texts needed for gnuplot and store them in a list.
+			plotfile_x_axis_time_information=[]
+			plotfile_x_axis_tics = [] # The same x-axis texts and their positions for graphics drawn in-process.
+			if timeslice_calculation_error == False:
+				plotfile_x_axis_time_information.append('set xtics (')
+				counter=1
+				for counter in range(0, int(number_of_timeslices / (plotfile_x_axis_divider) + 1), 1):
+					plotfile_x_axis_time_information.append('\"' + str(counter * plotfile_x_axis_time) + '\" ' + str(counter * plotfile_x_axis_divider) + ' ')
+					plotfile_x_axis_tics.append([str(counter * plotfile_x_axis_time), counter * plotfile_x_axis_divider])
+					if counter <  int(number_of_timeslices / (plotfile_x_axis_divider)):
+						plotfile_x_axis_time_information.append(', ')
+				plotfile_x_axis_time_information.append(')')
+				plotfile_x_axis_time_information = ''.join(plotfile_x_axis_time_information)
+		
+		# Save some debug information.
+		if debug_file_processing == True:
+			debug_information_list.append('Message')
+			debug_information_list.append('Calling subroutine: get_audiofile_info_with_sox_and_determine_output_format')
+		
+		# Get technical info from audio file and determine what the output format will be
+		if filename in audio_streams_measured_without_a_file_dict:
+			# The audio stream was measured while FFmpeg decoded it and it was not written to a file, use the information FFmpeg reported about the stream. No loudness corrected file is created.
+			channel_count, sample_rate, bit_depth, audio_duration = audio_streams_measured_without_a_file_dict[filename]
+			sample_count = int(audio_duration * sample_rate)
+			flac_compression_level = ['-C', '1']
+			output_format_for_intermediate_files = 'wav'
+			output_format_for_final_file = 'wav'
+			audio_channels_will_be_split_to_separate_mono_files = False
+			output_file_too_big_to_split_to_separate_wav_channels = False
+		else:
+			channel_count, sample_rate, bit_depth, sample_count, flac_compression_level, output_format_for_intermediate_files, output_format_for_final_file, audio_channels_will_be_split_to_separate_mono_files, audio_duration, output_file_too_big_to_split_to_separate_wav_channels, sox_encountered_an_error, sox_error_message = get_audiofile_info_with_sox_and_determine_output_format(directory_for_temporary_files, hotfolder_path, filename)
+
+		# Save some debug information.
+		if debug_file_processing == True:
+			debug_information_list.append('Message')
+			debug_information_list.append('Returned from subroutine: get_audiofile_info_with_sox_and_determine_output_format')
+
+		# Write details of loudness measurement of the file to a debug logfile.
+		# This is a debugging option.
+		if (integrated_loudness_calculation_error == False) and (timeslice_calculation_error == False):
+
+			if save_all_measurement_results_to_a_single_debug_file == True:
+
+				global loudness_calculation_logfile_path
+
+				if loudness_calculation_logfile_path == '':
+					loudness_calculation_logfile_path = directory_for_error_logs + os.sep + 'loudness_calculation_log-' + str(get_realtime(english, finnish)[1]) + '.txt'
+
+				loudness_calculation_data = filename + ',EndOFFileName,' + str(integrated_loudness) + ',' + str(loudness_range) + ',' + str(highest_peak_db) + ',' + str(channel_count) + ',' + str(sample_rate) + ',' + str(bit_depth) + ',' + str(int(audio_duration)) + '\n'
+
+				# Save some debug information.
+				if debug_file_processing == True:
+					debug_information_list.append('Message')
+					debug_information_list.append('Calling subroutine: debug_write_loudness_calculation_info_to_a_logfile')
+
+				debug_write_loudness_calculation_info_to_a_logfile(loudness_calculation_data, loudness_calculation_logfile_path)
+
+				# Save some debug information.
+				if debug_file_processing == True:
+					debug_information_list.append('Message')
+					debug_information_list.append('Returned from subroutine: debug_write_loudness_calculation_info_to_a_logfile')
+
+
+		# Write loudness calculation results of each file to separate text files in results directory.
+		# This is a user definable option.
+		if write_loudness_calculation_results_to_a_machine_readable_file == True:
+
+			# Add info for all mixes found in the file to dictionary that is used to write the machine readable results file.
+
+			error_code = 0
+			error_message = ' '
+
+			if integrated_loudness_calculation_error == True:
+				error_code = 2
+				error_message = 'ERROR !!! in libebur128 integrated loudness calculation: ' * english + 'VIRHE !!! libebur128:n keskimääräisen äänekkyyden laskennassa: ' * finnish + integrated_loudness_calculation_error_message
+		
+			if integrated_loudness_is_below_measurement_threshold == True:
+				error_code = 1
+				# variable 'error_message' is set by the previous if statement for this situation also. In this case it says 'Loudness is below measurement threshold'. The contents for 'error_message' is taken by the previous if statement from the variable 'integrated_loudness_calculation_error_message'.
+
+			list_of_filenames = []
+
+			if error_code == 0:
+
+				number_of_files_in_this_mix = 1
+
+				if audio_channels_will_be_split_to_separate_mono_files == True:
+					number_of_files_in_this_mix = int(channel_count)
+
+				filename_and_extension = os.path.splitext(filename)
+
+				# The combined channels in final output file exceeds the max file size and the file needs to be split to separate mono files.
+				# Create output filenames for the machine readable readable results file.
+				if number_of_files_in_this_mix > 1:
+				
+					for counter in range(1, channel_count + 1):
+						split_channel_targetfile_name = filename_and_extension[0] + '-Channel-' * english + '-Kanava-' * finnish + str(counter) + '_' + target_loudness + '_LUFS.' + output_format_for_final_file
+						list_of_filenames.append(split_channel_targetfile_name)
+
+				else:
+					# In this case the output file will be a single file.
+					# Create output filename for the machine readable readable results file.
+					list_of_filenames.append(str(filename_and_extension[0] + '_' + target_loudness + '_LUFS.' + output_format_for_final_file))
+
+				# Get values stored for machine readable results file, and complete loudness result information for the file.
+				if filename in temp_loudness_results_for_automation:
+
+					original_file_name, list_of_values =  temp_loudness_results_for_automation[filename]
+
+					# list_of_values[0] = number_of_this_mix # This value is already correct and we don't need to change it.
+					# list_of_values[1] = total_number_of_supported_mixes_in_original_file # This value is already correct and we don't need to change it.
+					# list_of_values[2] = total_number_of_mixes_in_original_file # This value is already correct and we don't need to change it.
+					list_of_values[3] = create_loudness_corrected_files
+					list_of_values[4] = number_of_files_in_this_mix
+					list_of_values[5] = integrated_loudness
+					list_of_values[6] = loudness_range
+					list_of_values[7] = highest_peak_db
+					list_of_values[8] = channel_count
+					list_of_values[9] = sample_rate
+					list_of_values[10] = bit_depth
+					list_of_values[11] = audio_duration
+
+					# If some subprocess has already stored an error_code or error_message, then don't change them.
+					if list_of_values[12] == 0:
+						list_of_values[12] = error_code
+					if list_of_values[13] == '':
+						list_of_values[13] = error_message
+
+					list_of_values[14] = list_of_filenames
+
+					temp_loudness_results_for_automation[filename] = [original_file_name, list_of_values]
 
 					# If there are unsupported mixes in the mxf - file and remixing is on, warn the user about unpredictable results.
 					if list_of_values[12] == 9:
@@ -1210,63 +2714,124 @@ def create_gnuplot_commands(filename, number_of_timeslices, time_slice_duration_
 					peak_measurement_string_finnish = peak_measurement_string_english
 					peak_measurement_unit = 'dBTP'
 
-				# Set target level color on graphics based on if target loudness is lower, equal or higher than -23 LUFS.
-				if int(target_loudness) < -23:
-					target_level = " title \'" + target_loudness + " LUFS (Target Level)\'" * english + " LUFS (Tavoitetaso)\'" * finnish +  " lw 6 lc rgb \'#0d59d6\', " # Color: Blue
-				elif target_loudness == '-23':
-					target_level = " title \'0 LU (Target Level)\'" * english + " title \'0 LU (Tavoitetaso)\'" * finnish + " lw 6 lc rgb \'#99ff00\', " # Color: Green                                                               
+				# The title of the graphics, lines are separated with '\\n'.
+				graphics_title = '\'' + filename.replace('_', ' ') + '\'\\n' + 'Integrated Loudness ' * english + 'Keskimääräinen Äänekkyystaso ' * finnish + str(integrated_loudness) + ' LUFS\\n ' + difference_from_target_loudness_string + ' LU from target loudness (' * english + target_loudness * english + ' LUFS)\\nLoudness Range (LRA) ' * english + ' LU:ta tavoitetasosta (' * finnish + target_loudness * finnish + ' LUFS)\\nÄänekkyyden vaihteluväli (LRA) '  * finnish + str(loudness_range) + ' LU' + peak_measurement_string_english * english + peak_measurement_string_finnish * finnish + highest_peak_db_string + ' ' + peak_measurement_unit + warning_message
+				y_axis_name = 'Loudness (LUFS)' * english + 'Äänekkyystaso (LUFS)' * finnish
+
+				if draw_loudness_graphics_in_process == True:
+
+					# Read short-term loudness values from the time slice calculation results. Like in the gnuplot time slice file there is a dummy '-60' value at the beginning of the list.
+					short_term_loudness_points = [[0, -60.0]]
+					timeslice_number = 0
+
+					for item in timeslice_loudness_calculation_stdout.decode('UTF-8').split('\n'):
+						item = item.strip()
+						if item == '':
+							continue
+						timeslice_number = timeslice_number + 1
+						try:
+							loudness_value = float(item)
+						except ValueError:
+							continue
+						if loudness_value != loudness_value: # Value is 'nan', leave it out from the line.
+							continue
+						short_term_loudness_points.append([timeslice_number, loudness_value])
+
+					# Target level and integrated loudness lines are drawn over the whole x-axis.
+					x_axis_maximum = timeslice_number
+					if (len(plotfile_x_axis_tics) > 0) and (plotfile_x_axis_tics[-1][1] > x_axis_maximum):
+						x_axis_maximum = plotfile_x_axis_tics[-1][1]
+
+					# Set target level color on graphics based on if target loudness is lower, equal or higher than -23 LUFS.
+					if int(target_loudness) < -23:
+						target_level_title = target_loudness + ' LUFS (Target Level)' * english + ' LUFS (Tavoitetaso)' * finnish
+						target_level_color = '#0d59d6' # Color: Blue
+					elif target_loudness == '-23':
+						target_level_title = '0 LU (Target Level)' * english + '0 LU (Tavoitetaso)' * finnish
+						target_level_color = '#99ff00' # Color: Green
+					else:
+						target_level_title = target_loudness + ' LUFS (Target Level)' * english + ' LUFS (Tavoitetaso)' * finnish
+						target_level_color = '#d60d43' # Color: Red
+
+					# Lines are drawn in the same order and with the same colors and widths as gnuplot draws them.
+					plotted_lines = [[[[[0, float(target_loudness)], [x_axis_maximum, float(target_loudness)]]], target_level_color, 6, target_level_title], \
+					[[short_term_loudness_points], '#c4a45a', 1, 'Short-term Loudness' * english + 'Tiedoston lyhytaikainen äänekkyystaso' * finnish], \
+					[[[[0, float(integrated_loudness)], [x_axis_maximum, float(integrated_loudness)]]], '#008327', 2, 'Integrated Loudness' * english + 'Tiedoston keskimääräinen äänekkyystaso' * finnish]]
+
 				else:
-					target_level = " title \'" + target_loudness + " LUFS (Target Level)\'" * english + " LUFS (Tavoitetaso)\'" * finnish +" lw 6 lc rgb \'#d60d43\', " # Color: Red
-
-				# Generate gnuplot commands for plotting the graphics. Put all gnuplot commands in a list.
-
-				gnuplot_y_axis_commands = 'set yrange [ -60 : 0 ] nowriteback'
-				gnuplot_commands=['set terminal jpeg size 1280,960 medium font \'LiberationSans-Regular\' 12', \
-				'set encoding utf8', \
-				'set output ' + '\"' + gnuplot_temporary_output_graphicsfile.replace('"','\\"') + '\"', \
-				gnuplot_y_axis_commands, \
-				'set grid', \
-				'set title ' + '\"\'' + filename.replace('_', ' ').replace('"','\\"') + '\'\\n' + 'Integrated Loudness ' * english + 'Keskimääräinen Äänekkyystaso ' * finnish + str(integrated_loudness) + ' LUFS\\n ' + difference_from_target_loudness_string + ' LU from target loudness (' * english + target_loudness * english + ' LUFS)\\nLoudness Range (LRA) ' * english + ' LU:ta tavoitetasosta (' * finnish + target_loudness * finnish + ' LUFS)\\nÄänekkyyden vaihteluväli (LRA) '  * finnish + str(loudness_range) + ' LU' + peak_measurement_string_english * english + peak_measurement_string_finnish * finnish + highest_peak_db_string + ' ' + peak_measurement_unit + warning_message + '\"', \
-				'set ylabel ' + '\"Loudness (LUFS)\"' * english + '\"Äänekkyystaso (LUFS)\"' *finnish, \
-				plotfile_x_axis_time_information, \
-				'set xlabel \"' + plotfile_x_axis_name + '\"', \
-				'plot ' + target_loudness + target_level + '\"' + loudness_calculation_table.replace('"','\\"') + '\"' + ' with lines lw 1 lc rgb \'#c4a45a\' title \'Short-term Loudness\', ' * english + ' with lines lw 1 lc rgb \'#c4a45a\' title \'Tiedoston lyhytaikainen äänekkyystaso\', ' * finnish + str(integrated_loudness) + ' title \'Integrated Loudness\' lw 2 lc rgb \'#008327\'' * english + ' title \'Tiedoston keskimääräinen äänekkyystaso\' lw 2 lc rgb \'#008327\'' * finnish]
-
-				# Write loudness time slice calculation results in a file, gnuplot uses this file for plotting graphics.
-				try:
-					with open(loudness_calculation_table, 'wb') as timeslice_file_handler:
-						timeslice_file_handler.write(b'-60\n') # There is no timeslice at the beginning of the audio (at 0 seconds), however graphics plotting needs this. Add a dummy '-60' value at the beginning of the time slice list. This does not affect loudness calculation result, only graphics plotting.
-						timeslice_file_handler.write(timeslice_loudness_calculation_stdout)
-						timeslice_file_handler.flush() # Flushes written data to os cache
-						os.fsync(timeslice_file_handler.fileno()) # Flushes os cache to disk
-				except KeyboardInterrupt:
-					if silent == False:
-						print('\n\nUser cancelled operation.\n' * english + '\n\nKäyttäjä pysäytti ohjelman.\n' * finnish)
-					sys.exit(0)
-				except IOError as reason_for_error:
-					error_message = 'Error opening timeslice tablefile for writing ' * english + 'Aikaviipaleiden taulukkotiedoston avaaminen kirjoittamista varten epäonnistui ' * finnish + str(reason_for_error)
-					send_error_messages_to_screen_logfile_email(error_message, [])
-				except OSError as reason_for_error:
-					error_message = 'Error opening timeslice tablefile for writing ' * english + 'Aikaviipaleiden taulukkotiedoston avaaminen kirjoittamista varten epäonnistui ' * finnish + str(reason_for_error)
-					send_error_messages_to_screen_logfile_email(error_message, [])
+					# Set target level color on graphics based on if target loudness is lower, equal or higher than -23 LUFS.
+					if int(target_loudness) < -23:
+						target_level = " title \'" + target_loudness + " LUFS (Target Level)\'" * english + " LUFS (Tavoitetaso)\'" * finnish +  " lw 6 lc rgb \'#0d59d6\', " # Color: Blue
+					elif target_loudness == '-23':
+						target_level = " title \'0 LU (Target Level)\'" * english + " title \'0 LU (Tavoitetaso)\'" * finnish + " lw 6 lc rgb \'#99ff00\', " # Color: Green                                                               
+					else:
+						target_level = " title \'" + target_loudness + " LUFS (Target Level)\'" * english + " LUFS (Tavoitetaso)\'" * finnish +" lw 6 lc rgb \'#d60d43\', " # Color: Red
 
-				# Write gnuplot commands to a file.
-				try:
-					with open(commandfile_for_gnuplot, 'wt') as gnuplot_commandfile_handler:
-						for item in gnuplot_commands:
-							gnuplot_commandfile_handler.write(item + '\n')
-						gnuplot_commandfile_handler.flush() # Flushes written data to os cache
-						os.fsync(gnuplot_commandfile_handler.fileno()) # Flushes os cache to disk
-				except KeyboardInterrupt:
-					if silent == False:
-						print('\n\nUser cancelled operation.\n' * english + '\n\nKäyttäjä pysäytti ohjelman.\n' * finnish)
-					sys.exit(0)
-				except IOError as reason_for_error:
-					error_message = 'Error opening Gnuplot commandfile for writing ' * english + 'Gnuplotin komentotiedoston avaaminen kirjoittamista varten epäonnistui ' * finnish + str(reason_for_error)
-					send_error_messages_to_screen_logfile_email(error_message, [])
-				except OSError as reason_for_error:
-					error_message = 'Error opening Gnuplot commandfile for writing ' * english + 'Gnuplotin komentotiedoston avaaminen kirjoittamista varten epäonnistui ' * finnish + str(reason_for_error)
-					send_error_messages_to_screen_logfile_email(error_message, [])
+					# Gnuplot processes that are kept running get time slice data inline after the plot command, otherwise gnuplot reads it from the time slice file.
+					gnuplot_data_source = '\"' + loudness_calculation_table.replace('"','\\"') + '\"'
+
+					if number_of_gnuplot_worker_processes > 0:
+						gnuplot_data_source = '\'-\''
+
+					# Generate gnuplot commands for plotting the graphics. Put all gnuplot commands in a list.
+
+					gnuplot_y_axis_commands = 'set yrange [ -60 : 0 ] nowriteback'
+					gnuplot_commands=['set terminal jpeg size ' + str(loudness_graphics_width) + ',' + str(loudness_graphics_height) + ' medium font \'LiberationSans-Regular\' ' + str(loudness_graphics_font_size), \
+					'set encoding utf8', \
+					'set output ' + '\"' + gnuplot_temporary_output_graphicsfile.replace('"','\\"') + '\"', \
+					gnuplot_y_axis_commands, \
+					'set grid', \
+					'set title ' + '\"' + graphics_title.replace('"','\\"') + '\"', \
+					'set ylabel ' + '\"' + y_axis_name + '\"', \
+					plotfile_x_axis_time_information, \
+					'set xlabel \"' + plotfile_x_axis_name + '\"', \
+					'plot ' + target_loudness + target_level + gnuplot_data_source + ' with lines lw 1 lc rgb \'#c4a45a\' title \'Short-term Loudness\', ' * english + ' with lines lw 1 lc rgb \'#c4a45a\' title \'Tiedoston lyhytaikainen äänekkyystaso\', ' * finnish + str(integrated_loudness) + ' title \'Integrated Loudness\' lw 2 lc rgb \'#008327\'' * english + ' title \'Tiedoston keskimääräinen äänekkyystaso\' lw 2 lc rgb \'#008327\'' * finnish]
+
+					if number_of_gnuplot_worker_processes > 0:
+						# Time slice data ends with a line with the letter 'e'. There is no timeslice at the beginning of the audio (at 0 seconds), however graphics plotting needs this. Add a dummy '-60' value at the beginning of the time slice list.
+						gnuplot_commands.append('-60')
+
+						for item in timeslice_loudness_calculation_stdout.decode('UTF-8').split('\n'):
+							if item.strip() != '':
+								gnuplot_commands.append(item.strip())
+
+						gnuplot_commands.append('e')
+					else:
+						# Write loudness time slice calculation results in a file, gnuplot uses this file for plotting graphics.
+						try:
+							with open(loudness_calculation_table, 'wb') as timeslice_file_handler:
+								timeslice_file_handler.write(b'-60\n') # There is no timeslice at the beginning of the audio (at 0 seconds), however graphics plotting needs this. Add a dummy '-60' value at the beginning of the time slice list. This does not affect loudness calculation result, only graphics plotting.
+								timeslice_file_handler.write(timeslice_loudness_calculation_stdout)
+								timeslice_file_handler.flush() # Flushes written data to os cache
+								os.fsync(timeslice_file_handler.fileno()) # Flushes os cache to disk
+						except KeyboardInterrupt:
+							if silent == False:
+								print('\n\nUser cancelled operation.\n' * english + '\n\nKäyttäjä pysäytti ohjelman.\n' * finnish)
+							sys.exit(0)
+						except IOError as reason_for_error:
+							error_message = 'Error opening timeslice tablefile for writing ' * english + 'Aikaviipaleiden taulukkotiedoston avaaminen kirjoittamista varten epäonnistui ' * finnish + str(reason_for_error)
+							send_error_messages_to_screen_logfile_email(error_message, [])
+						except OSError as reason_for_error:
+							error_message = 'Error opening timeslice tablefile for writing ' * english + 'Aikaviipaleiden taulukkotiedoston avaaminen kirjoittamista varten epäonnistui ' * finnish + str(reason_for_error)
+							send_error_messages_to_screen_logfile_email(error_message, [])
+
+						# Write gnuplot commands to a file.
+						try:
+							with open(commandfile_for_gnuplot, 'wt') as gnuplot_commandfile_handler:
+								for item in gnuplot_commands:
+									gnuplot_commandfile_handler.write(item + '\n')
+								gnuplot_commandfile_handler.flush() # Flushes written data to os cache
+								os.fsync(gnuplot_commandfile_handler.fileno()) # Flushes os cache to disk
+						except KeyboardInterrupt:
+							if silent == False:
+								print('\n\nUser cancelled operation.\n' * english + '\n\nKäyttäjä pysäytti ohjelman.\n' * finnish)
+							sys.exit(0)
+						except IOError as reason_for_error:
+							error_message = 'Error opening Gnuplot commandfile for writing ' * english + 'Gnuplotin komentotiedoston avaaminen kirjoittamista varten epäonnistui ' * finnish + str(reason_for_error)
+							send_error_messages_to_screen_logfile_email(error_message, [])
+						except OSError as reason_for_error:
+							error_message = 'Error opening Gnuplot commandfile for writing ' * english + 'Gnuplotin komentotiedoston avaaminen kirjoittamista varten epäonnistui ' * finnish + str(reason_for_error)
+							send_error_messages_to_screen_logfile_email(error_message, [])
 
 			# Save some debug information.
 			if debug_file_processing == True:
@@ -1283,14 +2848,38 @@ def create_gnuplot_commands(filename, number_of_timeslices, time_slice_duration_
 				debug_information_list.append(unix_time_in_ticks)
 				debug_temporary_dict_for_all_file_processing_information[filename] = debug_information_list
 
-			# Call a subprocess to run gnuplot
+			# The graphics file and the loudness corrected file don't depend on each other, so gnuplot is run in its own thread while the loudness corrected file is created.
+			# The gnuplot thread saves its debug information to a list of its own, the list is added to the debug information of the file when the thread has finished.
+			gnuplot_process = None
+			debug_information_list_of_the_gnuplot_thread = []
+
 			if create_loudness_history_graphics_files == True:
-				run_gnuplot(filename, directory_for_temporary_files, directory_for_results, english, finnish)
+				if draw_loudness_graphics_in_process == True:
+					gnuplot_process = threading.Thread(target=draw_loudness_graphics, args=(filename, graphics_title, [-60, 0], plotted_lines, plotfile_x_axis_tics, plotfile_x_axis_name, y_axis_name, directory_for_results, english, finnish, debug_information_list_of_the_gnuplot_thread)) # Create a process instance.
+				else:
+					gnuplot_process = threading.Thread(target=run_gnuplot, args=(filename, directory_for_temporary_files, directory_for_results, english, finnish, gnuplot_commands, debug_information_list_of_the_gnuplot_thread)) # Create a process instance.
+				graphics_plotting_threads_dict[filename] = gnuplot_process
+				gnuplot_process.start() # Start the process in it'own thread.
 
 			# Call a subprocess to create the loudness corrected audio file.
 			if create_loudness_corrected_files == True:
 				create_commands_for_loudness_adjusting_a_file(integrated_loudness_calculation_error, difference_from_target_loudness, filename, english, finnish, hotfolder_path, directory_for_results, directory_for_temporary_files, highest_peak_db, flac_compression_level, output_format_for_intermediate_files, output_format_for_final_file, channel_count, audio_channels_will_be_split_to_separate_mono_files, output_file_too_big_to_split_to_separate_wav_channels, bit_depth, sample_rate)
 
+			# Processing of the file is ready only when both the graphics file and the loudness corrected file are ready.
+			if gnuplot_process != None:
+				gnuplot_process.join()
+
+				if graphics_plotting_threads_dict.get(filename) == gnuplot_process:
+					del graphics_plotting_threads_dict[filename]
+
+				if debug_file_processing == True:
+					debug_information_list = []
+
+					if filename in debug_temporary_dict_for_all_file_processing_information:
+						debug_information_list = debug_temporary_dict_for_all_file_processing_information[filename]
+					debug_information_list.extend(debug_information_list_of_the_gnuplot_thread)
+					debug_temporary_dict_for_all_file_processing_information[filename] = debug_information_list
+
 	except Exception:
 		exc_type, exc_value, exc_traceback = sys.exc_info()
 		error_message_as_a_list = traceback.format_exception(exc_type, exc_value, exc_traceback)
@@ -1310,7 +2899,16 @@ def create_gnuplot_commands_for_error_message(error_message, filename, directory
 		gnuplot_commands = []
 		global create_loudness_history_graphics_files
 		global silent
+		global graphics_plotting_threads_dict
+		global draw_loudness_graphics_in_process
+		global number_of_gnuplot_worker_processes
 		
+		# If the graphics file of loudness results is still being plotted, wait for it to finish. The error graphics then replaces it and the two gnuplot runs don't use the same temporary files at the same time.
+		gnuplot_process = graphics_plotting_threads_dict.get(filename)
+
+		if (gnuplot_process != None) and (gnuplot_process != threading.current_thread()):
+			gnuplot_process.join()
+
 
 		# Save some debug information. Items are always saved in pairs (Title, value) so that the list is easy to parse later.
 		if debug_file_processing == True:
@@ -1326,8 +2924,10 @@ def create_gnuplot_commands_for_error_message(error_message, filename, directory
 			debug_information_list.append('create_gnuplot_commands_for_error_message')
 			debug_temporary_dict_for_all_file_processing_information[filename] = debug_information_list
 
+		graphics_title = '\'' + filename.replace('_', ' ') + '\'\\n' + 'Loudness calculation encountered an error\\n\\n' * english + 'Äänekkyyden mittaamisessa tapahtui virhe:\\n\\n' * finnish + 'Error Message: ' * english + 'Virheilmoitus: ' * finnish + str(error_message)
+
 		# Write 4 coordinates to gnuplot data file. These 4 coordinates are used to draw a big red cross on the error graphics file.
-		if create_loudness_history_graphics_files == True:
+		if (create_loudness_history_graphics_files == True) and (draw_loudness_graphics_in_process == False) and (number_of_gnuplot_worker_processes == 0):
 
 			try:
 				with open(loudness_calculation_table, 'wt') as timeslice_file_handler:
@@ -1345,15 +2945,24 @@ def create_gnuplot_commands_for_error_message(error_message, filename, directory
 				error_message = 'Error opening gnuplot datafile for writing error graphics data ' * english + 'Gnuplotin datatiedoston avaaminen virhegrafiikan datan kirjoittamista varten epäonnistui ' * finnish + str(reason_for_error)
 				send_error_messages_to_screen_logfile_email(error_message, [])
 
+		if (create_loudness_history_graphics_files == True) and (draw_loudness_graphics_in_process == False):
+
 			# Create gnuplot commands and put them in  a list.
-			gnuplot_commands=['set terminal jpeg size 1280,960 medium font \'LiberationSans-Regular\' 12', \
+			gnuplot_commands=['set terminal jpeg size ' + str(loudness_graphics_width) + ',' + str(loudness_graphics_height) + ' medium font \'LiberationSans-Regular\' ' + str(loudness_graphics_font_size), \
 			'set encoding utf8', \
 			'set output ' + '\"' + gnuplot_temporary_output_graphicsfile.replace('"','\\"') + '\"', \
 			'set yrange [ 1 : 10 ]', \
-			'set title ' + '\"\'' + filename.replace('_', ' ').replace('"','\\"') + '\'\\n' + 'Loudness calculation encountered an error\\n\\n' * english + 'Äänekkyyden mittaamisessa tapahtui virhe:\\n\\n' * finnish + 'Error Message: ' * english + 'Virheilmoitus: ' * finnish + str(error_message), \
+			'set title ' + '\"' + graphics_title.replace('"','\\"') + '\"', \
 			'plot ' + '\"' + loudness_calculation_table.replace('"','\\"') + '\"' + ' with lines lw 2 title \'\'']
 
-			# Write gnuplot commands to a file.
+			if number_of_gnuplot_worker_processes > 0:
+				# Gnuplot processes that are kept running get the 4 coordinates inline after the plot command. X - coordinates are given, since the second line starts again from 0.
+				gnuplot_commands[-1] = 'plot \'-\' using 1:2 with lines lw 2 title \'\''
+				gnuplot_commands.extend(['0 1.0', '1 10', '', '0 10', '1 1.0', 'e'])
+
+		# Write gnuplot commands to a file.
+		if (create_loudness_history_graphics_files == True) and (draw_loudness_graphics_in_process == False) and (number_of_gnuplot_worker_processes == 0):
+
 			try:
 				with open(commandfile_for_gnuplot, 'wt') as gnuplot_commandfile_handler:
 					for item in gnuplot_commands:
@@ -1386,7 +2995,15 @@ def create_gnuplot_commands_for_error_message(error_message, filename, directory
 
 		# Call a subprocess to run gnuplot
 		if create_loudness_history_graphics_files == True:
-			run_gnuplot(filename, directory_for_temporary_files, directory_for_results, english, finnish)
+			if draw_loudness_graphics_in_process == True:
+				# Draw the same red cross as gnuplot draws from the 4 coordinates.
+				error_x_axis_tics = []
+				for counter in range(0, 6):
+					error_x_axis_tics.append(['%g' % (counter / 5), counter / 5])
+				plotted_lines = [[[[[0, 1.0], [1, 10.0]], [[0, 10.0], [1, 1.0]]], '#ff0000', 2, '']]
+				draw_loudness_graphics(filename, graphics_title, [1, 10], plotted_lines, error_x_axis_tics, '', '', directory_for_results, english, finnish)
+			else:
+				run_gnuplot(filename, directory_for_temporary_files, directory_for_results, english, finnish, gnuplot_commands)
 
 	except Exception:
 		exc_type, exc_value, exc_traceback = sys.exc_info()
@@ -1394,12 +3011,17 @@ def create_gnuplot_commands_for_error_message(error_message, filename, directory
 		subroutine_name = 'create_gnuplot_commands_for_error_message'
 		catch_python_interpreter_errors(error_message_as_a_list, subroutine_name)
 	
-def run_gnuplot(filename, directory_for_temporary_files, directory_for_results, english, finnish):
+def run_gnuplot(filename, directory_for_temporary_files, directory_for_results, english, finnish, gnuplot_commands=None, debug_information_list_of_the_thread=None):
 
 	# This subroutine runs Gnuplot and generates a graphics file.
 	# Gnuplot output is searched for error messages.
+	# If gnuplot processes are kept running, 'gnuplot_commands' are sent to one of them, otherwise gnuplot is started and it reads commands from the command file.
+	# When this subroutine runs in its own thread beside other processing of the same file, debug information is saved to 'debug_information_list_of_the_thread' and not to the dictionary shared with the other threads.
 	results_from_gnuplot_run = b''
 
+	if gnuplot_commands == None:
+		gnuplot_commands = []
+
 	try:
 		commandfile_for_gnuplot = directory_for_temporary_files + os.sep + filename + '-gnuplot_commands'
 		loudness_calculation_table = directory_for_temporary_files + os.sep + filename + '-loudness_calculation_table'
@@ -1407,6 +3029,116 @@ def run_gnuplot(filename, directory_for_temporary_files, directory_for_results,
 		gnuplot_output_graphicsfile = directory_for_results + os.sep + filename + '-Loudness_Results_Graphics.jpg' * english + '-Aanekkyyslaskennan_Tulokset.jpg' * finnish
 
 		global silent
+		global number_of_gnuplot_worker_processes
+		error_message = ''
+
+		# Save some debug information. Items are always saved in pairs (Title, value) so that the list is easy to parse later.
+		if debug_file_processing == True:
+			debug_information_list = []
+			global debug_temporary_dict_for_all_file_processing_information
+
+			if debug_information_list_of_the_thread != None:
+				debug_information_list = debug_information_list_of_the_thread
+			elif filename in debug_temporary_dict_for_all_file_processing_information:
+				debug_information_list = debug_temporary_dict_for_all_file_processing_information[filename]
+			unix_time_in_ticks, realtime = get_realtime(english, finnish)
+			debug_information_list.append('Start Time')
+			debug_information_list.append(unix_time_in_ticks)
+			debug_information_list.append('Subprocess Name')
+			debug_information_list.append('run_gnuplot')
+
+			if debug_information_list_of_the_thread == None:
+				debug_temporary_dict_for_all_file_processing_information[filename] = debug_information_list
+
+		if (number_of_gnuplot_worker_processes > 0) and (len(gnuplot_commands) > 0):
+			# Send commands to a gnuplot process that is kept running. If the gnuplot process crashed, try once more with a new gnuplot process.
+			results_from_gnuplot_run, error_message = run_gnuplot_commands_in_worker_process(gnuplot_commands, english, finnish)
+
+			if error_message != '':
+				results_from_gnuplot_run, error_message = run_gnuplot_commands_in_worker_process(gnuplot_commands, english, finnish)
+		else:
+			# Start gnuplot and give time slice and gnuplot command file names as arguments. Gnuplot generates graphics file in the temporary files directory.
+			results_from_gnuplot_run, gnuplot_stderr, error_message = run_external_command(['gnuplot', commandfile_for_gnuplot], english, finnish, stderr_to_stdout=True) # Run gnuplot.
+		
+		# Convert gnuplot output from binary to UTF-8 text.
+		results_of_gnuplot_run_list = results_from_gnuplot_run.decode('UTF-8').strip()
+		
+		# If gnuplot outputs something, there was a warning or an error. Send this message to user.
+		if ('warning:' in results_of_gnuplot_run_list.lower()) and ('error' not in results_of_gnuplot_run_list.lower()):
+			error_message = 'Warning, Gnuplot printed warnings while plotting graphics, ' * english + 'Varoitus, Gnuplot tulosti varoituksia grafiikan piirtämisessä, ' * finnish + ' ' + filename + ' : ' + results_of_gnuplot_run_list
+			send_error_messages_to_screen_logfile_email(error_message, [])
+		elif not len(results_of_gnuplot_run_list) == 0:
+			error_message = 'ERROR !!! Plotting graphics with Gnuplot, ' * english + 'VIRHE !!! Grafiikan piirtämisessä Gnuplotilla, ' * finnish + ' ' + filename + ' : ' + results_of_gnuplot_run_list
+			send_error_messages_to_screen_logfile_email(error_message, [])
+
+		# Save some debug information.
+		if debug_file_processing == True:
+			debug_information_list.append('error_message')
+			debug_information_list.append(error_message)
+			unix_time_in_ticks, realtime = get_realtime(english, finnish)
+			debug_information_list.append('Stop Time')
+			debug_information_list.append(unix_time_in_ticks)
+
+			if debug_information_list_of_the_thread == None:
+				debug_temporary_dict_for_all_file_processing_information[filename] = debug_information_list
+
+		# Remove time slice and gnuplot command files and move graphics file to results directory. Gnuplot processes that are kept running don't use these files.
+		if not ((number_of_gnuplot_worker_processes > 0) and (len(gnuplot_commands) > 0)):
+			try:
+				os.remove(commandfile_for_gnuplot)
+				os.remove(loudness_calculation_table)
+			except KeyboardInterrupt:
+				if silent == False:
+					print('\n\nUser cancelled operation.\n' * english + '\n\nKäyttäjä pysäytti ohjelman.\n' * finnish)
+				sys.exit(0)
+			except IOError as reason_for_error:
+				error_message = 'Error deleting gnuplot command- or time slice file ' * english + 'Gnuplotin komento- tai aikaviipale-tiedoston poistaminen epäonnistui ' * finnish + str(reason_for_error)
+				send_error_messages_to_screen_logfile_email(error_message, [])
+			except OSError as reason_for_error:
+				error_message = 'Error deleting gnuplot command- or time slice file ' * english + 'Gnuplotin komento- tai aikaviipale-tiedoston poistaminen epäonnistui ' * finnish + str(reason_for_error)
+				send_error_messages_to_screen_logfile_email(error_message, [])
+
+		try:
+			shutil.move(gnuplot_temporary_output_graphicsfile, gnuplot_output_graphicsfile)
+		except KeyboardInterrupt:
+			if silent == False:
+				print('\n\nUser cancelled operation.\n' * english + '\n\nKäyttäjä pysäytti ohjelman.\n' * finnish)
+			sys.exit(0)
+		except IOError as reason_for_error:
+			error_message = 'Error moving gnuplot graphics file ' * english + 'Gnuplotin grafiikkatiedoston siirtäminen epäonnistui ' * finnish + str(reason_for_error)
+			send_error_messages_to_screen_logfile_email(error_message, [])
+		except OSError as reason_for_error:
+			error_message = 'Error moving gnuplot graphics file ' * english + 'Gnuplotin grafiikkatiedoston siirtäminen epäonnistui ' * finnish + str(reason_for_error)
+			send_error_messages_to_screen_logfile_email(error_message, [])
+
+	except Exception:
+		exc_type, exc_value, exc_traceback = sys.exc_info()
+		error_message_as_a_list = traceback.format_exception(exc_type, exc_value, exc_traceback)
+		subroutine_name = 'run_gnuplot'
+		catch_python_interpreter_errors(error_message_as_a_list, subroutine_name)
+
+def draw_loudness_graphics(filename, graphics_title, y_axis_range, plotted_lines, x_axis_tics, x_axis_name, y_axis_name, directory_for_results, english, finnish, debug_information_list_of_the_thread=None):
+
+	# This subroutine draws the loudness graphics file in this process with Pillow, the graphics file looks like the one gnuplot plots.
+	# The graphics file is written once directly to the results directory, no temporary files are needed and no external program is started.
+	#
+	# This subroutine works like this:
+	# ---------------------------------
+	# 'graphics_title' is the title printed above the plot area, title lines are separated with '\\n' like in the gnuplot title.
+	# 'y_axis_range' is a list: [lowest value, highest value]. Lines are cut to this range.
+	# 'plotted_lines' is a list of lines, each line is a list: [list of line segments, color, line width, title printed in the key]. A line segment is a list of [x, y] points.
+	# 'x_axis_tics' is a list of x-axis tic marks, each tic mark is a list: [text, x position].
+	# The x-axis starts from 0 and ends to the biggest x position of a point or a tic mark.
+	# When this subroutine runs in its own thread beside other processing of the same file, debug information is saved to 'debug_information_list_of_the_thread' and not to the dictionary shared with the other threads.
+
+	try:
+		output_graphicsfile = directory_for_results + os.sep + filename + '-Loudness_Results_Graphics.jpg' * english + '-Aanekkyyslaskennan_Tulokset.jpg' * finnish
+
+		global silent
+		global font_paths_for_loudness_graphics
+		global loudness_graphics_width
+		global loudness_graphics_height
+		global loudness_graphics_font_size
 		error_message = ''
 
 		# Save some debug information. Items are always saved in pairs (Title, value) so that the list is easy to parse later.
@@ -1414,62 +3146,155 @@ def run_gnuplot(filename, directory_for_temporary_files, directory_for_results,
 			debug_information_list = []
 			global debug_temporary_dict_for_all_file_processing_information
 
-			if filename in debug_temporary_dict_for_all_file_processing_information:
-				debug_information_list = debug_temporary_dict_for_all_file_processing_information[filename]
-			unix_time_in_ticks, realtime = get_realtime(english, finnish)
-			debug_information_list.append('Start Time')
-			debug_information_list.append(unix_time_in_ticks)
-			debug_information_list.append('Subprocess Name')
-			debug_information_list.append('run_gnuplot')
-			debug_temporary_dict_for_all_file_processing_information[filename] = debug_information_list
+			if debug_information_list_of_the_thread != None:
+				debug_information_list = debug_information_list_of_the_thread
+			elif filename in debug_temporary_dict_for_all_file_processing_information:
+				debug_information_list = debug_temporary_dict_for_all_file_processing_information[filename]
+			unix_time_in_ticks, realtime = get_realtime(english, finnish)
+			debug_information_list.append('Start Time')
+			debug_information_list.append(unix_time_in_ticks)
+			debug_information_list.append('Subprocess Name')
+			debug_information_list.append('draw_loudness_graphics')
+
+			if debug_information_list_of_the_thread == None:
+				debug_temporary_dict_for_all_file_processing_information[filename] = debug_information_list
+
+		image_width = loudness_graphics_width
+		image_height = loudness_graphics_height
+		title_lines = graphics_title.split('\\n')
+
+		# The gnuplot jpeg terminal draws fonts at 96 dots per inch, convert the font size from points to pixels the same way.
+		font_size_in_pixels = int(round(loudness_graphics_font_size * 96 / 72))
+
+		# Use the first font that can be found, if none is found use the default font of Pillow.
+		font = None
+
+		for font_path in font_paths_for_loudness_graphics:
+			if os.path.exists(font_path):
+				font = PIL.ImageFont.truetype(font_path, font_size_in_pixels)
+				break
+
+		if font == None:
+			font = PIL.ImageFont.load_default()
+
+		# Gnuplot measures its margins in characters. Use the width of a digit and the height of a text line of the font as the units.
+		character_width = font.getbbox('0')[2]
+		line_height = int(round(font_size_in_pixels * 1.25))
+
+		# Gnuplot puts a tic mark on the y-axis every 10 units on the -60 to 0 LUFS scale and every unit on shorter scales.
+		y_axis_minimum = y_axis_range[0]
+		y_axis_maximum = y_axis_range[1]
+		y_axis_tic_step = 1
+
+		if y_axis_maximum - y_axis_minimum > 20:
+			y_axis_tic_step = 10
+
+		y_axis_tics = list(range(y_axis_minimum, y_axis_maximum + 1, y_axis_tic_step))
+		widest_y_axis_tic_text = 0
+
+		for y_axis_tic in y_axis_tics:
+			if font.getbbox(str(y_axis_tic))[2] > widest_y_axis_tic_text:
+				widest_y_axis_tic_text = font.getbbox(str(y_axis_tic))[2]
+
+		# Leave room for the title above the plot area, for the y-axis name and tic mark texts on the left side and for tic mark texts and the x-axis name below the plot area, like gnuplot does.
+		plot_area_left = character_width + line_height + character_width + widest_y_axis_tic_text + character_width
+		plot_area_right = image_width - 2 * character_width
+		plot_area_top = (len(title_lines) + 1) * line_height
+		plot_area_bottom = image_height - 3 * line_height
+
+		x_axis_maximum = 0
+
+		for line in plotted_lines:
+			for line_segment in line[0]:
+				for point in line_segment:
+					if point[0] > x_axis_maximum:
+						x_axis_maximum = point[0]
+
+		for tic_mark in x_axis_tics:
+			if tic_mark[1] > x_axis_maximum:
+				x_axis_maximum = tic_mark[1]
+
+		if x_axis_maximum <= 0:
+			x_axis_maximum = 1
+
+		x_scale = (plot_area_right - plot_area_left) / x_axis_maximum
+		y_scale = (plot_area_bottom - plot_area_top) / (y_axis_maximum - y_axis_minimum)
+
+		image = PIL.Image.new('RGB', (image_width, image_height), '#ffffff')
+		draw = PIL.ImageDraw.Draw(image)
+
+		# Print the title centered above the plot area.
+		for counter in range(0, len(title_lines)):
+			text_width = draw.textbbox((0, 0), title_lines[counter], font=font)[2]
+			draw.text((int((image_width - text_width) / 2), int(line_height / 2) + counter * line_height), title_lines[counter], font=font, fill='#000000')
+
+		# Draw y-axis grid and tic mark texts.
+		for y_axis_tic in y_axis_tics:
+			y_position = int(plot_area_bottom - (y_axis_tic - y_axis_minimum) * y_scale)
+			draw.line([(plot_area_left, y_position), (plot_area_right, y_position)], fill='#c0c0c0', width=1)
+			text_box = draw.textbbox((0, 0), str(y_axis_tic), font=font)
+			draw.text((plot_area_left - character_width - text_box[2], y_position - int(text_box[3] / 2)), str(y_axis_tic), font=font, fill='#000000')
+
+		# Draw x-axis grid and tic mark texts.
+		for tic_mark in x_axis_tics:
+			x_position = int(plot_area_left + tic_mark[1] * x_scale)
+			draw.line([(x_position, plot_area_top), (x_position, plot_area_bottom)], fill='#c0c0c0', width=1)
+			text_width = draw.textbbox((0, 0), tic_mark[0], font=font)[2]
+			draw.text((x_position - int(text_width / 2), plot_area_bottom + int(line_height / 2)), tic_mark[0], font=font, fill='#000000')
+
+		draw.rectangle([plot_area_left, plot_area_top, plot_area_right, plot_area_bottom], outline='#000000')
+
+		# Print axis names, y-axis name is printed rotated 90 degrees.
+		if x_axis_name != '':
+			text_width = draw.textbbox((0, 0), x_axis_name, font=font)[2]
+			draw.text((int((plot_area_left + plot_area_right - text_width) / 2), plot_area_bottom + int(line_height * 1.5)), x_axis_name, font=font, fill='#000000')
+
+		if y_axis_name != '':
+			text_box = draw.textbbox((0, 0), y_axis_name, font=font)
+			y_axis_name_image = PIL.Image.new('RGB', (text_box[2], text_box[3]), '#ffffff')
+			PIL.ImageDraw.Draw(y_axis_name_image).text((0, 0), y_axis_name, font=font, fill='#000000')
+			y_axis_name_image = y_axis_name_image.rotate(90, expand=True)
+			image.paste(y_axis_name_image, (character_width, int((plot_area_top + plot_area_bottom - y_axis_name_image.size[1]) / 2)))
+
+		# Draw the lines and print the key for lines that have a title in the upper right corner of the plot area. The line sample in the key is 4 characters long like in gnuplot.
+		key_line_number = 0
+
+		for line in plotted_lines:
+
+			for line_segment in line[0]:
+				points = []
+
+				for point in line_segment:
+					y_value = point[1]
 
-		try:
-			# Define filename for the temporary file that we are going to use as stdout for the external command.
-			stdout_for_external_command = directory_for_temporary_files + os.sep + filename + '_gnuplot_stdout.txt'
-			# Open the stdout and stderr temporary files in binary write mode.
-			with open(stdout_for_external_command, 'wb') as stdout_commandfile_handler:
+					if y_value < y_axis_minimum:
+						y_value = y_axis_minimum
+					if y_value > y_axis_maximum:
+						y_value = y_axis_maximum
+
+					points.append((plot_area_left + point[0] * x_scale, plot_area_bottom - (y_value - y_axis_minimum) * y_scale))
+
+				if len(points) > 1:
+					draw.line(points, fill=line[1], width=line[2])
+
+			if line[3] != '':
+				y_position = plot_area_top + line_height + key_line_number * line_height
+				text_box = draw.textbbox((0, 0), line[3], font=font)
+				draw.text((plot_area_right - 6 * character_width - text_box[2], y_position - int(text_box[3] / 2)), line[3], font=font, fill='#000000')
+				draw.line([(plot_area_right - 5 * character_width, y_position), (plot_area_right - character_width, y_position)], fill=line[1], width=line[2])
+				key_line_number = key_line_number + 1
 
-				# Start gnuplot and give time slice and gnuplot command file names as arguments. Gnuplot generates graphics file in the temporary files directory.
-				subprocess.Popen(['gnuplot', commandfile_for_gnuplot], stdout=stdout_commandfile_handler, stderr=stdout_commandfile_handler, stdin=None, close_fds=True).communicate()[0] # Run gnuplot.
-			
-				# Make sure all data written to temporary stdout and stderr - files is flushed from the os cache and written to disk.
-				stdout_commandfile_handler.flush() # Flushes written data to os cache
-				os.fsync(stdout_commandfile_handler.fileno()) # Flushes os cache to disk
-			
-		except IOError as reason_for_error:
-			error_message = 'Error writing to gnuplot stdout- file ' * english + 'Gnuplotin Stdout- tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error writing to gnuplot stdout- file ' * english + 'Gnuplotin Stdout- tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-			
-		# Open the file we used as stdout for the external program and read in what the external program wrote to it.
-		try:
-			with open(stdout_for_external_command, 'rb') as stdout_commandfile_handler:
-				results_from_gnuplot_run = stdout_commandfile_handler.read(None)
-		except IOError as reason_for_error:
-			error_message = 'Error reading from gnuplot stdout- file ' * english + 'Gnuplotin Stdout- tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error reading from gnuplot stdout- file ' * english + 'Gnuplotin Stdout- tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		
-		# Convert gnuplot output from binary to UTF-8 text.
-		results_of_gnuplot_run_list = results_from_gnuplot_run.decode('UTF-8').strip()
-		
-		# Delete the temporary stdout - file.
 		try:
-			os.remove(stdout_for_external_command)
+			image.save(output_graphicsfile, 'JPEG', quality=90)
+		except KeyboardInterrupt:
+			if silent == False:
+				print('\n\nUser cancelled operation.\n' * english + '\n\nKäyttäjä pysäytti ohjelman.\n' * finnish)
+			sys.exit(0)
 		except IOError as reason_for_error:
-			error_message = 'Error deleting gnuplot stdout - file ' * english + 'Gnuplotin stdout - tiedoston deletoiminen epäonnistui ' * finnish	+ str(reason_for_error)
+			error_message = 'Error writing graphics file ' * english + 'Grafiikkatiedoston kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
 			send_error_messages_to_screen_logfile_email(error_message, [])
 		except OSError as reason_for_error:
-			error_message = 'Error deleting gnuplot stdout - file ' * english + 'Gnuplotin stdout - tiedoston deletoiminen epäonnistui ' * finnish	+ str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-			
-		# If gnuplot outputs something, there was an error. Send this message to user.
-		if not len(results_of_gnuplot_run_list) == 0:
-			error_message = 'ERROR !!! Plotting graphics with Gnuplot, ' * english + 'VIRHE !!! Grafiikan piirtämisessä Gnuplotilla, ' * finnish + ' ' + filename + ' : ' + results_of_gnuplot_run_list
+			error_message = 'Error writing graphics file ' * english + 'Grafiikkatiedoston kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
 			send_error_messages_to_screen_logfile_email(error_message, [])
 
 		# Save some debug information.
@@ -1479,42 +3304,339 @@ def run_gnuplot(filename, directory_for_temporary_files, directory_for_results,
 			unix_time_in_ticks, realtime = get_realtime(english, finnish)
 			debug_information_list.append('Stop Time')
 			debug_information_list.append(unix_time_in_ticks)
-			debug_temporary_dict_for_all_file_processing_information[filename] = debug_information_list
 
-		# Remove time slice and gnuplot command files and move graphics file to results directory.
+			if debug_information_list_of_the_thread == None:
+				debug_temporary_dict_for_all_file_processing_information[filename] = debug_information_list
+
+	except Exception:
+		exc_type, exc_value, exc_traceback = sys.exc_info()
+		error_message_as_a_list = traceback.format_exception(exc_type, exc_value, exc_traceback)
+		subroutine_name = 'draw_loudness_graphics'
+		catch_python_interpreter_errors(error_message_as_a_list, subroutine_name)
+
+def measure_integrated_loudness_and_peak_from_a_pipe(measurement_pipe_path, measurement_results, english, finnish):
+
+	"""Measures integrated loudness and the highest peak of a wav - stream written to a pipe and appends them and an error message to the list 'measurement_results'."""
+
+	# Audio is measured with the same program and peak measurement method as the original files: NumPy when 'use_numpy_for_loudness_measurement' is True, otherwise libebur128.
+	# The error message is not empty if the program did not print the results or the results are not numbers.
+
+	try:
+		global libebur128_path
+		global peak_measurement_method
+
+		integrated_loudness = float('-inf')
+		highest_peak_float = 0.0
+		error_message = ''
+
+		if use_numpy_for_loudness_measurement == True:
+			list_of_100ms_block_energies, highest_peak_float, channel_count, sample_rate, error_message = calculate_100ms_block_energies_and_peak_with_numpy(measurement_pipe_path, peak_measurement_method, english, finnish)
+
+			if (error_message == '') and (len(list_of_100ms_block_energies) == 0):
+				error_message = 'No audio was read from the pipe' * english + 'Putkesta ei luettu audiota' * finnish
+
+			if error_message == '':
+				integrated_loudness, loudness_range, list_of_timeslice_loudness_values = calculate_loudness_from_100ms_block_energies(list_of_100ms_block_energies, '3')
+		else:
+			libebur128_stdout, libebur128_stderr, error_message = run_external_command([libebur128_path, 'scan', '-l', peak_measurement_method, measurement_pipe_path], english, finnish)
+
+			# libebur128 prints the results on the first line: integrated loudness, loudness range and the highest peak, like this: '-23.0 LUFS, 5.2 LU, 0.891251'
+			libebur128_results = libebur128_stdout.decode('UTF-8', 'replace').split('\n')[0].split(',')
+
+			if (error_message == '') and (len(libebur128_results) < 3):
+				error_message = 'libebur128 did not print the results: ' * english + 'libebur128 ei tulostanut tuloksia: ' * finnish + ' '.join(libebur128_stderr.decode('UTF-8', 'replace').replace('#','').split())
+
+			if error_message == '':
+				try:
+					integrated_loudness = float(libebur128_results[0].replace(' LUFS','').strip())
+					highest_peak_float = float(libebur128_results[2].strip())
+				except ValueError:
+					error_message = 'Error: libebur128 calculation result is not a number: ' * english + 'Virhe: libebur128 laskentatulos ei ole numero: ' * finnish + '\'' + ','.join(libebur128_results) + '\''
+
+		measurement_results.extend([integrated_loudness, highest_peak_float, error_message])
+
+	except Exception:
+		exc_type, exc_value, exc_traceback = sys.exc_info()
+		error_message_as_a_list = traceback.format_exception(exc_type, exc_value, exc_traceback)
+		subroutine_name = 'measure_integrated_loudness_and_peak_from_a_pipe'
+		catch_python_interpreter_errors(error_message_as_a_list, subroutine_name)
+
+def measure_loudness_of_peak_limited_audio(file_to_process, ffmpeg_filter_options, directory_for_temporary_files, english, finnish):
+
+	'''This subroutine measures integrated loudness and the highest peak of the audio coming out of a FFmpeg filter chain without writing the audio to a file'''
+
+	# This subroutine works like this:
+	# ---------------------------------
+	# FFmpeg reads the file, runs the audio through the filter chain and writes the result as 32 bit float wav to a pipe. The pipe is measured in a thread with the same program and peak measurement method as the original file.
+	# When FFmpeg has finished, the pipe is opened and closed for writing until the thread has finished, so that the thread does not wait forever for a pipe FFmpeg did not open.
+	# The measurement stops reading the pipe before the end of the stream only when it fails. FFmpeg is then stopped, otherwise it would wait forever for the pipe to be read.
+	# Measurement fails if FFmpeg exits with an error code, or if the measurement did not produce the integrated loudness and the peak.
+	# Returns an error flag, an error message, the integrated loudness and the highest peak in dB.
+
+	integrated_loudness_calculation_error = False
+	integrated_loudness_calculation_error_message = ''
+	integrated_loudness = 0
+	highest_peak_db = float('-120')
+	measurement_results = []
+	ffmpeg_stderr = bytearray()
+	measurement_pipe_path = directory_for_temporary_files + os.sep + os.path.basename(file_to_process) + '-peak_limited_measurement_pipe'
+
+	try:
 		try:
-			os.remove(commandfile_for_gnuplot)
-			os.remove(loudness_calculation_table)
-		except KeyboardInterrupt:
-			if silent == False:
-				print('\n\nUser cancelled operation.\n' * english + '\n\nKäyttäjä pysäytti ohjelman.\n' * finnish)
-			sys.exit(0)
+			if os.path.exists(measurement_pipe_path):
+				os.remove(measurement_pipe_path)
+			os.mkfifo(measurement_pipe_path)
 		except IOError as reason_for_error:
-			error_message = 'Error deleting gnuplot command- or time slice file ' * english + 'Gnuplotin komento- tai aikaviipale-tiedoston poistaminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
+			integrated_loudness_calculation_error_message = 'Error creating a pipe for loudness measurement ' * english + 'Äänekkyysmittauksen putken luominen epäonnistui ' * finnish + str(reason_for_error)
+			send_error_messages_to_screen_logfile_email(integrated_loudness_calculation_error_message, [])
+			return(True, integrated_loudness_calculation_error_message, integrated_loudness, highest_peak_db)
 		except OSError as reason_for_error:
-			error_message = 'Error deleting gnuplot command- or time slice file ' * english + 'Gnuplotin komento- tai aikaviipale-tiedoston poistaminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
+			integrated_loudness_calculation_error_message = 'Error creating a pipe for loudness measurement ' * english + 'Äänekkyysmittauksen putken luominen epäonnistui ' * finnish + str(reason_for_error)
+			send_error_messages_to_screen_logfile_email(integrated_loudness_calculation_error_message, [])
+			return(True, integrated_loudness_calculation_error_message, integrated_loudness, highest_peak_db)
+
+		measurement_thread = threading.Thread(target=measure_integrated_loudness_and_peak_from_a_pipe, args=(measurement_pipe_path, measurement_results, english, finnish)) # Create a process instance.
+		measurement_thread.start() # Start the process in it'own thread.
+
+		ffmpeg_commandline = ["ffmpeg", "-nostdin", "-y", "-loglevel", "level+error", "-hide_banner", "-i", file_to_process, "-filter", ffmpeg_filter_options, "-acodec", "pcm_f32le", "-f", "wav", measurement_pipe_path]
+		ffmpeg_process = None
+		ffmpeg_return_code = None
+		ffmpeg_was_stopped = False
 
 		try:
-			shutil.move(gnuplot_temporary_output_graphicsfile, gnuplot_output_graphicsfile)
-		except KeyboardInterrupt:
-			if silent == False:
-				print('\n\nUser cancelled operation.\n' * english + '\n\nKäyttäjä pysäytti ohjelman.\n' * finnish)
-			sys.exit(0)
+			ffmpeg_process = subprocess.Popen(ffmpeg_commandline, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, stdin=None, close_fds=True)
+			stderr_reader_thread = threading.Thread(target=read_output_of_external_command, args=(ffmpeg_process.stderr, ffmpeg_stderr, maximum_external_command_output_size))
+			stderr_reader_thread.start()
 		except IOError as reason_for_error:
-			error_message = 'Error moving gnuplot graphics file ' * english + 'Gnuplotin grafiikkatiedoston siirtäminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
+			integrated_loudness_calculation_error_message = 'Error running command: ' * english + 'Komennon ajaminen epäonnistui: ' * finnish + ' '.join(ffmpeg_commandline) + '. ' + str(reason_for_error)
+			send_error_messages_to_screen_logfile_email(integrated_loudness_calculation_error_message, [])
 		except OSError as reason_for_error:
-			error_message = 'Error moving gnuplot graphics file ' * english + 'Gnuplotin grafiikkatiedoston siirtäminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
+			integrated_loudness_calculation_error_message = 'Error running command: ' * english + 'Komennon ajaminen epäonnistui: ' * finnish + ' '.join(ffmpeg_commandline) + '. ' + str(reason_for_error)
+			send_error_messages_to_screen_logfile_email(integrated_loudness_calculation_error_message, [])
+
+		# If FFmpeg stopped before opening the pipe, the measurement thread is still waiting for the pipe to be opened.
+		while measurement_thread.is_alive() == True:
+			if (ffmpeg_process == None) or (ffmpeg_process.poll() != None):
+				try:
+					pipe_file_descriptor = os.open(measurement_pipe_path, os.O_WRONLY | os.O_NONBLOCK)
+					os.close(pipe_file_descriptor)
+				except OSError:
+					pass # Nobody has the pipe open for reading.
+
+			measurement_thread.join(1)
+
+		if ffmpeg_process != None:
+
+			# The measurement failed before it read the pipe to the end, FFmpeg may be waiting for the pipe to be read.
+			if ((len(measurement_results) != 3) or (measurement_results[2] != '')) and (ffmpeg_process.poll() == None):
+				ffmpeg_process.kill()
+				ffmpeg_was_stopped = True
+
+			ffmpeg_return_code = ffmpeg_process.wait()
+			stderr_reader_thread.join()
+
+		try:
+			os.remove(measurement_pipe_path)
+		except OSError:
+			pass
+
+		ffmpeg_stderr_string = ' '.join(bytes(ffmpeg_stderr).decode('UTF-8', 'replace').split())
+
+		if integrated_loudness_calculation_error_message != '':
+			integrated_loudness_calculation_error = True
+		elif (ffmpeg_return_code != 0) and (ffmpeg_was_stopped == False):
+			integrated_loudness_calculation_error = True
+			integrated_loudness_calculation_error_message = 'FFmpeg failed while peak limiting the file, exit code: ' * english + 'FFmpeg epäonnistui tiedoston huippulimitoinnissa, paluukoodi: ' * finnish + str(ffmpeg_return_code) + ' ' + ffmpeg_stderr_string
+		elif len(measurement_results) != 3:
+			integrated_loudness_calculation_error = True
+			integrated_loudness_calculation_error_message = 'Loudness of the peak limited audio was not measured' * english + 'Limitoidun audion äänekkyyttä ei mitattu' * finnish
+		elif measurement_results[2] != '':
+			integrated_loudness_calculation_error = True
+			integrated_loudness_calculation_error_message = measurement_results[2]
+		elif measurement_results[0] == float('-inf'):
+			integrated_loudness_calculation_error = True
+			integrated_loudness_calculation_error_message = 'Loudness is below measurement threshold (-70 LUFS)' * english + 'Äänekkyys on alle mittauksen alarajan (-70 LUFS)' * finnish
+		elif measurement_results[1] <= 0:
+			integrated_loudness_calculation_error = True
+			integrated_loudness_calculation_error_message = 'Error: calculation result (highest_peak) is not positive: ' * english + 'Virhe: laskentatulos (Huippuarvo) ei ole positiivinen: ' * finnish + str(measurement_results[1])
+		else:
+			integrated_loudness = measurement_results[0]
+			highest_peak_db = round(20 * math.log(measurement_results[1], 10), 1)
+
+		# FFmpeg was stopped because the measurement failed. Its exit code only tells that it was killed, but what FFmpeg printed before that may tell why the measurement failed.
+		if (ffmpeg_was_stopped == True) and (integrated_loudness_calculation_error == True):
+			integrated_loudness_calculation_error_message = integrated_loudness_calculation_error_message + '. ' + 'FFmpeg was stopped, FFmpeg output: ' * english + 'FFmpeg pysäytettiin, FFmpeg:in tuloste: ' * finnish + ffmpeg_stderr_string
 
 	except Exception:
 		exc_type, exc_value, exc_traceback = sys.exc_info()
 		error_message_as_a_list = traceback.format_exception(exc_type, exc_value, exc_traceback)
-		subroutine_name = 'run_gnuplot'
+		subroutine_name = 'measure_loudness_of_peak_limited_audio'
 		catch_python_interpreter_errors(error_message_as_a_list, subroutine_name)
 
+	return(integrated_loudness_calculation_error, integrated_loudness_calculation_error_message, integrated_loudness, highest_peak_db)
+
+def read_chunks_from_a_memory_mapped_wav_file(file_mapping, chunk_position, chunk_area_end):
+
+	"""Returns the chunks between two positions of a memory mapped wav - file as a list of [chunk name, chunk data] pairs. Reading stops at the data - chunk or at a chunk that does not fit in the area."""
+
+	list_of_chunks = []
+
+	while chunk_position + 8 <= chunk_area_end:
+		chunk_name = file_mapping[chunk_position:chunk_position + 4]
+		chunk_size = struct.unpack('<I', file_mapping[chunk_position + 4:chunk_position + 8])[0]
+
+		if (chunk_name == b'data') or (chunk_position + 8 + chunk_size > chunk_area_end):
+			break
+
+		list_of_chunks.append([chunk_name, file_mapping[chunk_position + 8:chunk_position + 8 + chunk_size]])
+		chunk_position = chunk_position + 8 + chunk_size + (chunk_size % 2) # Chunks are padded to even byte boundaries.
+
+	return(list_of_chunks)
+
+def create_wav_chunk(chunk_name, chunk_data):
+
+	"""Returns a wav - chunk with its header and padding as bytes."""
+
+	return(chunk_name + struct.pack('<I', len(chunk_data)) + chunk_data + b'\x00' * (len(chunk_data) % 2)) # Chunks are padded to even byte boundaries.
+
+def apply_gain_to_a_wav_file_with_numpy(file_to_process, target_file, gain_in_db, english, finnish):
+
+	"""Writes a copy of an integer pcm wav - file with the gain changed. Returns True if the file was written, False if the file has to be processed with sox."""
+
+	# This subroutine works like this:
+	# ---------------------------------
+	# The source file is memory mapped the same way as in the NumPy loudness measurement, so the file is read from the page cache the measurement already filled.
+	# Audio is processed in 10 second chunks. Pages of the source file are released after each chunk, so memory used does not grow with the size of the file.
+	# Samples are rounded and clipped back to the bit depth of the source file. 16 bit audio is dithered with TPDF dither the same way sox does it when gain is changed.
+	# The fmt - chunk of the source file is copied to the target file, so a WAVE_FORMAT_EXTENSIBLE file keeps its channel mask and valid bits information.
+	# All other chunks (for example bext, iXML and LIST) are copied in the same order before or after the audio data as they are in the source file. Only the ds64 - chunk is not copied, a new one is written when needed.
+	# If the target file does not fit in a wav - file (4 GB), an RF64 - file is written: the sizes in the RIFF- and data - chunk headers are 0xFFFFFFFF and the real sizes are in a ds64 - chunk right after the RF64 - header (EBU Tech 3306).
+
+	supported_wav_formats = [[1, 16], [1, 24], [1, 32]] # Pairs of [format tag, bit depth].
+	target_file_was_written = False
+	file_mapping = None
+	audio_data_memoryview = None
+	audio_data = None
+
+	try:
+		with open(file_to_process, 'rb') as audio_file_handler:
+
+			channel_count, sample_rate, bit_depth, format_tag, data_size = read_wav_format_information_from_a_stream(audio_file_handler)
+
+			if (channel_count == 0) or (sample_rate == 0) or ([format_tag, bit_depth] not in supported_wav_formats):
+				return(False)
+
+			file_mapping, read_position, audio_data_end = map_wav_audio_data_to_memory(audio_file_handler, data_size)
+
+			if file_mapping == None:
+				return(False)
+
+			# Chunks after the audio data can only be found if the size of audio data is known.
+			list_of_chunks_before_audio_data = read_chunks_from_a_memory_mapped_wav_file(file_mapping, 12, read_position)
+			list_of_chunks_after_audio_data = []
+
+			if data_size > 0:
+				list_of_chunks_after_audio_data = read_chunks_from_a_memory_mapped_wav_file(file_mapping, read_position + data_size + (data_size % 2), len(file_mapping))
+
+			fmt_chunk = b''
+			other_chunks_before_audio_data = b''
+			other_chunks_after_audio_data = b''
+
+			for chunk_name, chunk_data in list_of_chunks_before_audio_data:
+				if chunk_name == b'fmt ':
+					fmt_chunk = create_wav_chunk(chunk_name, chunk_data)
+				elif chunk_name != b'ds64':
+					other_chunks_before_audio_data = other_chunks_before_audio_data + create_wav_chunk(chunk_name, chunk_data)
+
+			for chunk_name, chunk_data in list_of_chunks_after_audio_data:
+				if chunk_name not in [b'fmt ', b'ds64']:
+					other_chunks_after_audio_data = other_chunks_after_audio_data + create_wav_chunk(chunk_name, chunk_data)
+
+			if len(fmt_chunk) < 24:
+				return(False)
+
+			bytes_in_one_sample_frame = int(bit_depth / 8) * channel_count
+			size_of_target_audio_data = int((audio_data_end - read_position) / bytes_in_one_sample_frame) * bytes_in_one_sample_frame
+			audio_data_end = read_position + size_of_target_audio_data
+			padding = size_of_target_audio_data % 2 # Chunks are padded to even byte boundaries.
+			riff_chunk_size = 4 + len(fmt_chunk) + len(other_chunks_before_audio_data) + 8 + size_of_target_audio_data + padding + len(other_chunks_after_audio_data) # 'WAVE', the chunks and the data - chunk.
+			riff_header = b'RIFF' + struct.pack('<I', riff_chunk_size) + b'WAVE'
+			data_chunk_header = b'data' + struct.pack('<I', size_of_target_audio_data)
+
+			# The sizes do not fit in 32 bits, write an RF64 - file. The ds64 - chunk holds the RIFF size, the data size, the number of sample frames and an empty table of other chunk sizes. The chunk is 36 bytes long with its header.
+			if (riff_chunk_size > 4294967295) or (size_of_target_audio_data > 4294967295):
+				riff_chunk_size = riff_chunk_size + 36
+				ds64_chunk = create_wav_chunk(b'ds64', struct.pack('<QQQI', riff_chunk_size, size_of_target_audio_data, int(size_of_target_audio_data / bytes_in_one_sample_frame), 0))
+				riff_header = b'RF64' + struct.pack('<I', 4294967295) + b'WAVE' + ds64_chunk
+				data_chunk_header = b'data' + struct.pack('<I', 4294967295)
+
+			bytes_in_a_chunk = sample_rate * 10 * bytes_in_one_sample_frame
+			gain_factor = math.pow(10, gain_in_db / 20)
+			maximum_sample_value = math.pow(2, bit_depth - 1)
+			random_number_generator = numpy.random.default_rng()
+			audio_data_memoryview = memoryview(file_mapping)
+			released_position = 0
+
+			with open(target_file, 'wb') as target_file_handler:
+
+				target_file_handler.write(riff_header)
+				target_file_handler.write(fmt_chunk)
+				target_file_handler.write(other_chunks_before_audio_data)
+				target_file_handler.write(data_chunk_header)
+
+				while read_position < audio_data_end:
+					released_position = release_memory_mapped_audio_data(file_mapping, released_position, read_position)
+					audio_data = audio_data_memoryview[read_position:min(read_position + bytes_in_a_chunk, audio_data_end)]
+					read_position = read_position + len(audio_data)
+
+					audio_samples = convert_wav_data_to_numpy_array(audio_data, channel_count, bit_depth, format_tag) * (gain_factor * maximum_sample_value)
+
+					if (bit_depth == 16) and (gain_in_db != 0):
+						audio_samples = audio_samples + random_number_generator.random(audio_samples.shape) - random_number_generator.random(audio_samples.shape)
+
+					audio_samples = numpy.clip(numpy.round(audio_samples), -maximum_sample_value, maximum_sample_value - 1)
+
+					if bit_depth == 16:
+						target_file_handler.write(audio_samples.astype('<i2').tobytes())
+					elif bit_depth == 24:
+						# Only the three lowest bytes of each 32 bit integer are written.
+						target_file_handler.write(audio_samples.astype('<i4').view(numpy.uint8).reshape(-1, 4)[:, 0:3].tobytes())
+					else:
+						target_file_handler.write(audio_samples.astype('<i4').tobytes())
+
+				target_file_handler.write(b'\x00' * padding)
+				target_file_handler.write(other_chunks_after_audio_data)
+
+			target_file_was_written = True
+
+	except KeyboardInterrupt:
+		if silent == False:
+			print('\n\nUser cancelled operation.\n' * english + '\n\nKäyttäjä pysäytti ohjelman.\n' * finnish)
+		sys.exit(0)
+	except IOError as reason_for_error:
+		error_message = 'Error changing gain of file with NumPy, processing the file with sox: ' * english + 'Tiedoston äänenvoimakkuuden muuttaminen NumPy:llä epäonnistui, käsittelen tiedoston sox:illa: ' * finnish + file_to_process + '. ' + str(reason_for_error)
+		send_error_messages_to_screen_logfile_email(error_message, [])
+	except OSError as reason_for_error:
+		error_message = 'Error changing gain of file with NumPy, processing the file with sox: ' * english + 'Tiedoston äänenvoimakkuuden muuttaminen NumPy:llä epäonnistui, käsittelen tiedoston sox:illa: ' * finnish + file_to_process + '. ' + str(reason_for_error)
+		send_error_messages_to_screen_logfile_email(error_message, [])
+	finally:
+		# The memory mapping can be closed only after all views to it have been released.
+		audio_data = None
+
+		if audio_data_memoryview != None:
+			audio_data_memoryview.release()
+		if file_mapping != None:
+			file_mapping.close()
+
+	# Remove an incomplete target file, sox writes the file again.
+	if (target_file_was_written == False) and (os.path.exists(target_file) == True):
+		try:
+			os.remove(target_file)
+		except OSError:
+			pass
+
+	return(target_file_was_written)
+
 def create_commands_for_loudness_adjusting_a_file(integrated_loudness_calculation_error, difference_from_target_loudness, filename, english, finnish, hotfolder_path, directory_for_results, directory_for_temporary_files, highest_peak_db, flac_compression_level, output_format_for_intermediate_files, output_format_for_final_file, channel_count, audio_channels_will_be_split_to_separate_mono_files, output_file_too_big_to_split_to_separate_wav_channels, bit_depth, sample_rate):
 
 	'''This subroutine creates sox commands that are used to create a loudness corrected file'''
@@ -1528,14 +3650,11 @@ def create_commands_for_loudness_adjusting_a_file(integrated_loudness_calculatio
 
 	try:
 		# Assing some values to variables.
-		integrated_loudness_calculation_results_list = []
 		file_to_process = hotfolder_path + os.sep + filename
 		filename_and_extension = os.path.splitext(filename)
 		file_processing_encountered_an_error = False
 		sample_rate_str = str(sample_rate)
 		sample_ratex4_str = str(sample_rate * 4)
-		global integrated_loudness_calculation_results
-		global libebur128_path
 		global silent
 		global temp_loudness_results_for_automation
 		global write_loudness_calculation_results_to_a_machine_readable_file
@@ -1557,13 +3676,29 @@ def create_commands_for_loudness_adjusting_a_file(integrated_loudness_calculatio
 			debug_information_list.append('create_commands_for_loudness_adjusting_a_file')
 			debug_temporary_dict_for_all_file_processing_information[filename] = debug_information_list
 
+		# If loudness corrected files of an identical file are in the result cache, use them instead of creating the files again.
+		list_of_filenames = []
+
+		if (result_cache_size > 0) and (integrated_loudness_calculation_error == False):
+			list_of_filenames = copy_corrected_files_from_result_cache(filename, directory_for_temporary_files, english, finnish)
+
+			if len(list_of_filenames) > 0:
+
+				# Save some debug information.
+				if debug_file_processing == True:
+					debug_information_list.append('Message')
+					debug_information_list.append('Loudness corrected files were copied from the result cache')
+					debug_information_list.append('list_of_filenames')
+					debug_information_list.append(list_of_filenames)
+
+				move_processed_audio_files_to_target_directory(directory_for_temporary_files, directory_for_results, list_of_filenames, english, finnish)
+
 		# Create loudness corrected file if there were no errors in loudness calculation.
-		if (integrated_loudness_calculation_error == False):
+		if (integrated_loudness_calculation_error == False) and (len(list_of_filenames) == 0):
 			
 			# Assing some values to variables.
 			# Output format for files has been already been decided in subroutine: get_audiofile_info_with_sox_and_determine_output_format. Output format is wav for files of 4 GB or less and flac for very large files that can't be split to separate wav files.
 			combined_channels_targetfile_name = filename_and_extension[0] + '_' + target_loudness + '_LUFS.' + output_format_for_final_file
-			temporary_peak_limited_targetfile = filename_and_extension[0] + '-Peak_Limited.' + output_format_for_intermediate_files
 			difference_from_target_loudness_sign_inverted = difference_from_target_loudness * -1 # The sign (+/-) of the difference from target loudness needs to be flipped for sox. Plus becomes minus and vice versa.
 			
 			start_of_sox_commandline = ['sox','--single-threaded']
@@ -1579,8 +3714,6 @@ def create_commands_for_loudness_adjusting_a_file(integrated_loudness_calculatio
 			if debug_file_processing == True:
 				debug_information_list.append('combined_channels_targetfile_name')
 				debug_information_list.append(combined_channels_targetfile_name)
-				debug_information_list.append('temporary_peak_limited_targetfile')
-				debug_information_list.append(temporary_peak_limited_targetfile)
 				debug_information_list.append('difference_from_target_loudness')
 				debug_information_list.append(difference_from_target_loudness)
 				debug_information_list.append('difference_from_target_loudness_sign_inverted')
@@ -1617,31 +3750,33 @@ def create_commands_for_loudness_adjusting_a_file(integrated_loudness_calculatio
 					#Gather all names of processed files to a list.
 					list_of_filenames = [combined_channels_targetfile_name]
 					
+					# Change the gain of integer pcm wav - files in-process with NumPy, other files are processed with sox.
+					gain_was_changed_with_numpy = False
+
+					if (use_numpy_for_loudness_measurement == True) and (output_format_for_final_file == 'wav'):
+						gain_was_changed_with_numpy = apply_gain_to_a_wav_file_with_numpy(file_to_process, directory_for_temporary_files + os.sep + combined_channels_targetfile_name, difference_from_target_loudness_sign_inverted, english, finnish)
+
+					# Save some debug information.
+					if debug_file_processing == True:
+						debug_information_list.append('gain_was_changed_with_numpy')
+						debug_information_list.append(gain_was_changed_with_numpy)
+
 					# Run the commandline compiled in the lines above.
-					file_processing_encountered_an_error = process_files(directory_for_temporary_files, directory_for_results, filename, sox_commandline, english, finnish, 0, 0)
+					if gain_was_changed_with_numpy == False:
+						file_processing_encountered_an_error = process_files(directory_for_temporary_files, directory_for_results, filename, sox_commandline, english, finnish, 0, 0)
 				
 				else:
 				
 					# The combined channels in final output file exceeds the max file size and the file needs to be split to separate mono files.
-					# Create commandlines for extracting each channel to its own file.
-					
-					for counter in range(1, channel_count + 1):
-						split_channel_targetfile_name = filename_and_extension[0] + '-Channel-' * english + '-Kanava-' * finnish + str(counter) + '_' + target_loudness + '_LUFS.' + output_format_for_final_file
-						sox_commandline = []
-						sox_commandline.extend(start_of_sox_commandline)
-						sox_commandline.extend([file_to_process, directory_for_temporary_files + os.sep + split_channel_targetfile_name, 'remix', str(counter), 'gain', str(difference_from_target_loudness_sign_inverted)])
-				
-						#Gather all commands needed to process a file to a list of sox commandlines.
-						list_of_sox_commandlines.append(sox_commandline)
-						list_of_filenames.append(split_channel_targetfile_name)
+					# FFmpeg reads the file once and writes each channel to its own file.
+					ffmpeg_commandline, list_of_filenames = create_ffmpeg_commandline_to_split_channels_to_mono_files(file_to_process, 'volume=' + str(difference_from_target_loudness_sign_inverted) + 'dB:precision=double', channel_count, bit_depth, output_format_for_final_file, filename_and_extension, directory_for_temporary_files, english, finnish)
 					
 					# Save some debug information.
 					if debug_file_processing == True:
-						debug_information_list.append('list_of_sox_commandlines')
-						debug_information_list.append(''.join(str(list_of_sox_commandlines)))
+						debug_information_list.append('ffmpeg_commandline')
+						debug_information_list.append(ffmpeg_commandline)
 					
-					# Run several commands in parallel threads, this speeds up splitting the file to separate mono files.	
-					file_processing_encountered_an_error = run_file_processing_in_parallel_threads(directory_for_temporary_files, directory_for_results, filename, list_of_sox_commandlines, english, finnish)
+					file_processing_encountered_an_error = process_files(directory_for_temporary_files, directory_for_results, filename, ffmpeg_commandline, english, finnish, 0, 0)
 				
 				# Processing is ready move audio files to target directory.
 				move_processed_audio_files_to_target_directory(directory_for_temporary_files, directory_for_results, list_of_filenames, english, finnish)
@@ -1656,16 +3791,10 @@ def create_commands_for_loudness_adjusting_a_file(integrated_loudness_calculatio
 					
 					####################################################################################
 					# Peaks will exceed our upper peak limit defined in 'audio_peaks_absolute_ceiling' #
-					# Create a peak limited file with FFmpeg using it's alimiter                       #
-					# After this loudness of the file needs to be recalculated                         #
+					# Peak limit the audio with FFmpeg using it's alimiter                             #
+					# Loudness of the peak limited audio is measured without writing it to a file      #
 					####################################################################################
 					
-					ffmpeg_commandline = []
-					# Combine all FFmpeg commands into one list.
-					start_of_ffmpeg_commandline = ["ffmpeg", "-loglevel", "level+error", "-hide_banner", "-i"]
-					ffmpeg_commandline.extend(start_of_ffmpeg_commandline)
-					ffmpeg_commandline.append(file_to_process)
-
 					# FFmpeg alimiter can amplify at most 20 dB at a time, so if we need more we need to use multiple runs of alimiter.
 					alimiter_peak_limit = "-1"
 					amplify_now = 0
@@ -1692,105 +3821,91 @@ def create_commands_for_loudness_adjusting_a_file(integrated_loudness_calculatio
 
 						ffmpeg_alimiter_options = ffmpeg_alimiter_options + ",alimiter=level_in=" + str(amplify_now) + "dB:level_out=0dB:limit=" + alimiter_peak_limit + "dB:attack=10:release=500:level=disabled:latency=1"
 
-					# Downsample 4 x sample rate back to original.
-					ffmpeg_alimiter_options = ffmpeg_alimiter_options + ",aresample=" + sample_rate_str + ":resampler=soxr:precision=28:dither_method=triangular"
-
-					# When -filter is used and output format is flac FFmpeg alaways defaults to using 24 bit bit depth.
-					# Force FFmpeg to use 16 bits if input file bit depth is 16.
-					if (bit_depth == 16) and (output_format_for_intermediate_files) == "flac":
-						ffmpeg_alimiter_options = ffmpeg_alimiter_options + ",aformat=sample_fmts=s16"
-
-					ffmpeg_commandline.append("-filter")
-					ffmpeg_commandline.append(ffmpeg_alimiter_options)
-
-					# FFmpeg defaults to bit depth of 16 bits when target file format is wav.
-					# Force FFmpeg to use 24 bits if source file bit depth is 24.
-					if (bit_depth == 24) and (output_format_for_intermediate_files) == "wav":
-						ffmpeg_commandline.append("-acodec")
-						ffmpeg_commandline.append("pcm_s24le")
-
-					ffmpeg_commandline.extend([directory_for_temporary_files + os.sep + temporary_peak_limited_targetfile])
-
 					# Save some debug information.
 					if debug_file_processing == True:
-						debug_information_list.append('ffmpeg_commandline')
-						debug_information_list.append(ffmpeg_commandline)
+						debug_information_list.append('ffmpeg_alimiter_options')
+						debug_information_list.append(ffmpeg_alimiter_options)
 						debug_information_list.append('alimiter_peak_limit')
 						debug_information_list.append(alimiter_peak_limit)
+						unix_time_in_ticks, realtime = get_realtime(english, finnish)
+						debug_information_list.append('Start Time')
+						debug_information_list.append(unix_time_in_ticks)
+						debug_information_list.append('Subprocess Name')
+						debug_information_list.append('create_commands_for_loudness_adjusting_a_file: integrated measurements after peak-limiting ')
+
+					###########################################################################################################################
+					# Limiting lowers loudness a little. Measure loudness of the peak limited audio to find out how much gain is still needed #
+					###########################################################################################################################
+
+					integrated_loudness_calculation_error, integrated_loudness_calculation_error_message, integrated_loudness, highest_peak_db = measure_loudness_of_peak_limited_audio(file_to_process, ffmpeg_alimiter_options + ",aresample=" + sample_rate_str + ":resampler=soxr:precision=28:dither_method=triangular", directory_for_temporary_files, english, finnish)
+					difference_from_target_loudness = round(integrated_loudness - float(target_loudness), 1)
+					difference_from_target_loudness_sign_inverted = difference_from_target_loudness * -1 # The sign (+/-) of the difference from target loudness needs to be flipped for FFmpeg. Plus becomes minus and vice versa.
+
+					# The gain still needed is applied with the last alimiter. Peaks are now at -1 dBFS and the last alimiter limits to 0 dBFS, so if more than 1 dB is still needed, the last alimiter lowers loudness too.
+					# In this rare case measure the whole filter chain and correct the gain by the amount the result missed target loudness. This is done at most twice, so there are at most three analysis passes:
+					# - Every pass decodes the whole file and limits it at four times the sample rate, so one pass takes about as long as creating the loudness corrected file. A third correction would make the file take up to twice as long as without corrections.
+					# - The loudness the last alimiter removes grows slower than the gain given to it, so each correction misses target loudness by less than the one before. The first correction removes most of the miss,
+					#   the second one corrects the small extra loudness the last alimiter removes because of the gain added by the first correction.
+					# - Corrections are only needed for audio that is already limited close to full scale. If target loudness is still missed after two corrections, the gain of the last pass is used.
+					number_of_measurements_of_the_whole_filter_chain = 0
+
+					while (integrated_loudness_calculation_error == False) and (difference_from_target_loudness_sign_inverted > 1) and (number_of_measurements_of_the_whole_filter_chain < 2):
+
+						ffmpeg_final_alimiter_options = ffmpeg_alimiter_options + ",alimiter=level_in=" + str(difference_from_target_loudness_sign_inverted) + "dB:level_out=0dB:limit=0dB:attack=10:release=500:level=disabled:latency=1" + ",aresample=" + sample_rate_str + ":resampler=soxr:precision=28:dither_method=triangular"
+						integrated_loudness_calculation_error, integrated_loudness_calculation_error_message, integrated_loudness, highest_peak_db = measure_loudness_of_peak_limited_audio(file_to_process, ffmpeg_final_alimiter_options, directory_for_temporary_files, english, finnish)
+						number_of_measurements_of_the_whole_filter_chain = number_of_measurements_of_the_whole_filter_chain + 1
+
+						# Stop when the result is within 0.1 LU from target loudness.
+						if (integrated_loudness_calculation_error == True) or (abs(integrated_loudness - float(target_loudness)) < 0.1):
+							break
 
-					# Run FFmpeg with the commandline compiled in the lines above.
-					file_processing_encountered_an_error = process_files(directory_for_temporary_files, directory_for_results, filename, ffmpeg_commandline, english, finnish, 0, 0)
-
-					# If there has been an error in processing the file with then stop it.
-					if file_processing_encountered_an_error == False:
-					
-						########################################################################################
-						# Loudness of the peak limited file needs to be calculated again, measure the loudness #
-						########################################################################################
-
-						# Save some debug information.
-						if debug_file_processing == True:
-							unix_time_in_ticks, realtime = get_realtime(english, finnish)
-							debug_information_list.append('Start Time')
-							debug_information_list.append(unix_time_in_ticks)
-							debug_information_list.append('Subprocess Name')
-							debug_information_list.append('create_commands_for_loudness_adjusting_a_file: integrated measurements after peak-limiting ')
-						
-						event_for_integrated_loudness_calculation = threading.Event() # Create a dummy event for loudness calculation subroutine. This is needed by the subroutine, but not used anywhere else, since we do not start loudness calculation as a thread.
-						libebur128_commands_for_integrated_loudness_calculation=[libebur128_path, 'scan', '-l', peak_measurement_method] # Put libebur128 commands in a list.
-						calculate_integrated_loudness(event_for_integrated_loudness_calculation, temporary_peak_limited_targetfile, directory_for_temporary_files, libebur128_commands_for_integrated_loudness_calculation, english, finnish)
-					
-						#########################################################################################################
-						# After calculating loudness of the peak limited file, adjust the volume of the file to target loudness #
-						#########################################################################################################
-						
-						# Get loudness calculation results from the integrated loudness calculation process. Results are in list format in dictionary 'integrated_loudness_calculation_results', assing results to variables.
-						integrated_loudness_calculation_results_list = integrated_loudness_calculation_results.pop(temporary_peak_limited_targetfile)# Get loudness results for the file and remove this information from dictionary.
-						difference_from_target_loudness = integrated_loudness_calculation_results_list[1]
-						difference_from_target_loudness_sign_inverted = difference_from_target_loudness * -1 # The sign (+/-) of the difference from target loudness needs to be flipped for sox. Plus becomes minus and vice versa.
-						integrated_loudness_calculation_error = integrated_loudness_calculation_results_list[3]
-						integrated_loudness_calculation_error_message = integrated_loudness_calculation_results_list[4]
-						highest_peak_db = integrated_loudness_calculation_results_list[5]
-						sox_commandline = []
-						list_of_sox_commandlines = []
-						list_of_filenames = []
-						
-						# Save some debug information.
-						if debug_file_processing == True:
-							debug_information_list.append('difference_from_target_loudness')
-							debug_information_list.append(difference_from_target_loudness)
-							debug_information_list.append('difference_from_target_loudness_sign_inverted')
-							debug_information_list.append(difference_from_target_loudness_sign_inverted)
-							debug_information_list.append('peak_measurement_method ')
-							debug_information_list.append(peak_measurement_method )
-							debug_information_list.append('highest_peak_db')
-							debug_information_list.append(highest_peak_db)
-							unix_time_in_ticks, realtime = get_realtime(english, finnish)
-							debug_information_list.append('Stop Time')
-							debug_information_list.append(unix_time_in_ticks)
-							debug_information_list.append('Subprocess Name')
-							debug_information_list.append('create_commands_for_loudness_adjusting_a_file: integrated measurements after peak-limiting ')
-
-							# Remove debug data about integrated loudness measurement of temporary peak limited file since this data is already appended to debug dictionary by the lines above.
-							del debug_temporary_dict_for_integrated_loudness_calculation_information[temporary_peak_limited_targetfile]
-
-						if integrated_loudness_calculation_error == True:
-
-							# Print error message on result graphics file
-							error_message = 'ERROR !!! in integrated loudness calculation while measuring the peak limited file: ' * english + 'VIRHE !!! keskimääräisen äänekkyyden laskennassa, kun huippulimitoitua tiedostoa käsiteltiin: ' * finnish + integrated_loudness_calculation_error_message
-							create_gnuplot_commands_for_error_message(error_message, filename, directory_for_temporary_files, directory_for_results, english, finnish)
-
-							if write_loudness_calculation_results_to_a_machine_readable_file == True:
+						difference_from_target_loudness_sign_inverted = round(difference_from_target_loudness_sign_inverted + float(target_loudness) - integrated_loudness, 1)
+						difference_from_target_loudness = difference_from_target_loudness_sign_inverted * -1
 
-								if filename in temp_loudness_results_for_automation:
+					# 'highest_peak_db' is now the peak of the last measured pass and 'difference_from_target_loudness' the gain the last alimiter applies with the sign flipped.
 
-									# An error has happened.
-									error_code = 2
+					sox_commandline = []
+					list_of_sox_commandlines = []
+					list_of_filenames = []
 
-									temp_loudness_results_for_automation[filename][1][4] = 0 # number_of_files_in_this_mix
-									temp_loudness_results_for_automation[filename][1][12] = error_code
-									temp_loudness_results_for_automation[filename][1][13] = error_message
-									temp_loudness_results_for_automation[filename][1][14] = []
+					# Save some debug information.
+					if debug_file_processing == True:
+						debug_information_list.append('difference_from_target_loudness')
+						debug_information_list.append(difference_from_target_loudness)
+						debug_information_list.append('difference_from_target_loudness_sign_inverted')
+						debug_information_list.append(difference_from_target_loudness_sign_inverted)
+						debug_information_list.append('number_of_measurements_of_the_whole_filter_chain')
+						debug_information_list.append(number_of_measurements_of_the_whole_filter_chain)
+						debug_information_list.append('peak_measurement_method ')
+						debug_information_list.append(peak_measurement_method )
+						debug_information_list.append('highest_peak_db')
+						debug_information_list.append(highest_peak_db)
+						unix_time_in_ticks, realtime = get_realtime(english, finnish)
+						debug_information_list.append('Stop Time')
+						debug_information_list.append(unix_time_in_ticks)
+						debug_information_list.append('Subprocess Name')
+						debug_information_list.append('create_commands_for_loudness_adjusting_a_file: integrated measurements after peak-limiting ')
+
+					if integrated_loudness_calculation_error == True:
+
+						# Print error message on result graphics file
+						error_message = 'ERROR !!! in integrated loudness calculation while measuring the peak limited file: ' * english + 'VIRHE !!! keskimääräisen äänekkyyden laskennassa, kun huippulimitoitua tiedostoa käsiteltiin: ' * finnish + integrated_loudness_calculation_error_message
+						create_gnuplot_commands_for_error_message(error_message, filename, directory_for_temporary_files, directory_for_results, english, finnish)
+
+						if write_loudness_calculation_results_to_a_machine_readable_file == True:
+
+							if filename in temp_loudness_results_for_automation:
+
+								# An error has happened.
+								error_code = 2
+
+								temp_loudness_results_for_automation[filename][1][4] = 0 # number_of_files_in_this_mix
+								temp_loudness_results_for_automation[filename][1][12] = error_code
+								temp_loudness_results_for_automation[filename][1][13] = error_message
+								temp_loudness_results_for_automation[filename][1][14] = []
+
+					# The loudness corrected file is created from the original file in one pass, the last alimiter applies the gain still needed after the limiters above.
+					ffmpeg_final_alimiter_options = ffmpeg_alimiter_options + ",alimiter=level_in=" + str(difference_from_target_loudness_sign_inverted) + "dB:level_out=0dB:limit=0dB:attack=10:release=500:level=disabled:latency=1" + ",aresample=" + sample_rate_str + ":resampler=soxr:precision=28:dither_method=triangular"
 
 					# If there has been an error then stop processing this file.
 					if (file_processing_encountered_an_error == False) and (integrated_loudness_calculation_error == False):
@@ -1801,11 +3916,9 @@ def create_commands_for_loudness_adjusting_a_file(integrated_loudness_calculatio
 							ffmpeg_commandline = []
 							start_of_ffmpeg_commandline = ["ffmpeg", "-loglevel", "level+error", "-hide_banner", "-i"]
 							ffmpeg_commandline.extend(start_of_ffmpeg_commandline)
-							ffmpeg_commandline.extend([directory_for_temporary_files + os.sep + temporary_peak_limited_targetfile])
-
+							ffmpeg_commandline.append(file_to_process)
 
-							# Use x 4 sample rate (TruePeak) for lookahead peak limiting.
-							ffmpeg_alimiter_options = "aresample=" + sample_ratex4_str + ":resampler=soxr:precision=28:dither_method=triangular" + ",alimiter=level_in=" + str(difference_from_target_loudness_sign_inverted) + "dB:level_out=0dB:limit=0dB:attack=10:release=500:level=disabled:latency=1" + ",aresample=" + sample_rate_str + ":resampler=soxr:precision=28:dither_method=triangular"
+							ffmpeg_alimiter_options = ffmpeg_final_alimiter_options
 
 							# When -filter is used and output format is flac FFmpeg alaways defaults to using 24 bit bit depth.
 							# Force FFmpeg to use 16 bits if input file bit depth is 16.
@@ -1837,34 +3950,8 @@ def create_commands_for_loudness_adjusting_a_file(integrated_loudness_calculatio
 						else:
 					
 							# The combined channels in final output file exceeds the max file size and the file needs to be split to separate mono files.
-							# Create the commandline for extracting each channel to its own file.
-							ffmpeg_commandline = []
-							start_of_ffmpeg_commandline = ["ffmpeg", "-loglevel", "level+error", "-hide_banner", "-i"]
-							ffmpeg_commandline.extend(start_of_ffmpeg_commandline)
-							ffmpeg_commandline.extend([directory_for_temporary_files + os.sep + temporary_peak_limited_targetfile])
-							ffmpeg_commandline.append("-filter_complex")
-
-							# Use x 4 sample rate (TruePeak) for lookahead peak limiting.
-							filter_complex_options = "aresample=" + sample_ratex4_str + ":resampler=soxr:precision=28:dither_method=triangular" + ",alimiter=level_in=" + str(difference_from_target_loudness_sign_inverted) + "dB:level_out=0dB:limit=0dB:attack=10:release=500:level=disabled:latency=1" + ",aresample=" + sample_rate_str + ":resampler=soxr:precision=28:dither_method=triangular"  + ",channelsplit=channel_layout=" + str(channel_count) + "C"
-
-							for counter in range(1, channel_count + 1):
-								filter_complex_options = filter_complex_options + "[" + str(counter) + "]"
-
-							ffmpeg_commandline.append(filter_complex_options)
-
-							for counter in range(1, channel_count + 1):
-								split_channel_targetfile_name = filename_and_extension[0] + '-Channel-' * english + '-Kanava-' * finnish + str(counter) + '_' + target_loudness + '_LUFS.' + output_format_for_final_file
-
-								# FFmpeg defaults to bit depth of 16 bits when target file format is wav.
-								# Force FFmpeg to use 24 bits if source file bit depth is 24.
-								if (bit_depth == 24) and (output_format_for_final_file) == "wav":
-									ffmpeg_commandline.append("-acodec")
-									ffmpeg_commandline.append("pcm_s24le")
-
-								ffmpeg_commandline.append("-map")
-								ffmpeg_commandline.append("[" + str(counter) + "]") 
-								ffmpeg_commandline.append(directory_for_temporary_files + os.sep + split_channel_targetfile_name)
-								list_of_filenames.append(split_channel_targetfile_name)
+							# FFmpeg reads the file once and writes each channel to its own file.
+							ffmpeg_commandline, list_of_filenames = create_ffmpeg_commandline_to_split_channels_to_mono_files(file_to_process, ffmpeg_final_alimiter_options, channel_count, bit_depth, output_format_for_final_file, filename_and_extension, directory_for_temporary_files, english, finnish)
 
 							file_processing_encountered_an_error = process_files(directory_for_temporary_files, directory_for_results, filename, ffmpeg_commandline, english, finnish, 0, 0)
 
@@ -1904,49 +3991,40 @@ def create_commands_for_loudness_adjusting_a_file(integrated_loudness_calculatio
 						#Gather all names of processed files to a list.
 						list_of_filenames = [combined_channels_targetfile_name]
 						
+						# Change the gain of integer pcm wav - files in-process with NumPy, other files are processed with sox.
+						gain_was_changed_with_numpy = False
+
+						if (use_numpy_for_loudness_measurement == True) and (output_format_for_final_file == 'wav'):
+							gain_was_changed_with_numpy = apply_gain_to_a_wav_file_with_numpy(file_to_process, directory_for_temporary_files + os.sep + combined_channels_targetfile_name, difference_from_target_loudness_sign_inverted, english, finnish)
+
+						# Save some debug information.
+						if debug_file_processing == True:
+							debug_information_list.append('gain_was_changed_with_numpy')
+							debug_information_list.append(gain_was_changed_with_numpy)
+
 						# Run sox with the commandline compiled in the lines above.
-						file_processing_encountered_an_error = process_files(directory_for_temporary_files, directory_for_results, filename, sox_commandline, english, finnish, 0, 0)
+						if gain_was_changed_with_numpy == False:
+							file_processing_encountered_an_error = process_files(directory_for_temporary_files, directory_for_results, filename, sox_commandline, english, finnish, 0, 0)
 						
 					else:
 				
 						# The combined channels in final output file exceeds the max file size and the file needs to be split to separate mono files.
-						# Create commandlines for extracting each channel to its own file.
-						
-						for counter in range(1, channel_count + 1):
-							split_channel_targetfile_name = filename_and_extension[0] + '-Channel-' * english + '-Kanava-' * finnish + str(counter) + '_' + target_loudness + '_LUFS.' + output_format_for_final_file
-							sox_commandline = []
-							sox_commandline.extend(start_of_sox_commandline)
-							sox_commandline.extend([file_to_process, directory_for_temporary_files + os.sep + split_channel_targetfile_name, 'remix', str(counter), 'gain', str(difference_from_target_loudness_sign_inverted)])
-					
-							#Gather all commands needed to process a file to a list of sox commandlines.
-							list_of_sox_commandlines.append(sox_commandline)
-							list_of_filenames.append(split_channel_targetfile_name)
+						# FFmpeg reads the file once and writes each channel to its own file.
+						ffmpeg_commandline, list_of_filenames = create_ffmpeg_commandline_to_split_channels_to_mono_files(file_to_process, 'volume=' + str(difference_from_target_loudness_sign_inverted) + 'dB:precision=double', channel_count, bit_depth, output_format_for_final_file, filename_and_extension, directory_for_temporary_files, english, finnish)
 						
 						# Save some debug information.
 						if debug_file_processing == True:
-							debug_information_list.append('list_of_sox_commandlines')
-							debug_information_list.append(''.join(str(list_of_sox_commandlines)))
+							debug_information_list.append('ffmpeg_commandline')
+							debug_information_list.append(ffmpeg_commandline)
 						
-						# Run several sox commands in parallel threads, this speeds up splitting the file to separate mono files.	
-						file_processing_encountered_an_error = run_file_processing_in_parallel_threads(directory_for_temporary_files, directory_for_results, filename, list_of_sox_commandlines, english, finnish)
+						file_processing_encountered_an_error = process_files(directory_for_temporary_files, directory_for_results, filename, ffmpeg_commandline, english, finnish, 0, 0)
 					
 					# Processing is ready move audio files to target directory.
 					move_processed_audio_files_to_target_directory(directory_for_temporary_files, directory_for_results, list_of_filenames, english, finnish)
 			
-			# If the temporary peak limited file is there, delete it.
-			if os.path.exists(directory_for_temporary_files + os.sep + temporary_peak_limited_targetfile):
-				try:
-					os.remove(directory_for_temporary_files + os.sep + temporary_peak_limited_targetfile)
-				except KeyboardInterrupt:
-					if silent == False:
-						print('\n\nUser cancelled operation.\n' * english + '\n\nKäyttäjä pysäytti ohjelman.\n' * finnish)
-					sys.exit(0)
-				except IOError as reason_for_error:
-					error_message = 'Error deleting temporary peak limited file ' * english + 'Väliaikaisen limitoidun tiedoston poistaminen epäonnistui ' * finnish + str(reason_for_error)
-					send_error_messages_to_screen_logfile_email(error_message, [])
-				except OSError as reason_for_error:
-					error_message = 'Error deleting temporary peak limited file ' * english + 'Väliaikaisen limitoidun tiedoston poistaminen epäonnistui ' * finnish + str(reason_for_error)
-					send_error_messages_to_screen_logfile_email(error_message, [])
+		# Store the loudness corrected files to the result cache, so that they can be reused for files with identical content.
+		if (result_cache_size > 0) and (integrated_loudness_calculation_error == False) and (file_processing_encountered_an_error == False):
+			store_corrected_files_in_result_cache(filename, directory_for_results, list_of_filenames, english, finnish)
 		
 		# Save some debug information.
 		if debug_file_processing == True:
@@ -1963,73 +4041,124 @@ def create_commands_for_loudness_adjusting_a_file(integrated_loudness_calculatio
 		subroutine_name = 'create_commands_for_loudness_adjusting_a_file'
 		catch_python_interpreter_errors(error_message_as_a_list, subroutine_name)
 
+def create_ffmpeg_commandline_to_split_channels_to_mono_files(file_to_process, ffmpeg_filter_options, channel_count, bit_depth, output_format_for_final_file, filename_and_extension, directory_for_temporary_files, english, finnish):
+
+	'''This subroutine creates a FFmpeg commandline that processes a file and writes each of its channels to a separate mono file'''
+
+	# This subroutine works like this:
+	# ---------------------------------
+	# FFmpeg reads and decodes the source file only once. The audio goes through the filters given as an argument (gain or peak limiting) and the channelsplit filter then gives each channel to its own output file.
+	# All mono files are written at the same time by the same FFmpeg process, so the source file doesn't need to be read once for each channel.
+	# The mono files have the same sample format as the source file. Wav files may have integer samples of 8, 16, 24 or 32 bits or float samples of 32 or 64 bits, flac files have integer samples.
+	# The filters process audio in double precision. When samples are converted back to 8 or 16 bits, triangular (TPDF) dither is added the same way sox does it when it changes the gain of a file.
+	# Returns the commandline and the names of the mono files.
+
+	global target_loudness
+	ffmpeg_commandline = ["ffmpeg", "-loglevel", "level+error", "-hide_banner", "-i", file_to_process, "-filter_complex"]
+	list_of_filenames = []
+	format_tag = 1 # Integer samples.
+
+	# Find out if a wav file has integer or float samples.
+	if output_format_for_final_file == "wav":
+		try:
+			with open(file_to_process, 'rb') as audio_file_handler:
+				wav_channel_count, wav_sample_rate, wav_bit_depth, format_tag, wav_data_size = read_wav_format_information_from_a_stream(audio_file_handler)
+		except IOError:
+			pass
+		except OSError:
+			pass
+
+	# Choose the codec that keeps the sample format of the source file.
+	# FFmpeg defaults to bit depth of 16 bits when target file format is wav and to 24 bits when the format is flac.
+	codec_options = []
+	dither_options = ''
+
+	if output_format_for_final_file == "wav":
+		if (format_tag == 3) and (bit_depth == 64):
+			codec_options = ["-acodec", "pcm_f64le"]
+		elif format_tag == 3:
+			codec_options = ["-acodec", "pcm_f32le"]
+		elif bit_depth == 8:
+			codec_options = ["-acodec", "pcm_u8"]
+			dither_options = ",aresample=osf=u8:dither_method=triangular"
+		elif bit_depth == 24:
+			codec_options = ["-acodec", "pcm_s24le"]
+		elif bit_depth == 32:
+			codec_options = ["-acodec", "pcm_s32le"]
+		else:
+			codec_options = ["-acodec", "pcm_s16le"]
+			dither_options = ",aresample=osf=s16:dither_method=triangular"
+
+	if (output_format_for_final_file == "flac") and (bit_depth <= 16):
+		codec_options = ["-sample_fmt", "s16"]
+		dither_options = ",aresample=osf=s16:dither_method=triangular"
+
+	filter_complex_options = ffmpeg_filter_options + dither_options + ",channelsplit=channel_layout=" + str(channel_count) + "C"
+
+	for counter in range(1, channel_count + 1):
+		filter_complex_options = filter_complex_options + "[" + str(counter) + "]"
+
+	ffmpeg_commandline.append(filter_complex_options)
+
+	for counter in range(1, channel_count + 1):
+		split_channel_targetfile_name = filename_and_extension[0] + '-Channel-' * english + '-Kanava-' * finnish + str(counter) + '_' + target_loudness + '_LUFS.' + output_format_for_final_file
+		ffmpeg_commandline.extend(codec_options)
+		ffmpeg_commandline.append("-map")
+		ffmpeg_commandline.append("[" + str(counter) + "]")
+		ffmpeg_commandline.append(directory_for_temporary_files + os.sep + split_channel_targetfile_name)
+		list_of_filenames.append(split_channel_targetfile_name)
+
+	return(ffmpeg_commandline, list_of_filenames)
+
 def run_file_processing_in_parallel_threads(directory_for_temporary_files, directory_for_results, filename, list_of_sox_commandlines, english, finnish):
 
 	try:
-		list_of_sox_commandlines.reverse()
-		number_of_allowed_simultaneous_sox_processes = 10
+		# Each sox process uses one processor core, so run as many sox processes at the same time as there are processor cores available for file processing.
+		# estimate_processing_cost_of_a_file reserves the same number of processor cores for a file with mxf audio remixing.
+		number_of_allowed_simultaneous_sox_processes = max(1, number_of_processor_cores)
 		events_for_sox_commands_currently_running = {}
-		list_of_finished_processes = []
 		file_processing_encountered_an_error = False
 
-		while True:
-			
-			# If processing of all sox commands is ready then exit the loop.
-			if (len(list_of_sox_commandlines) == 0) and (len(events_for_sox_commands_currently_running) == 0):
-				break
-		
-			# Check if there are less processing threads going on than allowed, if true start some more.
-			while len(events_for_sox_commands_currently_running) < number_of_allowed_simultaneous_sox_processes:
-				
-				if len(list_of_sox_commandlines) > 0: # Check if there still is unprocessed sox commands waiting in the list of sox commandlines.
-			
-					# Get one commandline from list of commandlines.
-					sox_commandline = list_of_sox_commandlines.pop()
-			
-					# Create event for the process. When the process is ready it sets event = set, so that we know that we can start more processes.
-					event_for_sox_processing = threading.Event() # Create a unique event for the process. This event is used to signal that this process has finished.
-					# When the process is ready the state of this event tells us if sox encountered an error or not. if event.set == True then there was no error.
-					event_for_sox_processing_encountered_an_error = threading.Event() 
+		# The thread pool starts a new sox process as soon as a previous one finishes, so there is no need to poll the processes once a second.
+		sox_thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=number_of_allowed_simultaneous_sox_processes)
+
+		for sox_commandline in list_of_sox_commandlines:
+
+			# Create event for the process. When the process is ready it sets event = set.
+			event_for_sox_processing = threading.Event() # Create a unique event for the process. This event is used to signal that this process has finished.
+			# When the process is ready the state of this event tells us if sox encountered an error or not. if event.set == True then there was no error.
+			event_for_sox_processing_encountered_an_error = threading.Event() 
+
+			# Queue the sox process to the thread pool.
+			sox_process = sox_thread_pool.submit(process_files, directory_for_temporary_files, directory_for_results, filename, sox_commandline, english, finnish, event_for_sox_processing, event_for_sox_processing_encountered_an_error)
+			events_for_sox_commands_currently_running[sox_process] = event_for_sox_processing_encountered_an_error
+
+		##################################
+		# Wait for sox threads to finish #
+		##################################
 
-					# Add the event to the list of running sox processes.
-					events_for_sox_commands_currently_running[event_for_sox_processing] = event_for_sox_processing_encountered_an_error
-					
-					# Create a thread for the sox proces.
-					sox_process = threading.Thread(target=process_files, args=(directory_for_temporary_files, directory_for_results, filename, sox_commandline, english, finnish, event_for_sox_processing, event_for_sox_processing_encountered_an_error)) # Create a process instance.
-					
-					# Start sox thread.
-					sox_process.start() # Start the calculation process in it's own thread.
-				
-				# If all sox commandlines has been used, then break out of the loop.
-				if len(list_of_sox_commandlines) == 0:
-					break
-				
-			###################################
-			# Find threads that have finished #
-			###################################
-			
-			list_of_finished_processes=[]
-			
-			for sox_process_is_ready in events_for_sox_commands_currently_running:
+		while len(events_for_sox_commands_currently_running) > 0:
 
-				if sox_process_is_ready.is_set(): # Check if event is set.
-					list_of_finished_processes.append(sox_process_is_ready) # Add event of finished thread to a list.
-					sox_event_for_error = events_for_sox_commands_currently_running[sox_process_is_ready]
+			# Sleep until at least one of the sox processes has finished.
+			list_of_finished_processes = concurrent.futures.wait(list(events_for_sox_commands_currently_running), return_when=concurrent.futures.FIRST_COMPLETED)[0]
 
-					# If running sox was not succesful then the other event is not set, test for it.
-					if not sox_event_for_error.is_set():
-						file_processing_encountered_an_error = True
+			for sox_process in list_of_finished_processes:
+				sox_event_for_error = events_for_sox_commands_currently_running.pop(sox_process)
+
+				# If running sox was not succesful then the other event is not set, test for it.
+				if not sox_event_for_error.is_set():
+					file_processing_encountered_an_error = True
 
-			# If a thread has finished, remove it's event from the dictionary of files being processed.
-			for item in list_of_finished_processes: # Get events who's processing threads have completed.
-				del events_for_sox_commands_currently_running[item] # Remove the events from the dictionary of files currently being calculated upon.
-			
 			# If processing with sox was not succesful, then stop all prosessing and inform the calling subroutine.
 			if file_processing_encountered_an_error == True:
+
+				# Sox processes that have not started yet are cancelled.
+				for sox_process in events_for_sox_commands_currently_running:
+					sox_process.cancel()
 				break
 
-			# Wait 1 second before running the loop again
-			time.sleep(1)
+		sox_thread_pool.shutdown(wait=False)
+
 	except Exception:
 		exc_type, exc_value, exc_traceback = sys.exc_info()
 		error_message_as_a_list = traceback.format_exception(exc_type, exc_value, exc_traceback)
@@ -2053,52 +4182,8 @@ def process_files(directory_for_temporary_files, directory_for_results, filename
 		if 'Event' in variable_type_string:
 			we_are_part_of_a_multithread_sox_command = True
 		
-		# Define filename for the temporary file that we are going to use as stdout for the external command.
-		results_from_file_processing = b''
-		stdout_for_external_command = directory_for_temporary_files + os.sep + filename + '_file_processing_stdout.txt'
-		
-		# If there are other sox threads processing this same file, then our stdout filename must be unique.
-		if we_are_part_of_a_multithread_sox_command == True:
-
-			# Find event number in string created by: str(event). The position of the number changes in different versions of Python3.
-			event_number = "event_number_unknown"
-			temp_event_list = str(event_for_sox_processing).split(" ")
-
-			for str_text in temp_event_list:
-				if str_text.startswith("0x"):
-					event_number = str_text.strip(">:")
-
-			stdout_for_external_command = directory_for_temporary_files + os.sep + filename + '-event-' + event_number + '_file_processing_stdout.txt'
-			
-		# Open the stdout temporary file in binary write mode.
-		try:
-			
-			with open(stdout_for_external_command, 'wb') as stdout_commandfile_handler:
-
-				# Run a command.
-				subprocess.Popen(file_processing_commandline, stdout=stdout_commandfile_handler, stderr=stdout_commandfile_handler, stdin=None, close_fds=True).communicate()[0]
-				
-				# Make sure all data written to temporary stdout and stderr - files is flushed from the os cache and written to disk.
-				stdout_commandfile_handler.flush() # Flushes written data to os cache
-				os.fsync(stdout_commandfile_handler.fileno()) # Flushes os cache to disk
-		
-		except IOError as reason_for_error:
-			error_message = 'Error writing to file processing stdout - file ' * english + 'Tiedoston käsittelyn stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error writing to file processing stdout - file ' * english + 'Tiedoston käsittelyn stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-			
-		# Open the file we used as stdout for file processing and read in what it wrote to it.
-		try:
-			with open(stdout_for_external_command, 'rb') as stdout_commandfile_handler:
-				results_from_file_processing = stdout_commandfile_handler.read(None)
-		except IOError as reason_for_error:
-			error_message = 'Error reading from file processing stdout - file ' * english + 'Tiedoston käsittelyn stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error reading from file processing stdout - file ' * english + 'Tiedoston käsittelyn stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])	
+		# Run a command. Output of the command is captured through a pipe, so parallel sox threads processing the same file don't need separate stdout - files.
+		results_from_file_processing, file_processing_stderr, error_message = run_external_command(file_processing_commandline, english, finnish, stderr_to_stdout=True)
 
 		# Convert file processing output from binary to UTF-8 text.
 		results_from_file_processing_string = results_from_file_processing.decode('UTF-8').strip()
@@ -2109,17 +4194,6 @@ def process_files(directory_for_temporary_files, directory_for_results, filename
 		else:
 			results_from_file_processing_list = []
 		
-		# Delete the temporary stdout - file.
-		try:
-			if os.path.exists(stdout_for_external_command):
-				os.remove(stdout_for_external_command)
-		except IOError as reason_for_error:
-			error_message = 'Error deleting file processing stdout - file ' * english + 'Tiedoston käsittelyn stdout - tiedoston deletoiminen epäonnistui ' * finnish	+ str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error deleting file processing stdout - file ' * english + 'Tiedoston käsittelyn stdout - tiedoston deletoiminen epäonnistui ' * finnish	+ str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		
 		# If file processing did output something, there was an error. Print message to user.
 		if not len(results_from_file_processing_list) == 0:
 			file_processing_encountered_an_error = True
@@ -2202,6 +4276,155 @@ def move_processed_audio_files_to_target_directory(source_directory, target_dire
 		subroutine_name = 'move_processed_audio_files_to_target_directory'
 		catch_python_interpreter_errors(error_message_as_a_list, subroutine_name)
 
+def read_audio_file_information_from_header(file_to_process):
+
+	"""Reads channel count, sample rate, bit depth and sample count from the header of a pcm wav, rf64, flac or aiff - file. Zeros are returned if the header can not be parsed."""
+
+	# Sox reports the bit depth of floating point and compressed audio differently from the bit depth in the file header, so only headers of integer pcm and flac are parsed here.
+	# Information of all other files is read with sox.
+	channel_count = 0
+	sample_rate = 0
+	bit_depth = 0
+	sample_count = 0
+
+	try:
+		with open(file_to_process, 'rb') as file_handler:
+			file_header = file_handler.read(12)
+
+			if (file_header[0:4] in [b'RIFF', b'RF64']) and (file_header[8:12] == b'WAVE'):
+				file_handler.seek(0)
+				channel_count, sample_rate, bit_depth, format_tag, data_size = read_wav_format_information_from_a_stream(file_handler)
+
+				if (format_tag == 1) and (channel_count > 0) and (bit_depth > 0) and (data_size > 0):
+					sample_count = int(data_size / (channel_count * int((bit_depth + 7) / 8)))
+				else:
+					return(0, 0, 0, 0)
+
+				# In WAVE_FORMAT_EXTENSIBLE samples may use less bits than the sample container has (for example 20 bits in a 24 bit container). Sox reports the number of valid bits, so use the same value here.
+				file_handler.seek(12)
+
+				while True:
+					chunk_header = file_handler.read(8)
+
+					if len(chunk_header) != 8:
+						break
+
+					chunk_name = chunk_header[0:4]
+					chunk_size = struct.unpack('<I', chunk_header[4:8])[0]
+
+					if chunk_name == b'fmt ':
+						chunk_data = file_handler.read(chunk_size)
+
+						if (len(chunk_data) >= 20) and (struct.unpack('<H', chunk_data[0:2])[0] == 65534):
+							valid_bits_per_sample = struct.unpack('<H', chunk_data[18:20])[0]
+
+							if (valid_bits_per_sample > 0) and (valid_bits_per_sample < bit_depth):
+								bit_depth = valid_bits_per_sample
+						break
+
+					file_handler.seek(chunk_size + (chunk_size % 2), 1) # Chunks are padded to even byte boundaries.
+
+			elif file_header[0:4] == b'fLaC':
+				# The first metadata block after the flac marker is STREAMINFO. Sample rate, channel count, bit depth and sample count are packed to 64 bits starting from byte 10 of STREAMINFO.
+				file_handler.seek(4)
+				streaminfo_block = file_handler.read(38)
+
+				if (len(streaminfo_block) != 38) or ((streaminfo_block[0] & 127) != 0):
+					return(0, 0, 0, 0)
+
+				packed_information = struct.unpack('>Q', streaminfo_block[14:22])[0]
+				sample_rate = packed_information >> 44
+				channel_count = ((packed_information >> 41) & 7) + 1
+				bit_depth = ((packed_information >> 36) & 31) + 1
+				sample_count = packed_information & 68719476735
+
+			elif (file_header[0:4] == b'FORM') and (file_header[8:12] == b'AIFF'):
+
+				while True:
+					chunk_header = file_handler.read(8)
+
+					if len(chunk_header) != 8:
+						return(0, 0, 0, 0)
+
+					chunk_name = chunk_header[0:4]
+					chunk_size = struct.unpack('>I', chunk_header[4:8])[0]
+
+					if chunk_name == b'COMM':
+						chunk_data = file_handler.read(18)
+
+						if len(chunk_data) != 18:
+							return(0, 0, 0, 0)
+
+						channel_count, sample_count, bit_depth = struct.unpack('>hIh', chunk_data[0:8])
+
+						# Sample rate is stored as an 80 bit extended precision floating point number.
+						exponent, mantissa = struct.unpack('>HQ', chunk_data[8:18])
+						sample_rate = int(round(mantissa * math.pow(2, (exponent & 32767) - 16383 - 63)))
+						break
+
+					file_handler.seek(chunk_size + (chunk_size % 2), 1) # Chunks are padded to even byte boundaries.
+
+	except IOError:
+		return(0, 0, 0, 0)
+	except OSError:
+		return(0, 0, 0, 0)
+	except struct.error:
+		return(0, 0, 0, 0)
+
+	if (channel_count <= 0) or (sample_rate <= 0) or (bit_depth <= 0) or (sample_count <= 0):
+		return(0, 0, 0, 0)
+
+	return(channel_count, sample_rate, bit_depth, sample_count)
+
+def get_audiofile_info_with_sox(file_to_process, english, finnish):
+
+	"""Returns channel count, sample rate, bit depth and sample count of an audio file as strings and an error message."""
+
+	# This subroutine works like this:
+	# ---------------------------------
+	# Information is read directly from the file header if the file is pcm wav, rf64, flac or aiff.
+	# For other files sox is run once without options, so that it prints all information about the file. The values are then parsed from the printout:
+	#
+	# Channels       : 2
+	# Sample Rate    : 48000
+	# Precision      : 24-bit
+	# Duration       : 00:00:10.00 = 480000 samples ~ 750 CDDA sectors
+	#
+	# If a value can not be found, it is returned as an empty string.
+
+	channel_count_string = ''
+	sample_rate_string = ''
+	bit_depth_string = ''
+	sample_count_string = ''
+	error_message = ''
+
+	channel_count, sample_rate, bit_depth, sample_count = read_audio_file_information_from_header(file_to_process)
+
+	if channel_count > 0:
+		return(str(channel_count), str(sample_rate), str(bit_depth), str(sample_count), error_message)
+
+	results_from_sox_run, sox_stderr, error_message = run_file_information_command(['sox', '--i', file_to_process], file_to_process, english, finnish)
+
+	for line in results_from_sox_run.decode('UTF-8', 'replace').splitlines():
+
+		if ':' not in line:
+			continue
+
+		title, value = line.split(':', 1)
+		title = title.strip()
+		value = value.strip()
+
+		if title == 'Channels':
+			channel_count_string = value
+		if title == 'Sample Rate':
+			sample_rate_string = value
+		if title == 'Precision':
+			bit_depth_string = value.replace('-bit', '')
+		if (title == 'Duration') and ('=' in value):
+			sample_count_string = value.split('=')[1].split()[0]
+
+	return(channel_count_string, sample_rate_string, bit_depth_string, sample_count_string, error_message)
+
 def get_audiofile_info_with_sox_and_determine_output_format(directory_for_temporary_files, hotfolder_path, filename):
 	
 	# This subroutine gets audio file information with sox and determines based on estimated uncompressed file size what the output file format is.
@@ -2245,184 +4468,11 @@ def get_audiofile_info_with_sox_and_determine_output_format(directory_for_tempor
 			debug_information_list.append('get_audiofile_info_with_sox_and_determine_output_format')
 			debug_temporary_dict_for_all_file_processing_information[filename] = debug_information_list
 
-		# Define filename for the temporary file that we are going to use as stdout for the external command.
-		stdout_for_external_command = directory_for_temporary_files + os.sep + filename + '_sox_read_audio_info_stdout.txt'
-
-		#####################
-		# Get channel count #
-		#####################
-		try:
-			# Open the stdout temporary file in binary write mode.
-			with open(stdout_for_external_command, 'wb') as stdout_commandfile_handler:
-				
-				# Get audio file channel count using sox.
-				subprocess.Popen(['sox', '--i', '-c', file_to_process], stdout=stdout_commandfile_handler, stderr=stdout_commandfile_handler, stdin=None, close_fds=True).communicate()[0]
-			
-				# Make sure all data written to temporary stdout and stderr - files is flushed from the os cache and written to disk.
-				stdout_commandfile_handler.flush() # Flushes written data to os cache
-				os.fsync(stdout_commandfile_handler.fileno()) # Flushes os cache to disk
-				
-		except IOError as reason_for_error:
-			error_message = 'Error writing to (audio file info reading) sox stdout - file ' * english + 'Soxin (audiotiedoston teknisten tietojen luku) stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error writing to (audio file info reading) sox stdout - file ' * english + 'Soxin (audiotiedoston teknisten tietojen luku) stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-
-		# Open the file we used as stdout for the external program and read in what the external program wrote to it.
-		try:
-			with open(stdout_for_external_command, 'rb') as stdout_commandfile_handler:
-				results_from_sox_run = stdout_commandfile_handler.read(None)
-		except IOError as reason_for_error:
-			error_message = 'Error reading from  (audio file info reading) sox stdout - file ' * english + 'Soxin (audiotiedoston teknisten tietojen luku) stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error reading from  (audio file info reading) sox stdout - file ' * english + 'Soxin (audiotiedoston teknisten tietojen luku) stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])	
-
-		channel_count_string = results_from_sox_run.decode('UTF-8').strip()
-
-		# Delete the temporary stdout - file.
-		try:
-			os.remove(stdout_for_external_command)
-		except IOError as reason_for_error:
-			error_message = 'Error deleting (audio file info reading) sox stdout - file ' * english + 'Soxin (audiotiedoston teknisten tietojen luku) stdout - tiedoston deletoiminen epäonnistui ' * finnish  + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error deleting (audio file info reading) sox stdout - file ' * english + 'Soxin (audiotiedoston teknisten tietojen luku) stdout - tiedoston deletoiminen epäonnistui ' * finnish  + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-
-		###################
-		# Get sample rate #
-		###################
-		try:
-			# Open the stdout temporary file in binary write mode.
-			with open(stdout_for_external_command, 'wb') as stdout_commandfile_handler:
-				
-				# Get audio file sample rate using sox.
-				subprocess.Popen(['sox', '--i', '-r', file_to_process], stdout=stdout_commandfile_handler, stderr=stdout_commandfile_handler, stdin=None, close_fds=True).communicate()[0]
-			
-				# Make sure all data written to temporary stdout and stderr - files is flushed from the os cache and written to disk.
-				stdout_commandfile_handler.flush() # Flushes written data to os cache
-				os.fsync(stdout_commandfile_handler.fileno()) # Flushes os cache to disk
-				
-		except IOError as reason_for_error:
-			error_message = 'Error writing to (audio file info reading) sox stdout - file ' * english + 'Soxin (audiotiedoston teknisten tietojen luku) stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error writing to (audio file info reading) sox stdout - file ' * english + 'Soxin (audiotiedoston teknisten tietojen luku) stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-
-		# Open the file we used as stdout for the external program and read in what the external program wrote to it.
-		try:
-			with open(stdout_for_external_command, 'rb') as stdout_commandfile_handler:
-				results_from_sox_run = stdout_commandfile_handler.read(None)
-		except IOError as reason_for_error:
-			error_message = 'Error reading from  (audio file info reading) sox stdout - file ' * english + 'Soxin (audiotiedoston teknisten tietojen luku) stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error reading from  (audio file info reading) sox stdout - file ' * english + 'Soxin (audiotiedoston teknisten tietojen luku) stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])	
-
-		sample_rate_string = results_from_sox_run.decode('UTF-8').strip()
-
-		# Delete the temporary stdout - file.
-		try:
-			os.remove(stdout_for_external_command)
-		except IOError as reason_for_error:
-			error_message = 'Error deleting (audio file info reading) sox stdout - file ' * english + 'Soxin (audiotiedoston teknisten tietojen luku) stdout - tiedoston deletoiminen epäonnistui ' * finnish  + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error deleting (audio file info reading) sox stdout - file ' * english + 'Soxin (audiotiedoston teknisten tietojen luku) stdout - tiedoston deletoiminen epäonnistui ' * finnish  + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-
-		#################
-		# Get bit depth #
-		#################
-		try:
-			# Open the stdout temporary file in binary write mode.
-			with open(stdout_for_external_command, 'wb') as stdout_commandfile_handler:
-				
-				# Get audio file bit depth using sox. This is sox value "Precision" and it shows the exact bit depth for PCM files and estimated bit depth for audio compressed with bit reduction compression.
-				subprocess.Popen(['sox', '--i', '-p', file_to_process], stdout=stdout_commandfile_handler, stderr=stdout_commandfile_handler, stdin=None, close_fds=True).communicate()[0]
-			
-				# Make sure all data written to temporary stdout and stderr - files is flushed from the os cache and written to disk.
-				stdout_commandfile_handler.flush() # Flushes written data to os cache
-				os.fsync(stdout_commandfile_handler.fileno()) # Flushes os cache to disk
-				
-		except IOError as reason_for_error:
-			error_message = 'Error writing to (audio file info reading) sox stdout - file ' * english + 'Soxin (audiotiedoston teknisten tietojen luku) stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error writing to (audio file info reading) sox stdout - file ' * english + 'Soxin (audiotiedoston teknisten tietojen luku) stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-
-		# Open the file we used as stdout for the external program and read in what the external program wrote to it.
-		try:
-			with open(stdout_for_external_command, 'rb') as stdout_commandfile_handler:
-				results_from_sox_run = stdout_commandfile_handler.read(None)
-		except IOError as reason_for_error:
-			error_message = 'Error reading from  (audio file info reading) sox stdout - file ' * english + 'Soxin (audiotiedoston teknisten tietojen luku) stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error reading from  (audio file info reading) sox stdout - file ' * english + 'Soxin (audiotiedoston teknisten tietojen luku) stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])	
-
-		bit_depth_string = results_from_sox_run.decode('UTF-8').strip()
-
-		# Delete the temporary stdout - file.
-		try:
-			os.remove(stdout_for_external_command)
-		except IOError as reason_for_error:
-			error_message = 'Error deleting (audio file info reading) sox stdout - file ' * english + 'Soxin (audiotiedoston teknisten tietojen luku) stdout - tiedoston deletoiminen epäonnistui ' * finnish  + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error deleting (audio file info reading) sox stdout - file ' * english + 'Soxin (audiotiedoston teknisten tietojen luku) stdout - tiedoston deletoiminen epäonnistui ' * finnish  + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-
-		####################
-		# Get sample count #
-		####################
-		try:
-			# Open the stdout temporary file in binary write mode.
-			with open(stdout_for_external_command, 'wb') as stdout_commandfile_handler:
-				
-				# Get audio file sample count using sox.
-				subprocess.Popen(['sox', '--i', '-s', file_to_process], stdout=stdout_commandfile_handler, stderr=stdout_commandfile_handler, stdin=None, close_fds=True).communicate()[0]
-			
-				# Make sure all data written to temporary stdout and stderr - files is flushed from the os cache and written to disk.
-				stdout_commandfile_handler.flush() # Flushes written data to os cache
-				os.fsync(stdout_commandfile_handler.fileno()) # Flushes os cache to disk
-				
-		except IOError as reason_for_error:
-			error_message = 'Error writing to (audio file info reading) sox stdout - file ' * english + 'Soxin (audiotiedoston teknisten tietojen luku) stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error writing to (audio file info reading) sox stdout - file ' * english + 'Soxin (audiotiedoston teknisten tietojen luku) stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-
-		# Open the file we used as stdout for the external program and read in what the external program wrote to it.
-		try:
-			with open(stdout_for_external_command, 'rb') as stdout_commandfile_handler:
-				results_from_sox_run = stdout_commandfile_handler.read(None)
-		except IOError as reason_for_error:
-			error_message = 'Error reading from  (audio file info reading) sox stdout - file ' * english + 'Soxin (audiotiedoston teknisten tietojen luku) stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error reading from  (audio file info reading) sox stdout - file ' * english + 'Soxin (audiotiedoston teknisten tietojen luku) stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])	
-
-		sample_count_string = results_from_sox_run.decode('UTF-8').strip()
-
-		# Delete the temporary stdout - file.
-		try:
-			os.remove(stdout_for_external_command)
-		except IOError as reason_for_error:
-			error_message = 'Error deleting (audio file info reading) sox stdout - file ' * english + 'Soxin (audiotiedoston teknisten tietojen luku) stdout - tiedoston deletoiminen epäonnistui ' * finnish  + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error deleting (audio file info reading) sox stdout - file ' * english + 'Soxin (audiotiedoston teknisten tietojen luku) stdout - tiedoston deletoiminen epäonnistui ' * finnish  + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
+		##############################################################
+		# Get channel count, sample rate, bit depth and sample count #
+		##############################################################
+		# Bit depth is sox value "Precision" and it shows the exact bit depth for PCM files and estimated bit depth for audio compressed with bit reduction compression.
+		channel_count_string, sample_rate_string, bit_depth_string, sample_count_string, error_message = get_audiofile_info_with_sox(file_to_process, english, finnish)
 
 		# Convert audio technical information from string to integer and assign to variables.
 		channel_count = 0
@@ -2599,6 +4649,153 @@ def get_realtime(english, finnish):
 
 	return (unix_time_in_ticks, realtime)  
 
+def audio_streams_can_be_measured_without_writing_files(file_format_support_information):
+
+	"""Returns True if audio streams of a file that needs to be decoded with FFmpeg can be measured from pipes without writing the decoded streams to files."""
+
+	# Streams are only measured when no loudness corrected files are created. Measurement is done with NumPy from the pipes FFmpeg writes to.
+	# Streams of mxf - files that are remixed need to be written to files for remixing and worker processes can not see the results measured in the main process.
+
+	natively_supported_file_format, ffmpeg_supported_fileformat, number_of_ffmpeg_supported_audiostreams, details_of_ffmpeg_supported_audiostreams, time_slice_duration_string, audio_duration_rounded_to_seconds, ffmpeg_commandline, target_filenames, mxf_audio_remixing, filenames_and_channel_counts_for_mxf_audio_remixing, audio_remix_channel_map, number_of_unsupported_streams_in_file = file_format_support_information
+
+	if (create_loudness_corrected_files == False) and (use_numpy_for_loudness_measurement == True) and (run_file_processing_in_worker_processes == False) and (mxf_audio_remixing == False):
+		if (len(target_filenames) > 0) and (len(target_filenames) == len(details_of_ffmpeg_supported_audiostreams)) and ('-map' in ffmpeg_commandline):
+			return(True)
+
+	return(False)
+
+def calculate_loudness_of_audio_streams_measured_without_files(original_file_name, target_filenames, details_of_ffmpeg_supported_audiostreams, time_slice_duration_string, audio_duration_rounded_to_seconds, hotfolder_path, directory_for_temporary_files, english, finnish):
+
+	'''This subprocess creates loudness results for audio streams that were measured while FFmpeg decoded them without writing them to files'''
+
+	# This subprocess works like this:
+	# ---------------------------------
+	# Information FFmpeg reported about each stream is stored to 'audio_streams_measured_without_a_file_dict', so that loudness calculation and graphics generation don't need to read it from a file.
+	# calculate_loudness_in_a_single_pass is then run for each stream. It uses the block energies measured from the pipe and creates the graphics file and the results for the machine readable results file.
+	# The streams don't go through the HotFolder, so each stream and the events of its calculation are put to 'audio_streams_measured_without_a_file_queue'. The main thread adds the stream to 'loudness_calculation_queue',
+	# where it is found as a finished job and handled the same way as files: results are written to the machine readable results file, debug information is gathered and the stream is added to the completed files.
+
+	try:
+		global audio_streams_measured_without_a_file_dict
+		global loudness_measured_during_audio_stream_extraction_dict
+		global audio_streams_measured_without_a_file_queue
+		global main_loop_wake_up_queue
+		global directory_for_results
+		expected_number_of_time_slices = int(audio_duration_rounded_to_seconds / float(time_slice_duration_string))
+
+		for counter in range(0, len(target_filenames)):
+			item = target_filenames[counter]
+			audio_stream_details = details_of_ffmpeg_supported_audiostreams[counter]
+			channel_count = 2
+			sample_rate = 48000
+			bit_depth = 24
+
+			if str(audio_stream_details[2]).isnumeric() == True:
+				channel_count = int(audio_stream_details[2])
+			if str(audio_stream_details[5]).isnumeric() == True:
+				sample_rate = int(audio_stream_details[5])
+			if (str(audio_stream_details[6]).isnumeric() == True) and (int(audio_stream_details[6]) > 0):
+				bit_depth = int(audio_stream_details[6])
+
+			audio_streams_measured_without_a_file_dict[item] = [channel_count, sample_rate, bit_depth, audio_duration_rounded_to_seconds]
+
+			event_for_timeslice_loudness_calculation = threading.Event()
+			event_for_integrated_loudness_calculation = threading.Event()
+			calculate_loudness_in_a_single_pass(item, hotfolder_path, directory_for_temporary_files, directory_for_results, english, finnish, time_slice_duration_string, expected_number_of_time_slices, 0, event_for_timeslice_loudness_calculation, event_for_integrated_loudness_calculation)
+
+			del audio_streams_measured_without_a_file_dict[item]
+
+			if item in loudness_measured_during_audio_stream_extraction_dict:
+				del loudness_measured_during_audio_stream_extraction_dict[item]
+
+			# Give the finished stream to the main thread.
+			audio_streams_measured_without_a_file_queue.put([item, event_for_timeslice_loudness_calculation, event_for_integrated_loudness_calculation, original_file_name])
+			main_loop_wake_up_queue.put('job_finished')
+
+	except Exception:
+		exc_type, exc_value, exc_traceback = sys.exc_info()
+		error_message_as_a_list = traceback.format_exception(exc_type, exc_value, exc_traceback)
+		subroutine_name = 'calculate_loudness_of_audio_streams_measured_without_files'
+		catch_python_interpreter_errors(error_message_as_a_list, subroutine_name)
+
+def stop_audio_stream_measurement_threads(list_of_measurement_pipes_and_threads):
+
+	'''This subroutine waits until the threads measuring audio streams from pipes have finished and removes the pipes'''
+
+	# FFmpeg has finished and 'ffmpeg_has_finished_event' has been set. If FFmpeg stopped before opening a pipe, the measurement thread is still waiting for the pipe to be opened.
+	# Opening and closing the pipe for writing lets the thread see the end of the stream. The pipe can be opened only when the thread has the pipe open for reading, so this is tried until the thread finishes.
+	# Each item in 'list_of_measurement_pipes_and_threads' is a list: [path to the pipe, measurement thread].
+
+	for measurement_pipe_path, measurement_thread in list_of_measurement_pipes_and_threads:
+
+		while measurement_thread.is_alive() == True:
+			try:
+				pipe_file_descriptor = os.open(measurement_pipe_path, os.O_WRONLY | os.O_NONBLOCK)
+				os.close(pipe_file_descriptor)
+			except OSError:
+				pass # Nobody has the pipe open for reading.
+
+			measurement_thread.join(1)
+
+		try:
+			os.remove(measurement_pipe_path)
+		except OSError:
+			pass
+
+def measure_audio_stream_from_a_pipe(measurement_pipe_path, filename, ffmpeg_has_finished_event, english, finnish):
+
+	'''This subprocess measures an audio stream FFmpeg writes to a pipe while it extracts the stream to a file'''
+
+	# The pipe is read with the NumPy measurement, results are stored to the dictionary 'loudness_measured_during_audio_stream_extraction_dict'.
+	# decompress_audio_streams_with_ffmpeg adds the size and modification time of the extracted file to the results when extraction is ready.
+	#
+	# If the NumPy measurement stops before the end of the stream (the format is not supported, the header can not be parsed or there is an error) and nobody reads the pipe, FFmpeg gets an error writing to the pipe and stops extracting all streams.
+	# To prevent this the pipe is opened for reading before the measurement starts and kept open until FFmpeg has finished. Everything FFmpeg writes to the pipe after the measurement has stopped is read and thrown away.
+
+	drain_file_descriptor = -1
+
+	try:
+		global loudness_measured_during_audio_stream_extraction_dict
+		global peak_measurement_method
+
+		try:
+			drain_file_descriptor = os.open(measurement_pipe_path, os.O_RDONLY | os.O_NONBLOCK) # A pipe opened without blocking does not wait for FFmpeg to open the pipe for writing.
+		except OSError as reason_for_error:
+			error_message = 'Error opening a pipe for loudness measurement ' * english + 'Äänekkyysmittauksen putken avaaminen epäonnistui ' * finnish + str(reason_for_error)
+			send_error_messages_to_screen_logfile_email(error_message, [])
+
+		list_of_100ms_block_energies, highest_peak_float, channel_count, sample_rate, error_message = calculate_100ms_block_energies_and_peak_with_numpy(measurement_pipe_path, peak_measurement_method, english, finnish)
+
+		if len(list_of_100ms_block_energies) > 0:
+			loudness_measured_during_audio_stream_extraction_dict[filename] = [list_of_100ms_block_energies, highest_peak_float, channel_count, sample_rate, error_message]
+
+	except Exception:
+		exc_type, exc_value, exc_traceback = sys.exc_info()
+		error_message_as_a_list = traceback.format_exception(exc_type, exc_value, exc_traceback)
+		subroutine_name = 'measure_audio_stream_from_a_pipe'
+		catch_python_interpreter_errors(error_message_as_a_list, subroutine_name)
+
+	finally:
+		# Read the pipe until FFmpeg has finished and closed the pipe. A read returns nothing when FFmpeg has not opened the pipe yet or has already closed it, the end of the stream is known only after FFmpeg has finished.
+		if drain_file_descriptor != -1:
+
+			while True:
+				select.select([drain_file_descriptor], [], [], 1)
+
+				try:
+					data_read_from_pipe = os.read(drain_file_descriptor, 1048576)
+				except BlockingIOError:
+					continue # FFmpeg has the pipe open but has not written anything yet.
+				except OSError:
+					break
+
+				if len(data_read_from_pipe) == 0:
+					if ffmpeg_has_finished_event.is_set() == True:
+						break
+					ffmpeg_has_finished_event.wait(1) # Nobody has the pipe open for writing, select does not wait in this case.
+
+			os.close(drain_file_descriptor)
+
 def decompress_audio_streams_with_ffmpeg(event_1_for_ffmpeg_audiostream_conversion, event_2_for_ffmpeg_audiostream_conversion, filename, file_format_support_information, hotfolder_path, directory_for_temporary_files, english, finnish):
 	'''This subprocess decompresses all valid audiostreams from a file with ffmpeg'''
 
@@ -2610,6 +4807,7 @@ def decompress_audio_streams_with_ffmpeg(event_1_for_ffmpeg_audiostream_conversi
 	# The original file is queued for deletion.
 
 	ffmpeg_run_output = b''
+	ffmpeg_has_finished_event = threading.Event() # Tells the measurement threads that FFmpeg is no longer writing to the pipes.
 
 	try:
 		global files_queued_for_deletion
@@ -2618,7 +4816,16 @@ def decompress_audio_streams_with_ffmpeg(event_1_for_ffmpeg_audiostream_conversi
 		global directory_for_results
 		global write_loudness_calculation_results_to_a_machine_readable_file
 		global temp_loudness_results_for_automation
+		global queue_extracted_audio_streams_directly
+		global extracted_audio_streams_ready_for_processing_queue
+		global file_format_support_information_of_extracted_audio_streams_dict
+		global measure_audio_streams_while_extracting
+		global loudness_measured_during_audio_stream_extraction_dict
 		error_message = ''
+		list_of_moved_files = []
+		list_of_measurement_pipes_and_threads = []
+		ffmpeg_reported_an_error = False
+		measure_audio_streams_without_writing_files = audio_streams_can_be_measured_without_writing_files(file_format_support_information)
 		
 		# Save some debug information. Items are always saved in pairs (Title, value) so that the list is easy to parse later.
 		if debug_file_processing == True:
@@ -2635,38 +4842,56 @@ def decompress_audio_streams_with_ffmpeg(event_1_for_ffmpeg_audiostream_conversi
 			debug_temporary_dict_for_all_file_processing_information[filename] = debug_information_list
 		
 		# In list 'file_format_support_information' we already have all the information FFmpeg was able to find about the valid audio streams in the file, assign all info to variables.
-		natively_supported_file_format, ffmpeg_supported_fileformat, number_of_ffmpeg_supported_audiostreams, details_of_ffmpeg_supported_audiostreams, time_slice_duration_string, audio_duration_rounded_to_seconds, ffmpeg_commandline, target_filenames, mxf_audio_remixing, filenames_and_channel_counts_for_mxf_audio_remixing, audio_remix_channel_map, number_of_unsupported_streams_in_file = file_format_support_information
-		
-		try:
-			# Define filename for the temporary file that we are going to use as stdout for the external command.
-			stdout_for_external_command = directory_for_temporary_files + os.sep + filename + '_ffmpeg_audio_stream_demux_stdout.txt'
-			# Open the stdout temporary file in binary write mode.
-			with open(stdout_for_external_command, 'wb') as stdout_commandfile_handler:
-		
-				# Run ffmpeg to extract valid audio streams and parse output
-				subprocess.Popen(ffmpeg_commandline, stdout=stdout_commandfile_handler, stderr=stdout_commandfile_handler, stdin=None, close_fds=True).communicate()[0]
-		
-				# Make sure all data written to temporary stdout - file is flushed from the os cache and written to disk.
-				stdout_commandfile_handler.flush() # Flushes written data to os cache
-				os.fsync(stdout_commandfile_handler.fileno()) # Flushes os cache to disk
-		
-		except IOError as reason_for_error:
-			error_message = 'Error writing to ffmpeg (audio stream demux) stdout - file ' * english + 'FFmpeg (audio streamien demux) stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error writing to ffmpeg (audio stream demux) stdout - file ' * english + 'FFmpeg (audio streamien demux) stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
+		natively_supported_file_format, ffmpeg_supported_fileformat, number_of_ffmpeg_supported_audiostreams, details_of_ffmpeg_supported_audiostreams, time_slice_duration_string, audio_duration_rounded_to_seconds, ffmpeg_commandline, target_filenames, mxf_audio_remixing, filenames_and_channel_counts_for_mxf_audio_remixing, audio_remix_channel_map, number_of_unsupported_streams_in_file = file_format_support_information
+		names_of_extracted_audio_streams = list(target_filenames) # Details of each audio stream in 'details_of_ffmpeg_supported_audiostreams' are in the same order as the names in this list.
 		
-		# Open the file we used as stdout for the external program and read in what the external program wrote to it.
-		try:
-			with open(stdout_for_external_command, 'rb') as stdout_commandfile_handler:
-				ffmpeg_run_output = stdout_commandfile_handler.read(None)
-		except IOError as reason_for_error:
-			error_message = 'Error reading from ffmpeg (audio stream demux) stdout - file ' * english + 'FFmpeg (audio streamien demux) stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error reading from ffmpeg (audio stream demux) stdout - file ' * english + 'FFmpeg (audio streamien demux) stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
+		# If audio streams are measured while they are extracted, FFmpeg also writes each stream to a pipe as 32 bit float wav. A thread reads each pipe and measures the stream.
+		# If loudness corrected files are not created, the streams are only written to the pipes. The commandline is cut before the first output and only the outputs for the pipes are added.
+		measure_audio_streams_from_pipes = False
+
+		if measure_audio_streams_without_writing_files == True:
+			ffmpeg_commandline = ffmpeg_commandline[0:ffmpeg_commandline.index('-map')]
+			measure_audio_streams_from_pipes = True
+		elif (measure_audio_streams_while_extracting == True) and (use_numpy_for_loudness_measurement == True) and (run_file_processing_in_worker_processes == False) and (mxf_audio_remixing == False) and (len(target_filenames) == len(details_of_ffmpeg_supported_audiostreams)):
+			ffmpeg_commandline = list(ffmpeg_commandline)
+			measure_audio_streams_from_pipes = True
+
+		if measure_audio_streams_from_pipes == True:
+
+			for counter in range(0, len(target_filenames)):
+				measurement_pipe_path = directory_for_temporary_files + os.sep + target_filenames[counter] + '-measurement_pipe'
+
+				try:
+					if os.path.exists(measurement_pipe_path):
+						os.remove(measurement_pipe_path)
+					os.mkfifo(measurement_pipe_path)
+				except IOError as reason_for_error:
+					error_message = 'Error creating a pipe for loudness measurement ' * english + 'Äänekkyysmittauksen putken luominen epäonnistui ' * finnish + str(reason_for_error)
+					send_error_messages_to_screen_logfile_email(error_message, [])
+					continue
+				except OSError as reason_for_error:
+					error_message = 'Error creating a pipe for loudness measurement ' * english + 'Äänekkyysmittauksen putken luominen epäonnistui ' * finnish + str(reason_for_error)
+					send_error_messages_to_screen_logfile_email(error_message, [])
+					continue
+
+				map_number = details_of_ffmpeg_supported_audiostreams[counter][7]
+				ffmpeg_commandline.extend(['-map', '0:' + str(map_number), '-acodec', 'pcm_f32le', '-f', 'wav', measurement_pipe_path])
+
+				measurement_thread = threading.Thread(target=measure_audio_stream_from_a_pipe, args=(measurement_pipe_path, target_filenames[counter], ffmpeg_has_finished_event, english, finnish)) # Create a process instance.
+				measurement_thread.start() # Start the process in it'own thread.
+				list_of_measurement_pipes_and_threads.append([measurement_pipe_path, measurement_thread])
+
+			# Save some debug information.
+			if debug_file_processing == True:
+				debug_information_list.append('ffmpeg_commandline with measurement pipes')
+				debug_information_list.append(ffmpeg_commandline)
+
+		# Run ffmpeg to extract valid audio streams and parse output
+		ffmpeg_run_output, ffmpeg_stderr, error_message = run_external_command(ffmpeg_commandline, english, finnish, stderr_to_stdout=True)
+
+		# FFmpeg has finished. Let the measurement threads stop reading the pipes.
+		ffmpeg_has_finished_event.set()
+		stop_audio_stream_measurement_threads(list_of_measurement_pipes_and_threads)
 		
 		# Convert ffmpeg output from binary to UTF-8 text.
 		try:
@@ -2680,6 +4905,7 @@ def decompress_audio_streams_with_ffmpeg(event_1_for_ffmpeg_audiostream_conversi
 		for item in ffmpeg_run_output_result_list:
 			if 'error:' in item.lower(): # If there is the string 'error' in ffmpeg's output, there has been an error.
 				error_message = 'ERROR !!! Extracting audio streams with ffmpeg, ' * english + 'VIRHE !!! Audio streamien purkamisessa ffmpeg:illä, ' * finnish + ' ' + filename + ' : ' + item
+				ffmpeg_reported_an_error = True
 
 				# Save some debug information.
 				if debug_file_processing == True:
@@ -2687,17 +4913,37 @@ def decompress_audio_streams_with_ffmpeg(event_1_for_ffmpeg_audiostream_conversi
 					debug_information_list.append(error_message)
 
 				send_error_messages_to_screen_logfile_email(error_message, [])
-		
-		# Delete the temporary stdout - file.
-		try:
-			os.remove(stdout_for_external_command)
-		except IOError as reason_for_error:
-			error_message = 'Error deleting ffmpeg (audio stream demux) stdout - file ' * english + 'FFmpeg (audio streamien demux) stdout - tiedoston deletoiminen epäonnistui ' * finnish  + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error deleting ffmpeg (audio stream demux) stdout - file ' * english + 'FFmpeg (audio streamien demux) stdout - tiedoston deletoiminen epäonnistui ' * finnish  + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
 
+		# Store the size and modification time of each extracted file with the loudness measured while extracting, so that results are used only for the same file.
+		# If FFmpeg reported an error the measurement may be incomplete, then the extracted files are measured again.
+		for measurement_pipe_path, measurement_thread in list_of_measurement_pipes_and_threads:
+			item = os.path.basename(measurement_pipe_path)[0:-len('-measurement_pipe')]
+
+			if item not in loudness_measured_during_audio_stream_extraction_dict:
+				continue
+
+			try:
+				if ffmpeg_reported_an_error == True:
+					del loudness_measured_during_audio_stream_extraction_dict[item]
+				elif measure_audio_streams_without_writing_files == False:
+					file_metadata = os.stat(directory_for_temporary_files + os.sep + item)
+					loudness_measured_during_audio_stream_extraction_dict[item].extend([file_metadata.st_size, file_metadata.st_mtime_ns])
+			except IOError:
+				del loudness_measured_during_audio_stream_extraction_dict[item]
+			except OSError:
+				del loudness_measured_during_audio_stream_extraction_dict[item]
+
+		# Audio streams that were only written to the pipes have no files to move to the HotFolder, create their results here.
+		if measure_audio_streams_without_writing_files == True:
+
+			# Save some debug information.
+			if debug_file_processing == True:
+				debug_information_list.append('Message')
+				debug_information_list.append('Calling subroutine: calculate_loudness_of_audio_streams_measured_without_files')
+
+			calculate_loudness_of_audio_streams_measured_without_files(filename, target_filenames, details_of_ffmpeg_supported_audiostreams, time_slice_duration_string, audio_duration_rounded_to_seconds, hotfolder_path, directory_for_temporary_files, english, finnish)
+			target_filenames = []
+		
 		# If the audio streams we extracted came from a mxf - file and need to be remixed before processing, then call the remixing subroutine.
 		if (mxf_audio_remixing == True) and (len(filenames_and_channel_counts_for_mxf_audio_remixing) > 0) and (len(audio_remix_channel_map) > 0):
 
@@ -2746,6 +4992,7 @@ def decompress_audio_streams_with_ffmpeg(event_1_for_ffmpeg_audiostream_conversi
 		for item in target_filenames:
 			try:
 				shutil.move(directory_for_temporary_files + os.sep + item, hotfolder_path + os.sep + item)
+				list_of_moved_files.append(item)
 			except KeyboardInterrupt:
 				if silent == False:
 					print('\n\nUser cancelled operation.\n' * english + '\n\nKäyttäjä pysäytti ohjelman.\n' * finnish)
@@ -2756,10 +5003,34 @@ def decompress_audio_streams_with_ffmpeg(event_1_for_ffmpeg_audiostream_conversi
 			except OSError as reason_for_error:
 				error_message = 'Error moving ffmpeg decompressed file ' * english + 'FFmpeg:illä puretun tiedoston siirtäminen epäonnistui ' * finnish + str(reason_for_error)
 				send_error_messages_to_screen_logfile_email(error_message, [])
+
+		# The extracted files are natively supported single stream files with the same duration as the original file, FFmpeg already reported everything needed about them.
+		# Give the extracted files directly to the main thread for loudness calculation, or store the information so that the files are not probed again when they are found in the HotFolder.
+		# Details of the audio stream are known for files extracted directly from the original file, but not for mixes created by remixing mxf - audio.
+		for item in list_of_moved_files:
+			details_of_extracted_audio_stream = []
+
+			if (item in names_of_extracted_audio_streams) and (len(names_of_extracted_audio_streams) == len(details_of_ffmpeg_supported_audiostreams)):
+				details_of_extracted_audio_stream = [details_of_ffmpeg_supported_audiostreams[names_of_extracted_audio_streams.index(item)]]
+
+			file_format_support_information_for_extracted_file = [True, True, 1, details_of_extracted_audio_stream, time_slice_duration_string, audio_duration_rounded_to_seconds, [], [], False, [], [], 0]
+
+			if queue_extracted_audio_streams_directly == True:
+				extracted_audio_streams_ready_for_processing_queue.put([item, file_format_support_information_for_extracted_file, filename])
+			else:
+				file_identity = get_identity_of_a_file(hotfolder_path + os.sep + item)
+
+				if file_identity != None:
+					file_format_support_information_of_extracted_audio_streams_dict[item] = [file_identity, file_format_support_information_for_extracted_file]
+
+		# Save some debug information.
+		if (debug_file_processing == True) and (queue_extracted_audio_streams_directly == True):
+			debug_information_list.append('Files queued directly for loudness calculation')
+			debug_information_list.append(list_of_moved_files)
 		
 		# Queue the original file for deletion. It is no longer needed since we have extracted all audio streams from it.
 		if delete_original_file_immediately == True:
-			files_queued_for_deletion.append(filename)
+			files_queued_for_deletion.add(filename)
 		
 		# Save some debug information.
 		if debug_file_processing == True:
@@ -2777,6 +5048,9 @@ def decompress_audio_streams_with_ffmpeg(event_1_for_ffmpeg_audiostream_conversi
 		error_message_as_a_list = traceback.format_exception(exc_type, exc_value, exc_traceback)
 		subroutine_name = 'decompress_audio_streams_with_ffmpeg'
 
+		# Let measurement threads stop reading the pipes.
+		ffmpeg_has_finished_event.set()
+
 		# Set the events so that the main program can see that extracting audio streams from file is ready.
 		event_1_for_ffmpeg_audiostream_conversion.set()
 		event_2_for_ffmpeg_audiostream_conversion.set()
@@ -2968,6 +5242,38 @@ def send_error_messages_by_email_thread(email_sending_details, english, finnish)
 							print('\033[7m' + '\r-------->	' + exception_error_message + '\033[0m')
 				reason_for_failed_send = []
 
+def create_http_session_with_retries():
+
+	"""Creates a keep-alive http session for sending messages to Progress_Report and Heartbeat_Checker. Failed connections and server errors are retried twice, a read timeout only once."""
+
+	# Messages contain the complete state of the program, so sending the same message again is harmless and POST can be retried.
+	# Sending a message with all retries must take less time than 'heartbeat_write_interval', see get_timeout_for_status_messages.
+	# Delays between retries are 0 and 1 seconds (backoff_factor 0.5).
+	# Older versions of urllib3 call the 'allowed_methods' parameter 'method_whitelist'.
+	try:
+		retry_policy = requests.adapters.Retry(total=2, connect=2, read=1, status=2, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504], allowed_methods=frozenset(['POST']), raise_on_status=False)
+	except TypeError:
+		retry_policy = requests.adapters.Retry(total=2, connect=2, read=1, status=2, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504], method_whitelist=frozenset(['POST']), raise_on_status=False)
+
+	http_session = requests.Session()
+	http_session.headers.update({ 'Content-Type' : 'application/json' })
+	http_session.mount('http://', requests.adapters.HTTPAdapter(max_retries=retry_policy))
+
+	return(http_session)
+
+def get_timeout_for_status_messages():
+
+	"""Returns the connect and read timeouts for one attempt to send a message to Progress_Report or Heartbeat_Checker."""
+
+	# A message is sent at most three times, each attempt may wait for both the connect and the read timeout and the delays between the attempts are 1 second in total.
+	# The timeouts are chosen so that this worst case is shorter than 'heartbeat_write_interval', then a server that does not answer does not delay the next heartbeat. The timeouts are never shorter than one second.
+
+	global heartbeat_write_interval
+
+	timeout = max(1, (heartbeat_write_interval - 1.5) / 6)
+
+	return((timeout, timeout))
+
 def send_to_progress_report(english, finnish):
 		
 	'''This subprocess runs in it's own thread and periodically sends calculation queue information to Progress_Report allowing the calculation queue progress to be monitored with a web browser'''
@@ -2979,9 +5285,13 @@ def send_to_progress_report(english, finnish):
 		global silent
 		global quit_all_threads_now
 		global freelcs_version
+		global http_session_for_status_messages
+		global status_message_forced_send_interval
 		
 		data_to_send = {}
 		data_to_send["title_1"] = [ 'FreeLCS ' + freelcs_version + ' Progress Report' * english + ' Laskentajono' * finnish ]
+		information_in_last_sent_message = ''
+		time_of_last_sent_message = 0
 
 		while True:
 			
@@ -3004,7 +5314,7 @@ def send_to_progress_report(english, finnish):
 			data_to_send["realtime"] = [ server_name + ": " + realtime.replace('_', ' ')  ]
 			
 			# Get the first 10 filenames waiting for getting into loudness calculation and insert those names in to the html code.
-			first_ten_files_queued_to_loudness_calculation = files_queued_to_loudness_calculation[:10] # Get the first 10 filenames from the waiting queue into a list.
+			first_ten_files_queued_to_loudness_calculation = list(files_queued_to_loudness_calculation)[:10] # Get the first 10 filenames from the waiting queue into a list.
 			waiting_queue = []
 
 			for counter in range(10, 0, -1):
@@ -3018,8 +5328,8 @@ def send_to_progress_report(english, finnish):
 			data_to_send["files_waiting_in_queue"] = waiting_queue
 
 			# Get the filenames currently in loudness calculation and insert their names into the data to send
-			maximum_number_of_simultaneously_processed_files = int(number_of_processor_cores / 2) # This variable holds the number of files we are able to process simultanously. As two loudness calculation processed are started for each file, this number is always the value in variable 'number_of_processor_cores' divided by two.
 			loudness_calculation_queue_list = list(loudness_calculation_queue) # Get the list of filesnames currently in loudness calculation from the 'loudness_calculation_queue' dictionary.
+			maximum_number_of_simultaneously_processed_files = max(int(number_of_processor_cores / processor_cores_used_by_one_file), len(loudness_calculation_queue_list)) # This variable holds the number of files we are able to process simultanously. Files that only have their audio streams extracted with FFmpeg use less processor cores, so more files than this may be processed at the same time.
 			processing_queue = []
 			
 			for counter in range(1, maximum_number_of_simultaneously_processed_files + 1):
@@ -3043,21 +5353,26 @@ def send_to_progress_report(english, finnish):
 
 			# Take max 100 names of processed files in the list
 			data_to_send["processed_files"] = processed_files[:100]
+			data_to_send["authorization"] = authorization
 
-			# Send data to the Progress_Report
-			try:
+			# Send the message only if the queue information has changed or the forced send interval has passed. The time of day in the message changes every time, so it is not compared.
+			information_in_message = json.dumps([data_to_send[key] for key in sorted(data_to_send) if key != "realtime"])
 
-				# Send timestamp and some other information to HeartBeat_Checker
-				headers = { 'Content-Type' : 'application/json' }
-				data_to_send["authorization"] = authorization
+			if (information_in_message == information_in_last_sent_message) and (time.time() - time_of_last_sent_message < status_message_forced_send_interval):
+				continue
 
+			# Send data to the Progress_Report
+			try:
 				target_address = "http://" + str(progress_network_name) + ":" + str(progress_service_port) + str(progress_service_path)
 
 				# Send data and get reply
-				return_message = requests.post(target_address, data=json.dumps(data_to_send), headers=headers)
+				return_message = http_session_for_status_messages.post(target_address, data=json.dumps(data_to_send), timeout=get_timeout_for_status_messages())
 
 				if return_message.status_code != 200:
 					send_error_messages_to_screen_logfile_email(str(return_message), []) 
+				else:
+					information_in_last_sent_message = information_in_message
+					time_of_last_sent_message = time.time()
 
 			except KeyboardInterrupt:
 				if silent == False:
@@ -3067,6 +5382,9 @@ def send_to_progress_report(english, finnish):
 				# Catch and supress errors when trying to send a message to progress_report or heartbeat_checker fails.
 				# These errors are not fatal for the LoudnessCorrection functionality but may fill logs fast.
 				pass
+			except requests.exceptions.Timeout:
+				# Progress_Report did not answer in time, try again after the wait period.
+				pass
 			except IOError as reason_for_error:
 				error_message = str(reason_for_error)
 				send_error_messages_to_screen_logfile_email(error_message, [])
@@ -3095,8 +5413,12 @@ def send_to_heartbeat_checker():
 		global finnish
 		global silent
 		global quit_all_threads_now
+		global http_session_for_status_messages
+		global status_message_forced_send_interval
 
 		data_to_send = {}
+		information_in_last_sent_message = ''
+		time_of_last_sent_message = 0
 
 		while True:
 
@@ -3115,16 +5437,25 @@ def send_to_heartbeat_checker():
 			try:
 
 				# Send timestamp and some other information to HeartBeat_Checker
-				headers = { 'Content-Type' : 'application/json' }
 				data_to_send["authorization"] = authorization
 				data_to_send.update(loudness_correction_program_info_and_timestamps)
+				information_in_message = json.dumps(data_to_send, sort_keys=True)
+
+				# Send the message only if the information has changed or the forced send interval has passed.
+				# Threads update their timestamps in 'loudness_correction_program_info_and_timestamps' while they are running, so a thread that has stopped shows up as a timestamp that does not change.
+				if (information_in_message == information_in_last_sent_message) and (time.time() - time_of_last_sent_message < status_message_forced_send_interval):
+					continue
+
 				target_address = "http://" + str(heartbeat_network_name) + ":" + str(heartbeat_service_port) + str(heartbeat_service_path)
 
 				# Send data and get reply
-				return_message = requests.post(target_address, data=json.dumps(data_to_send), headers=headers)
+				return_message = http_session_for_status_messages.post(target_address, data=information_in_message, timeout=get_timeout_for_status_messages())
 
 				if return_message.status_code != 200:
 					send_error_messages_to_screen_logfile_email(str(return_message), []) 
+				else:
+					information_in_last_sent_message = information_in_message
+					time_of_last_sent_message = time.time()
 
 			except KeyboardInterrupt:
 				if silent == False:
@@ -3134,6 +5465,9 @@ def send_to_heartbeat_checker():
 				# Catch and supress errors when trying to send a message to progress_report or heartbeat_checker fails.
 				# These errors are not fatal for the LoudnessCorrection functionality but may fill logs fast.
 				pass
+			except requests.exceptions.Timeout:
+				# Heartbeat_Checker did not answer in time, try again after the wait period.
+				pass
 			except IOError as reason_for_error:
 				error_message = str(reason_for_error)
 				send_error_messages_to_screen_logfile_email(error_message, [])
@@ -3165,6 +5499,9 @@ def debug_lists_and_dictionaries_thread():
 	global completed_files_list
 	global error_messages_to_email_later_list
 	global finished_processes
+	global job_dispatch_wait_statistics
+	global hotfolder_poll_statistics
+	global growing_file_statistics
 	global integrated_loudness_calculation_results
 	global silent
 	global directory_for_error_logs
@@ -3177,6 +5514,10 @@ def debug_lists_and_dictionaries_thread():
 	global directory_for_results
 	global libebur128_path
 	global delay_between_directory_reads
+	global watch_hotfolder_with_inotify
+	global delay_between_directory_reads_when_idle
+	global file_stability_window_for_local_files
+	global file_stability_window_for_network_files
 	global number_of_processor_cores
 	global target_loudness
 	global file_expiry_time
@@ -3186,6 +5527,7 @@ def debug_lists_and_dictionaries_thread():
 	global html_progress_report_write_interval
 	global heartbeat
 	global heartbeat_write_interval
+	global status_message_forced_send_interval
 	global where_to_send_error_messages
 	global send_error_messages_to_logfile
 	global send_error_messages_by_email
@@ -3222,6 +5564,25 @@ def debug_lists_and_dictionaries_thread():
 	global ffmpeg_allowed_codec_formats
 	global os_name
 	global os_version
+	global measure_loudness_in_a_single_pass
+	global use_numpy_for_loudness_measurement
+	global run_file_processing_in_worker_processes
+	global maximum_number_of_worker_process_failures_for_a_file
+	global memory_budget_for_file_processing
+	global temporary_disk_space_budget_for_file_processing
+	global processing_costs_of_running_jobs_dict
+	global queue_policy
+	global queue_priority_classes
+	global queue_default_priority
+	global queue_aging_time
+	global queue_maximum_times_passed
+	global file_information_cache_size
+	global measure_audio_streams_while_extracting
+	global queue_extracted_audio_streams_directly
+	global result_cache_size
+	global draw_loudness_graphics_in_process
+	global number_of_gnuplot_worker_processes
+	global timeout_for_gnuplot_worker_processes
 
 	list_printouts = []
 	list_printouts_old_values = []
@@ -3255,6 +5616,10 @@ def debug_lists_and_dictionaries_thread():
 		values_read_from_configfile.append('libebur128_path = ' + libebur128_path)
 		values_read_from_configfile.append('')
 		values_read_from_configfile.append('delay_between_directory_reads = ' + str(delay_between_directory_reads))	
+		values_read_from_configfile.append('watch_hotfolder_with_inotify = ' + str(watch_hotfolder_with_inotify))
+		values_read_from_configfile.append('delay_between_directory_reads_when_idle = ' + str(delay_between_directory_reads_when_idle))
+		values_read_from_configfile.append('file_stability_window_for_local_files = ' + str(file_stability_window_for_local_files))
+		values_read_from_configfile.append('file_stability_window_for_network_files = ' + str(file_stability_window_for_network_files))
 		values_read_from_configfile.append('number_of_processor_cores = ' + str(number_of_processor_cores))
 		values_read_from_configfile.append('target_loudness = ' + target_loudness)
 		values_read_from_configfile.append('file_expiry_time = ' + str(file_expiry_time))
@@ -3272,6 +5637,7 @@ def debug_lists_and_dictionaries_thread():
 		values_read_from_configfile.append('')
 		values_read_from_configfile.append('heartbeat = ' + str(heartbeat))
 		values_read_from_configfile.append('heartbeat_write_interval = ' + str(heartbeat_write_interval))
+		values_read_from_configfile.append('status_message_forced_send_interval = ' + str(status_message_forced_send_interval))
 		values_read_from_configfile.append('')
 		values_read_from_configfile.append('where_to_send_error_messages = ' + ', '.join(where_to_send_error_messages))
 		values_read_from_configfile.append('send_error_messages_to_logfile = ' + str(send_error_messages_to_logfile))
@@ -3285,6 +5651,24 @@ def debug_lists_and_dictionaries_thread():
 		values_read_from_configfile.append('create_loudness_corrected_files = ' + str(create_loudness_corrected_files))
 		values_read_from_configfile.append('create_loudness_history_graphics_files = ' + str(create_loudness_history_graphics_files))
 		values_read_from_configfile.append('delete_original_file_immediately = ' + str(delete_original_file_immediately))
+		values_read_from_configfile.append('measure_loudness_in_a_single_pass = ' + str(measure_loudness_in_a_single_pass))
+		values_read_from_configfile.append('use_numpy_for_loudness_measurement = ' + str(use_numpy_for_loudness_measurement))
+		values_read_from_configfile.append('run_file_processing_in_worker_processes = ' + str(run_file_processing_in_worker_processes))
+		values_read_from_configfile.append('maximum_number_of_worker_process_failures_for_a_file = ' + str(maximum_number_of_worker_process_failures_for_a_file))
+		values_read_from_configfile.append('memory_budget_for_file_processing = ' + str(memory_budget_for_file_processing))
+		values_read_from_configfile.append('temporary_disk_space_budget_for_file_processing = ' + str(temporary_disk_space_budget_for_file_processing))
+		values_read_from_configfile.append('queue_policy = ' + str(queue_policy))
+		values_read_from_configfile.append('queue_priority_classes = ' + str(queue_priority_classes))
+		values_read_from_configfile.append('queue_default_priority = ' + str(queue_default_priority))
+		values_read_from_configfile.append('queue_aging_time = ' + str(queue_aging_time))
+		values_read_from_configfile.append('queue_maximum_times_passed = ' + str(queue_maximum_times_passed))
+		values_read_from_configfile.append('file_information_cache_size = ' + str(file_information_cache_size))
+		values_read_from_configfile.append('measure_audio_streams_while_extracting = ' + str(measure_audio_streams_while_extracting))
+		values_read_from_configfile.append('queue_extracted_audio_streams_directly = ' + str(queue_extracted_audio_streams_directly))
+		values_read_from_configfile.append('result_cache_size = ' + str(result_cache_size))
+		values_read_from_configfile.append('draw_loudness_graphics_in_process = ' + str(draw_loudness_graphics_in_process))
+		values_read_from_configfile.append('number_of_gnuplot_worker_processes = ' + str(number_of_gnuplot_worker_processes))
+		values_read_from_configfile.append('timeout_for_gnuplot_worker_processes = ' + str(timeout_for_gnuplot_worker_processes))
 
 		variable_string = unit_separator
 		characters_in_ascii = '' 
@@ -3332,12 +5716,19 @@ def debug_lists_and_dictionaries_thread():
 			keys_of_final_loudness_results_for_automation = set(final_loudness_results_for_automation)
 
 			list_printouts = []
-			list_printouts.append('len(list_of_growing_files)= ' + str(len(list_of_growing_files)) + ' list_of_growing_files = ' + str(list_of_growing_files))
+			list_printouts.append('len(list_of_growing_files)= ' + str(len(list_of_growing_files)) + ' list_of_growing_files = ' + str(list(list_of_growing_files)))
 			list_printouts.append('-----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------')
-			list_printouts.append('len(files_queued_to_loudness_calculation)= ' + str(len(files_queued_to_loudness_calculation)) + ' files_queued_to_loudness_calculation = ' + str(files_queued_to_loudness_calculation))
+			list_printouts.append('len(files_queued_to_loudness_calculation)= ' + str(len(files_queued_to_loudness_calculation)) + ' files_queued_to_loudness_calculation = ' + str(list(files_queued_to_loudness_calculation)))
 			list_printouts.append('-----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------')
 			list_printouts.append('len(loudness_calculation_queue)= ' + str(len(loudness_calculation_queue)) + ' loudness_calculation_queue = ' + str(loudness_calculation_queue))
 			list_printouts.append('-----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------')
+			list_printouts.append('job_dispatch_wait_statistics = ' + str(job_dispatch_wait_statistics))
+			list_printouts.append('-----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------')
+			list_printouts.append('hotfolder_poll_statistics = ' + str(hotfolder_poll_statistics))
+			list_printouts.append('growing_file_statistics = ' + str(growing_file_statistics))
+			list_printouts.append('-----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------')
+			list_printouts.append('processing_costs_of_running_jobs_dict = ' + str(processing_costs_of_running_jobs_dict))
+			list_printouts.append('-----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------')
 			list_printouts.append('len(new_hotfolder_filelist_dict)= ' + str(len(new_hotfolder_filelist_dict)) + ' new_hotfolder_filelist_dict = ' + str(new_hotfolder_filelist_dict))
 			list_printouts.append('-----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------')
 			list_printouts.append('len(old_hotfolder_filelist_dict)= ' +  str(len(old_hotfolder_filelist_dict)) + ' old_hotfolder_filelist_dict = ' + str(old_hotfolder_filelist_dict))
@@ -3503,36 +5894,8 @@ def get_audio_stream_information_with_ffmpeg_and_create_extraction_parameters(fi
 		wrapper_format = ''
 		mediainfo_error_message = ''
 		
-		try:
-			# Define filename for the temporary file that we are going to use as stdout for the external command.
-			stdout_for_external_command = directory_for_temporary_files + os.sep + filename + '_ffmpeg_find_audio_streams_stdout.txt'
-			# Open the stdout temporary file in binary write mode.
-			with open(stdout_for_external_command, 'wb') as stdout_commandfile_handler:
-		
-				# Examine the file in HotFolder with ffmpeg.
-				subprocess.Popen([ffmpeg_executable_name, '-guess_layout_max', '0', '-i', file_to_process], stdout=stdout_commandfile_handler, stderr=stdout_commandfile_handler, stdin=None, close_fds=True).communicate()[0] # Run ffmpeg.
-		
-				# Make sure all data written to temporary stdout - file is flushed from the os cache and written to disk.
-				stdout_commandfile_handler.flush() # Flushes written data to os cache
-				os.fsync(stdout_commandfile_handler.fileno()) # Flushes os cache to disk
-				
-		except IOError as reason_for_error:
-			error_message = 'Error writing to ffmpeg stdout - file ' * english + 'FFmpegin stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error writing to ffmpeg stdout - file ' * english + 'FFmpegin stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-			
-		# Open the file we used as stdout for the external program and read in what the external program wrote to it.
-		try:
-			with open(stdout_for_external_command, 'rb') as stdout_commandfile_handler:
-				ffmpeg_run_output = stdout_commandfile_handler.read(None)
-		except IOError as reason_for_error:
-			error_message = 'Error reading from ffmpeg stdout - file ' * english + 'FFmpegin stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error reading from ffmpeg stdout - file ' * english + 'FFmpegin stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
+		# Examine the file in HotFolder with ffmpeg.
+		ffmpeg_run_output, ffmpeg_stderr, error_message = run_file_information_command([ffmpeg_executable_name, '-guess_layout_max', '0', '-i', file_to_process], file_to_process, english, finnish) # Run ffmpeg.
 		
 		# Convert ffmpeg output from binary to UTF-8 text.
 		try:
@@ -3543,16 +5906,6 @@ def get_audio_stream_information_with_ffmpeg_and_create_extraction_parameters(fi
 			
 		ffmpeg_run_output_result_list = str(ffmpeg_run_output_decoded).split('\n') # Split ffmpeg output by linefeeds to a list.
 		
-		# Delete the temporary stdout - file.
-		try:
-			os.remove(stdout_for_external_command)
-		except IOError as reason_for_error:
-			error_message = 'Error deleting ffmpeg stdout - file ' * english + 'FFmpegin stdout - tiedoston deletoiminen epäonnistui ' * finnish  + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error deleting ffmpeg stdout - file ' * english + 'FFmpegin stdout - tiedoston deletoiminen epäonnistui ' * finnish  + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-			
 		##################################################################################################
 		# Find lines from FFmpeg output that have information about audio streams and file duration	 #
 		# Also record channels count, bit depth, sample rate and FFmpeg map number for each stream found #
@@ -4189,72 +6542,91 @@ def get_audio_stream_information_with_ffmpeg_and_create_extraction_parameters(fi
 	
 	return(file_format_support_information, ffmpeg_error_message, send_ffmpeg_error_message_by_email)
 
-def get_file_wrapper_format_with_mediainfo(directory_for_temporary_files, filename, hotfolder_path, english, finnish):
+def get_file_information_with_mediainfo(file_to_process, english, finnish):
 
-	file_to_process = hotfolder_path + os.sep + filename
+	"""Runs mediainfo once and returns a dictionary of the values LoudnessCorrection needs from the file and an error message."""
 
-	mediainfo_output = b''
+	# This subroutine works like this:
+	# ---------------------------------
+	# Mediainfo prints the values listed in a template file, one line for the file (General) and one line for each audio stream (Audio). Values on a line are separated with '|':
+	#
+	# General|Wave|1|00:00:10.000
+	# Audio|2|24|PCM
+	#
+	# Only the values of the first audio stream are returned. A value that mediainfo does not print is returned as an empty string.
+
+	global file_information_cache_lock
+
+	mediainfo_information = {'Format' : '', 'AudioCount' : '', 'Duration/String3' : '', 'Channels' : '', 'BitDepth' : '', 'AudioFormat' : ''}
 	mediainfo_output_decoded = ''
 	error_message = ''
-	wrapper_format = ''
+	audio_stream_was_found = False
+	mediainfo_template_file = directory_for_temporary_files + os.sep + '00-mediainfo_template.txt'
 
-	#####################################################
-	# Find out what is the wrapper format of the file   #
-	#####################################################
-	
-	try:
-		# Define filename for the temporary file that we are going to use as stdout for the external command.
-		stdout_for_external_command = directory_for_temporary_files + os.sep + filename + '_mediainfo_find_file_wrapper_format_stdout.txt'
-		# Open the stdout temporary file in binary write mode.
-		with open(stdout_for_external_command, 'wb') as stdout_commandfile_handler:
-	
-			# Get the number of audio streams in the file
-			subprocess.Popen(['mediainfo', '--Inform=General;%Format%', file_to_process], stdout=stdout_commandfile_handler, stderr=stdout_commandfile_handler, stdin=None, close_fds=True).communicate()[0] # Run mediainfo.
-	
-			# Make sure all data written to temporary stdout - file is flushed from the os cache and written to disk.
-			stdout_commandfile_handler.flush() # Flushes written data to os cache
-			os.fsync(stdout_commandfile_handler.fileno()) # Flushes os cache to disk
-			
-	except IOError as reason_for_error:
-		error_message = 'Error writing to mediainfo (file wrapper format) stdout - file ' * english + 'Mediainfon (wräpperi- formaatin selvitys) stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-		send_error_messages_to_screen_logfile_email(error_message, [])
-	except OSError as reason_for_error:
-		error_message = 'Error writing to mediainfo (file wrapper format) stdout - file ' * english + 'Mediainfon (wräpperi- formaatin selvitys) stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-		send_error_messages_to_screen_logfile_email(error_message, [])
-		
-	# Open the file we used as stdout for the external program and read in what the external program wrote to it.
 	try:
-		with open(stdout_for_external_command, 'rb') as stdout_commandfile_handler:
-			mediainfo_output = stdout_commandfile_handler.read(None)
+		with file_information_cache_lock:
+			if os.path.exists(mediainfo_template_file) == False:
+				with open(mediainfo_template_file, 'wt') as template_file_handler:
+					template_file_handler.write('General;General|%Format%|%AudioCount%|%Duration/String3%\\n\n' + 'Audio;Audio|%Channels%|%BitDepth%|%Format%\\n\n')
 	except IOError as reason_for_error:
-		error_message = 'Error reading from mediainfo (file wrapper format) stdout - file ' * english + 'Mediainfon (wräpperi- formaatin selvitys) stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
+		error_message = 'Error writing mediainfo template file: ' * english + 'Mediainfon mallitiedoston kirjoittaminen epäonnistui: ' * finnish + str(reason_for_error)
 		send_error_messages_to_screen_logfile_email(error_message, [])
+		return(mediainfo_information, error_message)
 	except OSError as reason_for_error:
-		error_message = 'Error reading from mediainfo (file wrapper format) stdout - file ' * english + 'Mediainfon (wräpperi- formaatin selvitys) stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
+		error_message = 'Error writing mediainfo template file: ' * english + 'Mediainfon mallitiedoston kirjoittaminen epäonnistui: ' * finnish + str(reason_for_error)
 		send_error_messages_to_screen_logfile_email(error_message, [])
-	
+		return(mediainfo_information, error_message)
+
+	mediainfo_output, mediainfo_stderr, error_message = run_file_information_command(['mediainfo', '--Inform=file://' + mediainfo_template_file, file_to_process], file_to_process, english, finnish) # Run mediainfo.
+
 	# Convert mediainfo output from binary to UTF-8 text.
 	try:
 		mediainfo_output_decoded = mediainfo_output.decode('UTF-8') # Convert mediainfo output from binary to utf-8 text.
 	except UnicodeDecodeError:
 		# If UTF-8 conversion fails, try conversion with another character map.
-		mediainfo_output_decoded = mediainfo_output.decode('ISO-8859-15') # Convert mediainfo output from binary to text.	
+		mediainfo_output_decoded = mediainfo_output.decode('ISO-8859-15') # Convert mediainfo output from binary to text.
+
+	for line in mediainfo_output_decoded.splitlines():
+		values = line.split('|')
+
+		if len(values) != 4:
+			continue
+
+		if values[0] == 'General':
+			mediainfo_information['Format'] = values[1]
+			mediainfo_information['AudioCount'] = values[2]
+			mediainfo_information['Duration/String3'] = values[3]
+
+		if (values[0] == 'Audio') and (audio_stream_was_found == False):
+			mediainfo_information['Channels'] = values[1]
+			mediainfo_information['BitDepth'] = values[2]
+			mediainfo_information['AudioFormat'] = values[3]
+			audio_stream_was_found = True
+
+	return(mediainfo_information, error_message)
+
+def get_file_wrapper_format_with_mediainfo(directory_for_temporary_files, filename, hotfolder_path, english, finnish):
+
+	file_to_process = hotfolder_path + os.sep + filename
+
+	mediainfo_output = b''
+	mediainfo_output_decoded = ''
+	error_message = ''
+	wrapper_format = ''
+
+	#####################################################
+	# Find out what is the wrapper format of the file   #
+	#####################################################
+	
+	# Get the wrapper format of the file.
+	mediainfo_information, error_message = get_file_information_with_mediainfo(file_to_process, english, finnish)
+	mediainfo_output_decoded = mediainfo_information['Format']
 		
 	# Get the file wrapper format from mediainfo output.
 	if (mediainfo_output_decoded.strip() != '') and ('-' not in mediainfo_output_decoded):
 		if mediainfo_output_decoded.strip().isalpha() == True:
 			wrapper_format = str(mediainfo_output_decoded).strip().lower()
 		
-	# Delete the temporary stdout - file.
-	try:
-		os.remove(stdout_for_external_command)
-	except IOError as reason_for_error:
-		error_message = 'Error deleting mediainfo (file wrapper format) stdout - file ' * english + 'Mediainfon (wräpperi- formaatin selvitys) stdout - tiedoston deletoiminen epäonnistui ' * finnish  + str(reason_for_error)
-		send_error_messages_to_screen_logfile_email(error_message, [])
-	except OSError as reason_for_error:
-		error_message = 'Error deleting mediainfo (file wrapper format) stdout - file ' * english + 'Mediainfon (wräpperi- formaatin selvitys) stdout - tiedoston deletoiminen epäonnistui ' * finnish  + str(reason_for_error)
-		send_error_messages_to_screen_logfile_email(error_message, [])	
-
 	return(wrapper_format, error_message)
 
 def get_audiofile_info_with_mediainfo(directory_for_temporary_files, filename, hotfolder_path, english, finnish, save_debug_information):
@@ -4300,58 +6672,15 @@ def get_audiofile_info_with_mediainfo(directory_for_temporary_files, filename, h
 		# Find how many audio streams there are in the file #
 		#####################################################
 		
-		try:
-			# Define filename for the temporary file that we are going to use as stdout for the external command.
-			stdout_for_external_command = directory_for_temporary_files + os.sep + filename + '_mediainfo_find_audiofile_info_stdout.txt'
-			# Open the stdout temporary file in binary write mode.
-			with open(stdout_for_external_command, 'wb') as stdout_commandfile_handler:
-		
-				# Get the number of audio streams in the file
-				subprocess.Popen(['mediainfo', '--Inform=General;%AudioCount%', file_to_process], stdout=stdout_commandfile_handler, stderr=stdout_commandfile_handler, stdin=None, close_fds=True).communicate()[0] # Run mediainfo.
-		
-				# Make sure all data written to temporary stdout - file is flushed from the os cache and written to disk.
-				stdout_commandfile_handler.flush() # Flushes written data to os cache
-				os.fsync(stdout_commandfile_handler.fileno()) # Flushes os cache to disk
-				
-		except IOError as reason_for_error:
-			error_message = 'Error writing to mediainfo (audiostream_count) stdout - file ' * english + 'Mediainfon (audiostreamien lukumäärän selvitys) stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error writing to mediainfo  (audiostream_count) stdout - file ' * english + 'Mediainfon (audiostreamien lukumäärän selvitys) stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-			
-		# Open the file we used as stdout for the external program and read in what the external program wrote to it.
-		try:
-			with open(stdout_for_external_command, 'rb') as stdout_commandfile_handler:
-				mediainfo_output = stdout_commandfile_handler.read(None)
-		except IOError as reason_for_error:
-			error_message = 'Error reading from mediainfo (audiostream_count) stdout - file ' * english + 'Mediainfon (audiostreamien lukumäärän selvitys) stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error reading from mediainfo (audiostream_count) stdout - file ' * english + 'Mediainfon (audiostreamien lukumäärän selvitys) stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		
-		# Convert mediainfo output from binary to UTF-8 text.
-		try:
-			mediainfo_output_decoded = mediainfo_output.decode('UTF-8') # Convert mediainfo output from binary to utf-8 text.
-		except UnicodeDecodeError:
-			# If UTF-8 conversion fails, try conversion with another character map.
-			mediainfo_output_decoded = mediainfo_output.decode('ISO-8859-15') # Convert mediainfo output from binary to text.	
+		# Get the number of audio streams in the file. Mediainfo is run only once, all other values are read from the same output.
+		mediainfo_information, error_message = get_file_information_with_mediainfo(file_to_process, english, finnish)
+		mediainfo_output_decoded = mediainfo_information['AudioCount']
 			
 		# Get the audiostream count from mediainfo output.
 		if (mediainfo_output_decoded.strip() != '') and ('-' not in mediainfo_output_decoded):
 			if mediainfo_output_decoded.strip().isnumeric() == True:
 				audiostream_count = int(mediainfo_output_decoded.strip())
 			
-		# Delete the temporary stdout - file.
-		try:
-			os.remove(stdout_for_external_command)
-		except IOError as reason_for_error:
-			error_message = 'Error deleting mediainfo (audiostream_count) stdout - file ' * english + 'Mediainfon (audiostreamien lukumäärän selvitys) stdout - tiedoston deletoiminen epäonnistui ' * finnish  + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error deleting mediainfo (audiostream_count) stdout - file ' * english + 'Mediainfon (audiostreamien lukumäärän selvitys) stdout - tiedoston deletoiminen epäonnistui ' * finnish  + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])	
 
 
 		if audiostream_count == 1:
@@ -4360,58 +6689,14 @@ def get_audiofile_info_with_mediainfo(directory_for_temporary_files, filename, h
 			# Find how many audio channels there are in the file #
 			######################################################
 			
-			try:
-				# Define filename for the temporary file that we are going to use as stdout for the external command.
-				stdout_for_external_command = directory_for_temporary_files + os.sep + filename + '_mediainfo_find_audiofile_info_stdout.txt'
-				# Open the stdout temporary file in binary write mode.
-				with open(stdout_for_external_command, 'wb') as stdout_commandfile_handler:
-			
-					# Get the number of audio channels in the file
-					subprocess.Popen(['mediainfo', '--Inform=Audio;%Channels%', file_to_process], stdout=stdout_commandfile_handler, stderr=stdout_commandfile_handler, stdin=None, close_fds=True).communicate()[0] # Run mediainfo.
-			
-					# Make sure all data written to temporary stdout - file is flushed from the os cache and written to disk.
-					stdout_commandfile_handler.flush() # Flushes written data to os cache
-					os.fsync(stdout_commandfile_handler.fileno()) # Flushes os cache to disk
-					
-			except IOError as reason_for_error:
-				error_message = 'Error writing to mediainfo (channel_count) stdout - file ' * english + 'Mediainfon (kanavamäärä) stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-				send_error_messages_to_screen_logfile_email(error_message, [])
-			except OSError as reason_for_error:
-				error_message = 'Error writing to mediainfo  (channel_count) stdout - file ' * english + 'Mediainfon (kanavamäärä) stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-				send_error_messages_to_screen_logfile_email(error_message, [])
-				
-			# Open the file we used as stdout for the external program and read in what the external program wrote to it.
-			try:
-				with open(stdout_for_external_command, 'rb') as stdout_commandfile_handler:
-					mediainfo_output = stdout_commandfile_handler.read(None)
-			except IOError as reason_for_error:
-				error_message = 'Error reading from mediainfo (channel_count) stdout - file ' * english + 'Mediainfon (kanavamäärä) stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-				send_error_messages_to_screen_logfile_email(error_message, [])
-			except OSError as reason_for_error:
-				error_message = 'Error reading from mediainfo (channel_count) stdout - file ' * english + 'Mediainfon (kanavamäärä) stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-				send_error_messages_to_screen_logfile_email(error_message, [])
-			
-			# Convert mediainfo output from binary to UTF-8 text.
-			try:
-				mediainfo_output_decoded = mediainfo_output.decode('UTF-8') # Convert mediainfo output from binary to utf-8 text.
-			except UnicodeDecodeError:
-				# If UTF-8 conversion fails, try conversion with another character map.
-				mediainfo_output_decoded = mediainfo_output.decode('ISO-8859-15') # Convert mediainfo output from binary to text.	
+			# Get the number of audio channels in the file
+			mediainfo_output_decoded = mediainfo_information['Channels']
 				
 			# Get the channel count from mediainfo output.
 			if (mediainfo_output_decoded.strip() != '') and ('-' not in mediainfo_output_decoded):
 				if mediainfo_output_decoded.strip().isnumeric() == True:
 					channel_count = int(mediainfo_output_decoded.strip())
 				
-			# Delete the temporary stdout - file.
-			try:
-				os.remove(stdout_for_external_command)
-			except IOError as reason_for_error:
-				error_message = 'Error deleting mediainfo (channel_count) stdout - file ' * english + 'Mediainfon (kanavamäärä) stdout - tiedoston deletoiminen epäonnistui ' * finnish  + str(reason_for_error)
-				send_error_messages_to_screen_logfile_email(error_message, [])
-			except OSError as reason_for_error:
-				error_message = 'Error deleting mediainfo (channel_count) stdout - file ' * english + 'Mediainfon (kanavamäärä) stdout - tiedoston deletoiminen epäonnistui ' * finnish  + str(reason_for_error)
-				send_error_messages_to_screen_logfile_email(error_message, [])
 			
 			if channel_count != 0:
 			
@@ -4419,172 +6704,40 @@ def get_audiofile_info_with_mediainfo(directory_for_temporary_files, filename, h
 				# Find out audio bit depth #
 				############################
 				
-				try:
-					# Define filename for the temporary file that we are going to use as stdout for the external command.
-					stdout_for_external_command = directory_for_temporary_files + os.sep + filename + '_mediainfo_find_audiofile_info_stdout.txt'
-					# Open the stdout temporary file in binary write mode.
-					with open(stdout_for_external_command, 'wb') as stdout_commandfile_handler:
-				
-						# Get the bit depth of the audio file
-						subprocess.Popen(['mediainfo', '--Inform=Audio;%BitDepth%', file_to_process], stdout=stdout_commandfile_handler, stderr=stdout_commandfile_handler, stdin=None, close_fds=True).communicate()[0] # Run mediainfo.
-				
-						# Make sure all data written to temporary stdout - file is flushed from the os cache and written to disk.
-						stdout_commandfile_handler.flush() # Flushes written data to os cache
-						os.fsync(stdout_commandfile_handler.fileno()) # Flushes os cache to disk
-						
-				except IOError as reason_for_error:
-					error_message = 'Error writing to mediainfo (bit_depth) stdout - file ' * english + 'Mediainfon (bittisyvyys) stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-					send_error_messages_to_screen_logfile_email(error_message, [])
-				except OSError as reason_for_error:
-					error_message = 'Error writing to mediainfo  (bit_depth) stdout - file ' * english + 'Mediainfon (bittisyvyys) stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-					send_error_messages_to_screen_logfile_email(error_message, [])
-					
-				# Open the file we used as stdout for the external program and read in what the external program wrote to it.
-				try:
-					with open(stdout_for_external_command, 'rb') as stdout_commandfile_handler:
-						mediainfo_output = stdout_commandfile_handler.read(None)
-				except IOError as reason_for_error:
-					error_message = 'Error reading from mediainfo (bit_depth) stdout - file ' * english + 'Mediainfon (bittisyvyys) stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-					send_error_messages_to_screen_logfile_email(error_message, [])
-				except OSError as reason_for_error:
-					error_message = 'Error reading from mediainfo (bit_depth) stdout - file ' * english + 'Mediainfon (bittisyvyys) stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-					send_error_messages_to_screen_logfile_email(error_message, [])
-				
-				# Convert mediainfo output from binary to UTF-8 text.
-				try:
-					mediainfo_output_decoded = mediainfo_output.decode('UTF-8') # Convert mediainfo output from binary to utf-8 text.
-				except UnicodeDecodeError:
-					# If UTF-8 conversion fails, try conversion with another character map.
-					mediainfo_output_decoded = mediainfo_output.decode('ISO-8859-15') # Convert mediainfo output from binary to text.
+				# Get the bit depth of the audio file
+				mediainfo_output_decoded = mediainfo_information['BitDepth']
 					
 				# Get the bit depth from mediainfo output.
 				if (mediainfo_output_decoded.strip() != '') and ('-' not in mediainfo_output_decoded):
 					if mediainfo_output_decoded.strip().isnumeric() == True:
 						bit_depth = int(mediainfo_output_decoded.strip())
 					
-				# Delete the temporary stdout - file.
-				try:
-					os.remove(stdout_for_external_command)
-				except IOError as reason_for_error:
-					error_message = 'Error deleting mediainfo (bit_depth) stdout - file ' * english + 'Mediainfon (bittisyvyys) stdout - tiedoston deletoiminen epäonnistui ' * finnish  + str(reason_for_error)
-					send_error_messages_to_screen_logfile_email(error_message, [])
-				except OSError as reason_for_error:
-					error_message = 'Error deleting mediainfo (bit_depth) stdout - file ' * english + 'Mediainfon (bittisyvyys) stdout - tiedoston deletoiminen epäonnistui ' * finnish  + str(reason_for_error)
-					send_error_messages_to_screen_logfile_email(error_message, [])
 				
 				##########################
 				# Find out sample format #
 				##########################
 				
-				try:
-					# Define filename for the temporary file that we are going to use as stdout for the external command.
-					stdout_for_external_command = directory_for_temporary_files + os.sep + filename + '_mediainfo_find_audiofile_info_stdout.txt'
-					# Open the stdout temporary file in binary write mode.
-					with open(stdout_for_external_command, 'wb') as stdout_commandfile_handler:
-				
-						# Get the sample format of the audio file
-						subprocess.Popen(['mediainfo', '--Inform=Audio;%Format%', file_to_process], stdout=stdout_commandfile_handler, stderr=stdout_commandfile_handler, stdin=None, close_fds=True).communicate()[0] # Run mediainfo.
-				
-						# Make sure all data written to temporary stdout - file is flushed from the os cache and written to disk.
-						stdout_commandfile_handler.flush() # Flushes written data to os cache
-						os.fsync(stdout_commandfile_handler.fileno()) # Flushes os cache to disk
-						
-				except IOError as reason_for_error:
-					error_message = 'Error writing to mediainfo (sample_format) stdout - file ' * english + 'Mediainfon (sample formaatti) stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-					send_error_messages_to_screen_logfile_email(error_message, [])
-				except OSError as reason_for_error:
-					error_message = 'Error writing to mediainfo  (sample_format) stdout - file ' * english + 'Mediainfon (sample formaatti) stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-					send_error_messages_to_screen_logfile_email(error_message, [])
-					
-				# Open the file we used as stdout for the external program and read in what the external program wrote to it.
-				try:
-					with open(stdout_for_external_command, 'rb') as stdout_commandfile_handler:
-						mediainfo_output = stdout_commandfile_handler.read(None)
-				except IOError as reason_for_error:
-					error_message = 'Error reading from mediainfo (sample_format) stdout - file ' * english + 'Mediainfon (sample formaatti) stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-					send_error_messages_to_screen_logfile_email(error_message, [])
-				except OSError as reason_for_error:
-					error_message = 'Error reading from mediainfo (sample_format) stdout - file ' * english + 'Mediainfon (sample formaatti) stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-					send_error_messages_to_screen_logfile_email(error_message, [])
-				
-				# Convert mediainfo output from binary to UTF-8 text.
-				try:
-					mediainfo_output_decoded = mediainfo_output.decode('UTF-8') # Convert mediainfo output from binary to utf-8 text.
-				except UnicodeDecodeError:
-					# If UTF-8 conversion fails, try conversion with another character map.
-					mediainfo_output_decoded = mediainfo_output.decode('ISO-8859-15') # Convert mediainfo output from binary to text.	
+				# Get the sample format of the audio file
+				mediainfo_output_decoded = mediainfo_information['AudioFormat']
 					
 				# Get the sample format from mediainfo output.
 				if (mediainfo_output_decoded.strip() != '') and ('-' not in mediainfo_output_decoded):
 					sample_format = mediainfo_output_decoded.strip().lower()
 					
-				# Delete the temporary stdout - file.
-				try:
-					os.remove(stdout_for_external_command)
-				except IOError as reason_for_error:
-					error_message = 'Error deleting mediainfo (sample_format) stdout - file ' * english + 'Mediainfon (sample formaatti) stdout - tiedoston deletoiminen epäonnistui ' * finnish  + str(reason_for_error)
-					send_error_messages_to_screen_logfile_email(error_message, [])
-				except OSError as reason_for_error:
-					error_message = 'Error deleting mediainfo (sample_format) stdout - file ' * english + 'Mediainfon (sample formaatti) stdout - tiedoston deletoiminen epäonnistui ' * finnish  + str(reason_for_error)
-					send_error_messages_to_screen_logfile_email(error_message, [])
 				
 				#######################
 				# Find audio duration #
 				#######################
 				
-				try:
-					# Define filename for the temporary file that we are going to use as stdout for the external command.
-					stdout_for_external_command = directory_for_temporary_files + os.sep + filename + '_mediainfo_find_audiofile_info_stdout.txt'
-					# Open the stdout temporary file in binary write mode.
-					with open(stdout_for_external_command, 'wb') as stdout_commandfile_handler:
-				
-						# Get the audio duration of the file
-						subprocess.Popen(['mediainfo', '--Inform=General;%Duration/String3%', file_to_process], stdout=stdout_commandfile_handler, stderr=stdout_commandfile_handler, stdin=None, close_fds=True).communicate()[0] # Run mediainfo.
-				
-						# Make sure all data written to temporary stdout - file is flushed from the os cache and written to disk.
-						stdout_commandfile_handler.flush() # Flushes written data to os cache
-						os.fsync(stdout_commandfile_handler.fileno()) # Flushes os cache to disk
-						
-				except IOError as reason_for_error:
-					error_message = 'Error writing to mediainfo (audio duration) stdout - file ' * english + 'Mediainfon (audion kesto) stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-					send_error_messages_to_screen_logfile_email(error_message, [])
-				except OSError as reason_for_error:
-					error_message = 'Error writing to mediainfo (audio duration) stdout - file ' * english + 'Mediainfon (audion kesto) stdout - tiedostoon kirjoittaminen epäonnistui ' * finnish + str(reason_for_error)
-					send_error_messages_to_screen_logfile_email(error_message, [])
-					
-				# Open the file we used as stdout for the external program and read in what the external program wrote to it.
-				try:
-					with open(stdout_for_external_command, 'rb') as stdout_commandfile_handler:
-						mediainfo_output = stdout_commandfile_handler.read(None)
-				except IOError as reason_for_error:
-					error_message = 'Error reading from mediainfo (audio duration) stdout - file ' * english + 'Mediainfon (audion kesto) stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-					send_error_messages_to_screen_logfile_email(error_message, [])
-				except OSError as reason_for_error:
-					error_message = 'Error reading from mediainfo (audio duration) stdout - file ' * english + 'Mediainfon (audion kesto) stdout - tiedoston lukeminen epäonnistui ' * finnish + str(reason_for_error)
-					send_error_messages_to_screen_logfile_email(error_message, [])
-				
-				# Convert mediainfo output from binary to UTF-8 text.
-				try:
-					mediainfo_output_decoded = mediainfo_output.decode('UTF-8') # Convert mediainfo output from binary to utf-8 text.
-				except UnicodeDecodeError:
-					# If UTF-8 conversion fails, try conversion with another character map.
-					mediainfo_output_decoded = mediainfo_output.decode('ISO-8859-15') # Convert mediainfo output from binary to text.
+				# Get the audio duration of the file
+				mediainfo_output_decoded = mediainfo_information['Duration/String3']
 				
 				# Get the file duration as a string and also calculate it in seconds.
 				if (mediainfo_output_decoded.strip() != '') and ('-' not in mediainfo_output_decoded):
 					audio_duration_string, audio_duration_fractions_string = mediainfo_output_decoded.split('.') # Split the time string to two variables, the last will hold the fractions part (0 - 999 hundreds of a second).
 					audio_duration_list = audio_duration_string.split(':') # Separate each element in the time string (hours, minutes, seconds) and put them in a list.
 					audio_duration_rounded_to_seconds = (int(audio_duration_list[0]) * 60 * 60) + (int(audio_duration_list[1]) * 60) + int(audio_duration_list[2]) # Calculate audio duration in seconds.
-				
-				# Delete the temporary stdout - file.
-				try:
-					os.remove(stdout_for_external_command)
-				except IOError as reason_for_error:
-					error_message = 'Error deleting mediainfo (audio duration) stdout - file ' * english + 'Mediainfon (audion kesto) stdout - tiedoston deletoiminen epäonnistui ' * finnish  + str(reason_for_error)
-					send_error_messages_to_screen_logfile_email(error_message, [])
-				except OSError as reason_for_error:
-					error_message = 'Error deleting mediainfo (audio duration) stdout - file ' * english + 'Mediainfon (audion kesto) stdout - tiedoston deletoiminen epäonnistui ' * finnish  + str(reason_for_error)
-					send_error_messages_to_screen_logfile_email(error_message, [])
+				
 
 		###################################################################
 		# Decide if the file is one of the natively supported formats	  #
@@ -4871,78 +7024,750 @@ def signal_handler_routine(signal_number, stack_frame):
 		subroutine_name = 'signal_handler_routine'
 		catch_python_interpreter_errors(error_message_as_a_list, subroutine_name)
 
-def check_samba_file_locks(filename):
+def get_paths_of_files_locked_by_samba():
+
+	"""Runs smbstatus once and returns a set of the full paths of files Samba has locked."""
+
+	# This subroutine works like this:
+	# ---------------------------------
+	# The main loop calls this once per HotFolder poll when there are files whose transfer seems to be ready, the same set of locked files is used for all of them.
+	# Samba 4.16 and newer can print locked files as json (smbstatus -L --json). Each locked file has the share path ('service_path') and the name of the file relative to the share ('filename') as separate values.
+	# If smbstatus does not support json, it is not tried again and the text output of smbstatus -L is parsed. It prints a line for each locked file:
+	# 'Pid  User(ID)  DenyMode  Access  R/W  Oplock  SharePath   Name   Time'
+	# Share path, name and time are separated by three spaces, but file names may also have three spaces in them. The line is parsed backwards from the time at the end of the line,
+	# the share path starts at the first '/' on the line. If the text between can be split in more than one place, the split where the share path is an existing directory is used.
+	# The full path of the file is the share path joined with the name. Symbolic links are resolved, so that paths can be compared exactly with paths of files in the HotFolder.
+
+	paths_of_locked_files = set()
+
+	# Time is printed like: 'Sun Oct  4 07:55:39 2026'.
+	locked_file_line_pattern = re.compile('^[0-9]+ .*? (/.*)   [A-Z][a-z]{2} [A-Z][a-z]{2} +[0-9]{1,2} [0-9]{2}:[0-9]{2}:[0-9]{2} [0-9]{4}\\s*$')
+
+	try:
+		global english
+		global finnish
+		global smbstatus_supports_json_output
+
+		if smbstatus_supports_json_output == True:
+			stdout, stderr, error_message = run_external_command(['smbstatus', '-L', '--json'], english, finnish, timeout=timeout_for_file_information_commands)
+
+			try:
+				smbstatus_results = json.loads(stdout.decode('UTF-8', 'replace'))
+
+				for locked_file_details in smbstatus_results['open_files'].values():
+					paths_of_locked_files.add(os.path.realpath(locked_file_details['service_path'] + os.sep + locked_file_details['filename']))
+
+				return(paths_of_locked_files)
+
+			except (ValueError, KeyError, TypeError, AttributeError):
+				smbstatus_supports_json_output = False
+				paths_of_locked_files = set()
+
+		# Run our command.
+		stdout, stderr, error_message = run_external_command(['smbstatus', '-L'], english, finnish, timeout=timeout_for_file_information_commands)
+
+		for line in stdout.decode('UTF-8', 'replace').split('\n'):
+
+			# Lines of locked files start with the process id and end with the time, headers and empty lines do not match.
+			match = locked_file_line_pattern.match(line)
+
+			if match == None:
+				continue
+
+			share_path_and_name = match.group(1)
+			list_of_possible_paths = []
+			position = share_path_and_name.find('   ')
+
+			while position != -1:
+				list_of_possible_paths.append([share_path_and_name[:position], share_path_and_name[position + 3:]])
+				position = share_path_and_name.find('   ', position + 1)
+
+			if len(list_of_possible_paths) == 0:
+				continue
+
+			share_path, locked_file_name = list_of_possible_paths[0]
+
+			for possible_share_path, possible_file_name in list_of_possible_paths:
+				if os.path.isdir(possible_share_path) == True:
+					share_path, locked_file_name = possible_share_path, possible_file_name
+					break
+
+			paths_of_locked_files.add(os.path.realpath(share_path + os.sep + locked_file_name))
+
+	except Exception:
+		exc_type, exc_value, exc_traceback = sys.exc_info()
+		error_message_as_a_list = traceback.format_exception(exc_type, exc_value, exc_traceback)
+		subroutine_name = 'get_paths_of_files_locked_by_samba'
+		catch_python_interpreter_errors(error_message_as_a_list, subroutine_name)
+
+	return(paths_of_locked_files)
+
+def get_filesystem_type_of_directory(directory_path):
+
+	"""Returns the type of the filesystem the directory is on (for example 'ext4' or 'cifs'). If the type can not be found an empty string is returned."""
+
+	# Find the filesystem type of the directory from the list of mounted filesystems. The longest mount point that the directory path starts with is the mount the directory is on.
+	real_directory_path = os.path.realpath(directory_path)
+	longest_mount_point = ''
+	filesystem_type = ''
+
+	try:
+		with open('/proc/mounts', 'r') as mounts_file_handler:
+			for line in mounts_file_handler:
+				mount_information = line.split()
+
+				if len(mount_information) < 3:
+					continue
+
+				mount_point = mount_information[1].replace('\\040', ' ')
+
+				if ((real_directory_path == mount_point) or (real_directory_path.startswith(mount_point.rstrip(os.sep) + os.sep))) and (len(mount_point) >= len(longest_mount_point)):
+					longest_mount_point = mount_point
+					filesystem_type = mount_information[2]
+	except IOError:
+		filesystem_type = ''
+	except OSError:
+		filesystem_type = ''
+
+	return(filesystem_type)
+
+def get_stability_window_of_a_growing_file(filename):
+
+	"""Returns the number of seconds the size and modification time of a file in the HotFolder must stay unchanged before the file transfer is considered ready."""
+
+	# Inotify has reported the file closed after writing or moved to the HotFolder, the writer is done with it.
+	if filename in growing_files_closed_after_writing:
+		return(0)
+
+	# Network clients may pause writing in the middle of a transfer, wait longer for them.
+	if (hotfolder_is_on_a_network_filesystem == True) or (filename in growing_files_written_through_samba):
+		return(file_stability_window_for_network_files)
+
+	return(file_stability_window_for_local_files)
+
+def create_inotify_watch_for_directory(directory_path, english, finnish):
+
+	"""Creates a Linux inotify watch for a directory and returns the inotify file descriptor. If inotify can not be used -1 is returned."""
+
+	# Inotify events we are interested in. The values come from the Linux header file sys/inotify.h.
+	IN_CLOSE_WRITE = 0x00000008
+	IN_MOVED_FROM = 0x00000040
+	IN_MOVED_TO = 0x00000080
+	IN_CREATE = 0x00000100
+	IN_DELETE = 0x00000200
+
+	inotify_file_descriptor = -1
+	error_message = ''
+
+	try:
+		filesystem_type = get_filesystem_type_of_directory(directory_path)
+
+		if filesystem_type in network_filesystem_types:
+			error_message = 'HotFolder is on a network filesystem ' * english + 'HotFolder on verkkolevyllä ' * finnish + '(' + filesystem_type + ')' + ', inotify can not be used, HotFolder is polled for new files.' * english + ', inotify:ta ei voi käyttää, HotFolderia luetaan säännöllisesti.' * finnish
+			send_error_messages_to_screen_logfile_email(error_message, [])
+			return(inotify_file_descriptor)
+
+		libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+		inotify_file_descriptor = libc.inotify_init()
+
+		if inotify_file_descriptor < 0:
+			error_message = 'Inotify can not be initialized, HotFolder is polled for new files: ' * english + 'Inotify:n käynnistäminen epäonnistui, HotFolderia luetaan säännöllisesti: ' * finnish + os.strerror(ctypes.get_errno())
+			send_error_messages_to_screen_logfile_email(error_message, [])
+			return(-1)
+
+		watch_descriptor = libc.inotify_add_watch(inotify_file_descriptor, os.fsencode(directory_path), IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE)
+
+		if watch_descriptor < 0:
+			error_message = 'Inotify can not watch HotFolder, HotFolder is polled for new files: ' * english + 'Inotify ei pysty valvomaan HotFolderia, HotFolderia luetaan säännöllisesti: ' * finnish + os.strerror(ctypes.get_errno())
+			send_error_messages_to_screen_logfile_email(error_message, [])
+			os.close(inotify_file_descriptor)
+			return(-1)
+
+	except AttributeError:
+		# The C - library does not have inotify functions, we are not running on Linux.
+		error_message = 'Inotify is not available, HotFolder is polled for new files.' * english + 'Inotify ei ole käytettävissä, HotFolderia luetaan säännöllisesti.' * finnish
+		send_error_messages_to_screen_logfile_email(error_message, [])
+		inotify_file_descriptor = -1
+	except IOError as reason_for_error:
+		error_message = 'Error setting up inotify for HotFolder, HotFolder is polled for new files: ' * english + 'Inotify:n käynnistäminen HotFolderille epäonnistui, HotFolderia luetaan säännöllisesti: ' * finnish + str(reason_for_error)
+		send_error_messages_to_screen_logfile_email(error_message, [])
+		inotify_file_descriptor = -1
+	except OSError as reason_for_error:
+		error_message = 'Error setting up inotify for HotFolder, HotFolder is polled for new files: ' * english + 'Inotify:n käynnistäminen HotFolderille epäonnistui, HotFolderia luetaan säännöllisesti: ' * finnish + str(reason_for_error)
+		send_error_messages_to_screen_logfile_email(error_message, [])
+		inotify_file_descriptor = -1
+
+	return(inotify_file_descriptor)
+
+def watch_hotfolder_with_inotify_thread():
+
+	"""Reads inotify events for the HotFolder and wakes up the main thread when files are written, moved or deleted in the HotFolder."""
+
+	# This subroutine is started in its own thread.
+	# Names of files that have been closed after writing or moved to the HotFolder are added to the set 'files_reported_ready_by_inotify', these files don't need to be watched for growing for several HotFolder polls.
+	# Every time inotify reports a change, a message is put to 'main_loop_wake_up_queue'. The main thread waits for messages in this queue, so it reads the HotFolder immediately after a change.
+	# If the kernel event queue overflows, events have been lost. The main thread is asked to read the whole HotFolder again, files whose events were lost are found by polling and wait for their stability window.
+	# If inotify events can not be read, the error is reported once, the inotify file descriptor is closed and set to -1 and the thread exits. The main thread then goes back to polling the HotFolder every 'delay_between_directory_reads' seconds.
+
+	try:
+		global quit_all_threads_now
+		global files_reported_ready_by_inotify
+		global main_loop_wake_up_queue
+		global inotify_file_descriptor
+		global english
+		global finnish
+
+		# Inotify event masks. The values come from the Linux header file sys/inotify.h.
+		IN_CLOSE_WRITE = 0x00000008
+		IN_MOVED_TO = 0x00000080
+		IN_Q_OVERFLOW = 0x00004000
+		IN_ISDIR = 0x40000000
+		inotify_event_header_size = 16 # Every event starts with: int wd, uint32 mask, uint32 cookie, uint32 len. The filename follows the header.
+
+		while True:
+
+			# Check if the main routine asks us to exit now. This is used when running regression tests.
+			if quit_all_threads_now == True:
+				return()
+
+			try:
+				# Wait for inotify events for one second at a time, so that we can check if we need to exit.
+				readable_file_descriptors = select.select([inotify_file_descriptor], [], [], 1)[0]
+
+				if len(readable_file_descriptors) == 0:
+					continue
+
+				inotify_events = os.read(inotify_file_descriptor, 65536)
+
+			except IOError as reason_for_error:
+				inotify_read_error_message = str(reason_for_error)
+			except OSError as reason_for_error:
+				inotify_read_error_message = str(reason_for_error)
+			else:
+				inotify_read_error_message = ''
+
+			# Stop using inotify. The main thread polls the HotFolder again every 'delay_between_directory_reads' seconds when the file descriptor is -1.
+			if inotify_read_error_message != '':
+				error_message = 'Error reading inotify events for HotFolder, HotFolder is polled for new files: ' * english + 'Inotify tapahtumien lukeminen HotFolderille epäonnistui, HotFolderia luetaan säännöllisesti: ' * finnish + inotify_read_error_message
+				send_error_messages_to_screen_logfile_email(error_message, [])
+				file_descriptor_to_close = inotify_file_descriptor
+				inotify_file_descriptor = -1
+
+				try:
+					os.close(file_descriptor_to_close)
+				except OSError:
+					pass
+
+				main_loop_wake_up_queue.put('hotfolder_changed')
+				return()
+
+			position = 0
+			inotify_queue_overflowed = False
+
+			while position + inotify_event_header_size <= len(inotify_events):
+				watch_descriptor, event_mask, cookie, filename_length = struct.unpack('iIII', inotify_events[position:position + inotify_event_header_size])
+				filename = os.fsdecode(inotify_events[position + inotify_event_header_size:position + inotify_event_header_size + filename_length].rstrip(b'\0'))
+				position = position + inotify_event_header_size + filename_length
+
+				if (event_mask & (IN_CLOSE_WRITE | IN_MOVED_TO) != 0) and (event_mask & IN_ISDIR == 0) and (filename != ''):
+					files_reported_ready_by_inotify.add(filename)
+
+				if event_mask & IN_Q_OVERFLOW != 0:
+					inotify_queue_overflowed = True
+
+			# Events have been lost, the whole HotFolder must be read again. Every poll reads the whole HotFolder, so waking up the main thread is enough.
+			if inotify_queue_overflowed == True:
+				error_message = 'Inotify event queue overflowed, HotFolder is read again' * english + 'Inotify tapahtumajono täyttyi, HotFolder luetaan uudelleen' * finnish
+				send_error_messages_to_screen_logfile_email(error_message, [])
+
+			# Wake up the main thread.
+			main_loop_wake_up_queue.put('hotfolder_changed')
+
+	except Exception:
+		exc_type, exc_value, exc_traceback = sys.exc_info()
+		error_message_as_a_list = traceback.format_exception(exc_type, exc_value, exc_traceback)
+		subroutine_name = 'watch_hotfolder_with_inotify_thread'
+		catch_python_interpreter_errors(error_message_as_a_list, subroutine_name)
+
+def estimate_processing_cost_of_a_file(file_format_support_information):
+
+	"""Estimates the processor cores, memory and temporary disk space needed to process a file."""
+
+	# This subroutine works like this:
+	# ---------------------------------
+	# The duration, channel count, sample rate and bit depth of audio streams come from the information FFmpeg reported about the file.
+	# The size of audio as uncompressed pcm is the base of the temporary disk space estimate:
+	# - Files that need to be decoded with FFmpeg have all their audio streams written to the temporary directory, unless the streams are only measured from pipes.
+	# - Loudness corrected files are written to the temporary directory before they are moved to the target directory.
+	# Memory is mostly needed by the programs that measure and process the audio. NumPy measurement keeps 10 seconds of audio of all channels in memory in several 64 bit float arrays.
+	# If FFmpeg has not reported details of audio streams (FFmpeg is not installed), a 48 kHz 24 bit stereo file is assumed.
+
+	global processor_cores_used_by_one_file
+	global number_of_processor_cores
+	global create_loudness_corrected_files
+	global create_loudness_history_graphics_files
+	global draw_loudness_graphics_in_process
+	global use_numpy_for_loudness_measurement
+
+	memory_needed_by_one_job = 67108864 # 64 MB for Python data structures and the external programs processing the file.
+	processing_cost = [processor_cores_used_by_one_file, memory_needed_by_one_job, 0] # Processor cores, memory in bytes, temporary disk space in bytes.
+
+	try:
+		natively_supported_file_format, ffmpeg_supported_fileformat, number_of_ffmpeg_supported_audiostreams, details_of_ffmpeg_supported_audiostreams, time_slice_duration_string, audio_duration_rounded_to_seconds, ffmpeg_commandline, target_filenames, mxf_audio_remixing, filenames_and_channel_counts_for_mxf_audio_remixing, audio_remix_channel_map, number_of_unsupported_streams_in_file = file_format_support_information
+
+		list_of_channel_counts_sample_rates_and_bit_depths = []
+
+		for audio_stream_details in details_of_ffmpeg_supported_audiostreams:
+			channel_count = 2
+			sample_rate = 48000
+			bit_depth = 24
+
+			if str(audio_stream_details[2]).isnumeric() == True:
+				channel_count = int(audio_stream_details[2])
+			if str(audio_stream_details[5]).isnumeric() == True:
+				sample_rate = int(audio_stream_details[5])
+			if (str(audio_stream_details[6]).isnumeric() == True) and (int(audio_stream_details[6]) > 0):
+				bit_depth = int(audio_stream_details[6])
+
+			list_of_channel_counts_sample_rates_and_bit_depths.append([channel_count, sample_rate, bit_depth])
+
+		if list_of_channel_counts_sample_rates_and_bit_depths == []:
+			list_of_channel_counts_sample_rates_and_bit_depths.append([2, 48000, 24])
+
+		size_of_audio_as_pcm = 0
+		size_of_numpy_measurement_buffers = 0
+
+		for channel_count, sample_rate, bit_depth in list_of_channel_counts_sample_rates_and_bit_depths:
+			size_of_audio_as_pcm = size_of_audio_as_pcm + (audio_duration_rounded_to_seconds * sample_rate * channel_count * int((bit_depth + 7) / 8))
+			size_of_numpy_measurement_buffers = max(size_of_numpy_measurement_buffers, 10 * sample_rate * channel_count * 8 * 4)
+
+		if (number_of_ffmpeg_supported_audiostreams == 1) and (natively_supported_file_format == True):
+			# The file is measured and corrected.
+			if use_numpy_for_loudness_measurement == True:
+				processing_cost[1] = processing_cost[1] + size_of_numpy_measurement_buffers
+			if create_loudness_corrected_files == True:
+				processing_cost[2] = size_of_audio_as_pcm
+			# Gnuplot plots the graphics file at the same time as the loudness corrected file is created, this uses one more processor core.
+			if (create_loudness_corrected_files == True) and (create_loudness_history_graphics_files == True) and (draw_loudness_graphics_in_process == False):
+				processing_cost[0] = processing_cost[0] + 1
+		else:
+			# Audio streams are extracted from the file with FFmpeg, this uses one processor core.
+			# Streams that are only measured from pipes are not written to the temporary directory.
+			processing_cost[0] = 1
+			processing_cost[2] = size_of_audio_as_pcm
+
+			# After extraction mxf audio is remixed with one sox process for each mix, run_file_processing_in_parallel_threads runs at most as many sox processes at the same time as there are processor cores.
+			if (mxf_audio_remixing == True) and (len(audio_remix_channel_map) > 0):
+				processing_cost[0] = max(1, min(len(audio_remix_channel_map), number_of_processor_cores))
+
+			if audio_streams_can_be_measured_without_writing_files(file_format_support_information) == True:
+				processing_cost[1] = processing_cost[1] + (size_of_numpy_measurement_buffers * len(list_of_channel_counts_sample_rates_and_bit_depths))
+				processing_cost[2] = 0
+
+	except Exception:
+		exc_type, exc_value, exc_traceback = sys.exc_info()
+		error_message_as_a_list = traceback.format_exception(exc_type, exc_value, exc_traceback)
+		subroutine_name = 'estimate_processing_cost_of_a_file'
+		catch_python_interpreter_errors(error_message_as_a_list, subroutine_name)
+
+	return(processing_cost)
+
+def processing_cost_fits_in_the_budget(processing_cost, processing_costs_of_running_jobs_dict):
+
+	"""Returns True if processor cores, memory and temporary disk space left free by files being processed is enough for processing a new file."""
+
+	global number_of_processor_cores
+	global memory_budget_for_file_processing
+	global temporary_disk_space_budget_for_file_processing
+
+	# Always start processing a file when no other files are being processed, otherwise a file bigger than the budget would never be processed.
+	if len(processing_costs_of_running_jobs_dict) == 0:
+		return(True)
+
+	processor_cores_in_use = 0
+	memory_in_use = 0
+	temporary_disk_space_in_use = 0
+
+	for filename in processing_costs_of_running_jobs_dict:
+		processor_cores_in_use = processor_cores_in_use + processing_costs_of_running_jobs_dict[filename][0]
+		memory_in_use = memory_in_use + processing_costs_of_running_jobs_dict[filename][1]
+		temporary_disk_space_in_use = temporary_disk_space_in_use + processing_costs_of_running_jobs_dict[filename][2]
+
+	if processor_cores_in_use + processing_cost[0] > number_of_processor_cores:
+		return(False)
+
+	if (memory_budget_for_file_processing > 0) and (memory_in_use + processing_cost[1] > memory_budget_for_file_processing):
+		return(False)
+
+	if (temporary_disk_space_budget_for_file_processing > 0) and (temporary_disk_space_in_use + processing_cost[2] > temporary_disk_space_budget_for_file_processing):
+		return(False)
+
+	return(True)
+
+def read_directory_entries_with_scandir(directory):
+
+	"""Returns a dictionary of the files in a directory. Keys are file names and values are the os.DirEntry objects of the files, subdirectories are left out."""
+
+	# os.scandir gets the type of each entry with the directory listing, so no file information needs to be read to separate files from directories.
+	# DirEntry objects cache the file information when it is read, so it is read from the filesystem at most once for each poll. On a network share every read is a round-trip to the server.
+	directory_entries = {}
+
+	with os.scandir(directory) as directory_iterator:
+		for directory_entry in directory_iterator:
+			if directory_entry.is_dir() == False:
+				directory_entries[directory_entry.name] = directory_entry
+
+	return(directory_entries)
+
+def read_hotfolder_and_update_file_bookkeeping():
+
+	"""Reads the HotFolder, removes vanished files from the bookkeeping, queues expired files for deletion and saves information of the files still needing attention to 'new_hotfolder_filelist_dict'."""
+
+	# This is the part of the HotFolder poll that goes through every file in the HotFolder, so its duration grows with the number of files.
+	# It is a separate function so that Debugging_Tools_For_Developer/hotfolder_poll_benchmark.py can measure the same code the main loop runs.
+	global hotfolder_directory_entries
+	global list_of_files
+	global set_of_files_in_hotfolder
+
+	try:
+		# Get directory listing for HotFolder. Directory entries are kept, so that file information is read only for files that need it.
+		hotfolder_directory_entries = read_directory_entries_with_scandir(hotfolder_path)
+		list_of_files = list(hotfolder_directory_entries)
+		set_of_files_in_hotfolder = set(hotfolder_directory_entries)
+	except KeyboardInterrupt:
+		if silent == False:
+			print('\n\nUser cancelled operation.\n' * english + '\n\nKäyttäjä pysäytti ohjelman.\n' * finnish)
+		sys.exit(0)
+	except IOError as reason_for_error:
+		error_message = 'Error reading HotFolder directory listing ' * english + 'Lähdehakemistopuun lukeminen epäonnistui ' * finnish + str(reason_for_error)
+		send_error_messages_to_screen_logfile_email(error_message, [])
+	except OSError as reason_for_error:
+		error_message = 'Error reading HotFolder directory listing ' * english + 'Lähdehakemistopuun lukeminen epäonnistui ' * finnish + str(reason_for_error)
+		send_error_messages_to_screen_logfile_email(error_message, [])
+		
+	# The files in 'unsupported_ignored_files_dict' are files that ffmpeg was not able to find any audiostreams from, or streams were found but the duration is less than 1 second or file transfer ended prematurely.
+	# Check if files in the unsupported files dictionary have vanished from the HotFolder. If a name has disappeared from HotFolder, remove it also from the list of unsupported files.
+	# Check if files in the unsupported files dictionary have been there longer than the expiry time allows, queue expired files for deletion.
+
+	unsupported_ignored_files_list = list(unsupported_ignored_files_dict) # Copy filesnames from dictionary to a list to use as for - loop iterable, since we can't use the dictionary directly because we are going to delete values from it. The for loop - iterable is forbidden to change.
+
+	for filename in unsupported_ignored_files_list:
+		if not filename in set_of_files_in_hotfolder:
+			unsupported_ignored_files_dict.pop(filename) # If unsupported file that previously was in HotFolder has vanished, remove its name from the unsupported files list.
+			continue
+		if int(time.time()) - unsupported_ignored_files_dict[filename] >= file_expiry_time: # If file has expired then queue it for deletion.
+			files_queued_for_deletion.add(filename)
+
+	# If user has deleted a file that did already make it to the 'list_of_growing_files' remove it from list.
+	filenames_to_remove = []
+
+	for filename in list_of_growing_files:
+		if not filename in set_of_files_in_hotfolder:
+			filenames_to_remove.append(filename)
+	for filename in filenames_to_remove:
+		del list_of_growing_files[filename] # If file that previously was in HotFolder has vanished, remove its name from the list_of_growing_files.
+
+	# Information of extracted audio streams that have vanished from the HotFolder before they were probed is not needed.
+	for filename in list(file_format_support_information_of_extracted_audio_streams_dict):
+		if filename not in set_of_files_in_hotfolder:
+			del file_format_support_information_of_extracted_audio_streams_dict[filename]
+
+	# If user has deleted a file that did already make it to the 'debug_temporary_dict_for_all_file_processing_information' remove it from list.
+	filenames_to_remove = []
+
+	for filename in debug_temporary_dict_for_all_file_processing_information:
+		if not filename in set_of_files_in_hotfolder:
+			filenames_to_remove.append(filename)
+	for filename in filenames_to_remove:
+		del debug_temporary_dict_for_all_file_processing_information[filename] # If file that previously was in HotFolder has vanished, remove its name from the dictionary used to collect debug data.
+
+	filenames_to_remove = []
+
+	# Process filenames found in the directory
+	try:
+		for filename in list_of_files:
+
+			if (filename.startswith('.')) and (not filename.startswith('.nfs')): # If filename starts with an '.' queue the file for deletion and continue to process next filename. Don't try to delete files that start with .nfs since these might be false files that actually are caused by a file deleted on a nfs mount. Ilmeisesti meidän BackupSysteemi tekee tiedostojärjestelmän varmuuskopiot nfs - mountin yli ja siksi näitä tiedostoja välillä ilmestyy HotFolderiin. Lisätietoa: https://stackoverflow.com/questions/8192605/how-delete-nfs-in-linux
+				files_queued_for_deletion.add(filename)
+				continue
+
+			# Don't try to find audio in mxf - remix map files that are text files.
+			if os.path.splitext(filename)[1] == remix_map_file_extension:
+				if filename not in unsupported_ignored_files_dict:
+					unsupported_ignored_files_dict[filename] = int(time.time())
+					continue
+
+
+			# Files seen in an earlier poll that are not growing or waiting in the queue will not be processed again, so their size and modification time are not needed.
+			# File information is not read for them, the information from the previous poll is used instead.
+			if (filename in old_hotfolder_filelist_dict) and (filename not in list_of_growing_files) and (filename not in files_queued_to_loudness_calculation):
+				file_information_to_save = old_hotfolder_filelist_dict[filename][0:3]
+			else:
+				file_metadata = hotfolder_directory_entries[filename].stat(follow_symlinks=False) # Get file information (size, date, etc)
+				file_information_to_save=[file_metadata.st_size, int(time.time()), file_metadata.st_mtime] # Put in a list: file size, time the file was first seen in HotFolder and file modification time.
+
+			##########################################################################################################################################
+			# Que expired files in HotFolder for deletion. Make sure no other thread is currently processing the files before queueing for deletion. #
+			##########################################################################################################################################
+			# Test if the time between now and the time the file was first seen in HotFolder is longer that expiry time, if true queue file for deletion.
+			if (filename in old_hotfolder_filelist_dict) and (int(time.time()) - old_hotfolder_filelist_dict[filename][1] > file_expiry_time) and (filename not in list_of_growing_files) and (filename not in loudness_calculation_queue) and (filename not in files_queued_to_loudness_calculation):
+				files_queued_for_deletion.add(filename)
+				
+			#################################################################################
+			# Add files we need to study further to a dictionary with some file information #
+			#################################################################################
+			# Add information about a file to dictionary.
+			# This statement also guarantees that files put in deletion queue by subprocess 'decompress_audio_streams_with_ffmpeg' running in separate thread, are not processed here further. That would sometimes cause files being used by one thread to be deleted by the other.
+			if (filename not in files_queued_for_deletion) and (filename not in unsupported_ignored_files_dict):
+
+				# Save information about new files into a dictionary: filename, file size, time file was first seen in HotFolder.
+				if not filename in old_hotfolder_filelist_dict:
+					# The file has just appeared to the HotFolder and it has not been analyzed yet.
+					# However some dummy data for the file needs to be filled, so we create that data here.
+					# This dummy data is replaced with real data when the file stops growing and gets analyzed.
+					dummy_information = [False, False, 0, [], '3', 0, [], [], False, [], [], 0] # This dummy information will be replaced by info from FFmpeg later.
+					file_information_to_save.append(dummy_information)
+
+					# Append time the file size or timestamp was last updated.
+					# As this is the first time we have seen the file, we don't have this information yet, we need to use some sane dummy value.
+					# So just use the current time, which is the time the file was first seen in HotFolder, as the last update time.
+					# The time is stored with fractions of a second, because the stability window of a file may be only one second long.
+					file_information_to_save.append(time.time())
+
+				# Data in 'file_information_to_save' is at this point (with item numbers):
+				#
+				# 0 = file size
+				# 1 = time file was first seen in HotFolder
+				# 2 = file modification time
+				# 3 = [False, False, 0, [], '3', 0, [], [], False, [], [], 0] # This is dummy information that will later be replaced by data from FFmpeg. See comment below for item identification.
+				# 4 = Time the file size or timestamp was last updated (with fractions of a second). At this point this is the time the file was first seen in HotFolder.
+				#
+				# The item 3 above is a list of dummy information that later will be replaced by real file information reported by FFmpeg.
+				# The data that FFmpeg fills later in this list is (with item numbers):
+				# ---------------------------------------------------------------------------------------------------------------
+				#
+				# 00 = natively_supported_file_format
+				# 01 = ffmpeg_supported_fileformat
+				# 02 = number_of_ffmpeg_supported_audiostreams
+				# 03 = details_of_ffmpeg_supported_audiostreams
+				# 04 = time_slice_duration_string
+				# 05 = audio_duration_rounded_to_seconds
+				# 06 = ffmpeg_commandline
+				# 07 = target_filenames
+				# 08 = mxf_audio_remixing
+				# 09 = filenames_and_channel_counts_for_mxf_audio_remixing
+				# 10 = audio_remix_channel_map
+				# 11 = number_of_unsupported_streams_in_file
+				#
+				new_hotfolder_filelist_dict[filename] = file_information_to_save
+
+
+	except KeyboardInterrupt:
+		if silent == False:
+			print('\n\nUser cancelled operation.\n' * english + '\n\nKäyttäjä pysäytti ohjelman.\n' * finnish)
+		sys.exit(0)
+	except IOError as reason_for_error:
+		error_message = 'Error reading HotFolder file metadata ' * english + 'Lähdehakemistopussa olevan tiedoston tietojen lukeminen epäonnistui ' * finnish + str(reason_for_error)
+		send_error_messages_to_screen_logfile_email(error_message, [])
+	except OSError as reason_for_error:
+		error_message = 'Error reading HotFolder file metadata ' * english + 'Lähdehakemistopussa olevan tiedoston tietojen lukeminen epäonnistui ' * finnish + str(reason_for_error)
+		send_error_messages_to_screen_logfile_email(error_message, [])
+
+def sort_files_queued_to_loudness_calculation(files_queued_to_loudness_calculation, time_file_was_queued_dict, old_hotfolder_filelist_dict):
+
+	"""Returns the files waiting in the queue as an ordered dictionary sorted in the order defined by 'queue_policy'."""
+
+	global queue_policy
+	global queue_priority_classes
+	global queue_default_priority
+	global queue_aging_time
+
+	sorted_files_queued_to_loudness_calculation = files_queued_to_loudness_calculation
+
+	try:
+		current_time = time.time()
+		list_of_sort_keys_and_filenames = []
+
+		for filename in files_queued_to_loudness_calculation:
+
+			time_file_was_queued = time_file_was_queued_dict.get(filename, current_time)
+			number_of_aging_periods_waited = (current_time - time_file_was_queued) / queue_aging_time
+
+			if queue_policy == 'shortest_first':
+				audio_duration_rounded_to_seconds = old_hotfolder_filelist_dict[filename][3][5]
+				sort_key = audio_duration_rounded_to_seconds / (1 + number_of_aging_periods_waited)
+
+			elif queue_policy == 'priority':
+				priority = queue_default_priority
+				length_of_matching_prefix = -1
+
+				for prefix in queue_priority_classes:
+					if (filename.startswith(prefix) == True) and (len(prefix) > length_of_matching_prefix):
+						priority = queue_priority_classes[prefix]
+						length_of_matching_prefix = len(prefix)
+
+				sort_key = priority - int(number_of_aging_periods_waited)
+			else:
+				sort_key = 0
+
+			# Files with the same sort key are kept in the order they were queued.
+			list_of_sort_keys_and_filenames.append([sort_key, time_file_was_queued, filename])
+
+		list_of_sort_keys_and_filenames.sort()
+		sorted_files_queued_to_loudness_calculation = collections.OrderedDict()
+
+		for sort_key, time_file_was_queued, filename in list_of_sort_keys_and_filenames:
+			sorted_files_queued_to_loudness_calculation[filename] = True
+
+	except Exception:
+		exc_type, exc_value, exc_traceback = sys.exc_info()
+		error_message_as_a_list = traceback.format_exception(exc_type, exc_value, exc_traceback)
+		subroutine_name = 'sort_files_queued_to_loudness_calculation'
+		catch_python_interpreter_errors(error_message_as_a_list, subroutine_name)
+
+	return(sorted_files_queued_to_loudness_calculation)
+
+def run_job_and_wake_up_main_thread(job_subroutine, job_arguments):
+
+	"""Runs a file processing subroutine and tells the main thread when the subroutine has finished."""
+
+	# This subroutine is started in its own thread by the main routine.
+	# The main thread sleeps waiting for messages in 'main_loop_wake_up_queue'. When the job finishes (successfully or not) a message is put to the queue,
+	# so the main thread can immediately collect the results and start processing the next file in the queue.
+
+	global main_loop_wake_up_queue
+
+	try:
+		job_subroutine(*job_arguments)
+
+	finally:
+		main_loop_wake_up_queue.put('job_finished')
+
+def send_file_to_worker_process(filename, job_name, job_arguments):
+
+	"""Sends a file to a worker process for processing and puts the results to 'worker_process_results_queue' for the main thread."""
+
+	# This subroutine is started in its own thread by the main routine and it waits until the worker process has finished processing the file.
+	# The worker process is a copy of this process made at program start, so it does not have the information the main thread has since stored for the file.
+	# This information is sent to the worker process along with the file name.
+
+	global file_processing_worker_process_pool
+	global worker_process_pool_is_broken
+	global worker_process_results_queue
+	global temp_loudness_results_for_automation
+	global debug_temporary_dict_for_all_file_processing_information
+	global english
+	global finnish
+
+	results_from_worker_process = {}
+	worker_process_pool = file_processing_worker_process_pool
+
+	try:
+		temp_loudness_results_for_file = temp_loudness_results_for_automation.get(filename)
+		debug_information_for_file = debug_temporary_dict_for_all_file_processing_information.get(filename)
+
+		worker_process = worker_process_pool.submit(process_file_in_worker_process, filename, job_name, job_arguments, temp_loudness_results_for_file, debug_information_for_file)
+		results_from_worker_process = worker_process.result()
+
+	except concurrent.futures.process.BrokenProcessPool as reason_for_error:
+		# A worker process has died, the pool can not be used anymore. Tell the main thread to start a new pool, unless it has already been started in place of this one.
+		# The main thread queues the file again, or reports an error for it if worker processes have died too many times while processing it.
+		if worker_process_pool == file_processing_worker_process_pool:
+			worker_process_pool_is_broken = True
+
+		error_message = 'Worker process stopped unexpectedly while processing file ' * english + 'Tiedostoa käsitellyt aliprosessi pysähtyi odottamatta tiedoston ' * finnish + filename + ', worker processes are started again: ' * english + ' käsittelyn aikana, aliprosessit käynnistetään uudelleen: ' * finnish + str(reason_for_error)
+		send_error_messages_to_screen_logfile_email(error_message, [])
+		results_from_worker_process = {'worker_process_failed' : True, 'error_message' : error_message}
+
+	except Exception:
+		exc_type, exc_value, exc_traceback = sys.exc_info()
+		error_message_as_a_list = traceback.format_exception(exc_type, exc_value, exc_traceback)
+		subroutine_name = 'send_file_to_worker_process'
+		catch_python_interpreter_errors(error_message_as_a_list, subroutine_name)
+
+	worker_process_results_queue.put([filename, results_from_worker_process])
+
+def create_file_processing_worker_process_pool():
+
+	"""Creates the pool of worker processes that process files and starts the worker processes."""
+
+	# The worker processes are copies of this process. Submitting the first job to the pool starts all worker processes.
+	number_of_worker_processes = int((number_of_processor_cores + processor_cores_used_by_one_file - 1) / processor_cores_used_by_one_file)
+	worker_process_pool = concurrent.futures.ProcessPoolExecutor(max_workers = number_of_worker_processes, mp_context = multiprocessing.get_context('fork'), initializer = initialize_file_processing_worker_process)
+	worker_process_pool.submit(os.getpid).result()
+
+	return(worker_process_pool)
+
+def initialize_file_processing_worker_process():
+
+	"""Prepares a new worker process for file processing. This is run in the worker process when it starts."""
 
-	try:
-		global silent
-		global directory_for_temporary_files
-		file_is_locked_by_samba = False
-		stdout = b''
-		stderr = b''
+	# Worker processes are copies of the main process, so they would get a copy of the main process queue of gnuplot processes.
+	# A worker process processes only one file at a time and needs at most one gnuplot process, so the queue is replaced with a queue of its own. The gnuplot process is started when the worker first plots graphics.
+	global gnuplot_worker_processes_queue
 
-		# Create the commandline we need to run.
-		commands_to_run = ['smbstatus', '-L']
+	gnuplot_worker_processes_queue = queue.Queue()
 
-		try:
-			# Define filenames for temporary files that we are going to use as stdout and stderr for the external command.
-			stdout_for_external_command = directory_for_temporary_files + os.sep + 'Smbstatus_command_stdout.txt'
-			stderr_for_external_command = directory_for_temporary_files + os.sep + 'Smbstatus_command_stderr.txt'
+	if number_of_gnuplot_worker_processes > 0:
+		gnuplot_worker_processes_queue.put(None)
 
-			# Open the stdout and stderr temporary files in binary write mode.
-			with open(stdout_for_external_command, 'wb') as stdout_commandfile_handler, open(stderr_for_external_command, 'wb') as stderr_commandfile_handler:
+def process_file_in_worker_process(filename, job_name, job_arguments, temp_loudness_results_for_file, debug_information_for_file):
 
-				# Run our command.
-				subprocess.Popen(commands_to_run, stdout=stdout_commandfile_handler, stderr=stderr_commandfile_handler, stdin=None, close_fds=True).communicate()
+	"""Runs loudness measurement, loudness graphics and loudness correction of one file in a worker process and returns the results."""
 
-				# Make sure all data written to temporary stdout and stderr - files is flushed from the os cache and written to disk.
-				stdout_commandfile_handler.flush() # Flushes written data to os cache
-				os.fsync(stdout_commandfile_handler.fileno()) # Flushes os cache to disk
-				stderr_commandfile_handler.flush() # Flushes written data to os cache
-				os.fsync(stderr_commandfile_handler.fileno()) # Flushes os cache to disk
+	# This subroutine is run in a worker process, it processes the file the same way as the threads of the main process would.
+	# Information the processing stages store in the global dictionaries is returned to the main process in a dictionary, since the worker process can not change the dictionaries of the main process.
+	# Error messages are printed to the screen and logfile by the worker process, but messages to be sent by email are returned to the main process where the email thread runs.
 
-		except IOError as reason_for_error:
-			error_message = 'Error writing to stdout- or stderr - file when running command: ' * english + 'Stdout- tai stderr - tiedostoon kirjoittaminen epäonnistui ajettaessa komentoa: ' * finnish + ' '.join(commands_to_run) + '. ' + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error writing to stdout- or stderr - file when running command: ' * english + 'Stdout- tai stderr - tiedostoon kirjoittaminen epäonnistui ajettaessa komentoa: ' * finnish + ' '.join(commands_to_run) + '. ' + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
+	global temp_loudness_results_for_automation
+	global debug_temporary_dict_for_all_file_processing_information
+	global debug_temporary_dict_for_timeslice_calculation_information
+	global debug_temporary_dict_for_integrated_loudness_calculation_information
+	global integrated_loudness_calculation_results
+	global error_messages_to_email_later_list
+	global critical_python_error_has_happened
 
-		# Open files we used as stdout and stderr for the external program and read in what the program did output to those files.
-		try:
-			with open(stdout_for_external_command, 'rb') as stdout_commandfile_handler, open(stderr_for_external_command, 'rb') as stderr_commandfile_handler:
-				stdout = stdout_commandfile_handler.read(None)
-				stderr = stderr_commandfile_handler.read(None)
-		except IOError as reason_for_error:
-			error_message = 'Error reading from stdout- or stderr - file when running command: ' * english + 'Stdout- tai stderr - tiedoston lukeminen epäonnistui ajettaessa komentoa: ' * finnish + ' '.join(commands_to_run) + '. ' + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error reading from stdout- or stderr - file when running command: ' * english + 'Stdout- tai stderr - tiedostoon lukeminen epäonnistui ajettaessa komentoa: ' * finnish + ' '.join(commands_to_run) + '. ' + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
+	error_messages_to_email_later_list = []
+	critical_python_error_has_happened = False
 
-		stdout = str(stdout.decode('UTF-8')) # Convert sudo possible error output from binary to UTF-8 text.
-		stderr = str(stderr.decode('UTF-8')) # Convert sudo possible error output from binary to UTF-8 text.
+	try:
+		if temp_loudness_results_for_file != None:
+			temp_loudness_results_for_automation[filename] = temp_loudness_results_for_file
 
-		# Delete the temporary stdout and stderr - files
-		try:
-			os.remove(stdout_for_external_command)
-			os.remove(stderr_for_external_command)
-		except IOError as reason_for_error:
-			error_message = 'Error deleting stdout- or stderr - file when running command: ' * english + 'Stdout- tai stderr - tiedoston deletoiminen epäonnistui ajettaessa komentoa: ' * finnish + ' '.join(commands_to_run) + '. ' + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error deleting stdout- or stderr - file when running command: ' * english + 'Stdout- tai stderr - tiedoston deletoiminen epäonnistui ajettaessa komentoa: ' * finnish + ' '.join(commands_to_run) + '. ' + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
+		if debug_information_for_file != None:
+			debug_temporary_dict_for_all_file_processing_information[filename] = debug_information_for_file
 
-		if filename in stdout:
-			file_is_locked_by_samba = True
+		event_for_timeslice_loudness_calculation = threading.Event()
+		event_for_integrated_loudness_calculation = threading.Event()
+		arguments_for_loudness_calculation, arguments_for_integrated_loudness_calculation = job_arguments
+
+		if job_name == 'calculate_loudness_in_a_single_pass':
+			calculate_loudness_in_a_single_pass(*(arguments_for_loudness_calculation + (event_for_timeslice_loudness_calculation, event_for_integrated_loudness_calculation)))
+		else:
+			# Calculate integrated loudness in a thread and time slices in this thread, time slice calculation waits for the integrated loudness results.
+			integrated_loudness_process = threading.Thread(target=calculate_integrated_loudness, args=((event_for_integrated_loudness_calculation,) + arguments_for_integrated_loudness_calculation)) # Create a process instance.
+			integrated_loudness_process.start()
+			calculate_loudness_timeslices(*(arguments_for_loudness_calculation + (event_for_timeslice_loudness_calculation, event_for_integrated_loudness_calculation)))
+			integrated_loudness_process.join()
 
 	except Exception:
 		exc_type, exc_value, exc_traceback = sys.exc_info()
 		error_message_as_a_list = traceback.format_exception(exc_type, exc_value, exc_traceback)
-		subroutine_name = 'check_samba_file_locks'
+		subroutine_name = 'process_file_in_worker_process'
 		catch_python_interpreter_errors(error_message_as_a_list, subroutine_name)
 
-	return(file_is_locked_by_samba)
+	results_from_worker_process = {}
+	results_from_worker_process['temp_loudness_results_for_automation'] = temp_loudness_results_for_automation.pop(filename, None)
+	results_from_worker_process['debug_temporary_dict_for_all_file_processing_information'] = debug_temporary_dict_for_all_file_processing_information.pop(filename, None)
+	results_from_worker_process['debug_temporary_dict_for_timeslice_calculation_information'] = debug_temporary_dict_for_timeslice_calculation_information.pop(filename, None)
+	results_from_worker_process['debug_temporary_dict_for_integrated_loudness_calculation_information'] = debug_temporary_dict_for_integrated_loudness_calculation_information.pop(filename, None)
+	results_from_worker_process['error_messages_to_email_later_list'] = error_messages_to_email_later_list
+	results_from_worker_process['critical_python_error_has_happened'] = critical_python_error_has_happened
+
+	# The worker process processes only one file at a time, results left behind by an unsuccessful processing are not needed anymore.
+	integrated_loudness_calculation_results.clear()
+
+	return(results_from_worker_process)
 
 def catch_python_interpreter_errors(error_message_as_a_list, subroutine_name):
 
@@ -5528,13 +8353,14 @@ def write_user_defined_configuration_settings_to_logfile():
 # These dictionaries are used to keep track of files that appear to the HotFolder and the time the files were first seen there.
 # This time is used to determine when files have expired and can been deleted. (Expiration time (seconds) is stored in variable 'file_expiry_time' and is 8 hours by default).
 #	'list_of_growing_files'
-# This list is used to keep track of files that are being transferred to the HotFolder but are not yet complete (file size is growing between directory polls).
+# This ordered dictionary is used to keep track of files that are being transferred to the HotFolder but are not yet complete (file size is growing between directory polls).
 #	'files_queued_to_loudness_calculation'
-# This list holds the names of files in the HotFolder that are no longer growing and can be sent to loudness calculation.
+# This ordered dictionary holds the names of files in the HotFolder that are no longer growing and can be sent to loudness calculation. The names are the keys, in the order the files are processed.
 #	 'loudness_calculation_queue'
 # This list holds the names of files that are currently being calculated upon.
 #	'files_queued_for_deletion'
-# This list holds the names of files that are going to be deleted.
+# This set holds the names of files that are going to be deleted.
+# The HotFolder may hold tens of thousands of files, so names are looked up from sets and dictionaries, never from lists. This keeps the time of a directory poll growing only linearly with the number of files.
 #		'completed_files_list'
 #		'completed_files_dict'
 # The list holds the names of 100 last files that has gone through loudness calculation, and the order processing them was completed. The dictionary holds the time processing each file was completed. The list and dictionary are only used when printing loudness calculation progress information to a web page on disk.
@@ -5657,15 +8483,39 @@ try:
 	filename = ''
 	list_of_directories=[]
 	list_of_files=[]
-	list_of_growing_files=[] # See explanation of the purpose for this dictionary in comments above.
-	files_queued_to_loudness_calculation=[] # See explanation of the purpose for this dictionary in comments above.
-	files_queued_for_deletion=[] # See explanation of the purpose for this dictionary in comments above.
+	set_of_files_in_hotfolder = set() # Names of files found in the latest HotFolder poll.
+	hotfolder_directory_entries = {} # os.DirEntry objects of the files found in the latest HotFolder poll, file names are the keys.
+	delay_between_results_directory_sweeps = 60 # Expired files in the results directory are searched for only this often (seconds), file expiry time is hours so there is no need to do it on every HotFolder poll.
+	time_of_last_results_directory_sweep = 0
+	list_of_growing_files = collections.OrderedDict() # See explanation of the purpose for this dictionary in comments above.
+	files_queued_to_loudness_calculation = collections.OrderedDict() # See explanation of the purpose for this dictionary in comments above.
+	files_queued_for_deletion = set() # See explanation of the purpose for this dictionary in comments above.
 	completed_files_list = [] # This variable holds the names of 100 last files that have gone through loudness calculation.
 	completed_files_dict = {} # This dictionary stores the time processing each file was completed.
 	adjust_line_printout='	       '
 	loudness_calculation_queue={} # See explanation of the purpose for this dictionary in comments above.
-	loop_counter=0
+	time_of_last_directory_read = 0
+	seconds_since_last_directory_read = 0
+	main_loop_wake_up_queue = queue.Queue() # Threads put a message to this queue when a job finishes or files in the HotFolder change. The main loop waits for messages in this queue.
+	time_file_was_queued_dict = {} # The time each file was added to the queue of files waiting for processing. This is used to measure how long files wait for dispatch.
+	number_of_times_file_was_passed_in_queue_dict = {} # How many times files behind the first file in the queue were started because the first file did not fit in the free resources.
+	file_processing_cost_estimates_dict = {} # Estimated processor cores, memory and temporary disk space needed to process each file waiting in the queue.
+	processing_costs_of_running_jobs_dict = {} # Estimated processor cores, memory and temporary disk space needed by each file being processed.
+	job_dispatch_wait_statistics = {'jobs_dispatched' : 0, 'total_wait_time' : 0.0, 'longest_wait_time' : 0.0, 'latest_wait_time' : 0.0} # Statistics of the time files have waited in the queue before processing started.
+	hotfolder_poll_statistics = {'number_of_polls' : 0, 'number_of_files_in_latest_poll' : 0, 'latest_poll_time' : 0.0, 'longest_poll_time' : 0.0, 'poll_time_per_thousand_files' : 0.0} # Statistics of the time reading the HotFolder and updating the bookkeeping of files takes.
+	inotify_file_descriptor = -1 # If HotFolder is watched with inotify, this is the inotify file descriptor.
+	files_reported_ready_by_inotify = set() # Names of files inotify has reported closed after writing or moved to the HotFolder.
+	growing_files_closed_after_writing = set() # Names of growing files inotify has reported closed after writing, these files don't need to wait for a stability window.
+	growing_files_written_through_samba = set() # Names of growing files Samba has been seen to have a lock on, these files use the stability window of network files.
+	hotfolder_is_on_a_network_filesystem = False # True if HotFolder is on a network filesystem, all files in it then use the stability window of network files.
+	growing_file_statistics = {'files_stopped_growing' : 0, 'total_time_growing' : 0.0, 'longest_time_growing' : 0.0, 'latest_time_growing' : 0.0} # Statistics of the time files spent in the list of growing files, from the time the file was first seen to the time it was queued for processing.
 	integrated_loudness_calculation_results = {}
+	file_processing_worker_process_pool = None # When files are processed in worker processes, this is the pool of worker processes.
+	worker_process_results_queue = queue.Queue() # Results of files processed in worker processes are put to this queue and the main thread reads them from it.
+	worker_process_pool_is_broken = False # This is set to True when a worker process has died, the main thread then starts a new pool of worker processes.
+	number_of_worker_process_failures_of_files_dict = {} # The number of times worker processes have died while processing a file. Keys are file names.
+	extracted_audio_streams_ready_for_processing_queue = queue.Queue() # Audio streams extracted with FFmpeg are put to this queue when they are queued for loudness calculation without reading the HotFolder.
+	audio_streams_measured_without_a_file_queue = queue.Queue() # Audio streams measured without writing them to files are put to this queue when their loudness results are ready.
 	previous_value_of_files_queued_to_loudness_calculation = 0 # This variable is used to track if the number of files in the calculation queue changes. A message is printed when it does.
 	previous_value_of_loudness_calculation_queue = 0 # This variable is used to track if the number of files being in the calculation process changes. A message is printed when it does.
 	error_messages_to_email_later_list = [] # Error messages are collected to this list for sending them by email.
@@ -5770,6 +8620,8 @@ try:
 			heartbeat = all_settings_dict['heartbeat']	
 		if 'heartbeat_write_interval' in all_settings_dict:
 			heartbeat_write_interval = all_settings_dict['heartbeat_write_interval']
+		if 'status_message_forced_send_interval' in all_settings_dict:
+			status_message_forced_send_interval = all_settings_dict['status_message_forced_send_interval']
 		
 		if 'send_error_messages_by_email' in all_settings_dict:
 			send_error_messages_by_email = all_settings_dict['send_error_messages_by_email']
@@ -5796,6 +8648,50 @@ try:
 			create_loudness_history_graphics_files = all_settings_dict['create_loudness_history_graphics_files']
 		if 'delete_original_file_immediately' in all_settings_dict:
 			delete_original_file_immediately = all_settings_dict['delete_original_file_immediately']
+		if 'measure_loudness_in_a_single_pass' in all_settings_dict:
+			measure_loudness_in_a_single_pass = all_settings_dict['measure_loudness_in_a_single_pass']
+		if 'use_numpy_for_loudness_measurement' in all_settings_dict:
+			use_numpy_for_loudness_measurement = all_settings_dict['use_numpy_for_loudness_measurement']
+		if 'run_file_processing_in_worker_processes' in all_settings_dict:
+			run_file_processing_in_worker_processes = all_settings_dict['run_file_processing_in_worker_processes']
+		if 'maximum_number_of_worker_process_failures_for_a_file' in all_settings_dict:
+			maximum_number_of_worker_process_failures_for_a_file = all_settings_dict['maximum_number_of_worker_process_failures_for_a_file']
+		if 'memory_budget_for_file_processing' in all_settings_dict:
+			memory_budget_for_file_processing = all_settings_dict['memory_budget_for_file_processing']
+		if 'temporary_disk_space_budget_for_file_processing' in all_settings_dict:
+			temporary_disk_space_budget_for_file_processing = all_settings_dict['temporary_disk_space_budget_for_file_processing']
+		if 'queue_policy' in all_settings_dict:
+			queue_policy = all_settings_dict['queue_policy']
+		if 'queue_priority_classes' in all_settings_dict:
+			queue_priority_classes = all_settings_dict['queue_priority_classes']
+		if 'queue_default_priority' in all_settings_dict:
+			queue_default_priority = all_settings_dict['queue_default_priority']
+		if 'queue_aging_time' in all_settings_dict:
+			queue_aging_time = all_settings_dict['queue_aging_time']
+		if 'queue_maximum_times_passed' in all_settings_dict:
+			queue_maximum_times_passed = all_settings_dict['queue_maximum_times_passed']
+		if 'file_information_cache_size' in all_settings_dict:
+			file_information_cache_size = all_settings_dict['file_information_cache_size']
+		if 'measure_audio_streams_while_extracting' in all_settings_dict:
+			measure_audio_streams_while_extracting = all_settings_dict['measure_audio_streams_while_extracting']
+		if 'queue_extracted_audio_streams_directly' in all_settings_dict:
+			queue_extracted_audio_streams_directly = all_settings_dict['queue_extracted_audio_streams_directly']
+		if 'result_cache_size' in all_settings_dict:
+			result_cache_size = all_settings_dict['result_cache_size']
+		if 'draw_loudness_graphics_in_process' in all_settings_dict:
+			draw_loudness_graphics_in_process = all_settings_dict['draw_loudness_graphics_in_process']
+		if 'number_of_gnuplot_worker_processes' in all_settings_dict:
+			number_of_gnuplot_worker_processes = all_settings_dict['number_of_gnuplot_worker_processes']
+		if 'timeout_for_gnuplot_worker_processes' in all_settings_dict:
+			timeout_for_gnuplot_worker_processes = all_settings_dict['timeout_for_gnuplot_worker_processes']
+		if 'watch_hotfolder_with_inotify' in all_settings_dict:
+			watch_hotfolder_with_inotify = all_settings_dict['watch_hotfolder_with_inotify']
+		if 'delay_between_directory_reads_when_idle' in all_settings_dict:
+			delay_between_directory_reads_when_idle = all_settings_dict['delay_between_directory_reads_when_idle']
+		if 'file_stability_window_for_local_files' in all_settings_dict:
+			file_stability_window_for_local_files = all_settings_dict['file_stability_window_for_local_files']
+		if 'file_stability_window_for_network_files' in all_settings_dict:
+			file_stability_window_for_network_files = all_settings_dict['file_stability_window_for_network_files']
 
 		if 'unit_separator' in all_settings_dict:
 
@@ -5893,6 +8789,7 @@ try:
 	ffmpeg_executable_found = False
 	mediainfo_executable_found = False
 	smbstatus_executable_found = False
+	smbstatus_supports_json_output = True # Set to False when smbstatus can not print locked files as json.
 	libebur128_loudness_executable_found = False
 	loudness_executable_name = 'loudness-freelcs'
 	libebur128_path = '/usr/bin/' + loudness_executable_name
@@ -5928,7 +8825,12 @@ try:
 		error_message = '\n!!!!!!! FFmpeg - can not be found or it does not have \'executable\' permissions on !!!!!!!' * english + '\n!!!!!!! FFmpeg - ohjelmaa ei löydy tai sillä ei ole käynnistyksen mahdollistava \'executable\' oikeudet päällä !!!!!!!' * finnish
 		send_error_messages_to_screen_logfile_email(error_message, [])
 		sys.exit(1)
-	if gnuplot_executable_found == False:
+	# If user wants to draw loudness graphics in-process, but Pillow is not installed, fall back to plotting graphics with gnuplot.
+	if (draw_loudness_graphics_in_process == True) and (pillow_is_available == False):
+		error_message = '\n!!!!!!! Pillow can not be found, loudness graphics is plotted with gnuplot !!!!!!!\n' * english + '\n!!!!!!! Pillow - kirjastoa ei löydy, äänekkyysgrafiikka piirretään gnuplotilla !!!!!!!\n' * finnish
+		send_error_messages_to_screen_logfile_email(error_message, [])
+		draw_loudness_graphics_in_process = False
+	if (gnuplot_executable_found == False) and (draw_loudness_graphics_in_process == False):
 		error_message = '\n!!!!!!! gnuplot - can not be found or it does not have \'executable\' permissions on !!!!!!!' * english + '\n!!!!!!! gnuplot - ohjelmaa ei löydy tai sillä ei ole käynnistyksen mahdollistava \'executable\' oikeudet päällä !!!!!!!' * finnish
 		send_error_messages_to_screen_logfile_email(error_message, [])
 		sys.exit(1)
@@ -5953,6 +8855,63 @@ try:
 			send_error_messages_to_screen_logfile_email(error_message, [])
 			sys.exit(1)
 
+	# If user wants to measure loudness with NumPy, but NumPy is not installed, fall back to measuring with external programs.
+	if (use_numpy_for_loudness_measurement == True) and (numpy_is_available == False):
+		error_message = '\n!!!!!!! NumPy can not be found, loudness is measured with external programs !!!!!!!\n' * english + '\n!!!!!!! NumPy - kirjastoa ei löydy, äänekkyys mitataan ulkoisilla ohjelmilla !!!!!!!\n' * finnish
+		send_error_messages_to_screen_logfile_email(error_message, [])
+		use_numpy_for_loudness_measurement = False
+
+	# Single pass measurement calculates the energies of sox K-weighted audio with NumPy. Without NumPy the calculation would run sample by sample in Python, which is slower than libebur128.
+	if (measure_loudness_in_a_single_pass == True) and (numpy_is_available == False):
+		error_message = '\n!!!!!!! NumPy can not be found, loudness is measured with libebur128 instead of the single pass measurement !!!!!!!\n' * english + '\n!!!!!!! NumPy - kirjastoa ei löydy, äänekkyys mitataan libebur128:lla yhden ajokerran mittauksen sijaan !!!!!!!\n' * finnish
+		send_error_messages_to_screen_logfile_email(error_message, [])
+		measure_loudness_in_a_single_pass = False
+
+	# Use the fifo queue if the queue policy is unknown.
+	if queue_policy not in ['fifo', 'shortest_first', 'priority']:
+		error_message = '\n!!!!!!! Unknown queue policy: ' * english + '\n!!!!!!! Tuntematon jonon käsittelyjärjestys: ' * finnish + str(queue_policy) + ', files are processed in the order they were queued !!!!!!!\n' * english + ', tiedostot käsitellään jonoon lisäämisjärjestyksessä !!!!!!!\n' * finnish
+		send_error_messages_to_screen_logfile_email(error_message, [])
+		queue_policy = 'fifo'
+
+	if queue_aging_time <= 0:
+		queue_aging_time = 600
+
+	if file_stability_window_for_local_files < 0:
+		file_stability_window_for_local_files = 0
+
+	if file_stability_window_for_network_files < 0:
+		file_stability_window_for_network_files = 0
+
+	# The result cache is kept in the memory of the main process, files processed in worker processes can not use it.
+	if (result_cache_size > 0) and (run_file_processing_in_worker_processes == True):
+		error_message = '\n!!!!!!! Result cache can not be used when files are processed in worker processes, the result cache is not used !!!!!!!\n' * english + '\n!!!!!!! Tulosvälimuistia ei voi käyttää, kun tiedostot käsitellään aliprosesseissa, tulosvälimuisti ei ole käytössä !!!!!!!\n' * finnish
+		send_error_messages_to_screen_logfile_email(error_message, [])
+		result_cache_size = 0
+
+	# The result cache is kept in memory, so files left in the cache directory by an earlier run can not be used. Empty the directory when the program starts.
+	if result_cache_size > 0:
+		directory_for_result_cache = directory_for_temporary_files + os.sep + '00-Result_Cache'
+
+		try:
+			if os.path.exists(directory_for_result_cache):
+				shutil.rmtree(directory_for_result_cache)
+			os.makedirs(directory_for_result_cache)
+		except IOError as reason_for_error:
+			error_message = 'Error emptying the result cache directory, the result cache is not used: ' * english + 'Tulosvälimuistin hakemiston tyhjentäminen epäonnistui, tulosvälimuisti ei ole käytössä: ' * finnish + str(reason_for_error)
+			send_error_messages_to_screen_logfile_email(error_message, [])
+			result_cache_size = 0
+		except OSError as reason_for_error:
+			error_message = 'Error emptying the result cache directory, the result cache is not used: ' * english + 'Tulosvälimuistin hakemiston tyhjentäminen epäonnistui, tulosvälimuisti ei ole käytössä: ' * finnish + str(reason_for_error)
+			send_error_messages_to_screen_logfile_email(error_message, [])
+			result_cache_size = 0
+
+	# Put one item for each gnuplot process to the queue of gnuplot processes. Gnuplot processes are started when they are first needed.
+	if number_of_gnuplot_worker_processes < 0:
+		number_of_gnuplot_worker_processes = 0
+
+	for counter in range(0, number_of_gnuplot_worker_processes):
+		gnuplot_worker_processes_queue.put(None)
+
 	ffmpeg_executable_name = ''
 
 	# If user has forced no_ffmpeg on the command line, don't use FFmpeg
@@ -5969,6 +8928,13 @@ try:
 	if force_truepeak == True:
 		peak_measurement_method = '--peak=true'
 
+	# Two libebur128 processes are started for each file, so each file being processed uses two processor cores.
+	# When loudness is measured in a single pass only one process is started for each file.
+	processor_cores_used_by_one_file = 2
+
+	if (measure_loudness_in_a_single_pass == True) or (use_numpy_for_loudness_measurement == True):
+		processor_cores_used_by_one_file = 1
+
 	# Define the name of the loudness calculation logfile.
 	loudness_calculation_logfile_path = '' 
 	if debug_file_processing == True: 
@@ -5993,11 +8959,20 @@ try:
 	'write_html_progress_report' : [write_html_progress_report, "0"]
 	} 
 
+	# Start worker processes for file processing. The worker processes are copies of this process and must be started before any other threads are started,
+	# since a process with several threads running can not be safely copied.
+	if run_file_processing_in_worker_processes == True:
+		file_processing_worker_process_pool = create_file_processing_worker_process_pool()
+
 	# Start in its own thread the subroutine that sends error messages by email.
 	if email_sending_details['send_error_messages_by_email'] == True:
 		email_process = threading.Thread(target=send_error_messages_by_email_thread, args=(email_sending_details, english, finnish)) # Create a process instance.
 		thread_object = email_process.start() # Start the process in it'own thread.
 		
+	# Progress_Report and Heartbeat_Checker threads share one keep-alive http session, so a new connection is not opened for every message.
+	if (write_html_progress_report == True) or (heartbeat == True):
+		http_session_for_status_messages = create_http_session_with_retries()
+
 	# Start in its own thread the subroutine that send process queue information periodically.
 	if write_html_progress_report == True:
 		html_writing_process = threading.Thread(target=send_to_progress_report, args=(english, finnish)) # Create a process instance.
@@ -6017,6 +8992,17 @@ try:
 	debug_file_processing_process = threading.Thread(target=debug_manage_file_processing_information_thread, args=()) # Create a process instance.
 	thread_object = debug_file_processing_process.start() # Start the process in it'own thread.
 
+	if get_filesystem_type_of_directory(hotfolder_path) in network_filesystem_types:
+		hotfolder_is_on_a_network_filesystem = True
+
+	# Start watching HotFolder with inotify in its own thread. If inotify can not be used, the HotFolder is only polled.
+	if watch_hotfolder_with_inotify == True:
+		inotify_file_descriptor = create_inotify_watch_for_directory(hotfolder_path, english, finnish)
+
+		if inotify_file_descriptor >= 0:
+			inotify_process = threading.Thread(target=watch_hotfolder_with_inotify_thread) # Create a process instance.
+			thread_object = inotify_process.start() # Start the process in it'own thread.
+
 	# Define a handler routine for signals recieved outside of program.
 	signal.signal(signal.SIGUSR1, signal_handler_routine)
 	signal.signal(signal.SIGUSR2, signal_handler_routine)
@@ -6037,193 +9023,70 @@ try:
 	while True:
 		
 		loudness_correction_program_info_and_timestamps['main_thread'] = [True, str(int(time.time()))] # Update the heartbeat timestamp for the main thread. This is used to keep track if the main thread has crashed.
+		time_poll_started = time.time()
 
-		try:
-			# Get directory listing for HotFolder. The 'break' statement stops the for - statement from recursing into subdirectories.
-			for path, list_of_directories, list_of_files in os.walk(hotfolder_path):
-				break
-		except KeyboardInterrupt:
-			if silent == False:
-				print('\n\nUser cancelled operation.\n' * english + '\n\nKäyttäjä pysäytti ohjelman.\n' * finnish)
-			sys.exit(0)
-		except IOError as reason_for_error:
-			error_message = 'Error reading HotFolder directory listing ' * english + 'Lähdehakemistopuun lukeminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error reading HotFolder directory listing ' * english + 'Lähdehakemistopuun lukeminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-			
-		# The files in 'unsupported_ignored_files_dict' are files that ffmpeg was not able to find any audiostreams from, or streams were found but the duration is less than 1 second or file transfer ended prematurely.
-		# Check if files in the unsupported files dictionary have vanished from the HotFolder. If a name has disappeared from HotFolder, remove it also from the list of unsupported files.
-		# Check if files in the unsupported files dictionary have been there longer than the expiry time allows, queue expired files for deletion.
-
-		unsupported_ignored_files_list = list(unsupported_ignored_files_dict) # Copy filesnames from dictionary to a list to use as for - loop iterable, since we can't use the dictionary directly because we are going to delete values from it. The for loop - iterable is forbidden to change.
-
-		for filename in unsupported_ignored_files_list:
-			if not filename in list_of_files:
-				unsupported_ignored_files_dict.pop(filename) # If unsupported file that previously was in HotFolder has vanished, remove its name from the unsupported files list.
-				continue
-			if int(time.time()) - unsupported_ignored_files_dict[filename] >= file_expiry_time: # If file has expired then queue it for deletion.
-				files_queued_for_deletion.append(filename)
-
-		# If user has deleted a file that did already make it to the 'list_of_growing_files' remove it from list.
-		filenames_to_remove = []
-
-		for filename in list_of_growing_files:
-			if not filename in list_of_files:
-				filenames_to_remove.append(filename)
-		for filename in filenames_to_remove:
-			list_of_growing_files.remove(filename) # If file that previously was in HotFolder has vanished, remove its name from the list_of_growing_files.
-
-		# If user has deleted a file that did already make it to the 'debug_temporary_dict_for_all_file_processing_information' remove it from list.
-		filenames_to_remove = []
-
-		for filename in debug_temporary_dict_for_all_file_processing_information:
-			if not filename in list_of_files:
-				filenames_to_remove.append(filename)
-		for filename in filenames_to_remove:
-			del debug_temporary_dict_for_all_file_processing_information[filename] # If file that previously was in HotFolder has vanished, remove its name from the dictionary used to collect debug data.
-
-		filenames_to_remove = []
-
-		# Process filenames found in the directory
-		try:
-			for filename in list_of_files:
-
-				if (filename.startswith('.')) and (not filename.startswith('.nfs')): # If filename starts with an '.' queue the file for deletion and continue to process next filename. Don't try to delete files that start with .nfs since these might be false files that actually are caused by a file deleted on a nfs mount. Ilmeisesti meidän BackupSysteemi tekee tiedostojärjestelmän varmuuskopiot nfs - mountin yli ja siksi näitä tiedostoja välillä ilmestyy HotFolderiin. Lisätietoa: https://stackoverflow.com/questions/8192605/how-delete-nfs-in-linux
-					files_queued_for_deletion.append(filename)
-					continue
-
-				# Don't try to find audio in mxf - remix map files that are text files.
-				if os.path.splitext(filename)[1] == remix_map_file_extension:
-					if filename not in unsupported_ignored_files_dict:
-						unsupported_ignored_files_dict[filename] = int(time.time())
-						continue
-
-
-				file_metadata=os.lstat(hotfolder_path + os.sep + filename) # Get file information (size, date, etc)
-				file_information_to_save=[file_metadata.st_size, int(time.time()), file_metadata.st_mtime] # Put in a list: file size, time the file was first seen in HotFolder and file modification time.
-
-				##########################################################################################################################################
-				# Que expired files in HotFolder for deletion. Make sure no other thread is currently processing the files before queueing for deletion. #
-				##########################################################################################################################################
-				# Test if the time between now and the time the file was first seen in HotFolder is longer that expiry time, if true queue file for deletion.
-				if (filename in old_hotfolder_filelist_dict) and (int(time.time()) - old_hotfolder_filelist_dict[filename][1] > file_expiry_time) and (filename not in list_of_growing_files) and (filename not in loudness_calculation_queue) and (filename not in files_queued_to_loudness_calculation):
-					files_queued_for_deletion.append(filename)
-					
-				#################################################################################
-				# Add files we need to study further to a dictionary with some file information #
-				#################################################################################
-				# Add information about a file to dictionary.
-				# This statement also guarantees that files put in deletion queue by subprocess 'decompress_audio_streams_with_ffmpeg' running in separate thread, are not processed here further. That would sometimes cause files being used by one thread to be deleted by the other.
-				if (filename not in files_queued_for_deletion) and (filename not in unsupported_ignored_files_dict):
-
-					# Save information about new files into a dictionary: filename, file size, time file was first seen in HotFolder.
-					if not filename in old_hotfolder_filelist_dict:
-						# The file has just appeared to the HotFolder and it has not been analyzed yet.
-						# However some dummy data for the file needs to be filled, so we create that data here.
-						# This dummy data is replaced with real data when the file stops growing and gets analyzed.
-						dummy_information = [False, False, 0, [], '3', 0, [], [], False, [], [], 0] # This dummy information will be replaced by info from FFmpeg later.
-						file_information_to_save.append(dummy_information)
-
-						# Append time the file size or timestamp was last updated.
-						# As this is the first time we have seen the file, we don't have this information yet, we need to use some sane dummy value.
-						# So just use the time the file was first seen in HotFolder as the last update time.
-						# This information is already in 'file_information_to_save' as it's item number 1, so just copy it from there.
-						file_information_to_save.append(file_information_to_save[1])
-
-					# Data in 'file_information_to_save' is at this point (with item numbers):
-					#
-					# 0 = file size
-					# 1 = time file was first seen in HotFolder
-					# 2 = file modification time
-					# 3 = [False, False, 0, [], '3', 0, [], [], False, [], [], 0] # This is dummy information that will later be replaced by data from FFmpeg. See comment below for item identification.
-					# 4 = Time the file size or timestamp was last updated. At this point this is the same as the time the file was first seen in HotFolder.
-					#
-					# The item 3 above is a list of dummy information that later will be replaced by real file information reported by FFmpeg.
-					# The data that FFmpeg fills later in this list is (with item numbers):
-					# ---------------------------------------------------------------------------------------------------------------
-					#
-					# 00 = natively_supported_file_format
-					# 01 = ffmpeg_supported_fileformat
-					# 02 = number_of_ffmpeg_supported_audiostreams
-					# 03 = details_of_ffmpeg_supported_audiostreams
-					# 04 = time_slice_duration_string
-					# 05 = audio_duration_rounded_to_seconds
-					# 06 = ffmpeg_commandline
-					# 07 = target_filenames
-					# 08 = mxf_audio_remixing
-					# 09 = filenames_and_channel_counts_for_mxf_audio_remixing
-					# 10 = audio_remix_channel_map
-					# 11 = number_of_unsupported_streams_in_file
-					#
-					new_hotfolder_filelist_dict[filename] = file_information_to_save
-
-
-		except KeyboardInterrupt:
-			if silent == False:
-				print('\n\nUser cancelled operation.\n' * english + '\n\nKäyttäjä pysäytti ohjelman.\n' * finnish)
-			sys.exit(0)
-		except IOError as reason_for_error:
-			error_message = 'Error reading HotFolder file metadata ' * english + 'Lähdehakemistopussa olevan tiedoston tietojen lukeminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error reading HotFolder file metadata ' * english + 'Lähdehakemistopussa olevan tiedoston tietojen lukeminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
+		# Read the HotFolder and update the bookkeeping of files in it.
+		read_hotfolder_and_update_file_bookkeeping()
 			
 		################################################################################
 		# Find expired files in results - directory and add them to the deletion queue #
 		################################################################################
-		try:
-			for path, list_of_directories, list_of_files in os.walk(directory_for_results):
-				break
+		# Expired files are searched for only every 'delay_between_results_directory_sweeps' seconds. Files in the results directory are not processed, so they don't need to be checked on every HotFolder poll.
+		if time.time() - time_of_last_results_directory_sweep >= delay_between_results_directory_sweeps:
+			time_of_last_results_directory_sweep = time.time()
 
-			for filename in list_of_files:
+			try:
+				for filename in read_directory_entries_with_scandir(directory_for_results):
 
-				partial_path=os.path.relpath(path + os.sep + filename, hotfolder_path) # Truncate file path by removing the preceding 'HotFolder' path.
-				time_file_was_first_seen = 0
+					partial_path=os.path.relpath(directory_for_results + os.sep + filename, hotfolder_path) # Truncate file path by removing the preceding 'HotFolder' path.
+					time_file_was_first_seen = 0
 
-				if partial_path in old_results_directory_filelist_dict:
-					# If the file was there in poll previous to this one, the time the file was first seen is in dictionary 'old_results_directory_filelist_dict' get it and put in a variable.
-					time_file_was_first_seen = old_results_directory_filelist_dict[partial_path]
+					if partial_path in old_results_directory_filelist_dict:
+						# If the file was there in poll previous to this one, the time the file was first seen is in dictionary 'old_results_directory_filelist_dict' get it and put in a variable.
+						time_file_was_first_seen = old_results_directory_filelist_dict[partial_path]
 
-					if int(time.time()) - time_file_was_first_seen > file_expiry_time: # Check if file has been there longer than the expiry time, if true queue file for deletion.
-						files_queued_for_deletion.append(partial_path)
+						if int(time.time()) - time_file_was_first_seen > file_expiry_time: # Check if file has been there longer than the expiry time, if true queue file for deletion.
+							files_queued_for_deletion.add(partial_path)
+						else:
+							# The file was there in the poll previous to this one, put the time the file was first seen in a dictionary along with filename.
+							new_results_directory_filelist_dict[partial_path] = time_file_was_first_seen
 					else:
-						# The file was there in the poll previous to this one, put the time the file was first seen in a dictionary along with filename.
-						new_results_directory_filelist_dict[partial_path] = time_file_was_first_seen
-				else:
-					# If we get here the file was not there in the poll previous to this. The file is new, put the time the file was first seen in a dictionary along with the filename.
-					new_results_directory_filelist_dict[partial_path] = int(time.time())
-		except KeyboardInterrupt:
-			if silent == False:
-				print('\n\nUser cancelled operation.\n' * english + '\n\nKäyttäjä pysäytti ohjelman.\n' * finnish)
-			sys.exit(0)
-		except IOError as reason_for_error:
-			error_message = 'Error reading ResultsFolder directory listing ' * english + 'Tuloshakemiston hakemistopuun lukeminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
-		except OSError as reason_for_error:
-			error_message = 'Error reading ResultsFolder directory listing ' * english + 'Tuloshakemiston hakemistopuun lukeminen epäonnistui ' * finnish + str(reason_for_error)
-			send_error_messages_to_screen_logfile_email(error_message, [])
+						# If we get here the file was not there in the poll previous to this. The file is new, put the time the file was first seen in a dictionary along with the filename.
+						new_results_directory_filelist_dict[partial_path] = int(time.time())
+			except KeyboardInterrupt:
+				if silent == False:
+					print('\n\nUser cancelled operation.\n' * english + '\n\nKäyttäjä pysäytti ohjelman.\n' * finnish)
+				sys.exit(0)
+			except IOError as reason_for_error:
+				error_message = 'Error reading ResultsFolder directory listing ' * english + 'Tuloshakemiston hakemistopuun lukeminen epäonnistui ' * finnish + str(reason_for_error)
+				send_error_messages_to_screen_logfile_email(error_message, [])
+			except OSError as reason_for_error:
+				error_message = 'Error reading ResultsFolder directory listing ' * english + 'Tuloshakemiston hakemistopuun lukeminen epäonnistui ' * finnish + str(reason_for_error)
+				send_error_messages_to_screen_logfile_email(error_message, [])
 
-		# Save latest directory poll information for the next poll.
-		old_results_directory_filelist_dict = new_results_directory_filelist_dict
-		new_results_directory_filelist_dict = {}
+			# Save latest directory poll information for the next poll.
+			old_results_directory_filelist_dict = new_results_directory_filelist_dict
+			new_results_directory_filelist_dict = {}
 
 		########################################################
 		# Delete all files that have been queued for deletion. #
 		########################################################
 		try:
-			files_to_delete = copy.deepcopy(files_queued_for_deletion) # Copy file list to a new list, since we are going to modify the original list it can not be used as the iterator for the for-loop.
+			files_to_delete = list(files_queued_for_deletion) # Copy file names to a new list, since we are going to modify the original set it can not be used as the iterator for the for-loop.
 			for filename in files_to_delete:
 				realtime = get_realtime(english, finnish)[1]
 
-				if os.path.exists(hotfolder_path + os.sep + filename):
+				# The file is removed without checking first that it exists, this saves a round-trip to the server when the HotFolder is on a network share. A file that has already disappeared does not need to be deleted anymore.
+				try:
 					os.remove(hotfolder_path + os.sep + filename)
-					files_queued_for_deletion.remove(filename)
+				except FileNotFoundError:
+					files_queued_for_deletion.discard(filename)
+					continue
 
-					if silent == False:
-						print('\r' + adjust_line_printout, ' Deleted file' * english + ' Poistin tiedoston' * finnish, '"' + str(filename) + '"', realtime)
+				files_queued_for_deletion.discard(filename)
+
+				if silent == False:
+					print('\r' + adjust_line_printout, ' Deleted file' * english + ' Poistin tiedoston' * finnish, '"' + str(filename) + '"', realtime)
 		except KeyboardInterrupt:
 			if silent == False:
 				print('\n\nUser cancelled operation.\n' * english + '\n\nKäyttäjä pysäytti ohjelman.\n' * finnish)
@@ -6250,6 +9113,9 @@ try:
 		#																						     #
 		######################################################################################################################################################################################
 		
+		paths_of_files_locked_by_samba = None # Full paths of files Samba has locked, read when the first file of this poll needs to be checked.
+		growing_files_changed_in_this_poll = set() # Names of growing files whose size or modification time changed since the previous poll.
+
 		for filename in new_hotfolder_filelist_dict:
 			
 			if filename in old_hotfolder_filelist_dict:
@@ -6267,17 +9133,23 @@ try:
 					# This is because the file has been sitting on the disk for some time, so it's name is in both 'old_hotfolder_filelist_dict' and 'new_hotfolder_filelist_dict'
 					# and the only way to get into processing is if it is only in 'new_hotfolder_filelist_dict' meaning it just appeared on the disk.
 					# Files removed from 'list_of_growing_files' are not touched anymore and get deleted when the expiry time comes.
-					list_of_growing_files.remove(filename)
+					del list_of_growing_files[filename]
 
 				if (filename in list_of_growing_files) and (new_filesize > 0): # If file is in the list of growing files, check if growing has stopped. If HotFolder is on a native windows network share and multiple files are transferred to the HotFolder at the same time, the files get a initial file size of zero, until the file actually gets transferred. Checking for zero file size prevents trying to process the file prematurely.
 
 					if (new_filesize != old_filesize) or (new_modification_time != old_modification_time): # If file size or modification time has changed print message to user about waiting for file transfer to finish.
 						# Store the last time the file size or timestamp were updated.
-						file_last_update_time = int(time.time()) 
+						file_last_update_time = time.time()
+						growing_files_changed_in_this_poll.add(filename)
 
 						if silent == False:
 							print('\r' + adjust_line_printout, ' Waiting for file transfer to end' * english + ' Odotan tiedostosiirron valmistumista' * finnish, end='')
 
+					elif time.time() - file_last_update_time < get_stability_window_of_a_growing_file(filename):
+						# File has not changed since the last poll, but it has not stayed unchanged for the whole stability window yet.
+						# The HotFolder is read again when the stability window has passed.
+						pass
+
 					else:
 						#######################################################################################################
 						# Filesize has not changed since last poll, the file is ready to be inspected.			      #
@@ -6300,11 +9172,19 @@ try:
 							we_have_true_read_access_to_the_file = False
 						
 						# Check if samba has a lock on the file, if it has then the file transfer is not ready yet.
+						# Locked files are read with smbstatus only once per HotFolder poll, when the first file needs to be checked.
 						if smbstatus_executable_found == True:
-							file_is_locked_by_samba = check_samba_file_locks(filename)
+							if paths_of_files_locked_by_samba == None:
+								paths_of_files_locked_by_samba = get_paths_of_files_locked_by_samba()
+
+							file_is_locked_by_samba = False
+
+							if os.path.realpath(hotfolder_path) + os.sep + filename in paths_of_files_locked_by_samba:
+								file_is_locked_by_samba = True
 
 							if file_is_locked_by_samba == True:
 								we_have_true_read_access_to_the_file = False
+								growing_files_written_through_samba.add(filename)
 								
 								# If file size and timestamp have not been updated in 5 minutes and samba still has a lock on the file, file transfer has failed. Inform the user about the error.
 								if (int(time.time()) >= file_last_update_time + 300) and (filename not in unsupported_ignored_files_dict):
@@ -6335,8 +9215,18 @@ try:
 							# Test if FFmpeg is installed.
 							if ffmpeg_executable_found == True:
 								
-								# Call a subroutine to inspect file with FFmpeg to get audio stream information.
-								ffmpeg_parsed_audio_stream_information, ffmpeg_error_message, send_ffmpeg_error_message_by_email = get_audio_stream_information_with_ffmpeg_and_create_extraction_parameters(filename, hotfolder_path, directory_for_temporary_files, ffmpeg_output_wrapper_format, english, finnish)
+								# Audio streams FFmpeg extracted from a file don't need to be probed again, FFmpeg already reported their information when the original file was probed.
+								# The information is used only if the file is still the same file that was extracted.
+								information_of_extracted_audio_stream = file_format_support_information_of_extracted_audio_streams_dict.pop(filename, [None, []])
+
+								if (information_of_extracted_audio_stream[0] != None) and (information_of_extracted_audio_stream[0] == get_identity_of_a_file(file_to_test)):
+									ffmpeg_parsed_audio_stream_information = information_of_extracted_audio_stream[1]
+									ffmpeg_error_message = ''
+									send_ffmpeg_error_message_by_email = False
+								else:
+									# Call a subroutine to inspect file with FFmpeg to get audio stream information.
+									ffmpeg_parsed_audio_stream_information, ffmpeg_error_message, send_ffmpeg_error_message_by_email = get_audio_stream_information_with_ffmpeg_and_create_extraction_parameters(filename, hotfolder_path, directory_for_temporary_files, ffmpeg_output_wrapper_format, english, finnish)
+
 								# Assign audio stream information to variables.
 								natively_supported_file_format, ffmpeg_supported_fileformat, number_of_ffmpeg_supported_audiostreams, details_of_ffmpeg_supported_audiostreams, time_slice_duration_string, audio_duration_rounded_to_seconds, ffmpeg_commandline, target_filenames, mxf_audio_remixing, filenames_and_channel_counts_for_mxf_audio_remixing, audio_remix_channel_map, number_of_unsupported_streams_in_file = ffmpeg_parsed_audio_stream_information
 							else:
@@ -6480,10 +9370,26 @@ try:
 							# If ffmpeg found audiostreams in the file, queue it for loudness calculation and print message to user.
 							if filename not in unsupported_ignored_files_dict:
 								file_format_support_information = [natively_supported_file_format, ffmpeg_supported_fileformat, number_of_ffmpeg_supported_audiostreams, details_of_ffmpeg_supported_audiostreams, time_slice_duration_string, audio_duration_rounded_to_seconds, ffmpeg_commandline, target_filenames, mxf_audio_remixing, filenames_and_channel_counts_for_mxf_audio_remixing, audio_remix_channel_map, number_of_unsupported_streams_in_file]
-								files_queued_to_loudness_calculation.append(filename)
+								files_queued_to_loudness_calculation[filename] = True
+								time_file_was_queued_dict[filename] = time.time()
+								file_processing_cost_estimates_dict[filename] = estimate_processing_cost_of_a_file(file_format_support_information)
 								if silent == False:
 									print('\r' + adjust_line_printout, '"' + str(filename) + '"', 'is in the job queue as number' * english + 'on laskentajonossa numerolla' * finnish, len(files_queued_to_loudness_calculation))
-							list_of_growing_files.remove(filename) # File has been queued for loudness calculation, or it is unsupported, in both cases we need to remove it from the list of growing files.
+
+								# Record how long the file spent in the list of growing files.
+								time_file_spent_growing = time.time() - time_file_was_first_seen
+								growing_file_statistics['files_stopped_growing'] = growing_file_statistics['files_stopped_growing'] + 1
+								growing_file_statistics['total_time_growing'] = growing_file_statistics['total_time_growing'] + time_file_spent_growing
+								growing_file_statistics['latest_time_growing'] = time_file_spent_growing
+
+								if time_file_spent_growing > growing_file_statistics['longest_time_growing']:
+									growing_file_statistics['longest_time_growing'] = time_file_spent_growing
+
+								if (debug_file_processing == True) and (filename in debug_temporary_dict_for_all_file_processing_information):
+									debug_temporary_dict_for_all_file_processing_information[filename].append('Time Spent Growing')
+									debug_temporary_dict_for_all_file_processing_information[filename].append(str(round(time_file_spent_growing, 3)))
+
+							del list_of_growing_files[filename] # File has been queued for loudness calculation, or it is unsupported, in both cases we need to remove it from the list of growing files.
 
 				# Save information about the file in a dictionary:
 				# filename, file size, time file was first seen in HotFolder, latest modification time, file format wav / flac / ogg, if format is supported by ffmpeg (True/False), number of audio streams found, information ffmpeg printed about the audio streams, the last time the file size changed.
@@ -6491,87 +9397,271 @@ try:
 			else:
 				# If we get here the file was not there in the directory poll before this one. We need to wait for another poll to see if the file is still growing. Add file name to the list of growing files.
 				if (filename not in files_queued_to_loudness_calculation) and (filename not in loudness_calculation_queue): # This line prevents LoudnessCorrection.py from crashing if the user repeatedly copies and deletes the same file from the HotFolder. Filenames already in the processing queue can not enter again.
-					list_of_growing_files.append(filename)
+					list_of_growing_files[filename] = True
+
+					# Files Samba is writing use the longer stability window of network files. Locked files are read with smbstatus only once per HotFolder poll.
+					if smbstatus_executable_found == True:
+						if paths_of_files_locked_by_samba == None:
+							paths_of_files_locked_by_samba = get_paths_of_files_locked_by_samba()
+
+						if os.path.realpath(hotfolder_path) + os.sep + filename in paths_of_files_locked_by_samba:
+							growing_files_written_through_samba.add(filename)
 
 		# Save latest directory poll information for the next round.
 		old_hotfolder_filelist_dict = new_hotfolder_filelist_dict
 		new_hotfolder_filelist_dict = {}
 
+		# If inotify has reported that a new file has already been closed after writing or moved to the HotFolder, the file transfer is ready.
+		# Read the HotFolder again immediately, so that the file does not need to wait for the next poll before it is queued for processing.
+		for filename in list_of_growing_files:
+			if filename in files_reported_ready_by_inotify:
+				files_reported_ready_by_inotify.discard(filename)
+				growing_files_closed_after_writing.add(filename)
+				main_loop_wake_up_queue.put('hotfolder_changed')
+
+		# Names of files that are not in the HotFolder anymore are not needed.
+		for filename in list(files_reported_ready_by_inotify):
+			if filename not in old_hotfolder_filelist_dict:
+				files_reported_ready_by_inotify.discard(filename)
+
+		# Names of files that are not growing anymore are not needed.
+		for filename in list(growing_files_closed_after_writing):
+			if filename not in list_of_growing_files:
+				growing_files_closed_after_writing.discard(filename)
+
+		for filename in list(growing_files_written_through_samba):
+			if filename not in list_of_growing_files:
+				growing_files_written_through_samba.discard(filename)
+
+		# When HotFolder is watched with inotify and there are no files being transferred or processed, inotify wakes us up when files arrive, so the HotFolder can be polled less often.
+		current_delay_between_directory_reads = delay_between_directory_reads
+
+		if (inotify_file_descriptor >= 0) and (len(list_of_growing_files) == 0) and (len(files_queued_to_loudness_calculation) == 0) and (len(loudness_calculation_queue) == 0):
+			current_delay_between_directory_reads = max(delay_between_directory_reads, delay_between_directory_reads_when_idle)
+
+		# If the stability window of a growing file ends before the next HotFolder poll, read the HotFolder again when the window has passed. Don't poll more often than once a second.
+		# Files that just changed are still being written, they are checked again on the normal poll interval. Only new files and files that stayed unchanged since the previous poll shorten the delay.
+		for filename in list_of_growing_files:
+			if (filename in old_hotfolder_filelist_dict) and (filename not in growing_files_changed_in_this_poll):
+				file_last_update_time = old_hotfolder_filelist_dict[filename][4]
+				seconds_until_stability_window_ends = get_stability_window_of_a_growing_file(filename) - (time.time() - file_last_update_time)
+				current_delay_between_directory_reads = min(current_delay_between_directory_reads, max(1, seconds_until_stability_window_ends))
+
 		##########################################################################
 		# Start loudness calculation or ffmpeg decompression in separate threads #
 		##########################################################################
-		# One round of the following while - loop takes approximately 1 second to complete, the number stored in 'delay_between_directory_reads' determines how many times this loop is performed before exiting the while - loop and polling the HotFolder again.
-		while loop_counter < delay_between_directory_reads:
-			
-			# Check if there are less processing threads going on than allowed, if true start some more.
-			if (len(loudness_calculation_queue) * 2) < number_of_processor_cores:
+		# The main thread does not poll for finished jobs anymore. Every thread that processes a file puts a message to 'main_loop_wake_up_queue' when it finishes and the inotify thread does the same when files in the HotFolder change.
+		# The loop below sleeps waiting for these messages, so new jobs are started as soon as processor cores become free and the HotFolder is read again when the time between directory polls has expired.
+		time_of_last_directory_read = time.time()
+		hotfolder_was_read_since_last_queue_check = True
+
+		# Record how long reading the HotFolder and updating the bookkeeping of files took. The time per thousand files shows if the poll time grows faster than the number of files.
+		time_poll_took = time_of_last_directory_read - time_poll_started
+		hotfolder_poll_statistics['number_of_polls'] = hotfolder_poll_statistics['number_of_polls'] + 1
+		hotfolder_poll_statistics['number_of_files_in_latest_poll'] = len(set_of_files_in_hotfolder)
+		hotfolder_poll_statistics['latest_poll_time'] = time_poll_took
+
+		if time_poll_took > hotfolder_poll_statistics['longest_poll_time']:
+			hotfolder_poll_statistics['longest_poll_time'] = time_poll_took
+
+		if len(set_of_files_in_hotfolder) > 0:
+			hotfolder_poll_statistics['poll_time_per_thousand_files'] = time_poll_took * 1000 / len(set_of_files_in_hotfolder)
+
+		while True:
+
+			# Queue audio streams extracted with FFmpeg for loudness calculation. Information about the files is already known, so they don't need to wait for the HotFolder polls that check that a file has stopped growing.
+			# The file is added to 'old_hotfolder_filelist_dict' so that the next HotFolder poll sees it as a file that is already known and does not queue it again.
+			while True:
+				try:
+					filename, file_format_support_information, original_file_name = extracted_audio_streams_ready_for_processing_queue.get_nowait()
+				except queue.Empty:
+					break
+
+				if (filename in files_queued_to_loudness_calculation) or (filename in loudness_calculation_queue) or (filename in files_queued_for_deletion):
+					continue
+
+				try:
+					file_metadata = os.lstat(hotfolder_path + os.sep + filename) # Get file information (size, date, etc)
+				except IOError:
+					continue # User has deleted the file.
+				except OSError:
+					continue
+
+				if filename in list_of_growing_files:
+					del list_of_growing_files[filename]
+
+				time_file_was_first_seen = int(time.time())
 
-				# If user has deleted a file from HotFolder that was already queued for loudness calculation, remove it's name from the queue.
-				copy_of_files_queued_to_loudness_calculation = copy.deepcopy(files_queued_to_loudness_calculation)
+				if filename in old_hotfolder_filelist_dict:
+					time_file_was_first_seen = old_hotfolder_filelist_dict[filename][1]
+
+				old_hotfolder_filelist_dict[filename] = [file_metadata.st_size, time_file_was_first_seen, file_metadata.st_mtime, file_format_support_information, time.time()]
+
+				# Save some debug information.
+				if debug_file_processing == True:
+					debug_temporary_dict_for_all_file_processing_information[filename] = ['Message', 'File was queued directly after it was extracted from file: ' + original_file_name]
+
+				files_queued_to_loudness_calculation[filename] = True
+				time_file_was_queued_dict[filename] = time.time()
+				file_processing_cost_estimates_dict[filename] = estimate_processing_cost_of_a_file(file_format_support_information)
+
+				if silent == False:
+					print('\r' + adjust_line_printout, '"' + str(filename) + '"', 'is in the job queue as number' * english + 'on laskentajonossa numerolla' * finnish, len(files_queued_to_loudness_calculation))
+			
+			# If user has deleted a file from HotFolder that was already queued for loudness calculation, remove it's name from the queue.
+			# Files only disappear from 'old_hotfolder_filelist_dict' when the HotFolder is read, so the queue needs to be checked only once after each directory read.
+			if hotfolder_was_read_since_last_queue_check == True:
+				hotfolder_was_read_since_last_queue_check = False
 
-				for removed_file in copy_of_files_queued_to_loudness_calculation:
+				for removed_file in list(files_queued_to_loudness_calculation):
 					if removed_file not in old_hotfolder_filelist_dict:
-						files_queued_to_loudness_calculation.remove(removed_file)
+						del files_queued_to_loudness_calculation[removed_file]
+
+						if removed_file in time_file_was_queued_dict:
+							del time_file_was_queued_dict[removed_file]
+						if removed_file in number_of_times_file_was_passed_in_queue_dict:
+							del number_of_times_file_was_passed_in_queue_dict[removed_file]
+						if removed_file in file_processing_cost_estimates_dict:
+							del file_processing_cost_estimates_dict[removed_file]
+						if removed_file in loudness_measured_during_audio_stream_extraction_dict:
+							del loudness_measured_during_audio_stream_extraction_dict[removed_file]
+
+			# Put files waiting in the queue in the order selected by the queue policy.
+			if (queue_policy != 'fifo') and (len(files_queued_to_loudness_calculation) > 1):
+				files_queued_to_loudness_calculation = sort_files_queued_to_loudness_calculation(files_queued_to_loudness_calculation, time_file_was_queued_dict, old_hotfolder_filelist_dict)
+
+			# Start processing files waiting in the queue as long as their estimated processing cost fits in the processor cores, memory and temporary disk space left free by files already being processed.
+			# If the first file in the queue does not fit in the free resources, a smaller file further back in the queue is started, so that all processor cores are kept busy.
+			# Smaller files could then keep the first file waiting forever. When the first file has been passed 'queue_maximum_times_passed' times or it has waited longer than 'queue_aging_time', no other file is started before it.
+			while len(files_queued_to_loudness_calculation) > 0:
+
+				filename = ''
+				first_file_in_queue = next(iter(files_queued_to_loudness_calculation))
+				resources_are_reserved_for_the_first_file = False
+
+				if (number_of_times_file_was_passed_in_queue_dict.get(first_file_in_queue, 0) >= queue_maximum_times_passed) or (time.time() - time_file_was_queued_dict.get(first_file_in_queue, time.time()) > queue_aging_time):
+					resources_are_reserved_for_the_first_file = True
+
+				for queued_file in files_queued_to_loudness_calculation:
+
+					if queued_file not in file_processing_cost_estimates_dict:
+						file_processing_cost_estimates_dict[queued_file] = estimate_processing_cost_of_a_file(old_hotfolder_filelist_dict[queued_file][3])
+
+					if processing_cost_fits_in_the_budget(file_processing_cost_estimates_dict[queued_file], processing_costs_of_running_jobs_dict) == True:
+						filename = queued_file
+						break
+
+					if resources_are_reserved_for_the_first_file == True:
+						break
+
+				# Stop when there are no free resources for any of the files in the queue.
+				if filename == '':
+					break
+
+				if filename != first_file_in_queue:
+					number_of_times_file_was_passed_in_queue_dict[first_file_in_queue] = number_of_times_file_was_passed_in_queue_dict.get(first_file_in_queue, 0) + 1
+
+				if filename in number_of_times_file_was_passed_in_queue_dict:
+					del number_of_times_file_was_passed_in_queue_dict[filename]
+
+				# Record how long the file waited in the queue before processing started.
+				if filename in time_file_was_queued_dict:
+					time_file_waited_in_queue = time.time() - time_file_was_queued_dict.pop(filename)
+					job_dispatch_wait_statistics['jobs_dispatched'] = job_dispatch_wait_statistics['jobs_dispatched'] + 1
+					job_dispatch_wait_statistics['total_wait_time'] = job_dispatch_wait_statistics['total_wait_time'] + time_file_waited_in_queue
+					job_dispatch_wait_statistics['latest_wait_time'] = time_file_waited_in_queue
+
+					if time_file_waited_in_queue > job_dispatch_wait_statistics['longest_wait_time']:
+						job_dispatch_wait_statistics['longest_wait_time'] = time_file_waited_in_queue
+
+					if (debug_file_processing == True) and (filename in debug_temporary_dict_for_all_file_processing_information):
+						debug_temporary_dict_for_all_file_processing_information[filename].append('Dispatch Wait Time')
+						debug_temporary_dict_for_all_file_processing_information[filename].append(str(round(time_file_waited_in_queue, 3)))
+
+				file_format_support_information = old_hotfolder_filelist_dict[filename][3] # The information about the file format is stored in a list in the dictionary, get it and store in a list.
+				natively_supported_file_format, ffmpeg_supported_fileformat, number_of_ffmpeg_supported_audiostreams, details_of_ffmpeg_supported_audiostreams, time_slice_duration_string, audio_duration_rounded_to_seconds, ffmpeg_commandline, target_filenames, mxf_audio_remixing, filenames_and_channel_counts_for_mxf_audio_remixing, audio_remix_channel_map, number_of_unsupported_streams_in_file = file_format_support_information # Save file format information to separate variables.
+
+				# Calculate the number of time slices we expect to get from loudness calculation.
+				expected_number_of_time_slices = int(audio_duration_rounded_to_seconds / float(time_slice_duration_string)) 
+
+				# Get the size of file, we check this once again after loudness calculation to make sure the calculation did not start too early.
+				expected_file_size = old_hotfolder_filelist_dict[filename][0]
+				
+				realtime = get_realtime(english, finnish)[1].replace('_', ' ')
 				
-				if len(files_queued_to_loudness_calculation) > 0: # Check if there are files queued for processing waiting in the queue.
-					filename = files_queued_to_loudness_calculation[0] # Get the first filename from the queue and put it in a variable.
-					file_format_support_information = old_hotfolder_filelist_dict[filename][3] # The information about the file format is stored in a list in the dictionary, get it and store in a list.
-					natively_supported_file_format, ffmpeg_supported_fileformat, number_of_ffmpeg_supported_audiostreams, details_of_ffmpeg_supported_audiostreams, time_slice_duration_string, audio_duration_rounded_to_seconds, ffmpeg_commandline, target_filenames, mxf_audio_remixing, filenames_and_channel_counts_for_mxf_audio_remixing, audio_remix_channel_map, number_of_unsupported_streams_in_file = file_format_support_information # Save file format information to separate variables.
+				# If audio fileformat is natively supported by libebur128 and sox and has only one audio stream, we don't need to do extraction and flac conversion with ffmpeg, just start two loudness calculation processes for the file.
+				if (number_of_ffmpeg_supported_audiostreams == 1) and (natively_supported_file_format == True):
+					# Start simultaneously two threads to calculate file loudness. The first one calculates loudness by dividing the file in time slices and calculating the loudness of each slice individually. The second process calculates integrated loudness and loudness range of the file as a whole.
+					# Both processes can be done in almost the same time as one, since the first process reads the file in to os file cache, so the second process doesn't need to read the disk at all. Reading from cache is much much faster than reading from disk.
+					if silent == False:
+						print ('\r' + 'File' * english + 'Tiedoston' * finnish, '"' + filename + '"' + ' processing started ' * english + ' käsittely	alkoi  ' * finnish, realtime)
+					
+					# Create events for both processes. When the process is ready it sets event = set, so that we know in the main thread that we can start more processes.
+					event_for_timeslice_loudness_calculation = threading.Event() # Create a unique event for the process. This event is used to signal other threads that this process has finished.
+					event_for_integrated_loudness_calculation = threading.Event() # Create a unique event for the process. This event is used to signal other threads that this process has finished.
+					
+					# Add file name and both the calculation process events to the dictionary of files that are currently being calculated upon.
+					loudness_calculation_queue[filename] = [event_for_timeslice_loudness_calculation, event_for_integrated_loudness_calculation]
+
+					# Create commands for both libebur128 loudness calculation processes.
+					libebur128_commands_for_time_slice_calculation=[libebur128_path, 'dump', '-s', time_slice_duration_string] # Put libebur128 commands in a list.
+					libebur128_commands_for_integrated_loudness_calculation=[libebur128_path, 'scan', '-l', peak_measurement_method] # Put libebur128 commands in a list.
+
+					if run_file_processing_in_worker_processes == True:
+						# Process the file in a worker process. The worker process creates it's own events, the thread waiting for the worker process puts the results to 'worker_process_results_queue' and the main thread sets both events when it reads the results.
+						if (measure_loudness_in_a_single_pass == True) or (use_numpy_for_loudness_measurement == True):
+							job_name = 'calculate_loudness_in_a_single_pass'
+							job_arguments = [(filename, hotfolder_path, directory_for_temporary_files, directory_for_results, english, finnish, time_slice_duration_string, expected_number_of_time_slices, expected_file_size), ()]
+						else:
+							job_name = 'calculate_loudness_with_libebur128'
+							job_arguments = [(filename, hotfolder_path, libebur128_commands_for_time_slice_calculation, directory_for_temporary_files, directory_for_results, english, finnish, expected_number_of_time_slices, expected_file_size), (filename, hotfolder_path, libebur128_commands_for_integrated_loudness_calculation, english, finnish)]
 
-					# Calculate the number of time slices we expect to get from loudness calculation.
-					expected_number_of_time_slices = int(audio_duration_rounded_to_seconds / float(time_slice_duration_string)) 
+						process_1 = threading.Thread(target=run_job_and_wake_up_main_thread, args=(send_file_to_worker_process, (filename, job_name, job_arguments))) # Create a process instance.
+						thread_object = process_1.start() # Start the process in it'own thread.
 
-					# Get the size of file, we check this once again after loudness calculation to make sure the calculation did not start too early.
-					expected_file_size = old_hotfolder_filelist_dict[filename][0]
+					else:
+						if (measure_loudness_in_a_single_pass == True) or (use_numpy_for_loudness_measurement == True):
+							# Decode the file only once and calculate all loudness results in one thread. The thread sets both events.
+							list_of_loudness_calculation_jobs = [[calculate_loudness_in_a_single_pass, (filename, hotfolder_path, directory_for_temporary_files, directory_for_results, english, finnish, time_slice_duration_string, expected_number_of_time_slices, expected_file_size, event_for_timeslice_loudness_calculation, event_for_integrated_loudness_calculation)]]
+						else:
+							# Calculate integrated loudness and time slices in two threads, the integrated loudness thread is started first.
+							list_of_loudness_calculation_jobs = [[calculate_integrated_loudness, (event_for_integrated_loudness_calculation, filename, hotfolder_path, libebur128_commands_for_integrated_loudness_calculation, english, finnish)]]
+							list_of_loudness_calculation_jobs.append([calculate_loudness_timeslices, (filename, hotfolder_path, libebur128_commands_for_time_slice_calculation, directory_for_temporary_files, directory_for_results, english, finnish, expected_number_of_time_slices, expected_file_size, event_for_timeslice_loudness_calculation, event_for_integrated_loudness_calculation)])
+
+						if result_cache_size > 0:
+							# If an identical file has already been processed with the same settings, it's results are reused and loudness is not calculated.
+							process_1 = threading.Thread(target=run_job_and_wake_up_main_thread, args=(use_result_cache_or_calculate_loudness, (filename, hotfolder_path, directory_for_temporary_files, directory_for_results, english, finnish, time_slice_duration_string, event_for_timeslice_loudness_calculation, event_for_integrated_loudness_calculation, list_of_loudness_calculation_jobs))) # Create a process instance.
+							thread_object = process_1.start() # Start the calculation process in it's own thread.
+						else:
+							for job_subroutine, job_arguments in list_of_loudness_calculation_jobs:
+								process_1 = threading.Thread(target=run_job_and_wake_up_main_thread, args=(job_subroutine, job_arguments)) # Create a process instance.
+								thread_object = process_1.start() # Start the calculation process in it's own thread.
 					
-					realtime = get_realtime(english, finnish)[1].replace('_', ' ')
+				else:
 					
-					# If audio fileformat is natively supported by libebur128 and sox and has only one audio stream, we don't need to do extraction and flac conversion with ffmpeg, just start two loudness calculation processes for the file.
-					if (number_of_ffmpeg_supported_audiostreams == 1) and (natively_supported_file_format == True):
-						# Start simultaneously two threads to calculate file loudness. The first one calculates loudness by dividing the file in time slices and calculating the loudness of each slice individually. The second process calculates integrated loudness and loudness range of the file as a whole.
-						# Both processes can be done in almost the same time as one, since the first process reads the file in to os file cache, so the second process doesn't need to read the disk at all. Reading from cache is much much faster than reading from disk.
+					# Fileformat is not natively supported by libebur128 and sox, or it has more than one audio streams.
+					# Start a process that extracts all audio streams from the file and converts them to wav or flac and moves resulting files back to the HotFolder for loudness calculation.
+					if ffmpeg_supported_fileformat == True:
+
 						if silent == False:
-							print ('\r' + 'File' * english + 'Tiedoston' * finnish, '"' + filename + '"' + ' processing started ' * english + ' käsittely	alkoi  ' * finnish, realtime)
-						
-						# Create commands for both loudness calculation processes.
-						libebur128_commands_for_time_slice_calculation=[libebur128_path, 'dump', '-s', time_slice_duration_string] # Put libebur128 commands in a list.
-						libebur128_commands_for_integrated_loudness_calculation=[libebur128_path, 'scan', '-l', peak_measurement_method] # Put libebur128 commands in a list.
-						
-						# Create events for both processes. When the process is ready it sets event = set, so that we know in the main thread that we can start more processes.
-						event_for_timeslice_loudness_calculation = threading.Event() # Create a unique event for the process. This event is used to signal other threads that this process has finished.
-						event_for_integrated_loudness_calculation = threading.Event() # Create a unique event for the process. This event is used to signal other threads that this process has finished.
-						
-						# Add file name and both the calculation process events to the dictionary of files that are currently being calculated upon.
-						loudness_calculation_queue[filename] = [event_for_timeslice_loudness_calculation, event_for_integrated_loudness_calculation]
-						# Create threads for both processes, the threads are not started yet.
-						process_1 = threading.Thread(target=calculate_loudness_timeslices, args=(filename, hotfolder_path, libebur128_commands_for_time_slice_calculation, directory_for_temporary_files, directory_for_results, english, finnish, expected_number_of_time_slices, expected_file_size, event_for_timeslice_loudness_calculation, event_for_integrated_loudness_calculation)) # Create a process instance.
-						process_2 = threading.Thread(target=calculate_integrated_loudness, args=(event_for_integrated_loudness_calculation, filename, hotfolder_path, libebur128_commands_for_integrated_loudness_calculation, english, finnish)) # Create a process instance.
-						
-						# Start both calculation threads.
-						thread_object = process_2.start() # Start the calculation process in it's own thread.
-						thread_object = process_1.start() # Start the calculation process in it's own thread.
-						
-					else:
+							print ('\r' + 'File' * english + 'Tiedoston' * finnish, '"' + filename + '"' + ' conversion started ' * english + '  muunnos	alkoi  ' * finnish, realtime)
+							print('\r' + adjust_line_printout, ' Extracting' * english + ' Puran' * finnish, str(number_of_ffmpeg_supported_audiostreams), 'audio streams from file' * english + 'miksausta tiedostosta' * finnish, filename)
+							
+							for counter in range(0, number_of_ffmpeg_supported_audiostreams): # Print information about all the audio streams we are going to extract.
+								print('\r' + adjust_line_printout, ' ' + details_of_ffmpeg_supported_audiostreams[counter][0])
 						
-						# Fileformat is not natively supported by libebur128 and sox, or it has more than one audio streams.
-						# Start a process that extracts all audio streams from the file and converts them to wav or flac and moves resulting files back to the HotFolder for loudness calculation.
-						if ffmpeg_supported_fileformat == True:
+						event_1_for_ffmpeg_audiostream_conversion = threading.Event() # Create events for the process. The events are being used to signal other threads that this process has finished. 
+						event_2_for_ffmpeg_audiostream_conversion = event_1_for_ffmpeg_audiostream_conversion 
+						process_3 = threading.Thread(target=run_job_and_wake_up_main_thread, args=(decompress_audio_streams_with_ffmpeg, (event_1_for_ffmpeg_audiostream_conversion, event_2_for_ffmpeg_audiostream_conversion, filename, file_format_support_information, hotfolder_path, directory_for_temporary_files, english, finnish))) # Create a process instance.
+						thread_object = process_3.start() # Start the process in it'own thread.
+						loudness_calculation_queue[filename] = [event_1_for_ffmpeg_audiostream_conversion, event_2_for_ffmpeg_audiostream_conversion] # Add file name and both process events to the dictionary of files that are currently being calculated upon.
 
-							if silent == False:
-								print ('\r' + 'File' * english + 'Tiedoston' * finnish, '"' + filename + '"' + ' conversion started ' * english + '  muunnos	alkoi  ' * finnish, realtime)
-								print('\r' + adjust_line_printout, ' Extracting' * english + ' Puran' * finnish, str(number_of_ffmpeg_supported_audiostreams), 'audio streams from file' * english + 'miksausta tiedostosta' * finnish, filename)
-								
-								for counter in range(0, number_of_ffmpeg_supported_audiostreams): # Print information about all the audio streams we are going to extract.
-									print('\r' + adjust_line_printout, ' ' + details_of_ffmpeg_supported_audiostreams[counter][0])
-							
-							event_1_for_ffmpeg_audiostream_conversion = threading.Event() # Create events for the process. The events are being used to signal other threads that this process has finished. 
-							event_2_for_ffmpeg_audiostream_conversion = event_1_for_ffmpeg_audiostream_conversion 
-							process_3 = threading.Thread(target = decompress_audio_streams_with_ffmpeg, args=(event_1_for_ffmpeg_audiostream_conversion, event_2_for_ffmpeg_audiostream_conversion, filename, file_format_support_information, hotfolder_path, directory_for_temporary_files, english, finnish)) # Create a process instance.
-							thread_object = process_3.start() # Start the process in it'own thread.
-							loudness_calculation_queue[filename] = [event_1_for_ffmpeg_audiostream_conversion, event_2_for_ffmpeg_audiostream_conversion] # Add file name and both process events to the dictionary of files that are currently being calculated upon.
+				# Remove the filename from the queue and reserve the resources it needs while it is being processed.
+				del files_queued_to_loudness_calculation[filename]
+				processing_cost = file_processing_cost_estimates_dict.pop(filename)
 
-					# Remove the filename from the queue.
-					files_queued_to_loudness_calculation.pop(0) 
+				if filename in loudness_calculation_queue:
+					processing_costs_of_running_jobs_dict[filename] = processing_cost
 
 			######################################################################################
 			# Tell user how many files are being processed and how many are waiting in the queue #
@@ -6584,6 +9674,97 @@ try:
 				previous_value_of_files_queued_to_loudness_calculation = len(files_queued_to_loudness_calculation)
 				previous_value_of_loudness_calculation_queue = len(loudness_calculation_queue)
 
+			#######################################################
+			# Read results of files processed in worker processes #
+			#######################################################
+
+			while True:
+				try:
+					filename, results_from_worker_process = worker_process_results_queue.get_nowait()
+				except queue.Empty:
+					break
+
+				# The worker process died while processing the file. Queue the file again at the head of the queue, it is then processed in the new pool of worker processes.
+				# If worker processes have died too many times while processing the file or it has vanished from the HotFolder, create an error graphics file for it instead.
+				if results_from_worker_process.get('worker_process_failed') == True:
+
+					# Start a new pool of worker processes in place of the broken one. All files that were being processed in the broken pool fail, the pool is started again only once for them.
+					# Other threads are running now, so the worker processes are copies of a process with several threads. The worker processes don't use the threads of the main process and
+					# the initializer of the worker processes replaces the queue of gnuplot processes shared with the threads.
+					if worker_process_pool_is_broken == True:
+						worker_process_pool_is_broken = False
+						file_processing_worker_process_pool.shutdown(wait=False)
+
+						# If new worker processes can not be started, process the next files in threads of the main process.
+						try:
+							file_processing_worker_process_pool = create_file_processing_worker_process_pool()
+						except OSError as reason_for_error:
+							run_file_processing_in_worker_processes = False
+							error_message = 'Error starting worker processes, processing files in threads from now on: ' * english + 'Aliprosessien käynnistäminen epäonnistui, tiedostot käsitellään jatkossa säikeissä: ' * finnish + str(reason_for_error)
+							send_error_messages_to_screen_logfile_email(error_message, [])
+
+					number_of_worker_process_failures_of_files_dict[filename] = number_of_worker_process_failures_of_files_dict.get(filename, 0) + 1
+
+					if (number_of_worker_process_failures_of_files_dict[filename] < maximum_number_of_worker_process_failures_for_a_file) and (filename in old_hotfolder_filelist_dict):
+
+						if filename in loudness_calculation_queue:
+							del loudness_calculation_queue[filename]
+						if filename in processing_costs_of_running_jobs_dict:
+							del processing_costs_of_running_jobs_dict[filename]
+
+						files_queued_to_loudness_calculation[filename] = True
+						files_queued_to_loudness_calculation.move_to_end(filename, last=False)
+						time_file_was_queued_dict[filename] = time.time()
+						file_processing_cost_estimates_dict[filename] = estimate_processing_cost_of_a_file(old_hotfolder_filelist_dict[filename][3])
+						main_loop_wake_up_queue.put('job_finished') # Wake up the main loop again so that the file is started without waiting for the next message.
+						continue
+
+					error_message = results_from_worker_process['error_message']
+					create_gnuplot_commands_for_error_message(error_message, filename, directory_for_temporary_files, directory_for_results, english, finnish)
+
+					if write_loudness_calculation_results_to_a_machine_readable_file == True:
+
+						error_code = 100
+
+						# Write results to the machine readable results file.
+						write_loudness_results_and_file_info_to_a_machine_readable_file(filename, [[0, 0, 0, create_loudness_corrected_files, 0, 0, 0, 0, 0, 0, 0, 0, error_code, error_message, []]])
+
+				# Store the information the processing stages created in the worker process to the dictionaries of the main process.
+				if results_from_worker_process.get('temp_loudness_results_for_automation') != None:
+					temp_loudness_results_for_automation[filename] = results_from_worker_process['temp_loudness_results_for_automation']
+
+				if debug_file_processing == True:
+					debug_temporary_dict_for_all_file_processing_information[filename] = results_from_worker_process.get('debug_temporary_dict_for_all_file_processing_information') or []
+					debug_temporary_dict_for_timeslice_calculation_information[filename] = results_from_worker_process.get('debug_temporary_dict_for_timeslice_calculation_information') or []
+					debug_temporary_dict_for_integrated_loudness_calculation_information[filename] = results_from_worker_process.get('debug_temporary_dict_for_integrated_loudness_calculation_information') or []
+
+				error_messages_to_email_later_list.extend(results_from_worker_process.get('error_messages_to_email_later_list', []))
+
+				if results_from_worker_process.get('critical_python_error_has_happened') == True:
+					critical_python_error_has_happened = True
+
+				# Processing of the file is ready, set both events so that the file is handled below like files processed in threads.
+				if filename in number_of_worker_process_failures_of_files_dict:
+					del number_of_worker_process_failures_of_files_dict[filename]
+
+				if filename in loudness_calculation_queue:
+					event_for_process_1, event_for_process_2 = loudness_calculation_queue[filename]
+					event_for_process_1.set()
+					event_for_process_2.set()
+
+			# Audio streams measured without writing them to files never go through the HotFolder. Their calculation is already finished, add them to the files being calculated upon so that they are handled below like all finished files.
+			while True:
+				try:
+					filename, event_for_process_1, event_for_process_2, original_file_name = audio_streams_measured_without_a_file_queue.get_nowait()
+				except queue.Empty:
+					break
+
+				loudness_calculation_queue[filename] = [event_for_process_1, event_for_process_2]
+
+				# Save some debug information.
+				if debug_file_processing == True:
+					debug_temporary_dict_for_all_file_processing_information[filename] = ['Message', 'Audio stream was measured without writing it to a file while it was extracted from file: ' + original_file_name]
+
 			###################################
 			# Find threads that have finished #
 			###################################
@@ -6681,6 +9862,9 @@ try:
 				realtime = get_realtime(english, finnish)[1].replace('_', ' ')
 				del loudness_calculation_queue[filename] # Remove file name from the list of files currently being calculated upon.
 
+				if filename in processing_costs_of_running_jobs_dict:
+					del processing_costs_of_running_jobs_dict[filename]
+
 				# Add filename at the beginning of the list of completed files, but if the user has dropped the same file in HotFolder before, then first remove the name from list. This moves the name to the top of the completed files list.
 				if filename in completed_files_list:
 					completed_files_list.remove(filename)
@@ -6697,20 +9881,37 @@ try:
 					filename_to_remove = completed_files_list.pop()
 					del completed_files_dict[filename_to_remove]
 
-			# Wait one second before checking if processor cores have become free and more calculation processes can be started.
-			time.sleep(1)
-			loop_counter = loop_counter + 1
+			# Sleep until a job finishes, inotify reports a change in the HotFolder or it is time to read the HotFolder again.
+			seconds_until_next_directory_read = current_delay_between_directory_reads - (time.time() - time_of_last_directory_read)
+
+			if seconds_until_next_directory_read <= 0:
+				break
+
+			try:
+				wake_up_reason = main_loop_wake_up_queue.get(timeout = seconds_until_next_directory_read)
+			except queue.Empty:
+				break
+
+			if wake_up_reason == 'hotfolder_changed':
+
+				# Remove other messages from the queue, the HotFolder is read now and finished jobs are checked after that anyway.
+				try:
+					while True:
+						main_loop_wake_up_queue.get_nowait()
+				except queue.Empty:
+					pass
+
+				break
 
-		# Check if the time between directory polls has expired and a new poll needs to be made. One advacement of the counter is approximately one second. Default time between directory polls is 5 seconds.
-		if loop_counter >= delay_between_directory_reads:
-			loop_counter = 0
+		# The time between directory polls has expired or inotify reported a change in the HotFolder and a new poll needs to be made. Default time between directory polls is 5 seconds.
+		seconds_since_last_directory_read = time.time() - time_of_last_directory_read
 
 		# If user gave the option '-force-quit-when-idle' on the commandline, then we are part of a multi cycle regession test and need to exit when test files have been processed so that the next test can run.
 		if force_quit_when_idle == True:
 
 			if len(loudness_calculation_queue) == 0:
 
-				quit_counter = quit_counter + delay_between_directory_reads
+				quit_counter = quit_counter + seconds_since_last_directory_read
 
 			else:
 				quit_counter = 0